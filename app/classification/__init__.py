@@ -4,8 +4,9 @@ Subpaquete de clasificación automática de centros gestores
 del requerimiento.
 
 Estrategia: híbrido **reglas léxicas + embeddings multilingües**
-(`sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2`).
+(`sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2`), con backend
+PyTorch u ONNX Runtime int8 (`CLASSIFIER_BACKEND`).
 """
 
-from .classifier import clasificar_centros_gestores  # noqa: F401
+from .classifier import clasificar_centros_gestores, clasificar_lote  # noqa: F401
 from .taxonomia import TAXONOMIA, RESPONSABLES_CONOCIDOS  # noqa: F401
@@ -16,20 +16,47 @@ Algoritmo:
 
 La función nunca lanza excepciones por fallas del modelo: degrada
 gracefully a reglas / a lista vacía.
+
+`clasificar_lote` aplica el mismo algoritmo a varios textos y agrupa la
+inferencia de embeddings de los que no resuelven por reglas en una sola
+llamada al modelo.
+
+Ambas funciones consultan primero una caché LRU + TTL (`memo.MemoTTL`)
+por hash del texto combinado normalizado, versión de la taxonomía y
+`top_k`. Los resultados degradados por una falla del modelo no se
+guardan. `recargar_taxonomia()` recompila reglas, descarta la matriz de
+embeddings, recalcula `RESPONSABLES_CONOCIDOS` y vacía la caché tras
+editar o reasignar `taxonomia.TAXONOMIA` en caliente (por eso aquí se lee
+siempre a través del módulo, nunca con `from .taxonomia import TAXONOMIA`).
+
+Variables de entorno de la caché:
+- `CLASSIFIER_MEMO_MAX`: entradas máximas (default 4096; 0 la desactiva).
+- `CLASSIFIER_MEMO_TTL_S`: vigencia de cada entrada (default 6 h).
 """
 
 from __future__ import annotations
 
+import copy
+import hashlib
 import os
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 from . import embeddings as _emb
-from .rules import aplicar_reglas
-from .taxonomia import TAXONOMIA, mapear_tipo_requerimiento_front
+from . import rules as _rules
+from .memo import MemoTTL
+from .rules import aplicar_reglas, normalizar
+from . import taxonomia as _taxonomia
+from .taxonomia import huella_taxonomia, mapear_tipo_requerimiento_front
 
 UMBRAL_REGLAS = int(os.getenv("CLASSIFIER_RULES_MIN_HITS", "1"))
 UMBRAL_EMBEDDINGS = float(os.getenv("CLASSIFIER_EMB_THRESHOLD", "0.45"))
 
+_MEMO = MemoTTL(
+    maxsize=int(os.getenv("CLASSIFIER_MEMO_MAX", "4096")),
+    ttl_s=float(os.getenv("CLASSIFIER_MEMO_TTL_S", str(6 * 3600))),
+)
+_VERSION_TAXONOMIA = huella_taxonomia()
+
 
 def _unir_textos(*textos: Optional[str]) -> str:
     """Concatena fragmentos no vacíos con separador ' . '."""
@@ -79,6 +106,149 @@ def _derivar_tipo_y_acciones(
     return {"tipo_requerimiento": tipo, "acciones_por_organismo": acciones}
 
 
+def _texto_combinado(
+    requerimiento: str,
+    tipo_requerimiento: Optional[str] = None,
+    observaciones: Optional[str] = None,
+    transcripciones: Optional[List[Dict]] = None,
+) -> str:
+    """Texto que se clasifica: requerimiento + contexto + transcripciones."""
+    transcripciones_txt = ""
+    if transcripciones:
+        try:
+            transcripciones_txt = " ".join(
+                (t.get("texto") or "") for t in transcripciones if isinstance(t, dict)
+            )
+        except Exception:
+            transcripciones_txt = ""
+
+    return _unir_textos(requerimiento, tipo_requerimiento, observaciones, transcripciones_txt)
+
+
+def _clasificar_por_reglas(texto: str, top_k: int) -> Optional[Dict]:
+    """Resultado por reglas léxicas, o None si ninguna fila alcanza el umbral."""
+    candidatos_reglas = aplicar_reglas(texto)
+    candidatos_validos = [c for c in candidatos_reglas if c["score"] >= UMBRAL_REGLAS]
+    if not candidatos_validos:
+        return None
+
+    top = candidatos_validos[:top_k]
+    max_score = max(c["score"] for c in top)
+    confianza = min(1.0, 0.5 + 0.15 * max_score)  # heurística simple
+    matches = [
+        {
+            "categoria": c["fila"]["categoria"],
+            "subcategoria": c["fila"]["subcategoria"],
+            "condicion": c["fila"]["condicion"],
+            "accion": c["fila"].get("accion", ""),
+            "responsables": c["fila"]["responsables"],
+            "score": c["score"],
+            "hits": c["hits"],
+        }
+        for c in top
+    ]
+    derivado = _derivar_tipo_y_acciones(matches, (c["fila"] for c in top))
+    return {
+        "centros_gestores": _responsables_unicos(c["fila"] for c in top),
+        "confianza": round(confianza, 3),
+        "metodo": "reglas",
+        "matches": matches,
+        "tipo_requerimiento": derivado["tipo_requerimiento"],
+        "acciones_por_organismo": derivado["acciones_por_organismo"],
+    }
+
+
+def _resultado_embeddings(sims: List[Tuple[int, float]], top_k: int) -> Optional[Dict]:
+    """Resultado a partir de similitudes ``(idx_fila, score)`` ordenadas
+    desc, o None si ninguna supera ``UMBRAL_EMBEDDINGS``."""
+    sims_validas = [(i, s) for i, s in sims if s >= UMBRAL_EMBEDDINGS][:top_k]
+    if not sims_validas:
+        return None
+
+    taxonomia = _taxonomia.TAXONOMIA
+    filas = [taxonomia[i] for i, _ in sims_validas]
+    matches = [
+        {
+            "categoria": fila["categoria"],
+            "subcategoria": fila["subcategoria"],
+            "condicion": fila["condicion"],
+            "accion": fila.get("accion", ""),
+            "responsables": fila["responsables"],
+            "score": round(s, 3),
+            "hits": [],
+        }
+        for fila, (_, s) in zip(filas, sims_validas)
+    ]
+    max_sim = sims_validas[0][1]
+    derivado = _derivar_tipo_y_acciones(matches, filas)
+    return {
+        "centros_gestores": _responsables_unicos(filas),
+        "confianza": round(float(max_sim), 3),
+        "metodo": "embeddings",
+        "matches": matches,
+        "tipo_requerimiento": derivado["tipo_requerimiento"],
+        "acciones_por_organismo": derivado["acciones_por_organismo"],
+    }
+
+
+def _sin_clasificacion() -> Dict:
+    return {
+        "centros_gestores": [],
+        "confianza": 0.0,
+        "metodo": "ninguno",
+        "matches": [],
+        "tipo_requerimiento": "Otros",
+        "acciones_por_organismo": {},
+    }
+
+
+def _clave_memo(texto: str, top_k: int) -> str:
+    """Clave de la caché: la comparten textos que solo difieren en tildes,
+    mayúsculas o espacios (el modelo de embeddings apenas los distingue)."""
+    contenido = f"{_VERSION_TAXONOMIA}\x00{top_k}\x00{normalizar(texto)}"
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def recargar_taxonomia() -> str:
+    """
+    Aplica en caliente una `taxonomia.TAXONOMIA` editada en el lugar o
+    reasignada: recompila las keywords, descarta la matriz de embeddings
+    (se recalcula o se lee del `.npy` correspondiente en el próximo uso),
+    recalcula `RESPONSABLES_CONOCIDOS` y vacía la caché de resultados.
+    Devuelve la nueva versión de la taxonomía.
+    """
+    global _VERSION_TAXONOMIA
+    _rules.recompilar()
+    _emb.descartar_matriz()
+    _taxonomia.recalcular_responsables()
+    _VERSION_TAXONOMIA = huella_taxonomia()
+    _MEMO.limpiar()
+    return _VERSION_TAXONOMIA
+
+
+def _clasificar_texto(texto: str, top_k: int) -> Tuple[Dict, bool]:
+    """``(resultado, cacheable)``; no es cacheable si el modelo falló."""
+    # ---------- 1) Reglas ----------
+    resultado = _clasificar_por_reglas(texto, top_k)
+    if resultado is not None:
+        return resultado, True
+
+    # ---------- 2) Embeddings ----------
+    if _emb.esta_disponible() and texto:
+        try:
+            sims = _emb.calcular_similitudes(texto, top_k=max(top_k, 5))
+        except Exception as e:
+            print(f"⚠️ Embeddings fallaron, devolviendo vacío: {e}")
+            return _sin_clasificacion(), False
+
+        resultado = _resultado_embeddings(sims, top_k)
+        if resultado is not None:
+            return resultado, True
+
+    # ---------- 3) Sin clasificación ----------
+    return _sin_clasificacion(), True
+
+
 def clasificar_centros_gestores(
     requerimiento: str,
     tipo_requerimiento: Optional[str] = None,
@@ -111,87 +281,85 @@ def clasificar_centros_gestores(
             "acciones_por_organismo": {"DAGMA": ["Atención prioritaria"], ...},
         }
     """
-    transcripciones_txt = ""
-    if transcripciones:
-        try:
-            transcripciones_txt = " ".join(
-                (t.get("texto") or "") for t in transcripciones if isinstance(t, dict)
-            )
-        except Exception:
-            transcripciones_txt = ""
+    texto = _texto_combinado(requerimiento, tipo_requerimiento, observaciones, transcripciones)
+    clave = _clave_memo(texto, top_k)
+    hit, resultado = _MEMO.obtener(clave)
+    if hit:
+        return resultado
 
-    texto = _unir_textos(requerimiento, tipo_requerimiento, observaciones, transcripciones_txt)
+    resultado, cacheable = _clasificar_texto(texto, top_k)
+    if cacheable:
+        _MEMO.guardar(clave, resultado)
+    return resultado
 
-    # ---------- 1) Reglas ----------
-    candidatos_reglas = aplicar_reglas(texto)
-    candidatos_validos = [c for c in candidatos_reglas if c["score"] >= UMBRAL_REGLAS]
 
-    if candidatos_validos:
-        top = candidatos_validos[:top_k]
-        max_score = max(c["score"] for c in top)
-        confianza = min(1.0, 0.5 + 0.15 * max_score)  # heurística simple
-        matches = [
-            {
-                "categoria": c["fila"]["categoria"],
-                "subcategoria": c["fila"]["subcategoria"],
-                "condicion": c["fila"]["condicion"],
-                "accion": c["fila"].get("accion", ""),
-                "responsables": c["fila"]["responsables"],
-                "score": c["score"],
-                "hits": c["hits"],
-            }
-            for c in top
-        ]
-        derivado = _derivar_tipo_y_acciones(matches, (c["fila"] for c in top))
-        return {
-            "centros_gestores": _responsables_unicos(c["fila"] for c in top),
-            "confianza": round(confianza, 3),
-            "metodo": "reglas",
-            "matches": matches,
-            "tipo_requerimiento": derivado["tipo_requerimiento"],
-            "acciones_por_organismo": derivado["acciones_por_organismo"],
-        }
+def clasificar_lote(
+    textos: Sequence[Union[str, Dict]],
+    top_k: int = 3,
+) -> List[Dict]:
+    """
+    Clasifica varios textos con el mismo algoritmo que
+    ``clasificar_centros_gestores`` (mismo resultado por elemento, salvo
+    el último bit de float32 en las similitudes, y en el mismo orden),
+    pensado para backfills y scripts de migración.
 
-    # ---------- 2) Embeddings ----------
-    if _emb.esta_disponible() and texto:
+    Cada elemento es el texto del requerimiento o un dict con los
+    parámetros de ``clasificar_centros_gestores`` (``requerimiento``,
+    ``tipo_requerimiento``, ``observaciones``, ``transcripciones``).
+
+    Las reglas se aplican a todos; los textos que no resuelven por reglas
+    se embeben juntos en una sola llamada al modelo
+    (``embeddings.calcular_similitudes_lote``) en vez de una pasada por
+    texto. Los textos ya cacheados no se reclasifican y los repetidos
+    dentro del lote se clasifican una sola vez.
+    """
+    combinados = [
+        _texto_combinado(t) if isinstance(t, str) else _texto_combinado(**t)
+        for t in textos
+    ]
+    claves = [_clave_memo(t, top_k) for t in combinados]
+
+    # Una sola consulta a la caché y una sola clasificación por clave distinta
+    por_clave: Dict[str, Optional[Dict]] = {}
+    texto_de: Dict[str, str] = {}
+    faltantes: List[str] = []
+    for clave, texto in zip(claves, combinados):
+        if clave in por_clave:
+            continue
+        hit, valor = _MEMO.obtener(clave)
+        por_clave[clave] = valor if hit else None
+        if not hit:
+            texto_de[clave] = texto
+            faltantes.append(clave)
+
+    for clave in faltantes:
+        por_clave[clave] = _clasificar_por_reglas(texto_de[clave], top_k)
+
+    fallidos: set = set()
+    pendientes = [c for c in faltantes if por_clave[c] is None and texto_de[c]]
+    if pendientes and _emb.esta_disponible():
         try:
-            sims = _emb.calcular_similitudes(texto, top_k=max(top_k, 5))
+            sims_lote = _emb.calcular_similitudes_lote(
+                [texto_de[c] for c in pendientes], top_k=max(top_k, 5)
+            )
         except Exception as e:
-            print(f"⚠️ Embeddings fallaron, devolviendo vacío: {e}")
-            sims = []
-
-        sims_validas = [(i, s) for i, s in sims if s >= UMBRAL_EMBEDDINGS][:top_k]
-        if sims_validas:
-            filas = [TAXONOMIA[i] for i, _ in sims_validas]
-            matches = [
-                {
-                    "categoria": TAXONOMIA[i]["categoria"],
-                    "subcategoria": TAXONOMIA[i]["subcategoria"],
-                    "condicion": TAXONOMIA[i]["condicion"],
-                    "accion": TAXONOMIA[i].get("accion", ""),
-                    "responsables": TAXONOMIA[i]["responsables"],
-                    "score": round(s, 3),
-                    "hits": [],
-                }
-                for i, s in sims_validas
-            ]
-            max_sim = sims_validas[0][1]
-            derivado = _derivar_tipo_y_acciones(matches, filas)
-            return {
-                "centros_gestores": _responsables_unicos(filas),
-                "confianza": round(float(max_sim), 3),
-                "metodo": "embeddings",
-                "matches": matches,
-                "tipo_requerimiento": derivado["tipo_requerimiento"],
-                "acciones_por_organismo": derivado["acciones_por_organismo"],
-            }
+            print(f"⚠️ Embeddings fallaron en el lote, devolviendo vacío: {e}")
+            sims_lote = [[] for _ in pendientes]
+            fallidos.update(pendientes)
+        for clave, sims in zip(pendientes, sims_lote):
+            por_clave[clave] = _resultado_embeddings(sims, top_k)
 
-    # ---------- 3) Sin clasificación ----------
-    return {
-        "centros_gestores": [],
-        "confianza": 0.0,
-        "metodo": "ninguno",
-        "matches": [],
-        "tipo_requerimiento": "Otros",
-        "acciones_por_organismo": {},
-    }
+    for clave in faltantes:
+        if por_clave[clave] is None:
+            por_clave[clave] = _sin_clasificacion()
+        if clave not in fallidos:
+            _MEMO.guardar(clave, por_clave[clave])
+
+    # Cada posición recibe su propio dict aunque el texto se repita en el lote
+    entregados: set = set()
+    resultados: List[Dict] = []
+    for clave in claves:
+        resultado = por_clave[clave]
+        resultados.append(copy.deepcopy(resultado) if clave in entregados else resultado)
+        entregados.add(clave)
+    return resultados
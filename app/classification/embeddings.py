@@ -7,28 +7,108 @@ el modelo (~120 MB) se carga **lazy** en el primer uso y se mantiene
 en memoria. Si la variable de entorno `CLASSIFIER_PRELOAD=true` se
 exporta, el clasificador puede forzar la carga al arranque.
 
+Backends (`CLASSIFIER_BACKEND`):
+- `torch` (default): `SentenceTransformer` de PyTorch.
+- `onnx`: el mismo modelo exportado a ONNX y ejecutado con ONNX Runtime
+  (`embeddings_onnx.ModeloOnnx`), por defecto con pesos cuantizados int8.
+  No necesita `torch` ni `sentence-transformers` en la imagen; el export
+  se genera una vez con `scripts/export_onnx_clasificador.py`.
+
+Variables de entorno del backend ONNX:
+- `CLASSIFIER_ONNX_DIR`: directorio del export (default
+  `<caché de modelos>/catatrack/onnx/<modelo>`).
+- `CLASSIFIER_ONNX_QUANTIZED`: `0`/`false` usa el grafo fp32 en vez del int8.
+- `CLASSIFIER_ONNX_THREADS`: hilos intra-op de ONNX Runtime (default: los
+  que decida ONNX Runtime).
+
 Caché en disco: respeta `HF_HOME` / `SENTENCE_TRANSFORMERS_HOME`
 configurados como env vars (en Railway, apuntan al volumen montado
 en `/app/.cache/huggingface`).
+
+La matriz de la taxonomía se guarda junto a esa caché como `.npy`,
+nombrada con el SHA-256 del nombre del modelo + backend + las
+descripciones canónicas, y se abre con `np.load(mmap_mode="r")`: los workers comparten
+las páginas y no re-embeben la taxonomía en cada arranque. Si cambia el
+modelo, el backend o la taxonomía el hash no coincide, se recalcula y se reescribe
+(borrando las versiones viejas). Ante cualquier error de la caché se
+recalcula en memoria; la caché nunca es necesaria para arrancar.
+
+Variables de entorno de la caché de la matriz:
+- `CLASSIFIER_MATRIX_CACHE_DIR`: directorio (default
+  `<SENTENCE_TRANSFORMERS_HOME | HF_HOME | ~/.cache/huggingface>/catatrack`).
+- `CLASSIFIER_MATRIX_CACHE`: `0`/`false` la desactiva.
 """
 
 from __future__ import annotations
 
+import glob
+import hashlib
+import json
 import os
 from typing import List, Optional, Tuple
 
+import numpy as np
+
 _MODEL = None
 _MATRIX = None  # numpy ndarray (n_filas, dim)
 _MODEL_NAME = os.getenv(
     "CLASSIFIER_MODEL",
     "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
 )
+_BACKEND = os.getenv("CLASSIFIER_BACKEND", "torch").strip().lower()
+_BACKENDS = ("torch", "onnx")
+# Textos por forward pass en `calcular_similitudes_lote`
+_BATCH_SIZE = max(1, int(os.getenv("CLASSIFIER_BATCH_SIZE", "64")))
+# Versión del formato en disco; subirla invalida todas las matrices guardadas.
+_FORMATO_MATRIZ = 1
+
+
+def _onnx_cuantizado() -> bool:
+    return os.getenv("CLASSIFIER_ONNX_QUANTIZED", "true").lower() not in ("0", "false", "no", "n")
+
+
+def _dir_onnx() -> str:
+    explicito = os.getenv("CLASSIFIER_ONNX_DIR")
+    if explicito:
+        return explicito
+    return os.path.join(_dir_cache_modelos(), "catatrack", "onnx", _MODEL_NAME.replace("/", "__"))
+
+
+def _identidad_backend() -> str:
+    """Backend efectivo; el ONNX int8 da vectores distintos al fp32, así que cuenta para la huella."""
+    if _BACKEND == "onnx":
+        return "onnx-int8" if _onnx_cuantizado() else "onnx-fp32"
+    return _BACKEND
+
+
+def _cargar_onnx():
+    from .embeddings_onnx import ModeloOnnx, archivo_modelo
+
+    directorio = _dir_onnx()
+    ruta = archivo_modelo(directorio, _onnx_cuantizado())
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(
+            f"No existe el export ONNX '{ruta}'; generarlo con scripts/export_onnx_clasificador.py"
+        )
+    print(f"🔄 Cargando modelo de embeddings ONNX '{ruta}'...")
+    modelo = ModeloOnnx(
+        directorio,
+        cuantizado=_onnx_cuantizado(),
+        hilos=int(os.getenv("CLASSIFIER_ONNX_THREADS", "0")),
+    )
+    print(f"✅ Modelo de embeddings ONNX '{_MODEL_NAME}' cargado ({_identidad_backend()})")
+    return modelo
 
 
 def _get_model():
-    """Carga el modelo SentenceTransformer una sola vez."""
+    """Carga el modelo de embeddings (según `CLASSIFIER_BACKEND`) una sola vez."""
     global _MODEL
     if _MODEL is None:
+        if _BACKEND not in _BACKENDS:
+            raise ValueError(f"CLASSIFIER_BACKEND inválido: {_BACKEND!r} (opciones: {', '.join(_BACKENDS)})")
+        if _BACKEND == "onnx":
+            _MODEL = _cargar_onnx()
+            return _MODEL
         # Import diferido para no obligar a tener torch instalado en entornos
         # donde solo se usen las reglas léxicas (p. ej. tests rápidos).
         from sentence_transformers import SentenceTransformer
@@ -39,25 +119,113 @@ def _get_model():
     return _MODEL
 
 
+def _dir_cache_modelos() -> str:
+    return (
+        os.getenv("SENTENCE_TRANSFORMERS_HOME")
+        or os.getenv("HF_HOME")
+        or os.path.join(os.path.expanduser("~"), ".cache", "huggingface")
+    )
+
+
+def _dir_cache_matriz() -> str:
+    explicito = os.getenv("CLASSIFIER_MATRIX_CACHE_DIR")
+    if explicito:
+        return explicito
+    return os.path.join(_dir_cache_modelos(), "catatrack")
+
+
+def _cache_matriz_habilitada() -> bool:
+    return os.getenv("CLASSIFIER_MATRIX_CACHE", "true").lower() not in ("0", "false", "no", "n")
+
+
+def huella_matriz(descripciones: List[str]) -> str:
+    """SHA-256 de todo lo que determina la matriz: modelo + backend + descripciones (en orden)."""
+    contenido = json.dumps(
+        {
+            "formato": _FORMATO_MATRIZ,
+            "modelo": _MODEL_NAME,
+            "backend": _identidad_backend(),
+            "descripciones": descripciones,
+        },
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def _ruta_cache_matriz(digest: str) -> str:
+    return os.path.join(_dir_cache_matriz(), f"taxonomia-embeddings.{digest[:16]}.npy")
+
+
+def _calcular_matriz(descripciones: List[str]):
+    modelo = _get_model()
+    print(f"🔄 Calculando embeddings de {len(descripciones)} filas de taxonomía...")
+    return modelo.encode(
+        descripciones,
+        normalize_embeddings=True,  # cosine == dot product
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+
+
+def _leer_matriz(ruta: str, n_filas: int):
+    matriz = np.load(ruta, mmap_mode="r", allow_pickle=False)
+    if matriz.ndim != 2 or matriz.shape[0] != n_filas or matriz.dtype.kind != "f":
+        raise ValueError(f"forma/tipo inesperado {matriz.shape} {matriz.dtype}")
+    return matriz
+
+
+def _escribir_matriz(ruta: str, matriz) -> None:
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(matriz), allow_pickle=False)
+    # Rename atómico: otro worker nunca ve un archivo a medio escribir.
+    os.replace(tmp, ruta)
+    for viejo in glob.glob(os.path.join(os.path.dirname(ruta), "taxonomia-embeddings.*.npy")):
+        if os.path.abspath(viejo) != os.path.abspath(ruta):
+            try:
+                os.remove(viejo)
+            except OSError:
+                pass
+
+
 def _get_matrix():
-    """Pre-computa y cachea la matriz de embeddings de la taxonomía."""
+    """Pre-computa y cachea la matriz de embeddings de la taxonomía
+    (en memoria y, vía `.npy` mapeado, en disco)."""
     global _MATRIX
     if _MATRIX is None:
         from .taxonomia import listar_descripciones_canonicas
 
-        modelo = _get_model()
         descripciones = listar_descripciones_canonicas()
-        print(f"🔄 Calculando embeddings de {len(descripciones)} filas de taxonomía...")
-        _MATRIX = modelo.encode(
-            descripciones,
-            normalize_embeddings=True,  # cosine == dot product
-            convert_to_numpy=True,
-            show_progress_bar=False,
-        )
+        if not _cache_matriz_habilitada():
+            _MATRIX = _calcular_matriz(descripciones)
+        else:
+            ruta = _ruta_cache_matriz(huella_matriz(descripciones))
+            matriz = None
+            if os.path.exists(ruta):
+                try:
+                    matriz = _leer_matriz(ruta, len(descripciones))
+                    print(f"✅ Matriz de embeddings cargada de '{ruta}' (mmap)")
+                except Exception as e:
+                    print(f"⚠️ Caché de matriz inválida '{ruta}', se recalcula: {e}")
+            if matriz is None:
+                matriz = _calcular_matriz(descripciones)
+                try:
+                    _escribir_matriz(ruta, matriz)
+                    matriz = _leer_matriz(ruta, len(descripciones))
+                except Exception as e:
+                    print(f"⚠️ No se pudo guardar la matriz de embeddings en '{ruta}': {e}")
+            _MATRIX = matriz
         print(f"✅ Matriz de embeddings lista: shape={_MATRIX.shape}")
     return _MATRIX
 
 
+def descartar_matriz() -> None:
+    """Olvida la matriz en memoria; el próximo uso la recarga (o recalcula si cambió la taxonomía)."""
+    global _MATRIX
+    _MATRIX = None
+
+
 def calcular_similitudes(texto: str, top_k: int = 5) -> List[Tuple[int, float]]:
     """
     Embebe `texto`, calcula similitud coseno contra la matriz
@@ -65,20 +233,55 @@ def calcular_similitudes(texto: str, top_k: int = 5) -> List[Tuple[int, float]]:
     """
     if not texto or not texto.strip():
         return []
+    return calcular_similitudes_lote([texto], top_k=top_k)[0]
+
+
+def _top_k_filas(sims, top_k: int) -> List[List[Tuple[int, float]]]:
+    """Top-k por fila de una matriz de similitudes ``(n_textos, n_filas)``:
+    ``argpartition`` selecciona los k mayores (O(n)) y solo esos se ordenan."""
+    k = min(top_k, sims.shape[1])
+    if k <= 0:
+        return [[] for _ in range(sims.shape[0])]
+    if k < sims.shape[1]:
+        idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(sims.shape[1]), sims.shape)
+    top = np.take_along_axis(sims, idx, axis=1)
+    orden = np.argsort(-top, axis=1, kind="stable")
+    idx = np.take_along_axis(idx, orden, axis=1)
+    top = np.take_along_axis(top, orden, axis=1)
+    return [
+        [(int(i), float(s)) for i, s in zip(fila_idx, fila_sims)]
+        for fila_idx, fila_sims in zip(idx, top)
+    ]
+
+
+def calcular_similitudes_lote(textos: List[str], top_k: int = 5) -> List[List[Tuple[int, float]]]:
+    """
+    Versión por lote de `calcular_similitudes`: una sola llamada a
+    `encode` (el modelo agrupa internamente en `CLASSIFIER_BATCH_SIZE`)
+    y un solo producto matricial contra la matriz de la taxonomía.
+    Textos vacíos devuelven `[]` en su posición.
+    """
+    validos = [i for i, t in enumerate(textos) if t and t.strip()]
+    resultados: List[List[Tuple[int, float]]] = [[] for _ in textos]
+    if not validos:
+        return resultados
 
     modelo = _get_model()
     matriz = _get_matrix()
-    vec = modelo.encode(
-        [texto],
+    vecs = modelo.encode(
+        [textos[i] for i in validos],
+        batch_size=_BATCH_SIZE,
         normalize_embeddings=True,
         convert_to_numpy=True,
         show_progress_bar=False,
-    )[0]
+    )
     # producto punto (vectores ya normalizados) = similitud coseno
-    sims = matriz @ vec  # shape (n_filas,)
-    # top-k índices ordenados desc
-    top_idx = sims.argsort()[::-1][:top_k]
-    return [(int(i), float(sims[i])) for i in top_idx]
+    sims = np.asarray(vecs) @ matriz.T  # shape (n_textos, n_filas)
+    for i, top in zip(validos, _top_k_filas(sims, top_k)):
+        resultados[i] = top
+    return resultados
 
 
 def precargar(force: bool = False) -> bool:
@@ -99,8 +302,15 @@ def precargar(force: bool = False) -> bool:
 
 
 def esta_disponible() -> bool:
-    """Indica si `sentence-transformers` está instalado y se puede cargar."""
+    """Indica si el backend configurado se puede cargar: `sentence-transformers`
+    instalado (torch) o `onnxruntime` + `tokenizers` y el export presente (onnx)."""
     try:
+        if _BACKEND == "onnx":
+            import onnxruntime  # noqa: F401
+            import tokenizers  # noqa: F401
+            from .embeddings_onnx import archivo_modelo
+
+            return os.path.exists(archivo_modelo(_dir_onnx(), _onnx_cuantizado()))
         import sentence_transformers  # noqa: F401
         return True
     except Exception:
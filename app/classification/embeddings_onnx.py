@@ -0,0 +1,115 @@
+"""
+Backend ONNX Runtime del modelo de embeddings (``CLASSIFIER_BACKEND=onnx``).
+
+Reemplaza al ``SentenceTransformer`` de PyTorch con el mismo modelo
+exportado a ONNX (normalmente cuantizado a int8) por
+``scripts/export_onnx_clasificador.py``. Solo necesita ``onnxruntime``,
+``tokenizers`` y ``numpy``: sin ``torch`` ni ``sentence-transformers``,
+una fracción de la RAM por worker y menos latencia por consulta en CPU.
+
+El directorio exportado contiene:
+- ``model.onnx`` (fp32) y/o ``model.int8.onnx`` (pesos cuantizados int8);
+- ``tokenizer.json`` (tokenizer "fast" de HuggingFace);
+- ``catatrack_onnx.json``: modelo de origen, ``max_seq_length``, pooling,
+  entradas del grafo y token de padding.
+
+``ModeloOnnx.encode`` acepta los mismos argumentos que
+``SentenceTransformer.encode`` que usa ``embeddings.py``, así que el resto
+del clasificador no distingue el backend.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+
+ARCHIVO_META = "catatrack_onnx.json"
+ARCHIVO_TOKENIZER = "tokenizer.json"
+ARCHIVO_FP32 = "model.onnx"
+ARCHIVO_INT8 = "model.int8.onnx"
+
+
+def archivo_modelo(directorio: str, cuantizado: bool = True) -> str:
+    return os.path.join(directorio, ARCHIVO_INT8 if cuantizado else ARCHIVO_FP32)
+
+
+def leer_meta(directorio: str) -> dict:
+    with open(os.path.join(directorio, ARCHIVO_META), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _pooling_media(hidden: np.ndarray, mascara: np.ndarray) -> np.ndarray:
+    """Promedio de los vectores de token válidos (ignora el padding)."""
+    m = mascara[..., None].astype(hidden.dtype)
+    suma = (hidden * m).sum(axis=1)
+    return suma / np.clip(m.sum(axis=1), 1e-9, None)
+
+
+class ModeloOnnx:
+    """Encoder de oraciones sobre ``onnxruntime`` con la interfaz de ``SentenceTransformer.encode``."""
+
+    def __init__(self, directorio: str, cuantizado: bool = True, hilos: int = 0, sesion=None):
+        from tokenizers import Tokenizer
+
+        self.directorio = directorio
+        self.meta = leer_meta(directorio)
+        if self.meta.get("pooling", "mean") != "mean":
+            raise ValueError(f"pooling no soportado: {self.meta.get('pooling')!r}")
+        self.max_seq_length = int(self.meta["max_seq_length"])
+        self.entradas: List[str] = list(self.meta["entradas"])
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(directorio, ARCHIVO_TOKENIZER))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=int(self.meta["pad_id"]), pad_token=self.meta["pad_token"])
+
+        if sesion is None:
+            import onnxruntime as ort
+
+            opciones = ort.SessionOptions()
+            if hilos > 0:
+                opciones.intra_op_num_threads = hilos
+            sesion = ort.InferenceSession(
+                archivo_modelo(directorio, cuantizado),
+                sess_options=opciones,
+                providers=["CPUExecutionProvider"],
+            )
+        self.sesion = sesion
+
+    def _forward(self, textos: List[str]) -> np.ndarray:
+        codificados = self.tokenizer.encode_batch(textos)
+        ids = np.array([c.ids for c in codificados], dtype=np.int64)
+        mascara = np.array([c.attention_mask for c in codificados], dtype=np.int64)
+        feed = {"input_ids": ids, "attention_mask": mascara}
+        if "token_type_ids" in self.entradas:
+            feed["token_type_ids"] = np.array([c.type_ids for c in codificados], dtype=np.int64)
+        (hidden,) = self.sesion.run(["last_hidden_state"], feed)
+        return _pooling_media(hidden, mascara)
+
+    def encode(
+        self,
+        textos: List[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+        show_progress_bar: Optional[bool] = None,
+    ) -> np.ndarray:
+        if isinstance(textos, str):
+            return self.encode([textos], batch_size, normalize_embeddings)[0]
+        if not textos:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Lotes ordenados por largo (como SentenceTransformer): menos padding por forward.
+        orden = sorted(range(len(textos)), key=lambda i: -len(textos[i]))
+        vecs: List[Optional[np.ndarray]] = [None] * len(textos)
+        batch_size = max(1, batch_size)
+        for inicio in range(0, len(orden), batch_size):
+            idx = orden[inicio:inicio + batch_size]
+            for i, v in zip(idx, self._forward([textos[i] for i in idx])):
+                vecs[i] = v
+        salida = np.stack(vecs).astype(np.float32, copy=False)
+        if normalize_embeddings:
+            normas = np.linalg.norm(salida, axis=1, keepdims=True)
+            salida = salida / np.clip(normas, 1e-12, None)
+        return salida
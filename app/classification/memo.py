@@ -0,0 +1,94 @@
+"""
+Memoización LRU + TTL de resultados del clasificador.
+
+Las mismas frases ("poda de árbol", "recolección de escombros") se repiten
+constantemente entre capturas; sin caché cada una vuelve a normalizarse,
+pasar por las reglas y, si cae a embeddings, por un forward del modelo.
+``MemoTTL`` guarda el resultado por clave (la arma ``classifier``: hash del
+texto combinado normalizado + versión de la taxonomía + ``top_k``), con
+tamaño máximo (desaloja la entrada usada hace más tiempo) y vencimiento
+por entrada.
+
+Los valores se guardan y se devuelven como copias profundas: quien llama
+puede modificar el dict del resultado sin alterar la caché.
+
+Métricas (``/metrics``): ``clasificador_memo_consultas_total{resultado}``
+(``hit``/``miss``) y ``clasificador_memo_entradas``.
+"""
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.routes.monitoring_routes import CLASIFICADOR_MEMO_CONSULTAS, CLASIFICADOR_MEMO_ENTRADAS
+
+
+class MemoTTL:
+    """Caché LRU thread-safe con vencimiento por entrada (``maxsize <= 0`` la desactiva)."""
+
+    def __init__(self, maxsize: int, ttl_s: float):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._datos: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def habilitada(self) -> bool:
+        return self.maxsize > 0 and self.ttl_s > 0
+
+    def obtener(self, clave: Hashable) -> tuple[bool, Any]:
+        """``(True, copia_del_valor)`` si está y no venció; ``(False, None)`` si no."""
+        if not self.habilitada:
+            return False, None
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[0] <= ahora:
+                del self._datos[clave]
+                entrada = None
+            if entrada is None:
+                self.misses += 1
+                n = len(self._datos)
+            else:
+                self._datos.move_to_end(clave)
+                self.hits += 1
+        if entrada is None:
+            CLASIFICADOR_MEMO_CONSULTAS.labels(resultado="miss").inc()
+            CLASIFICADOR_MEMO_ENTRADAS.set(n)
+            return False, None
+        CLASIFICADOR_MEMO_CONSULTAS.labels(resultado="hit").inc()
+        return True, copy.deepcopy(entrada[1])
+
+    def guardar(self, clave: Hashable, valor: Any, ttl_s: Optional[float] = None) -> None:
+        if not self.habilitada:
+            return
+        expira = time.monotonic() + (self.ttl_s if ttl_s is None else ttl_s)
+        valor = copy.deepcopy(valor)
+        with self._lock:
+            self._datos[clave] = (expira, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+            n = len(self._datos)
+        CLASIFICADOR_MEMO_ENTRADAS.set(n)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._datos.clear()
+            self.hits = self.misses = 0
+        CLASIFICADOR_MEMO_ENTRADAS.set(0)
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl_s,
+                "currsize": len(self._datos),
+            }
@@ -5,51 +5,116 @@ en `taxonomia.TAXONOMIA`.
 Devuelve una lista de candidatos `[{fila, score, hits}]` ordenados
 por score descendente. El score es simplemente el número de keywords
 matcheadas (case/tilde insensitive) en el texto normalizado.
+
+Las keywords se normalizan una sola vez al importar y se compilan en un
+único autómata Aho-Corasick (``app.utils.aho_corasick``): cada llamada
+recorre el texto normalizado una vez, sin importar cuántas keywords
+tenga la taxonomía.
 """
 
 from __future__ import annotations
 
-import re
 import unicodedata
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+from app.utils.aho_corasick import AhoCorasick
+
+from . import taxonomia as _taxonomia
 
-from .taxonomia import TAXONOMIA
+
+# Marcas (categoría Mn) ya vistas. ``unicodedata.category`` se consulta
+# una vez por carácter distinto y no una vez por carácter de cada texto
+# (las transcripciones son largas); cada marca presente se quita con un
+# ``str.replace``, que recorre el texto en C.
+_MARCAS: set = set()
+_REVISADOS: set = set()
 
 
 def normalizar(texto: str) -> str:
     """Lowercase + remoción de tildes + colapsar espacios."""
     if not texto:
         return ""
-    # NFD descompone "á" en "a" + acento; el filtro elimina los marks.
+    # NFD descompone "á" en "a" + acento; luego se eliminan los marks.
     desc = unicodedata.normalize("NFD", texto)
-    sin_tildes = "".join(ch for ch in desc if unicodedata.category(ch) != "Mn")
-    sin_tildes = sin_tildes.lower()
-    sin_tildes = re.sub(r"\s+", " ", sin_tildes).strip()
-    return sin_tildes
+    if not desc.isascii():
+        presentes = set(desc)
+        for ch in presentes.difference(_REVISADOS):
+            if unicodedata.category(ch) == "Mn":
+                _MARCAS.add(ch)
+            _REVISADOS.add(ch)
+        for marca in presentes.intersection(_MARCAS):
+            desc = desc.replace(marca, "")
+    # ``str.split()`` sin argumentos corta por los mismos espacios que
+    # ``\s`` y descarta los de los extremos: colapsa y hace strip.
+    return " ".join(desc.lower().split())
+
+
+def compilar_keywords(taxonomia: List[Dict]) -> Tuple[AhoCorasick, List[List[Tuple[int, int]]]]:
+    """
+    Normaliza las keywords de ``taxonomia`` y las compila en un autómata.
+    Devuelve ``(automata, destinos)``: ``destinos[id_patron]`` lista los
+    ``(posicion_fila, posicion_keyword)`` que comparten esa keyword
+    normalizada. Las keywords que normalizan a vacío se descartan.
+    """
+    ids: Dict[str, int] = {}
+    destinos: List[List[Tuple[int, int]]] = []
+    for i, fila in enumerate(taxonomia):
+        for j, kw in enumerate(fila["keywords"]):
+            kw_norm = normalizar(kw)
+            if not kw_norm:
+                continue
+            if kw_norm not in ids:
+                ids[kw_norm] = len(destinos)
+                destinos.append([])
+            destinos[ids[kw_norm]].append((i, j))
+    return AhoCorasick(ids, transiciones_completas=True), destinos
+
+
+def _compilar_vigente() -> Tuple[List[Dict], AhoCorasick, List[List[Tuple[int, int]]]]:
+    # Se lee ``taxonomia.TAXONOMIA`` a través del módulo: vale tanto si se
+    # editó en el lugar como si se reasignó la lista completa.
+    filas = _taxonomia.TAXONOMIA
+    return (filas, *compilar_keywords(filas))
+
+
+# ``(filas, automata, destinos)`` vigentes; se publican juntos en una sola
+# referencia para que ``recompilar`` no deje ver una combinación mezclada
+# (los índices de ``destinos`` apuntan a esas ``filas``).
+_COMPILADO = _compilar_vigente()
+
+
+def recompilar() -> None:
+    """Vuelve a compilar las keywords desde ``taxonomia.TAXONOMIA`` (tras editarla en caliente)."""
+    global _COMPILADO
+    _COMPILADO = _compilar_vigente()
 
 
 def aplicar_reglas(texto: str) -> List[Dict]:
     """
-    Recorre la taxonomía y cuenta keywords coincidentes (substring match)
-    en el texto normalizado. Solo devuelve filas con score >= 1.
+    Cuenta keywords coincidentes (substring match) por fila de la
+    taxonomía en el texto normalizado. Solo devuelve filas con
+    score >= 1; los hits de cada fila respetan el orden de sus
+    ``keywords`` y las filas empatadas, el orden de ``TAXONOMIA``.
     """
     normalizado = normalizar(texto)
     if not normalizado:
         return []
 
+    filas, automata, destinos = _COMPILADO
+    por_fila: Dict[int, List[int]] = {}
+    for pid in automata.presentes(normalizado):
+        for i, j in destinos[pid]:
+            por_fila.setdefault(i, []).append(j)
+
     candidatos: List[Dict] = []
-    for fila in TAXONOMIA:
-        hits: List[str] = []
-        for kw in fila["keywords"]:
-            kw_norm = normalizar(kw)
-            if kw_norm and kw_norm in normalizado:
-                hits.append(kw)
-        if hits:
-            candidatos.append({
-                "fila": fila,
-                "score": len(hits),
-                "hits": hits,
-            })
+    for i in sorted(por_fila):
+        fila = filas[i]
+        hits = [fila["keywords"][j] for j in sorted(por_fila[i])]
+        candidatos.append({
+            "fila": fila,
+            "score": len(hits),
+            "hits": hits,
+        })
 
     candidatos.sort(key=lambda c: c["score"], reverse=True)
     return candidatos
@@ -11,6 +11,8 @@ Para añadir nuevos casos: agregar dicts a `TAXONOMIA` con
 minúsculas para acelerar el matching léxico).
 """
 
+import hashlib
+import json
 from typing import Dict, List
 
 
@@ -157,6 +159,19 @@ TAXONOMIA: List[Dict] = [
 RESPONSABLES_CONOCIDOS = sorted({r for fila in TAXONOMIA for r in fila["responsables"]})
 
 
+def recalcular_responsables() -> List[str]:
+    """Recalcula `RESPONSABLES_CONOCIDOS` desde la `TAXONOMIA` vigente. La
+    lista se actualiza en el lugar: quien ya la importó ve el cambio."""
+    RESPONSABLES_CONOCIDOS[:] = sorted({r for fila in TAXONOMIA for r in fila["responsables"]})
+    return RESPONSABLES_CONOCIDOS
+
+
+def huella_taxonomia() -> str:
+    """SHA-256 del contenido actual de `TAXONOMIA` (versión para cachés derivadas)."""
+    contenido = json.dumps(TAXONOMIA, ensure_ascii=False, sort_keys=True, default=list)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
 # ---------------------------------------------------------------------------
 # Mapeo categoría/subcategoría -> "Tipo de Requerimiento" mostrado en el
 # frontend (los 13 valores del antiguo dropdown). Se utiliza para derivar el
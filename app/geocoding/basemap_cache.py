@@ -0,0 +1,216 @@
+"""
+Caché binaria de basemaps para acortar el arranque en frío.
+
+Parsear los GeoJSON de ``basemaps/`` (``json.load`` + ``shape()`` por feature)
+cuesta cientos de ms por proceso y por worker. Este módulo serializa una sola
+vez las geometrías ya parseadas en un ``.npz`` compacto:
+
+- ``wkb``: todos los WKB concatenados en un buffer ``uint8``.
+- ``offsets``: ``int64`` con el inicio de cada geometría dentro del buffer.
+- ``names``: tabla de nombres (``str``; ``""`` para nombre ausente).
+- ``has_name``: ``bool`` que distingue ``""`` de ``None``.
+
+El archivo se nombra con el SHA-256 del GeoJSON de origen, así que cualquier
+cambio en el GeoJSON invalida la caché automáticamente: el loader no la
+encuentra, vuelve a parsear el GeoJSON y reescribe la caché (borrando las
+versiones viejas). Ante cualquier error leyendo la caché se cae al parseo
+normal; la caché nunca es necesaria para arrancar.
+
+Variables de entorno:
+- ``BASEMAP_CACHE_DIR``: directorio de la caché (default ``basemaps/.cache``).
+- ``BASEMAP_CACHE``: ``0``/``false`` desactiva la caché por completo.
+
+Construcción offline: ``python scripts/build_basemap_cache.py``.
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+from typing import Callable, Optional
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+_API_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+BASEMAPS_DIR = os.path.join(_API_ROOT, "basemaps")
+
+# Versión del formato en disco; subirla invalida todas las cachés existentes.
+_FORMATO = 1
+
+
+def cache_dir() -> str:
+    """Directorio de las cachés derivadas de los basemaps (``BASEMAP_CACHE_DIR``)."""
+    return os.getenv("BASEMAP_CACHE_DIR") or os.path.join(BASEMAPS_DIR, ".cache")
+
+
+def cache_habilitada() -> bool:
+    """False si ``BASEMAP_CACHE`` desactiva las cachés en disco."""
+    return os.getenv("BASEMAP_CACHE", "true").lower() not in ("0", "false", "no", "n")
+
+
+def hash_archivo(ruta: str) -> str:
+    """SHA-256 hexadecimal del archivo (lectura en bloques de 1 MB)."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _ruta_cache(ruta_geojson: str, variante: str, digest: str) -> str:
+    stem = os.path.splitext(os.path.basename(ruta_geojson))[0]
+    return os.path.join(cache_dir(), f"{stem}.{variante}.v{_FORMATO}.{digest[:16]}.npz")
+
+
+# ==================== PARSEO DESDE GEOJSON ====================
+
+def parsear_poligonos(ruta_geojson: str, propiedad: str) -> tuple[list, list]:
+    """Parsea un GeoJSON de polígonos → (geometrías, valores de ``propiedad``)."""
+    with open(ruta_geojson, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    geoms: list = []
+    names: list[Optional[str]] = []
+    for feature in data.get("features", []):
+        try:
+            geom = shape(feature["geometry"])
+            value = feature["properties"].get(propiedad)
+        except Exception:
+            continue
+        geoms.append(geom)
+        names.append(value)
+    return geoms, names
+
+
+def parsear_cruces(ruta_geojson: str) -> tuple[list, list]:
+    """Parsea cruces viales y los deduplica por par no ordenado de calles."""
+    with open(ruta_geojson, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    geoms: list = []
+    names: list[str] = []
+    seen: set[frozenset[str]] = set()
+    for feat in data.get("features", []):
+        try:
+            g = shape(feat["geometry"])
+            if g.is_empty or g.geom_type != "Point":
+                continue
+            name = (feat.get("properties", {}) or {}).get("cruce2") or ""
+            # Dedupe: "CL 72A con CL 72" == "CL 72 con CL 72A"
+            parts = [p.strip() for p in name.split(" con ")]
+            key = frozenset(parts) if len(parts) == 2 else frozenset([name])
+            if key in seen:
+                continue
+            seen.add(key)
+            geoms.append(g)
+            names.append(name)
+        except Exception:
+            continue
+    return geoms, names
+
+
+# ==================== SERIALIZACIÓN ====================
+
+def _escribir(ruta_cache: str, geoms: list, names: list, digest: str) -> None:
+    wkbs = shapely.to_wkb(np.asarray(geoms, dtype=object)) if geoms else []
+    sizes = np.fromiter((len(b) for b in wkbs), dtype=np.int64, count=len(wkbs))
+    offsets = np.zeros(len(wkbs) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    blob = np.frombuffer(b"".join(wkbs), dtype=np.uint8)
+    os.makedirs(os.path.dirname(ruta_cache), exist_ok=True)
+    tmp = f"{ruta_cache}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            wkb=blob,
+            offsets=offsets,
+            names=np.array([n if n is not None else "" for n in names], dtype=str),
+            has_name=np.array([n is not None for n in names], dtype=bool),
+            source_sha256=np.array(digest),
+        )
+    # Rename atómico: otro worker nunca ve un archivo a medio escribir.
+    os.replace(tmp, ruta_cache)
+
+
+def _leer(ruta_cache: str, digest: str) -> tuple[list, list]:
+    with np.load(ruta_cache, allow_pickle=False) as z:
+        if str(z["source_sha256"]) != digest:
+            raise ValueError("hash de origen no coincide")
+        blob = z["wkb"].tobytes()
+        offsets = z["offsets"]
+        names_arr = z["names"]
+        has_name = z["has_name"]
+    wkbs = [blob[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+    geoms = list(shapely.from_wkb(wkbs)) if wkbs else []
+    names = [str(n) if h else None for n, h in zip(names_arr, has_name)]
+    return geoms, names
+
+
+def _purgar_obsoletas(ruta_geojson: str, variante: str, vigente: str) -> None:
+    stem = os.path.splitext(os.path.basename(ruta_geojson))[0]
+    for viejo in glob.glob(os.path.join(cache_dir(), f"{stem}.{variante}.*.npz")):
+        if os.path.abspath(viejo) != os.path.abspath(vigente):
+            try:
+                os.remove(viejo)
+            except OSError:
+                pass
+
+
+def cargar_con_cache(
+    ruta_geojson: str,
+    variante: str,
+    parsear: Callable[[], tuple[list, list]],
+    *,
+    reconstruir: bool = False,
+) -> tuple[list, list]:
+    """
+    Devuelve ``(geometrías, nombres)`` desde la caché binaria si existe una
+    vigente para el hash actual de ``ruta_geojson``; si no, llama a
+    ``parsear()`` y guarda el resultado para el próximo arranque.
+
+    ``variante`` distingue capas derivadas del mismo GeoJSON (p. ej. la
+    propiedad usada como nombre). ``reconstruir=True`` ignora la caché
+    existente (usado por el build step).
+    """
+    if not cache_habilitada():
+        return parsear()
+    try:
+        digest = hash_archivo(ruta_geojson)
+    except OSError:
+        return parsear()  # el GeoJSON no existe: que el parser reporte el error
+
+    ruta_cache = _ruta_cache(ruta_geojson, variante, digest)
+    if not reconstruir and os.path.exists(ruta_cache):
+        try:
+            return _leer(ruta_cache, digest)
+        except Exception as e:
+            print(f"⚠️ Caché de basemap inválida '{ruta_cache}', se reconstruye: {e}")
+
+    geoms, names = parsear()
+    try:
+        _escribir(ruta_cache, geoms, names, digest)
+        _purgar_obsoletas(ruta_geojson, variante, ruta_cache)
+    except Exception as e:
+        print(f"⚠️ No se pudo escribir la caché de basemap '{ruta_cache}': {e}")
+    return geoms, names
+
+
+def cargar_poligonos(ruta_geojson: str, propiedad: str, *, reconstruir: bool = False) -> tuple[list, list]:
+    """Capa de polígonos ``(geometrías, nombres)`` con caché binaria."""
+    return cargar_con_cache(
+        ruta_geojson,
+        propiedad,
+        lambda: parsear_poligonos(ruta_geojson, propiedad),
+        reconstruir=reconstruir,
+    )
+
+
+def cargar_cruces(ruta_geojson: str, *, reconstruir: bool = False) -> tuple[list, list]:
+    """Cruces viales deduplicados ``(points, nombres)`` con caché binaria."""
+    return cargar_con_cache(
+        ruta_geojson,
+        "cruces_dedup",
+        lambda: parsear_cruces(ruta_geojson),
+        reconstruir=reconstruir,
+    )
@@ -0,0 +1,201 @@
+"""
+Caché persistente clave → JSON sobre SQLite, compartida entre workers.
+
+Pensada para respuestas de proveedores externos (Nominatim, ArcGIS, ...) que
+son caras de obtener y cambian poco. Todos los procesos uvicorn de la misma
+máquina abren el mismo archivo: SQLite en modo WAL permite lecturas
+concurrentes y serializa las escrituras (``busy_timeout``), así que un
+resultado obtenido por un worker le sirve a los demás.
+
+Cada entrada guarda:
+
+- ``expira``: hasta cuándo está fresca (TTL por entrada).
+- ``ultimo_uso``: para la expulsión LRU cuando se supera ``max_entradas``.
+- ``refrescando_hasta``: marca de "un worker ya la está refrescando", para
+  que una entrada vencida se refresque una sola vez aunque la pidan todos.
+
+Las entradas vencidas no se borran de inmediato: ``obtener`` las devuelve
+marcadas como vencidas (stale-while-revalidate) hasta ``max_vencida_s``
+después de expirar; pasado ese margen cuentan como ausentes.
+
+Cualquier error de SQLite se traga y se trata como fallo de caché: la caché
+nunca es necesaria para responder.
+
+Desde código ``async`` se usan ``obtener_async`` / ``guardar_async`` /
+``reclamar_refresco_async``: corren la misma consulta en un hilo
+(``asyncio.to_thread``), porque una escritura concurrente de otro worker
+puede hacerla esperar hasta ``busy_timeout`` (5 s) y, en el event loop,
+esa espera frenaría todas las peticiones del worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+# Cada cuántas escrituras se revisa el tamaño para expulsar por LRU.
+_REVISAR_TAMANO_CADA = 64
+# No reescribir ``ultimo_uso`` en cada acierto: basta con esta resolución.
+_RESOLUCION_USO_S = 60.0
+
+
+class CachePersistente:
+    """Caché TTL + LRU en un archivo SQLite (una tabla por instancia)."""
+
+    def __init__(
+        self,
+        ruta: str,
+        tabla: str,
+        *,
+        ttl_s: float,
+        max_entradas: int,
+        max_vencida_s: float = 0.0,
+    ):
+        if not tabla.isidentifier():
+            raise ValueError(f"nombre de tabla inválido: {tabla!r}")
+        self.ruta = ruta
+        self.tabla = tabla
+        self.ttl_s = ttl_s
+        self.max_entradas = max_entradas
+        self.max_vencida_s = max_vencida_s
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._escrituras = 0
+        self.aciertos = 0
+        self.vencidos = 0
+        self.fallos = 0
+
+    # ------------------------------------------------------------------ conexión
+    def _conexion(self) -> sqlite3.Connection:
+        # Una conexión por proceso: tras un fork (workers de gunicorn/uvicorn)
+        # no se reutiliza la del padre.
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+            conn = sqlite3.connect(self.ruta, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.tabla} ("
+                " clave TEXT PRIMARY KEY,"
+                " valor TEXT NOT NULL,"
+                " expira REAL NOT NULL,"
+                " ultimo_uso REAL NOT NULL,"
+                " refrescando_hasta REAL NOT NULL DEFAULT 0)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.tabla}_uso ON {self.tabla} (ultimo_uso)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _ejecutar(self, sql: str, params: tuple = ()) -> Optional[list]:
+        try:
+            with self._lock:
+                return self._conexion().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️ Caché persistente '{self.tabla}' no disponible: {e}")
+            return None
+
+    # ------------------------------------------------------------------ API
+    def obtener(self, clave: str) -> Optional[tuple[Any, bool]]:
+        """
+        ``(valor, vencido)`` si hay entrada utilizable, o None.
+
+        ``vencido=True`` significa que pasó su TTL pero sigue dentro del
+        margen ``max_vencida_s``: se puede servir mientras se refresca.
+        """
+        ahora = time.time()
+        filas = self._ejecutar(
+            f"SELECT valor, expira, ultimo_uso FROM {self.tabla} WHERE clave = ?", (clave,)
+        )
+        if not filas:
+            self.fallos += 1
+            return None
+        valor, expira, ultimo_uso = filas[0]
+        if ahora > expira + self.max_vencida_s:
+            self.fallos += 1
+            return None
+        if ahora - ultimo_uso > _RESOLUCION_USO_S:
+            self._ejecutar(f"UPDATE {self.tabla} SET ultimo_uso = ? WHERE clave = ?", (ahora, clave))
+        vencido = ahora > expira
+        if vencido:
+            self.vencidos += 1
+        else:
+            self.aciertos += 1
+        return json.loads(valor), vencido
+
+    def guardar(self, clave: str, valor: Any, ttl_s: Optional[float] = None) -> None:
+        """Guarda ``valor`` (serializable a JSON) con ``ttl_s`` (default: el de la caché)."""
+        ahora = time.time()
+        ttl = self.ttl_s if ttl_s is None else ttl_s
+        self._ejecutar(
+            f"INSERT OR REPLACE INTO {self.tabla} (clave, valor, expira, ultimo_uso, refrescando_hasta)"
+            " VALUES (?, ?, ?, ?, 0)",
+            (clave, json.dumps(valor, ensure_ascii=False), ahora + ttl, ahora),
+        )
+        self._escrituras += 1
+        if self._escrituras % _REVISAR_TAMANO_CADA == 0:
+            self.expulsar()
+
+    def reclamar_refresco(self, clave: str, duracion_s: float = 60.0) -> bool:
+        """
+        Marca la entrada como "refrescándose" durante ``duracion_s``.
+        Devuelve True solo al primer proceso que la reclama; los demás siguen
+        sirviendo el valor vencido sin repetir la consulta externa.
+        """
+        ahora = time.time()
+        try:
+            with self._lock:
+                cur = self._conexion().execute(
+                    f"UPDATE {self.tabla} SET refrescando_hasta = ? WHERE clave = ? AND refrescando_hasta < ?",
+                    (ahora + duracion_s, clave, ahora),
+                )
+                return cur.rowcount == 1
+        except sqlite3.Error:
+            return False
+
+    # ------------------------------------------------------------------ API async
+    async def obtener_async(self, clave: str) -> Optional[tuple[Any, bool]]:
+        """``obtener`` fuera del event loop."""
+        return await asyncio.to_thread(self.obtener, clave)
+
+    async def guardar_async(self, clave: str, valor: Any, ttl_s: Optional[float] = None) -> None:
+        """``guardar`` fuera del event loop."""
+        await asyncio.to_thread(self.guardar, clave, valor, ttl_s)
+
+    async def reclamar_refresco_async(self, clave: str, duracion_s: float = 60.0) -> bool:
+        """``reclamar_refresco`` fuera del event loop."""
+        return await asyncio.to_thread(self.reclamar_refresco, clave, duracion_s)
+
+    def expulsar(self) -> None:
+        """Borra lo vencido sin margen y, si aún sobra, lo menos usado (LRU)."""
+        ahora = time.time()
+        self._ejecutar(f"DELETE FROM {self.tabla} WHERE expira + ? < ?", (self.max_vencida_s, ahora))
+        filas = self._ejecutar(f"SELECT COUNT(*) FROM {self.tabla}")
+        exceso = (filas[0][0] - self.max_entradas) if filas else 0
+        if exceso > 0:
+            self._ejecutar(
+                f"DELETE FROM {self.tabla} WHERE clave IN"
+                f" (SELECT clave FROM {self.tabla} ORDER BY ultimo_uso LIMIT ?)",
+                (exceso,),
+            )
+
+    def limpiar(self) -> None:
+        self._ejecutar(f"DELETE FROM {self.tabla}")
+
+    def __len__(self) -> int:
+        filas = self._ejecutar(f"SELECT COUNT(*) FROM {self.tabla}")
+        return filas[0][0] if filas else 0
+
+    def estadisticas(self) -> dict:
+        """Contadores de este proceso + tamaño actual de la tabla compartida."""
+        return {
+            "entradas": len(self),
+            "max_entradas": self.max_entradas,
+            "aciertos": self.aciertos,
+            "vencidos_servidos": self.vencidos,
+            "fallos": self.fallos,
+        }
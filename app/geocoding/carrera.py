@@ -0,0 +1,130 @@
+"""
+Carrera de proveedores con "hedging" para la geocodificación directa.
+
+En vez de recorrer Nominatim → Photon → ArcGIS en cadena (cada paso
+esperando su timeout antes del siguiente), ``carrera`` lanza el primer
+proveedor y, si no hay respuesta aceptable en ``retraso_s``, lanza el
+siguiente sin cancelar el anterior (hedge). Gana el primer carril que
+devuelva un resultado *fuerte*; los demás se cancelan. Si ninguno lo logra
+se devuelven los resultados *débiles* de todos para que el llamador elija
+un respaldo.
+
+El orden de lanzamiento lo decide ``RastreadorProveedores``: mantiene por
+proveedor una media móvil exponencial de latencia y de tasa de éxito, y
+ordena por tiempo esperado hasta un éxito (``latencia / éxito``). Así un
+proveedor que empieza a fallar o a tardar baja solo en la lista.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+
+@dataclass
+class ResultadoCarril:
+    fuerte: Optional[Any] = None  # aceptable de inmediato: gana la carrera
+    debil: Optional[Any] = None  # respaldo si ningún carril da uno fuerte
+
+
+@dataclass
+class _Estadisticas:
+    latencia_s: float
+    exito: float
+    consultas: int = 0
+
+
+class RastreadorProveedores:
+    """Latencia y tasa de éxito por proveedor (EWMA) → orden de la carrera."""
+
+    def __init__(
+        self,
+        prioridades: dict[str, tuple[float, float]],
+        *,
+        alfa: float = 0.2,
+        metrica_latencia=None,
+        metrica_consultas=None,
+    ):
+        """
+        ``prioridades``: ``{proveedor: (latencia_s inicial, éxito inicial)}``;
+        el orden de inserción desempata y define el orden de arranque.
+        """
+        self._stats = {p: _Estadisticas(lat, ex) for p, (lat, ex) in prioridades.items()}
+        self._alfa = alfa
+        self._metrica_latencia = metrica_latencia
+        self._metrica_consultas = metrica_consultas
+
+    def registrar(self, proveedor: str, latencia_s: float, exito: bool) -> None:
+        st = self._stats.setdefault(proveedor, _Estadisticas(latencia_s, float(exito)))
+        a = self._alfa
+        st.latencia_s = (1 - a) * st.latencia_s + a * latencia_s
+        st.exito = (1 - a) * st.exito + a * (1.0 if exito else 0.0)
+        st.consultas += 1
+        if self._metrica_latencia is not None:
+            self._metrica_latencia.labels(proveedor=proveedor).observe(latencia_s)
+        if self._metrica_consultas is not None:
+            self._metrica_consultas.labels(proveedor=proveedor, resultado="exito" if exito else "vacio").inc()
+
+    def puntaje(self, proveedor: str) -> float:
+        """Tiempo esperado hasta un éxito; menor es mejor."""
+        st = self._stats[proveedor]
+        return st.latencia_s / max(st.exito, 0.05)
+
+    def orden(self) -> list[str]:
+        return sorted(self._stats, key=self.puntaje)  # sorted es estable: desempata la prioridad
+
+    def estadisticas(self) -> dict:
+        return {
+            p: {"latencia_s": round(st.latencia_s, 3), "exito": round(st.exito, 3), "consultas": st.consultas}
+            for p, st in self._stats.items()
+        }
+
+
+async def carrera(
+    carriles: dict[str, Callable[[], Awaitable[ResultadoCarril]]],
+    orden: list[str],
+    retraso_s: float,
+) -> tuple[Optional[str], Optional[Any], dict[str, ResultadoCarril]]:
+    """
+    Corre los ``carriles`` escalonados según ``orden``: cada uno arranca
+    ``retraso_s`` después del anterior, o de inmediato si todos los que
+    están corriendo terminaron sin resultado fuerte.
+
+    Devuelve ``(ganador, resultado_fuerte, resultados)``; ``ganador`` es None
+    si ningún carril dio un resultado fuerte. ``resultados`` tiene lo que
+    devolvió cada carril terminado (un carril que lanza excepción cuenta como
+    vacío). Al salir se cancelan los carriles que sigan corriendo.
+    """
+    loop = asyncio.get_running_loop()
+    pendientes = [n for n in orden if n in carriles]
+    tareas: dict[asyncio.Task, str] = {}
+    resultados: dict[str, ResultadoCarril] = {}
+    siguiente_en = 0.0
+
+    def _lanzar() -> None:
+        nonlocal siguiente_en
+        nombre = pendientes.pop(0)
+        tareas[asyncio.ensure_future(carriles[nombre]())] = nombre
+        siguiente_en = loop.time() + retraso_s
+
+    try:
+        if pendientes:
+            _lanzar()
+        while tareas:
+            espera = max(0.0, siguiente_en - loop.time()) if pendientes else None
+            hechas, _ = await asyncio.wait(tareas, timeout=espera, return_when=asyncio.FIRST_COMPLETED)
+            for t in hechas:
+                nombre = tareas.pop(t)
+                try:
+                    r = t.result()
+                except Exception:
+                    r = ResultadoCarril()
+                resultados[nombre] = r
+                if r.fuerte is not None:
+                    return nombre, r.fuerte, resultados
+            if pendientes and (not tareas or loop.time() >= siguiente_en):
+                _lanzar()
+        return None, None, resultados
+    finally:
+        for t in tareas:
+            t.cancel()
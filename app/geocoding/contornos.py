@@ -0,0 +1,326 @@
+"""
+Contornos simplificados de los basemaps (barrios, comunas) para el frontend.
+
+El GeoJSON crudo de ``basemaps/`` pesa varios MB y trae mucho más detalle del
+que se ve a los zooms del mapa. Por cada capa y cada zoom de ``ZOOMS`` se
+precalcula una versión simplificada y se guarda ya serializada y comprimida:
+
+- Simplificación que preserva la topología entre vecinos: los bordes de
+  toda la capa se nodan en arcos compartidos (``union_all`` + ``line_merge``),
+  cada arco se simplifica una sola vez (sus extremos, los nodos donde se
+  encuentran 3+ polígonos, no se mueven) y las caras se reconstruyen con
+  ``polygonize``. Dos barrios vecinos quedan con exactamente el mismo borde:
+  sin huecos ni solapes nuevos. Cada cara se asigna al polígono original que
+  contiene su punto interior (el de menor posición si hay solapes, igual que
+  ``PolygonIndex.contenedor``).
+- Se trabaja en metros (``proyeccion``): la tolerancia es medio píxel del
+  zoom a la latitud de Cali (``tolerancia_m``).
+- ``Representacion``: cuerpo GeoJSON + gzip + brotli (si el paquete
+  ``brotli`` está instalado) y ETag fuerte por codificación.
+
+Los niveles se cachean en disco junto a la caché binaria
+(``basemap_cache``), nombrados con el SHA-256 del GeoJSON de origen, y en
+memoria por proceso. ``scripts/build_basemap_cache.py`` los construye en el
+build; si no, el primer pedido de cada nivel los calcula.
+
+El recorte por bbox selecciona los polígonos que lo intersectan con el
+mismo STRtree de ``PolygonIndex`` que usan las consultas de punto; cada
+``Nivel`` guarda el árbol del índice con el que se construyó, así que un
+recorte nunca mezcla dos generaciones de basemaps tras una recarga.
+
+Variables de entorno:
+- ``CONTORNOS_ZOOMS``: zooms precalculados, separados por coma
+  (default ``10,12,14,16``).
+"""
+from __future__ import annotations
+
+import glob
+import gzip
+import hashlib
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+from app.geocoding import basemap_cache, proyeccion
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+ZOOMS: tuple[int, ...] = tuple(
+    sorted(int(z) for z in os.getenv("CONTORNOS_ZOOMS", "10,12,14,16").split(",") if z.strip())
+)
+
+# Versión del formato en disco; subirla invalida los contornos cacheados.
+_FORMATO = 1
+
+# Metros por píxel de Web Mercator en el ecuador a zoom 0 (tiles de 256 px)
+_M_POR_PX_Z0 = 156543.03392
+_DECIMALES = 6  # ~0.1 m; suficiente para dibujar, y acorta el JSON
+
+
+def tolerancia_m(zoom: int) -> float:
+    """Medio píxel de Web Mercator a la latitud de Cali, en metros."""
+    return 0.5 * _M_POR_PX_Z0 * math.cos(math.radians(proyeccion.LAT_0)) / 2 ** zoom
+
+
+def zoom_precalculado(zoom: int) -> int:
+    """Menor zoom de ``ZOOMS`` que sea ≥ ``zoom`` (el más detallado si se pasa)."""
+    for z in ZOOMS:
+        if z >= zoom:
+            return z
+    return ZOOMS[-1]
+
+
+# ==================== SIMPLIFICACIÓN ====================
+
+def simplificar(geoms_m: Sequence, tol_m: float, tree_m: Optional[STRtree] = None) -> np.ndarray:
+    """
+    Simplifica una capa de polígonos en metros preservando los bordes
+    compartidos; devuelve las geometrías en grados, alineadas con la entrada.
+    """
+    geoms_m = np.asarray(geoms_m, dtype=object)
+    n = len(geoms_m)
+    if n == 0:
+        return geoms_m
+    tree_m = tree_m if tree_m is not None else STRtree(geoms_m)
+    arcos = shapely.get_parts(shapely.line_merge(shapely.union_all(shapely.boundary(geoms_m))))
+    simplificados = shapely.simplify(arcos, tol_m, preserve_topology=True)
+    # Arcos simplificados pueden cruzarse: se vuelven a nodar antes de poligonizar
+    nodados = shapely.get_parts(shapely.union_all(simplificados))
+    caras = shapely.get_parts(shapely.polygonize(nodados))
+
+    duenio = np.full(len(caras), n, dtype=np.int64)
+    if len(caras):
+        idx_cara, idx_poly = tree_m.query(shapely.point_on_surface(caras), predicate="within")
+        np.minimum.at(duenio, idx_cara, idx_poly)
+
+    salida = np.empty(n, dtype=object)
+    for i in range(n):
+        propias = caras[duenio == i]
+        if len(propias):
+            salida[i] = shapely.union_all(propias)
+        else:
+            # Polígono colapsado por la tolerancia: simplificación individual
+            salida[i] = shapely.simplify(geoms_m[i], tol_m, preserve_topology=True)
+    return shapely.transform(proyeccion.desproyectar(salida), lambda c: np.round(c, _DECIMALES))
+
+
+# ==================== SERIALIZACIÓN ====================
+
+@dataclass
+class Representacion:
+    """Cuerpo GeoJSON ya serializado y comprimido, con su ETag."""
+
+    cuerpo: bytes
+    gzip: bytes
+    br: Optional[bytes]
+    etag: str  # sin comillas; el de cada codificación lleva sufijo
+
+    @classmethod
+    def de_cuerpo(cls, cuerpo: bytes, *, nivel_gzip: int = 9, calidad_br: int = 11) -> "Representacion":
+        return cls(
+            cuerpo=cuerpo,
+            gzip=gzip.compress(cuerpo, compresslevel=nivel_gzip, mtime=0),
+            br=brotli.compress(cuerpo, quality=calidad_br) if brotli is not None else None,
+            etag=hashlib.sha256(cuerpo).hexdigest()[:32],
+        )
+
+    def para(self, accept_encoding: str) -> tuple[bytes, Optional[str], str]:
+        """``(bytes, content-encoding o None, etag con comillas)`` según ``Accept-Encoding``."""
+        aceptadas = {
+            parte.split(";")[0].strip().lower()
+            for parte in (accept_encoding or "").split(",")
+            if not parte.strip().endswith(";q=0")
+        }
+        if self.br is not None and "br" in aceptadas:
+            return self.br, "br", f'"{self.etag}-br"'
+        if "gzip" in aceptadas:
+            return self.gzip, "gzip", f'"{self.etag}-gz"'
+        return self.cuerpo, None, f'"{self.etag}"'
+
+
+def _features(geoms: Sequence, names: Sequence[Optional[str]]) -> list[str]:
+    textos = shapely.to_geojson(np.asarray(geoms, dtype=object))
+    return [
+        '{"type":"Feature","id":%d,"properties":%s,"geometry":%s}'
+        % (i, json.dumps({"id": i, "nombre": nombre}, ensure_ascii=False, separators=(",", ":")), geom)
+        for i, (nombre, geom) in enumerate(zip(names, textos))
+    ]
+
+
+def _coleccion(features: Sequence[str]) -> bytes:
+    # Un feature por línea: el archivo en disco se vuelve a partir sin parsear JSON
+    return ('{"type":"FeatureCollection","features":[\n' + ",\n".join(features) + "\n]}").encode("utf-8")
+
+
+def _separar(cuerpo: bytes) -> list[str]:
+    lineas = cuerpo.decode("utf-8").split("\n")[1:-1]
+    return [linea[:-1] if linea.endswith(",") else linea for linea in lineas]
+
+
+@dataclass
+class Nivel:
+    zoom: int
+    features: list[str]
+    completo: Representacion
+    # STRtree (en grados) de la generación de polígonos con la que se
+    # construyó el nivel: ``recortar`` lo consulta a él y no al índice vivo,
+    # que una recarga de basemaps puede haber reemplazado.
+    tree: Optional[STRtree] = None
+
+
+def construir_nivel(geoms_m: Sequence, names: Sequence[Optional[str]], zoom: int, tree_m: Optional[STRtree] = None) -> Nivel:
+    features = _features(simplificar(geoms_m, tolerancia_m(zoom), tree_m), names)
+    return Nivel(zoom=zoom, features=features, completo=Representacion.de_cuerpo(_coleccion(features)))
+
+
+# ==================== CACHÉ EN DISCO ====================
+
+def _prefijo_cache(ruta_geojson: str, variante: str, zoom: int) -> str:
+    stem = os.path.splitext(os.path.basename(ruta_geojson))[0]
+    return os.path.join(basemap_cache.cache_dir(), f"{stem}.{variante}.contornos-z{zoom}")
+
+
+def _purgar_obsoletas(prefijo: str, *vigentes: str) -> None:
+    """Borra las versiones viejas (otro hash de GeoJSON o formato) del mismo nivel."""
+    conservar = {os.path.abspath(v) for v in vigentes}
+    for viejo in glob.glob(f"{prefijo}.v*.json.*"):
+        if os.path.abspath(viejo) not in conservar:
+            try:
+                os.remove(viejo)
+            except OSError:
+                pass
+
+
+def cargar_nivel(
+    ruta_geojson: str,
+    variante: str,
+    zoom: int,
+    geoms_m: Sequence,
+    names: Sequence[Optional[str]],
+    *,
+    tree_m: Optional[STRtree] = None,
+    reconstruir: bool = False,
+) -> Nivel:
+    """
+    Nivel de contornos desde la caché en disco (``.json.gz``, y ``.json.br``
+    si hay brotli) si existe para el hash actual del GeoJSON; si no, lo
+    calcula y lo guarda. Mismo contrato que ``basemap_cache.cargar_con_cache``:
+    la caché nunca es necesaria, ante cualquier error se recalcula.
+    """
+    if not basemap_cache.cache_habilitada():
+        return construir_nivel(geoms_m, names, zoom, tree_m)
+    try:
+        digest = basemap_cache.hash_archivo(ruta_geojson)
+    except OSError:
+        return construir_nivel(geoms_m, names, zoom, tree_m)
+
+    prefijo = _prefijo_cache(ruta_geojson, variante, zoom)
+    ruta = f"{prefijo}.v{_FORMATO}.{digest[:16]}.json.gz"
+    ruta_br = f"{prefijo}.v{_FORMATO}.{digest[:16]}.json.br"
+    if not reconstruir and os.path.exists(ruta):
+        try:
+            with open(ruta, "rb") as f:
+                comprimido = f.read()
+            cuerpo = gzip.decompress(comprimido)
+            br = None
+            if brotli is not None:
+                if os.path.exists(ruta_br):
+                    with open(ruta_br, "rb") as f:
+                        br = f.read()
+                else:
+                    br = brotli.compress(cuerpo, quality=11)
+            rep = Representacion(cuerpo, comprimido, br, hashlib.sha256(cuerpo).hexdigest()[:32])
+            return Nivel(zoom=zoom, features=_separar(cuerpo), completo=rep)
+        except Exception as e:
+            print(f"⚠️ Caché de contornos inválida '{ruta}', se reconstruye: {e}")
+
+    resultado = construir_nivel(geoms_m, names, zoom, tree_m)
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        for destino, datos in ((ruta, resultado.completo.gzip), (ruta_br, resultado.completo.br)):
+            if datos is None:
+                continue
+            tmp = f"{destino}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(datos)
+            os.replace(tmp, destino)
+        _purgar_obsoletas(prefijo, ruta, ruta_br)
+    except Exception as e:
+        print(f"⚠️ No se pudo escribir la caché de contornos '{ruta}': {e}")
+    return resultado
+
+
+# ==================== CAPAS DE LA API ====================
+
+# capa → (GeoJSON en basemaps/, propiedad de nombre); mismas que artefacto_360_routes
+CAPAS: dict[str, tuple[str, str]] = {
+    "barrios": ("barrios_veredas.geojson", "barrio_vereda"),
+    "comunas": ("comunas_corregimientos.geojson", "comuna_corregimiento"),
+}
+
+_NIVELES: dict[tuple[str, int], Nivel] = {}
+_NIVELES_LOCK = threading.Lock()
+
+
+def _indice(capa: str):
+    # Import diferido: las rutas cargan los basemaps (y Firebase) al importarse
+    from app.routes import artefacto_360_routes as art
+
+    return {"barrios": art._BARRIOS_SPATIAL, "comunas": art._COMUNAS_SPATIAL}[capa]
+
+
+def nivel_cacheado(capa: str, zoom: int) -> Optional[Nivel]:
+    """El nivel si ya está en memoria (sin construir nada); None si no."""
+    return _NIVELES.get((capa, zoom_precalculado(zoom)))
+
+
+def nivel(capa: str, zoom: int) -> Nivel:
+    """Nivel precalculado de ``capa`` para ``zoom`` (se construye en el primer uso)."""
+    z = zoom_precalculado(zoom)
+    clave = (capa, z)
+    existente = _NIVELES.get(clave)
+    if existente is not None:
+        return existente
+    with _NIVELES_LOCK:
+        existente = _NIVELES.get(clave)
+        if existente is None:
+            archivo, propiedad = CAPAS[capa]
+            indice = _indice(capa)
+            existente = cargar_nivel(
+                os.path.join(basemap_cache.BASEMAPS_DIR, archivo),
+                propiedad,
+                z,
+                indice.geoms_m,
+                indice.names,
+                tree_m=indice.tree_m,
+            )
+            existente.tree = indice.tree
+            _NIVELES[clave] = existente
+    return existente
+
+
+def recortar(capa: str, zoom: int, bbox: tuple[float, float, float, float]) -> Representacion:
+    """Solo los polígonos de ``capa`` que intersectan ``bbox`` (lon_min, lat_min, lon_max, lat_max)."""
+    n = nivel(capa, zoom)
+    if n.tree is None:
+        ids = np.empty(0, dtype=np.intp)
+    else:
+        ids = np.sort(n.tree.query(shapely.box(*bbox), predicate="intersects"))
+    # Recorte bajo demanda: compresión más liviana que la de los niveles precalculados
+    return Representacion.de_cuerpo(_coleccion([n.features[i] for i in ids]), nivel_gzip=6, calidad_br=5)
+
+
+def limpiar() -> None:
+    """Descarta los niveles en memoria (p. ej. tras recargar los basemaps)."""
+    with _NIVELES_LOCK:
+        _NIVELES.clear()
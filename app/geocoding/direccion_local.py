@@ -0,0 +1,243 @@
+"""
+Geocodificador directo local (sin red) a partir de los cruces viales.
+
+La mayoría de direcciones que llegan tienen la forma de la nomenclatura
+urbana colombiana::
+
+    Calle 5 # 38-20     →  vía principal "CL 5", vía generadora "38",
+                           placa 20 (metros desde el cruce con la 38)
+    Calle 5 con Carrera 38  →  cruce explícito
+
+``cruces_ejes_viales.geojson`` (cargado por ``spatial_index``) ya trae los
+cruces con nombre ``"CL 5 con KR 38"``. ``IndiceCruces`` construye:
+
+- ``pares``: hash de par no ordenado de vías normalizadas → cruce, para
+  resolver principal + generadora en O(1);
+- ``por_via``: por cada vía, sus cruces ordenados por la numeración de la
+  vía que la corta, para encontrar el cruce siguiente.
+
+La coordenada se obtiene partiendo del cruce principal/generadora y
+avanzando ``placa`` metros sobre la principal hacia el cruce siguiente
+(numeración creciente de la generadora); si no hay siguiente, alejándose
+del anterior. Sin placa (o con cruce explícito) se devuelve el cruce.
+
+La vía generadora no trae tipo en la dirección ("# 38-20"): se prueban los
+tipos que cortan a la principal según ``_GENERADORAS`` (a una Calle la
+cortan Carreras, Transversales, ...).
+
+``spatial_index`` construye el índice al cargar los cruces
+(``geocodificar_direccion_local``) y ``geocodificar_direccion_cali`` lo
+consulta antes de los proveedores externos; un fallo aquí (dirección no
+parseable o cruce inexistente) solo significa que se sigue a la red.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from app.geocoding import proyeccion
+
+# Tipo de vía escrito en la dirección → abreviatura de los nombres de cruces.
+# "CR" en una dirección es Carrera (como en _ABREVIACIONES_VIA); en los cruces
+# "CR" es Circular, que en direcciones se escribe completo.
+_TIPOS_DIRECCION: dict[str, str] = {
+    "CALLE": "CL", "CLL": "CL", "CL": "CL",
+    "CARRERA": "KR", "CRA": "KR", "KRA": "KR", "KR": "KR", "CR": "KR",
+    "DIAGONAL": "DG", "DIAG": "DG", "DG": "DG",
+    "TRANSVERSAL": "TV", "TRANSV": "TV", "TV": "TV", "TR": "TV",
+    "AVENIDA": "AV", "AV": "AV", "AVDA": "AV",
+    "AUTOPISTA": "AK", "AK": "AK",
+    "CIRCULAR": "CR", "CQ": "CR",
+}
+# Abreviaturas usadas en cruces_ejes_viales (spatial_index._ABREV_TO_TIPO).
+_TIPOS_CRUCE = {"CL", "KR", "DG", "TV", "AK", "AV", "CR"}
+
+# Tipos de vía que pueden cortar a cada principal, en orden de preferencia.
+_GENERADORAS: dict[str, tuple[str, ...]] = {
+    "CL": ("KR", "TV", "AK", "AV", "DG"),
+    "DG": ("TV", "KR", "AK", "AV", "CL"),
+    "KR": ("CL", "DG", "AV", "TV"),
+    "TV": ("DG", "CL", "AV", "KR"),
+    "AK": ("CL", "DG", "AV"),
+    "AV": ("KR", "CL", "TV", "DG", "AK"),
+    "CR": ("CL", "KR", "TV", "DG"),
+}
+
+_CUADRANTES = {"NORTE": "N", "SUR": "S", "ESTE": "E", "OESTE": "O"}
+
+# Número de vía: 38, 38A, 38 BIS, 38A BIS B, 72A NORTE, 5 OESTE
+_NUM = (
+    r"(\d{1,3})\s?([A-Z](?![A-Z]))?(?:\s?(BIS)(?![A-Z]))?\s?([A-Z](?![A-Z]))?"
+    r"(?:\s(NORTE|SUR|OESTE|ESTE)\b)?"
+)
+_TIPO = r"([A-Z]+)\.?"
+_RE_NUMERO = re.compile(rf"^{_NUM}$")
+_RE_PLACA = re.compile(
+    rf"\b{_TIPO}\s+{_NUM}\s*(?:#|N[O°º]\.?|NRO\.?|NUMERO)\s*{_NUM}\s*-\s*(\d{{1,3}})\b"
+)
+_RE_CRUCE = re.compile(rf"\b{_TIPO}\s+{_NUM}\s+(?:CON|&|Y|X)\s+{_TIPO}\s+{_NUM}(?=\s|,|$)")
+
+# No interpolar más allá de esta distancia aunque la placa sea mayor.
+_MAX_PLACA_M = 150.0
+
+
+def _normalizar(texto: str) -> str:
+    sin_tildes = "".join(
+        c for c in unicodedata.normalize("NFD", texto) if unicodedata.category(c) != "Mn"
+    )
+    return re.sub(r"\s+", " ", sin_tildes.upper()).strip()
+
+
+def _clave_numero(n: str, letra: Optional[str], bis: Optional[str], letra2: Optional[str], cuadrante: Optional[str]) -> str:
+    """'38', 'A', 'BIS', None, 'NORTE' → '38ABIS N'."""
+    clave = f"{int(n)}{letra or ''}{'BIS' if bis else ''}{letra2 or ''}"
+    return f"{clave} {_CUADRANTES[cuadrante]}" if cuadrante else clave
+
+
+def _orden_numero(clave_num: str) -> tuple:
+    """``(cuadrante, número, sufijo)``; dentro de un cuadrante 38 < 38A < 38ABIS < 38B < 39."""
+    num, _, cuadrante = clave_num.partition(" ")
+    m = re.match(r"(\d+)(\D*)", num)
+    return (cuadrante, int(m.group(1)), m.group(2))
+
+
+def _via_de_cruce(token: str) -> Optional[str]:
+    """'CL 72A NORTE' → 'CL 72A N'; None si no es una vía numerada."""
+    partes = _normalizar(token).split(None, 1)
+    if len(partes) != 2 or partes[0] not in _TIPOS_CRUCE:
+        return None
+    m = _RE_NUMERO.match(partes[1])
+    if not m:
+        return None
+    return f"{partes[0]} {_clave_numero(*m.groups())}"
+
+
+def _tipo_direccion(tipo: str) -> Optional[str]:
+    return _TIPOS_DIRECCION.get(tipo)
+
+
+@dataclass
+class DireccionParseada:
+    principal: str  # 'CL 5'
+    generadora: str  # '38A' (sin tipo) o 'KR 38A' si es un cruce explícito
+    placa_m: float
+
+
+def parsear(direccion: str) -> Optional[DireccionParseada]:
+    """Extrae vía principal, generadora y placa de una dirección; None si no aplica."""
+    texto = _normalizar(direccion)
+    m = _RE_PLACA.search(texto)
+    if m:
+        g = m.groups()
+        tipo = _tipo_direccion(g[0])
+        if tipo is not None:
+            return DireccionParseada(
+                principal=f"{tipo} {_clave_numero(*g[1:6])}",
+                generadora=_clave_numero(*g[6:11]),
+                placa_m=float(g[11]),
+            )
+    m = _RE_CRUCE.search(texto)
+    if m:
+        g = m.groups()
+        tipo_a, tipo_b = _tipo_direccion(g[0]), _tipo_direccion(g[6])
+        if tipo_a is not None and tipo_b is not None:
+            return DireccionParseada(
+                principal=f"{tipo_a} {_clave_numero(*g[1:6])}",
+                generadora=f"{tipo_b} {_clave_numero(*g[7:12])}",
+                placa_m=0.0,
+            )
+    return None
+
+
+class IndiceCruces:
+    """Índices de cruces por par no ordenado de vías y por vía."""
+
+    def __init__(self, nombres: list[str], xy_m: np.ndarray):
+        self.nombres = nombres
+        self.xy_m = np.asarray(xy_m, dtype=float).reshape(-1, 2)
+        self.pares: dict[frozenset, int] = {}
+        # vía → [(orden, tipo_otra, idx)] ordenado por la numeración de la otra vía
+        self.por_via: dict[str, list[tuple[tuple, str, int]]] = {}
+        for idx, nombre in enumerate(nombres):
+            partes = nombre.split(" con ")
+            if len(partes) != 2:
+                continue
+            a, b = _via_de_cruce(partes[0]), _via_de_cruce(partes[1])
+            if a is None or b is None or a == b:
+                continue
+            self.pares.setdefault(frozenset((a, b)), idx)
+            for via, otra in ((a, b), (b, a)):
+                tipo_otra, num_otra = otra.split(" ", 1)
+                self.por_via.setdefault(via, []).append((_orden_numero(num_otra), tipo_otra, idx))
+        for cruces in self.por_via.values():
+            cruces.sort()
+
+    def __len__(self) -> int:
+        return len(self.pares)
+
+    def cruce(self, principal: str, generadora: str) -> Optional[tuple[int, str]]:
+        """Cruce ``(idx, vía generadora con tipo)``; prueba los tipos de ``_GENERADORAS`` si falta el tipo."""
+        if generadora.split(" ", 1)[0] in _TIPOS_CRUCE:
+            idx = self.pares.get(frozenset((principal, generadora)))
+            return (idx, generadora) if idx is not None else None
+        for tipo in _GENERADORAS.get(principal.split(" ", 1)[0], ()):
+            via = f"{tipo} {generadora}"
+            idx = self.pares.get(frozenset((principal, via)))
+            if idx is not None:
+                return idx, via
+        return None
+
+    def _vecino(self, principal: str, generadora: str, siguiente: bool) -> Optional[int]:
+        """Cruce siguiente (o anterior) sobre ``principal`` con una vía del mismo tipo que ``generadora``."""
+        tipo, num = generadora.split(" ", 1)
+        actual = _orden_numero(num)
+        candidatos = [
+            (o, i) for o, t, i in self.por_via.get(principal, ())
+            if t == tipo and o[0] == actual[0] and o != actual
+        ]
+        if siguiente:
+            mayores = [c for c in candidatos if c[0] > actual]
+            return min(mayores)[1] if mayores else None
+        menores = [c for c in candidatos if c[0] < actual]
+        return max(menores)[1] if menores else None
+
+    def geocodificar(self, direccion: str) -> Optional[dict]:
+        """Coordenada de la dirección a partir de los cruces, o None si no se resuelve."""
+        p = parsear(direccion)
+        if p is None:
+            return None
+        hit = self.cruce(p.principal, p.generadora)
+        if hit is None:
+            return None
+        idx, via_generadora = hit
+        xy, interpolado = self.xy_m[idx], False
+        if p.placa_m > 0:
+            # Hacia el cruce siguiente, sin pasarlo; si no hay, alejándose del anterior
+            sig = self._vecino(p.principal, via_generadora, siguiente=True)
+            ant = None if sig is not None else self._vecino(p.principal, via_generadora, siguiente=False)
+            if sig is not None:
+                vector, tope = self.xy_m[sig] - xy, None
+            elif ant is not None:
+                vector, tope = xy - self.xy_m[ant], _MAX_PLACA_M
+            else:
+                vector = None
+            if vector is not None:
+                largo = float(np.hypot(*vector))
+                if largo > 0:
+                    avance = min(p.placa_m, _MAX_PLACA_M, largo if tope is None else tope)
+                    xy, interpolado = xy + vector / largo * avance, True
+        lon, lat = proyeccion.a_grados(xy[0], xy[1])
+        return {
+            "lat": float(lat),
+            "lon": float(lon),
+            "proveedor": "cruces_local",
+            "cruce": self.nombres[idx],
+            "via_principal": p.principal,
+            "via_generadora": via_generadora,
+            "placa_m": p.placa_m,
+            "interpolado": interpolado,
+        }
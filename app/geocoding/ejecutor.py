@@ -0,0 +1,141 @@
+"""
+Pool acotado de hilos para el trabajo CPU del geocoding.
+
+Las búsquedas locales (point-in-polygon robusto, cruces, inferencia de vía)
+son shapely/NumPy síncronos. Llamadas directamente desde un endpoint
+``async`` bloquean el event loop: un caso de borde lento (varios polígonos
+vecinos medidos) frena a todas las demás peticiones del worker. Aquí se
+ejecutan en un ``ThreadPoolExecutor`` dedicado y de tamaño fijo; shapely 2
+libera el GIL en las operaciones GEOS, así que los hilos avanzan en
+paralelo con el loop.
+
+- ``en_pool(fn, *args)``: ejecuta ``fn`` en el pool y lo espera. Reporta
+  el tiempo en cola (desde que se encola hasta que un hilo lo toma) y las
+  tareas pendientes a Prometheus (``GEOCODING_POOL_ESPERA`` /
+  ``GEOCODING_POOL_PENDIENTES``).
+- ``MemoLRU``: caché LRU thread-safe con consulta sin cómputo
+  (``obtener``), para que ``calcular`` responda los aciertos inline, sin
+  pasar por el pool, y solo mande los fallos.
+
+Variables de entorno:
+- ``GEOCODING_POOL_WORKERS``: hilos del pool (default ``min(4, CPUs)``);
+  ``0`` ejecuta todo inline en el loop (comportamiento anterior).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Hashable, Optional
+
+from app.routes.monitoring_routes import GEOCODING_POOL_ESPERA, GEOCODING_POOL_PENDIENTES
+
+_WORKERS = int(os.getenv("GEOCODING_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+_PENDIENTES = 0
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadPoolExecutor(max_workers=_WORKERS, thread_name_prefix="geocoding")
+    return _POOL
+
+
+def cerrar() -> None:
+    """Apaga el pool (shutdown de la app); se vuelve a crear en el próximo uso."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _actualizar_pendientes(delta: int) -> None:
+    global _PENDIENTES
+    with _POOL_LOCK:
+        _PENDIENTES += delta
+        n = _PENDIENTES
+    GEOCODING_POOL_PENDIENTES.set(n)
+
+
+def _medido(encolado: float, fn: Callable, args: tuple) -> Any:
+    GEOCODING_POOL_ESPERA.observe(time.perf_counter() - encolado)
+    return fn(*args)
+
+
+async def en_pool(fn: Callable, *args) -> Any:
+    """Ejecuta ``fn(*args)`` en el pool de geocoding (inline si el pool está desactivado)."""
+    if _WORKERS <= 0:
+        return fn(*args)
+    _actualizar_pendientes(1)
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_pool(), partial(_medido, time.perf_counter(), fn, args))
+    finally:
+        _actualizar_pendientes(-1)
+
+
+class MemoLRU:
+    """
+    Memoización LRU thread-safe de ``fn`` por argumentos posicionales.
+
+    Se usa como la función: ``memo(*args)`` calcula y guarda si falta.
+    ``obtener(*args)`` consulta sin calcular. ``cache_clear`` / ``cache_info``
+    imitan a ``functools.lru_cache``.
+    """
+
+    def __init__(self, fn: Callable, maxsize: int):
+        self.fn = fn
+        self.maxsize = maxsize
+        self._datos: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obtener(self, *args) -> tuple[bool, Any]:
+        """``(True, valor)`` si está en caché, ``(False, None)`` si no."""
+        with self._lock:
+            if args in self._datos:
+                self._datos.move_to_end(args)
+                self.hits += 1
+                return True, self._datos[args]
+        return False, None
+
+    def __call__(self, *args) -> Any:
+        hit, valor = self.obtener(*args)
+        if hit:
+            return valor
+        valor = self.fn(*args)
+        with self._lock:
+            self.misses += 1
+            self._datos[args] = valor
+            self._datos.move_to_end(args)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+        return valor
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+            self.hits = self.misses = 0
+
+    def cache_info(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "maxsize": self.maxsize, "currsize": len(self._datos)}
+
+
+async def calcular(memo: MemoLRU, *args) -> Any:
+    """Acierto de ``memo`` inline; fallo calculado en el pool (y guardado en ``memo``)."""
+    hit, valor = memo.obtener(*args)
+    if hit:
+        return valor
+    return await en_pool(memo, *args)
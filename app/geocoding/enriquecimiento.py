@@ -0,0 +1,128 @@
+"""
+Cola en segundo plano para enriquecimientos lentos (p. ej. Nominatim).
+
+El modo "local primero, OSM después" del reverse geocoder responde con los
+basemaps al instante y deja la consulta externa en esta cola. La cola:
+
+- coalesce claves duplicadas: mientras una clave está pendiente, volver a
+  encolarla no agrega trabajo (N usuarios en la misma esquina → 1 consulta);
+- tiene profundidad máxima (``max_pendientes``): el consumidor avanza al
+  ritmo del proveedor (1 req/s), así que sin tope cualquiera podría
+  acumular horas de trabajo y memoria con coordenadas distintas; con la
+  cola llena ``encolar`` rechaza la clave y el llamador reporta que no
+  quedó pendiente;
+- procesa de a un elemento por vez (la consulta externa ya está limitada a
+  1 req/s, paralelizar solo alargaría la espera en el throttle);
+- recuerda los últimos resultados (acotados por cantidad y antigüedad) para
+  que la consulta de seguimiento sepa si el trabajo terminó o falló;
+- reporta profundidad, tiempo de espera en cola y rechazos a métricas
+  opcionales (``Gauge`` / ``Histogram`` / ``Counter`` de prometheus_client).
+
+El consumidor es una tarea asyncio que se crea al encolar y termina cuando
+la cola queda vacía, así no queda atada a un event loop en particular.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Optional
+
+PENDIENTE = "pendiente"
+LISTO = "listo"
+FALLIDO = "fallido"
+RECHAZADO = "rechazado"  # cola llena: no se agendó, reintentar más tarde
+
+
+class ColaEnriquecimiento:
+    """Cola FIFO acotada con coalescencia por clave y un único consumidor."""
+
+    def __init__(
+        self,
+        procesar: Callable[..., Awaitable[Any]],
+        *,
+        max_pendientes: int = 1000,
+        max_resultados: int = 10000,
+        ttl_resultado_s: float = 900.0,
+        metrica_profundidad=None,
+        metrica_espera=None,
+        metrica_rechazos=None,
+    ):
+        self._procesar = procesar
+        self._max_pendientes = max_pendientes
+        self._max_resultados = max_resultados
+        self._ttl_resultado_s = ttl_resultado_s
+        self._metrica_profundidad = metrica_profundidad
+        self._metrica_espera = metrica_espera
+        self._metrica_rechazos = metrica_rechazos
+        self._cola: deque = deque()
+        self._pendientes: dict[str, float] = {}  # clave → ts de encolado
+        self._resultados: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._consumidor: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pendientes)
+
+    def _actualizar_profundidad(self) -> None:
+        if self._metrica_profundidad is not None:
+            self._metrica_profundidad.set(len(self._pendientes))
+
+    def encolar(self, clave: str, *args) -> bool:
+        """
+        Agenda ``procesar(*args)`` para ``clave``. Devuelve False si la clave
+        ya estaba pendiente (se coalesce con el trabajo existente) o si la
+        cola llegó a ``max_pendientes`` (se rechaza y se cuenta en
+        ``metrica_rechazos``). Debe llamarse desde un event loop en ejecución.
+        """
+        if clave in self._pendientes:
+            return False
+        if len(self._pendientes) >= self._max_pendientes:
+            if self._metrica_rechazos is not None:
+                self._metrica_rechazos.inc()
+            return False
+        self._pendientes[clave] = time.monotonic()
+        self._cola.append((clave, args))
+        self._actualizar_profundidad()
+        if self._consumidor is None or self._consumidor.done():
+            self._consumidor = asyncio.get_running_loop().create_task(self._consumir())
+        return True
+
+    def resultado(self, clave: str) -> tuple[Optional[str], Any]:
+        """
+        ``(estado, valor)`` de la clave: ``PENDIENTE``, ``LISTO`` (valor no
+        nulo), ``FALLIDO`` (el procesamiento devolvió None o lanzó error) o
+        ``(None, None)`` si la cola no sabe nada de ella.
+        """
+        if clave in self._pendientes:
+            return PENDIENTE, None
+        hit = self._resultados.get(clave)
+        if hit is None:
+            return None, None
+        ts, valor = hit
+        if time.monotonic() - ts > self._ttl_resultado_s:
+            self._resultados.pop(clave, None)
+            return None, None
+        return (LISTO if valor is not None else FALLIDO), valor
+
+    async def _consumir(self) -> None:
+        while self._cola:
+            clave, args = self._cola.popleft()
+            encolado = self._pendientes.get(clave, time.monotonic())
+            if self._metrica_espera is not None:
+                self._metrica_espera.observe(time.monotonic() - encolado)
+            try:
+                valor = await self._procesar(*args)
+            except Exception as e:
+                print(f"⚠️ Enriquecimiento de '{clave}' falló: {e}")
+                valor = None
+            self._resultados[clave] = (time.monotonic(), valor)
+            self._resultados.move_to_end(clave)
+            while len(self._resultados) > self._max_resultados:
+                self._resultados.popitem(last=False)
+            self._pendientes.pop(clave, None)
+            self._actualizar_profundidad()
+
+    async def drenar(self) -> None:
+        """Espera a que se procese todo lo encolado (útil en tests y al apagar)."""
+        while self._consumidor is not None and not self._consumidor.done():
+            await asyncio.shield(self._consumidor)
@@ -0,0 +1,91 @@
+"""
+Geohash para consultas por radio sobre Firestore.
+
+Firestore no tiene índices geoespaciales: para buscar documentos cerca de
+un punto se guarda el geohash de cada coordenada (un string cuyo prefijo
+identifica una celda de la grilla) y se consulta por rangos de prefijo
+(``geohash >= p`` y ``geohash <= p + "~"``). ``rangos_radio`` devuelve los
+prefijos de las celdas que cubren el círculo; los candidatos se filtran
+después por distancia exacta (``distancia_m``), porque las celdas cubren
+también las esquinas fuera del radio.
+"""
+from __future__ import annotations
+
+import math
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 9  # celdas de ~4.8 m × 4.8 m: la que se guarda en cada documento
+_METROS_POR_GRADO = 111320.0
+_RADIO_TIERRA_M = 6371008.8
+# Mayor que cualquier carácter base32: cierra el rango de un prefijo
+FIN_DE_PREFIJO = "~"
+
+
+def codificar(lat: float, lng: float, precision: int = PRECISION) -> str:
+    """Geohash de ``(lat, lng)`` con ``precision`` caracteres."""
+    lat_min, lat_max = -90.0, 90.0
+    lng_min, lng_max = -180.0, 180.0
+    bits = []
+    for i in range(precision * 5):
+        if i % 2 == 0:  # bits pares: longitud
+            medio = (lng_min + lng_max) / 2
+            bits.append(lng >= medio)
+            lng_min, lng_max = (medio, lng_max) if lng >= medio else (lng_min, medio)
+        else:
+            medio = (lat_min + lat_max) / 2
+            bits.append(lat >= medio)
+            lat_min, lat_max = (medio, lat_max) if lat >= medio else (lat_min, medio)
+    return "".join(
+        _BASE32[sum(int(b) << (4 - j) for j, b in enumerate(bits[k:k + 5]))]
+        for k in range(0, len(bits), 5)
+    )
+
+
+def tamano_celda(precision: int) -> tuple[float, float]:
+    """``(alto, ancho)`` en grados de una celda de ``precision`` caracteres."""
+    bits = precision * 5
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def _precision_para(radio_m: float, lat: float) -> int:
+    """Mayor precisión cuyas celdas miden al menos ``radio_m`` por lado (≤ 3 × 3 celdas por círculo)."""
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    for precision in range(PRECISION, 0, -1):
+        alto, ancho = tamano_celda(precision)
+        if alto * _METROS_POR_GRADO >= radio_m and ancho * _METROS_POR_GRADO * cos_lat >= radio_m:
+            return precision
+    return 1
+
+
+def rangos_radio(lat: float, lng: float, radio_m: float) -> list[tuple[str, str]]:
+    """
+    Rangos ``(inicio, fin)`` de geohash que cubren el círculo de ``radio_m``
+    alrededor de ``(lat, lng)``: uno por celda que toca su bbox, ordenados
+    y sin repetir.
+    """
+    precision = _precision_para(radio_m, lat)
+    alto, ancho = tamano_celda(precision)
+    dlat = radio_m / _METROS_POR_GRADO
+    dlng = radio_m / (_METROS_POR_GRADO * max(math.cos(math.radians(lat)), 1e-6))
+    lat_min, lat_max = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    lng_min, lng_max = max(lng - dlng, -180.0), min(lng + dlng, 180.0)
+
+    def _celdas(v_min, v_max, origen, paso, tope):
+        i0 = int((v_min - origen) // paso)
+        i1 = min(int((v_max - origen) // paso), tope - 1)
+        return [origen + (i + 0.5) * paso for i in range(i0, i1 + 1)]
+
+    prefijos = {
+        codificar(la, lo, precision)
+        for la in _celdas(lat_min, lat_max, -90.0, alto, round(180.0 / alto))
+        for lo in _celdas(lng_min, lng_max, -180.0, ancho, round(360.0 / ancho))
+    }
+    return [(p, p + FIN_DE_PREFIJO) for p in sorted(prefijos)]
+
+
+def distancia_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distancia geodésica (haversine) en metros."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * _RADIO_TIERRA_M * math.asin(math.sqrt(a))
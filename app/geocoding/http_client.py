@@ -0,0 +1,165 @@
+"""
+Clientes HTTP compartidos para los proveedores externos de geocoding.
+
+Antes cada consulta abría su propio ``httpx.AsyncClient`` (TCP + TLS nuevos
+por llamada). Aquí hay un cliente por proveedor para toda la vida de la
+aplicación, con keep-alive y su propio tope de conexiones (``_LIMITES``),
+de modo que un proveedor lento no acapare el pool de los demás.
+
+Encima, ``single_flight`` coalesce consultas idénticas concurrentes: la
+segunda petición con la misma clave espera el resultado de la primera en
+vez de repetir la llamada al proveedor, y ``turno`` serializa las llamadas
+a un proveedor con intervalo mínimo (Nominatim: 1 req/s para reverse y
+search juntos, como exige su política de uso).
+
+Ciclo de vida: ``iniciar()`` / ``cerrar()`` se enganchan al startup /
+shutdown de FastAPI (``app.main``). Si se usa fuera de la app (scripts,
+tests) el cliente se crea a demanda. Un cliente queda atado al event loop
+en el que se creó; si cambia el loop se crea uno nuevo. Cada cliente tiene
+una tarea guardiana en su loop que lo cierra cuando el loop cancela sus
+tareas al terminar (``asyncio.run``, los portales de anyio del
+``TestClient``), así el reemplazado no deja su pool de conexiones abierto:
+pasado ese punto ya no se puede cerrar desde otro loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+import httpx
+
+USER_AGENT = "catatrack-api/1.0 (contacto: catatrack@cali.gov.co)"
+
+# Conexiones simultáneas y keep-alive por proveedor. Nominatim exige 1 req/s,
+# no tiene sentido abrirle más de un par de conexiones.
+_LIMITES: dict[str, httpx.Limits] = {
+    "nominatim": httpx.Limits(max_connections=2, max_keepalive_connections=2, keepalive_expiry=60.0),
+    "photon": httpx.Limits(max_connections=8, max_keepalive_connections=4, keepalive_expiry=60.0),
+    "arcgis": httpx.Limits(max_connections=8, max_keepalive_connections=4, keepalive_expiry=60.0),
+}
+_LIMITES_DEFAULT = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=30.0)
+_TIMEOUT_DEFAULT = httpx.Timeout(12.0, connect=5.0)
+
+_CLIENTES: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+_EN_VUELO: dict[Hashable, asyncio.Future] = {}
+_TURNOS: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = {}
+_ULTIMA_LLAMADA: dict[str, float] = {}
+_GUARDIANES: set[asyncio.Task] = set()
+
+
+async def _guardian(c: httpx.AsyncClient) -> None:
+    """Espera hasta que cancelen las tareas del loop y entonces cierra ``c``."""
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await c.aclose()
+
+
+def cliente(proveedor: str) -> httpx.AsyncClient:
+    """Cliente compartido del proveedor para el event loop actual."""
+    loop = asyncio.get_running_loop()
+    actual = _CLIENTES.get(proveedor)
+    if actual is not None and actual[0] is loop and not actual[1].is_closed:
+        return actual[1]
+    nuevo = httpx.AsyncClient(
+        timeout=_TIMEOUT_DEFAULT,
+        limits=_LIMITES.get(proveedor, _LIMITES_DEFAULT),
+        headers={"User-Agent": USER_AGENT},
+    )
+    _CLIENTES[proveedor] = (loop, nuevo)
+    tarea = loop.create_task(_guardian(nuevo))
+    _GUARDIANES.add(tarea)
+    tarea.add_done_callback(_GUARDIANES.discard)
+    return nuevo
+
+
+async def iniciar() -> None:
+    """Crea los clientes de los proveedores conocidos (startup de la app)."""
+    for proveedor in _LIMITES:
+        cliente(proveedor)
+
+
+async def cerrar() -> None:
+    """Cierra todos los clientes (shutdown de la app)."""
+    loop = asyncio.get_running_loop()
+    for proveedor, (loop_cliente, c) in list(_CLIENTES.items()):
+        if loop_cliente is loop:
+            await c.aclose()
+        _CLIENTES.pop(proveedor, None)
+
+
+@asynccontextmanager
+async def turno(proveedor: str, intervalo_s: float):
+    """
+    Serializa las llamadas a ``proveedor`` dejando al menos ``intervalo_s``
+    entre el fin de una y el inicio de la siguiente (en este proceso).
+    """
+    loop = asyncio.get_running_loop()
+    actual = _TURNOS.get(proveedor)
+    if actual is None or actual[0] is not loop:
+        actual = _TURNOS[proveedor] = (loop, asyncio.Lock())
+    async with actual[1]:
+        delta = time.time() - _ULTIMA_LLAMADA.get(proveedor, 0.0)
+        if delta < intervalo_s:
+            await asyncio.sleep(intervalo_s - delta)
+        try:
+            yield
+        finally:
+            _ULTIMA_LLAMADA[proveedor] = time.time()
+
+
+async def single_flight(clave: Hashable, fabrica: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Ejecuta ``fabrica()`` una sola vez por ``clave`` mientras haya una
+    ejecución en curso; las llamadas concurrentes con la misma clave reciben
+    el mismo resultado (o la misma excepción). Cancelar a un llamador no
+    cancela la ejecución compartida.
+    """
+    loop = asyncio.get_running_loop()
+    clave = (id(loop), clave)
+    fut = _EN_VUELO.get(clave)
+    if fut is None:
+        fut = asyncio.ensure_future(fabrica())
+        _EN_VUELO[clave] = fut
+        fut.add_done_callback(lambda _f, k=clave: _EN_VUELO.pop(k, None))
+    return await asyncio.shield(fut)
+
+
+async def get_json(
+    proveedor: str,
+    url: str,
+    params: Optional[dict] = None,
+    *,
+    headers: Optional[dict] = None,
+    timeout: Optional[float] = None,
+    intervalo_s: Optional[float] = None,
+) -> Any:
+    """
+    GET con el cliente compartido del proveedor y coalescencia de peticiones
+    idénticas concurrentes. Con ``intervalo_s`` la petición espera su
+    ``turno`` (las coalescidas no consumen turno). Devuelve el JSON de la
+    respuesta; lanza ``httpx.HTTPStatusError`` ante status != 2xx y
+    cualquier error de red.
+    """
+    params = params or {}
+    clave = (proveedor, url, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+    async def _get() -> Any:
+        kwargs: dict = {"params": params}
+        if headers:
+            kwargs["headers"] = headers
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        r = await cliente(proveedor).get(url, **kwargs)
+        r.raise_for_status()
+        return r.json()
+
+    async def _pedir() -> Any:
+        if intervalo_s is None:
+            return await _get()
+        async with turno(proveedor, intervalo_s):
+            return await _get()
+
+    return await single_flight(clave, _pedir)
@@ -0,0 +1,170 @@
+"""
+Índice espacial compartido para point-in-polygon sobre los basemaps de Cali.
+
+``PolygonIndex`` envuelve una capa de polígonos ``[(polygon, nombre), ...]``
+(geometrías y valores de ``basemap_cache.cargar_poligonos``) con:
+
+- un ``STRtree`` sobre los polígonos, para que cada consulta solo evalúe los
+  pocos candidatos cuyo bbox contiene el punto, y
+- geometrías preparadas (``shapely.prepare``), que aceleran los predicados
+  repetidos ``contains`` sobre el mismo polígono.
+
+Semántica idéntica al recorrido lineal que reemplaza: si varios polígonos
+contienen el punto gana el de menor posición en la lista original.
+
+También mantiene la capa en la proyección métrica local
+(``proyeccion.proyectar``: geometrías, bordes y un segundo STRtree en
+metros) y precomputa el grafo de adyacencia (``adyacentes[i]``: polígonos
+que tocan o se solapan con ``i``), para que la búsqueda de vecinos de
+``*_robusto`` solo mida los polígonos realmente cercanos y lo haga con
+distancias vectorizadas en metros.
+
+Opcionalmente se le engancha una grilla raster precomputada
+(``raster_grid.activar``): las celdas interiores se responden con un índice
+de arreglo y solo las celdas de borde caen al test geométrico.
+
+Lo usan tanto la captura legacy (``geolocate_point``) como el reverse
+geocoder (``spatial_index.barrio_de`` / ``comuna_de`` / ``*_robusto``), de
+modo que cada capa se indexa una sola vez por proceso.
+"""
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+from app.geocoding import proyeccion
+
+
+class PolygonIndex:
+    """STRtree + geometrías preparadas sobre una capa ``[(polygon, nombre)]``."""
+
+    def __init__(self, polygons: Sequence[tuple]):
+        self.polygons: list[tuple] = list(polygons)
+        self.geoms = np.array([g for g, _ in self.polygons], dtype=object)
+        self.names: list[Optional[str]] = [n for _, n in self.polygons]
+        if len(self.geoms):
+            shapely.prepare(self.geoms)
+        self.tree: Optional[STRtree] = STRtree(self.geoms) if len(self.geoms) else None
+        # Capa en metros (proyección local) para distancias y consultas por radio
+        self.geoms_m = proyeccion.proyectar(self.geoms) if len(self.geoms) else self.geoms
+        self.bordes_m = shapely.boundary(self.geoms_m) if len(self.geoms) else self.geoms
+        self.tree_m: Optional[STRtree] = STRtree(self.geoms_m) if len(self.geoms) else None
+        self.adyacentes: list[np.ndarray] = self._grafo_adyacencia()
+        # raster_grid.RasterLayer opcional; None = siempre test geométrico exacto
+        self.raster = None
+
+    def __len__(self) -> int:
+        return len(self.polygons)
+
+    def _grafo_adyacencia(self) -> list[np.ndarray]:
+        vecinos: list[list[int]] = [[] for _ in range(len(self.geoms))]
+        if self.tree is not None:
+            a, b = self.tree.query(self.geoms, predicate="intersects")
+            for i, j in zip(a.tolist(), b.tolist()):
+                if i != j:
+                    vecinos[i].append(j)
+        return [np.array(sorted(v), dtype=np.intp) for v in vecinos]
+
+    def en_radio(self, lon: float, lat: float, radio_m: float) -> np.ndarray:
+        """Índices (ordenados) de los polígonos a ≤ ``radio_m`` metros del punto."""
+        if self.tree_m is None:
+            return np.empty(0, dtype=np.intp)
+        idxs = self.tree_m.query(proyeccion.punto_m(lon, lat), predicate="dwithin", distance=radio_m)
+        idxs.sort()
+        return idxs
+
+    def distancias_m(self, lon: float, lat: float, idxs) -> np.ndarray:
+        """Distancia (m) del punto a cada polígono de ``idxs`` (0 si está dentro)."""
+        return shapely.distance(self.geoms_m[idxs], proyeccion.punto_m(lon, lat))
+
+    def distancia_borde_m(self, i: int, lon: float, lat: float) -> float:
+        """Distancia (m) del punto al borde del polígono ``i``."""
+        return float(shapely.distance(self.bordes_m[i], proyeccion.punto_m(lon, lat)))
+
+    def mas_cercano(self, lon: float, lat: float) -> tuple[Optional[int], float]:
+        """
+        ``(índice, distancia_m)`` del polígono más cercano al punto (0 si lo
+        contiene); ante empates gana el de menor posición en la capa.
+        """
+        if self.tree_m is None:
+            return None, float("inf")
+        idxs, dists = self.tree_m.query_nearest(proyeccion.punto_m(lon, lat), return_distance=True)
+        if not len(idxs):
+            return None, float("inf")
+        return int(idxs.min()), float(dists[0])
+
+    def candidatos(self, lon: float, lat: float) -> np.ndarray:
+        """Índices (ordenados) de los polígonos cuyo bbox contiene el punto."""
+        if self.tree is None:
+            return np.empty(0, dtype=np.intp)
+        idxs = self.tree.query(shapely.points(lon, lat))
+        idxs.sort()
+        return idxs
+
+    def contenedor(self, lon: float, lat: float) -> Optional[int]:
+        """Índice del primer polígono (en orden de la capa) que contiene el punto."""
+        if self.raster is not None:
+            v = self.raster.valor(lon, lat)
+            if v >= 0:
+                return v
+            if v == -1:  # raster_grid.SIN_POLIGONO
+                return None
+        for i in self.candidatos(lon, lat):
+            if shapely.contains_xy(self.geoms[i], lon, lat):
+                return int(i)
+        return None
+
+    def contenedores(self, lons, lats) -> np.ndarray:
+        """
+        Versión vectorizada de ``contenedor`` para arreglos de coordenadas.
+
+        Una sola consulta bulk al STRtree genera los pares (punto, polígono)
+        por bbox; ``contains_xy`` los filtra en bloque y por cada punto se
+        conserva el polígono de menor índice. Devuelve un arreglo ``int64``
+        alineado con la entrada, con ``-1`` donde ningún polígono contiene
+        el punto.
+        """
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        n = len(lons)
+        out = np.full(n, -1, dtype=np.int64)
+        if self.tree is None or n == 0:
+            return out
+        pendientes = np.arange(n)
+        if self.raster is not None:
+            v = self.raster.valores_en(lons, lats)
+            resueltos = v >= -1  # índice o SIN_POLIGONO; BORDE (-2) queda pendiente
+            out[resueltos] = v[resueltos]
+            pendientes = np.flatnonzero(~resueltos)
+            if not len(pendientes):
+                return out
+        idx_pt, idx_poly = self.tree.query(shapely.points(lons[pendientes], lats[pendientes]))
+        if not len(idx_pt):
+            return out
+        idx_pt = pendientes[idx_pt]
+        dentro = shapely.contains_xy(self.geoms[idx_poly], lons[idx_pt], lats[idx_pt])
+        idx_pt, idx_poly = idx_pt[dentro], idx_poly[dentro]
+        mejor = np.full(n, len(self.geoms), dtype=np.int64)
+        np.minimum.at(mejor, idx_pt, idx_poly)
+        hay = mejor < len(self.geoms)
+        out[hay] = mejor[hay]
+        return out
+
+    def nombres_en(self, lons, lats) -> list[Optional[str]]:
+        """Nombres (o None) para cada punto de los arreglos, en orden de entrada."""
+        return [self.names[i] if i >= 0 else None for i in self.contenedores(lons, lats)]
+
+    def nombre_en(self, lon: float, lat: float) -> Optional[str]:
+        """Nombre del polígono que contiene el punto, o None."""
+        i = self.contenedor(lon, lat)
+        return self.names[i] if i is not None else None
+
+    def polygon_en(self, lon: float, lat: float) -> tuple:
+        """``(polygon, nombre)`` del polígono que contiene el punto, o ``(None, None)``."""
+        i = self.contenedor(lon, lat)
+        if i is None:
+            return None, None
+        return self.polygons[i]
@@ -0,0 +1,80 @@
+"""
+Proyección métrica local para los basemaps de Cali.
+
+Equirectangular centrada en el centro de ``_CALI_BBOX`` y escalada a su
+latitud::
+
+    x = R · Δλ · cos(φ0)        y = R · Δφ        (radianes, R = 6 371 008.8 m)
+
+A estas latitudes (≈3.45°N) y dentro del bbox de Cali (±0.35°) el error de
+escala frente a haversine es < 0.05 %, es decir < 0.5 m por kilómetro, muy
+por debajo de la precisión de los propios basemaps. A cambio, distancias,
+buffers y vecinos más cercanos se resuelven con operaciones vectorizadas de
+shapely/NumPy directamente en metros, sin conversiones grados↔metros
+aproximadas ni haversine por candidato.
+
+Fuera de Cali la proyección se sigue pudiendo usar (p. ej. para medir lo
+lejos que queda un punto del basemap), con error que crece con la distancia
+en latitud al centro.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import shapely
+from shapely.geometry import Point
+
+# Centro de _CALI_BBOX (app.routes.artefacto_360_routes); se duplica para que
+# el módulo no dependa de importar la ruta.
+LON_0 = -76.475
+LAT_0 = 3.45
+
+_R = 6371008.8  # radio medio de la Tierra, el mismo de spatial_index._haversine_m
+_KX = _R * math.radians(1.0) * math.cos(math.radians(LAT_0))  # metros por grado de longitud
+_KY = _R * math.radians(1.0)  # metros por grado de latitud
+
+
+def a_metros(lons, lats) -> tuple[np.ndarray, np.ndarray]:
+    """(lon, lat) en grados → (x, y) en metros."""
+    return (np.asarray(lons, dtype=float) - LON_0) * _KX, (np.asarray(lats, dtype=float) - LAT_0) * _KY
+
+
+def a_grados(xs, ys) -> tuple[np.ndarray, np.ndarray]:
+    """(x, y) en metros → (lon, lat) en grados."""
+    return np.asarray(xs, dtype=float) / _KX + LON_0, np.asarray(ys, dtype=float) / _KY + LAT_0
+
+
+def _transformar(coords: np.ndarray) -> np.ndarray:
+    return (coords - (LON_0, LAT_0)) * (_KX, _KY)
+
+
+def proyectar(geoms):
+    """Geometría (o arreglo de geometrías) en grados → misma geometría en metros."""
+    return shapely.transform(geoms, _transformar)
+
+
+def _destransformar(coords: np.ndarray) -> np.ndarray:
+    return coords / (_KX, _KY) + (LON_0, LAT_0)
+
+
+def desproyectar(geoms):
+    """Inversa de ``proyectar``: geometría (o arreglo) en metros → grados."""
+    return shapely.transform(geoms, _destransformar)
+
+
+def punto_m(lon: float, lat: float) -> Point:
+    x, y = a_metros(lon, lat)
+    return Point(float(x), float(y))
+
+
+def puntos_m(lons, lats) -> np.ndarray:
+    """Arreglo de ``Point`` en metros para arreglos de coordenadas en grados."""
+    return shapely.points(*a_metros(lons, lats))
+
+
+def distancia_m(lon1, lat1, lon2, lat2):
+    """Distancia euclídea en el plano proyectado (escalares o arreglos)."""
+    x1, y1 = a_metros(lon1, lat1)
+    x2, y2 = a_metros(lon2, lat2)
+    return np.hypot(x2 - x1, y2 - y1)
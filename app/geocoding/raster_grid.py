@@ -0,0 +1,224 @@
+"""
+Grilla raster precomputada para asignar barrio/comuna en O(1) dentro del bbox de Cali.
+
+Casi todo el tráfico cae dentro de ``_CALI_BBOX``. La grilla divide ese bbox
+en celdas de ~20 m y guarda, por capa, el índice del polígono que contiene
+cada celda **completa**:
+
+- ``>= 0``: índice en la capa (mismo orden que ``_BARRIOS_POLYGONS`` /
+  ``_COMUNAS_POLYGONS``); toda la celda está dentro de ese polígono.
+- ``SIN_POLIGONO`` (-1): toda la celda está fuera de todos los polígonos.
+- ``BORDE`` (-2): algún borde de polígono cruza la celda (o una vecina), así
+  que la respuesta exige el test geométrico exacto.
+
+Una celda se marca ``BORDE`` si contiene un vértice del borde densificado
+(paso ≤ 1/4 de celda) o es vecina de una que lo contiene; en el resto de
+celdas ningún borde las atraviesa y la etiqueta de su centro vale para
+cualquier punto de la celda.
+
+La grilla es opcional: se genera offline con ``scripts/build_raster_grid.py``
+y se persiste como ``.npy`` (``(n_capas, ny, nx)``, cargado con
+``mmap_mode='r'`` para compartir páginas entre workers) más un ``.json`` de
+metadatos con el SHA-256 de cada GeoJSON de origen. Si el archivo no existe
+o los hashes no coinciden con los basemaps cargados, no se activa y todo
+sigue por el camino exacto de ``PolygonIndex``.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+from typing import Optional
+
+import numpy as np
+import shapely
+
+from app.geocoding.polygon_index import PolygonIndex
+
+SIN_POLIGONO = -1
+BORDE = -2
+
+_FORMATO = 1
+_METROS_POR_GRADO = 111320.0
+
+
+class RasterLayer:
+    """Vista georreferenciada sobre la grilla 2D ``(ny, nx)`` de una capa."""
+
+    def __init__(self, valores: np.ndarray, lon_min: float, lat_min: float, dlon: float, dlat: float):
+        self.valores = valores
+        self.lon_min = lon_min
+        self.lat_min = lat_min
+        self.dlon = dlon
+        self.dlat = dlat
+        self.ny, self.nx = valores.shape
+
+    def valor(self, lon: float, lat: float) -> int:
+        """Etiqueta de la celda del punto; ``BORDE`` si cae fuera de la grilla."""
+        ix = math.floor((lon - self.lon_min) / self.dlon)
+        iy = math.floor((lat - self.lat_min) / self.dlat)
+        if 0 <= ix < self.nx and 0 <= iy < self.ny:
+            return int(self.valores[iy, ix])
+        return BORDE
+
+    def valores_en(self, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+        """Versión vectorizada de ``valor``."""
+        ix = np.floor((lons - self.lon_min) / self.dlon).astype(np.int64)
+        iy = np.floor((lats - self.lat_min) / self.dlat).astype(np.int64)
+        dentro = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        out = np.full(len(lons), BORDE, dtype=np.int64)
+        out[dentro] = self.valores[iy[dentro], ix[dentro]]
+        return out
+
+
+def dimensiones(bbox: dict, celda_m: float) -> tuple[float, float, int, int]:
+    """``(dlon, dlat, nx, ny)`` para celdas de ~``celda_m`` metros sobre ``bbox``."""
+    lat_media = (bbox["lat_min"] + bbox["lat_max"]) / 2
+    dlat = celda_m / _METROS_POR_GRADO
+    dlon = celda_m / (_METROS_POR_GRADO * math.cos(math.radians(lat_media)))
+    nx = int(math.ceil((bbox["lon_max"] - bbox["lon_min"]) / dlon))
+    ny = int(math.ceil((bbox["lat_max"] - bbox["lat_min"]) / dlat))
+    return dlon, dlat, nx, ny
+
+
+def _marcar_bordes(index: PolygonIndex, lon_min, lat_min, dlon, dlat, nx, ny) -> np.ndarray:
+    # Máscara con 1 celda de margen para no perder bordes que entran desde fuera.
+    mask = np.zeros((ny + 2, nx + 2), dtype=bool)
+    paso = min(dlon, dlat) / 4
+    for geom in index.geoms:
+        xy = shapely.get_coordinates(shapely.segmentize(geom.boundary, paso))
+        ix = np.floor((xy[:, 0] - lon_min) / dlon).astype(np.int64) + 1
+        iy = np.floor((xy[:, 1] - lat_min) / dlat).astype(np.int64) + 1
+        ok = (ix >= 0) & (ix < nx + 2) & (iy >= 0) & (iy < ny + 2)
+        mask[iy[ok], ix[ok]] = True
+    # Dilatación 3x3: un borde que cruza una celda tiene un vértice en ella o en una vecina.
+    filas = mask.copy()
+    filas[1:, :] |= mask[:-1, :]
+    filas[:-1, :] |= mask[1:, :]
+    dil = filas.copy()
+    dil[:, 1:] |= filas[:, :-1]
+    dil[:, :-1] |= filas[:, 1:]
+    return dil[1:-1, 1:-1]
+
+
+def rasterizar(index: PolygonIndex, bbox: dict, celda_m: float, filas_por_bloque: int = 256) -> np.ndarray:
+    """Grilla ``(ny, nx)`` de etiquetas para una capa (ver docstring del módulo)."""
+    dlon, dlat, nx, ny = dimensiones(bbox, celda_m)
+    lon_min, lat_min = bbox["lon_min"], bbox["lat_min"]
+    dtype = np.int16 if len(index) < np.iinfo(np.int16).max else np.int32
+    valores = np.empty((ny, nx), dtype=dtype)
+    centros_x = lon_min + (np.arange(nx) + 0.5) * dlon
+    # Los centros se etiquetan siempre por el camino exacto, aunque la capa
+    # ya tenga una grilla enganchada.
+    raster_previo, index.raster = index.raster, None
+    try:
+        for y0 in range(0, ny, filas_por_bloque):
+            y1 = min(ny, y0 + filas_por_bloque)
+            centros_y = lat_min + (np.arange(y0, y1) + 0.5) * dlat
+            xx, yy = np.meshgrid(centros_x, centros_y)
+            valores[y0:y1] = index.contenedores(xx.ravel(), yy.ravel()).reshape(y1 - y0, nx)
+    finally:
+        index.raster = raster_previo
+    valores[_marcar_bordes(index, lon_min, lat_min, dlon, dlat, nx, ny)] = BORDE
+    return valores
+
+
+class RasterGrid:
+    """Grilla multicapa ``(n_capas, ny, nx)`` + metadatos de georreferencia y origen."""
+
+    def __init__(self, valores: np.ndarray, meta: dict):
+        self.valores = valores
+        self.meta = meta
+
+    @classmethod
+    def construir(cls, capas: dict, bbox: dict, celda_m: float, fuentes: Optional[dict] = None) -> "RasterGrid":
+        """``capas``: ``{nombre: PolygonIndex}``; ``fuentes``: ``{nombre: sha256 del GeoJSON}``."""
+        dlon, dlat, nx, ny = dimensiones(bbox, celda_m)
+        nombres = list(capas)
+        bloques = [rasterizar(capas[n], bbox, celda_m) for n in nombres]
+        dtype = np.result_type(*[b.dtype for b in bloques]) if bloques else np.int16
+        valores = np.stack(bloques).astype(dtype, copy=False) if bloques else np.empty((0, ny, nx), dtype)
+        meta = {
+            "formato": _FORMATO,
+            "bbox": dict(bbox),
+            "celda_m": celda_m,
+            "dlon": dlon,
+            "dlat": dlat,
+            "nx": nx,
+            "ny": ny,
+            "capas": nombres,
+            "n_poligonos": {n: len(capas[n]) for n in nombres},
+            "fuentes": dict(fuentes or {}),
+        }
+        return cls(valores, meta)
+
+    def capa(self, nombre: str) -> Optional[RasterLayer]:
+        if nombre not in self.meta["capas"]:
+            return None
+        k = self.meta["capas"].index(nombre)
+        return RasterLayer(
+            self.valores[k],
+            self.meta["bbox"]["lon_min"],
+            self.meta["bbox"]["lat_min"],
+            self.meta["dlon"],
+            self.meta["dlat"],
+        )
+
+    def guardar(self, ruta_npy: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta_npy)), exist_ok=True)
+        tmp = f"{ruta_npy}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, self.valores)
+        os.replace(tmp, ruta_npy)
+        with open(_ruta_meta(ruta_npy), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def cargar(cls, ruta_npy: str, mmap: bool = True) -> "RasterGrid":
+        with open(_ruta_meta(ruta_npy), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("formato") != _FORMATO:
+            raise ValueError(f"formato de grilla {meta.get('formato')} no soportado")
+        valores = np.load(ruta_npy, mmap_mode="r" if mmap else None, allow_pickle=False)
+        return cls(valores, meta)
+
+
+def _ruta_meta(ruta_npy: str) -> str:
+    return os.path.splitext(ruta_npy)[0] + ".json"
+
+
+def activar(ruta_npy: str, capas: dict) -> Optional[RasterGrid]:
+    """
+    Carga la grilla de ``ruta_npy`` y la engancha a cada ``PolygonIndex``.
+
+    ``capas``: ``{nombre: (PolygonIndex, ruta_geojson)}``. Una capa solo se
+    activa si la grilla la incluye, el número de polígonos coincide y el
+    SHA-256 del GeoJSON es el mismo con el que se generó. Devuelve la
+    grilla cargada o None si no existe / no es válida.
+    """
+    if not os.path.exists(ruta_npy):
+        return None
+    from app.geocoding.basemap_cache import hash_archivo
+
+    try:
+        grid = RasterGrid.cargar(ruta_npy)
+    except Exception as e:
+        print(f"⚠️ Grilla raster '{ruta_npy}' ilegible, se usa solo el camino exacto: {e}")
+        return None
+    activadas = []
+    for nombre, (index, ruta_geojson) in capas.items():
+        capa = grid.capa(nombre)
+        if capa is None or grid.meta["n_poligonos"].get(nombre) != len(index):
+            continue
+        try:
+            if grid.meta["fuentes"].get(nombre) != hash_archivo(ruta_geojson):
+                continue
+        except OSError:
+            continue
+        index.raster = capa
+        activadas.append(nombre)
+    if activadas:
+        print(f"✅ Grilla raster activa ({grid.meta['celda_m']} m): {', '.join(activadas)}")
+    else:
+        print(f"⚠️ Grilla raster '{ruta_npy}' desactualizada respecto a los basemaps; no se usa")
+    return grid
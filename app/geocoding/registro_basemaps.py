@@ -0,0 +1,351 @@
+"""
+Registro de basemaps con recarga en caliente.
+
+``BasemapRegistry`` es dueño de las capas del geocoding local (barrios,
+comunas, cruces) y de sus índices. Cada capa es un objeto inmutable ya
+indexado (``PolygonIndex`` / ``spatial_index.CapaCruces``) que se publica
+como **una sola referencia**: las consultas la leen una vez y nunca ven una
+mezcla de versiones, y no hay locks en el camino de lectura.
+
+Recarga (``recargar`` / ``revisar``):
+
+1. Si la capa tiene objeto S3 configurado y su ETag cambió, se descarga a
+   un temporal y se reemplaza el GeoJSON local con ``os.replace``.
+2. Si la huella del archivo local (mtime + tamaño) cambió y su SHA-256 es
+   otro, se construye la capa nueva fuera de cualquier lock de lectura,
+   midiendo duración y memoria estimada.
+3. Se publica (``publicar``: reasigna los globals de los módulos que la
+   usan) y se invalidan las cachés derivadas: ``reverse._lookup_local_cached``,
+   los contornos simplificados y las coropletas de avanzadas. La grilla
+   raster solo se engancha a la capa nueva si fue generada con ese mismo
+   GeoJSON (``raster_grid.activar``); si no, la capa responde por el
+   camino exacto.
+
+Si la construcción falla, la capa anterior sigue publicada.
+
+``vigilar`` revisa las fuentes cada ``BASEMAPS_RECARGA_INTERVALO_S``
+segundos en el executor por defecto del loop (no en el pool de geocoding,
+para no quitarle hilos a las consultas).
+
+Variables de entorno:
+- ``BASEMAPS_RECARGA_INTERVALO_S``: intervalo de revisión (default 60);
+  ``0`` desactiva la vigilancia (se puede recargar a mano con ``recargar``).
+- ``BASEMAPS_S3_PREFIJO``: prefijo de los GeoJSON en S3 (p. ej.
+  ``basemaps/``); vacío (default) = solo archivos locales.
+- ``BASEMAPS_S3_BUCKET``: bucket de esos objetos (default ``S3_BUCKET_NAME``).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+from app.geocoding import basemap_cache
+from app.geocoding.polygon_index import PolygonIndex
+from app.routes.monitoring_routes import BASEMAP_CONSTRUCCION, BASEMAP_MEMORIA, BASEMAP_RECARGAS
+
+_INTERVALO_S = float(os.getenv("BASEMAPS_RECARGA_INTERVALO_S", "60"))
+
+# Aproximación del costo de GEOS: 16 B por coordenada (x, y en double) más
+# la cabecera de cada geometría; el STRtree guarda una caja por elemento.
+_BYTES_POR_COORDENADA = 16
+_BYTES_POR_GEOMETRIA = 100
+_BYTES_POR_NODO_STRTREE = 64
+
+
+# ==================== MEMORIA ESTIMADA ====================
+
+def estimar_bytes(obj: Any, _vistos: Optional[set] = None) -> int:
+    """
+    Memoria aproximada de ``obj`` y lo que referencia (geometrías, arreglos,
+    listas, dicts y atributos de objetos). Cada objeto se cuenta una vez
+    aunque aparezca en varios índices. Es una estimación: las geometrías
+    preparadas y los buffers internos de GEOS no son visibles desde Python.
+    """
+    vistos = set() if _vistos is None else _vistos
+    if obj is None or id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        if obj.dtype != object:
+            return obj.nbytes
+        geoms = obj[shapely.is_geometry(obj)] if obj.size else obj
+        return (
+            obj.nbytes
+            + int(shapely.get_num_coordinates(geoms).sum()) * _BYTES_POR_COORDENADA
+            + len(geoms) * _BYTES_POR_GEOMETRIA
+        )
+    if isinstance(obj, shapely.Geometry):
+        return int(shapely.get_num_coordinates(obj)) * _BYTES_POR_COORDENADA + _BYTES_POR_GEOMETRIA
+    if isinstance(obj, STRtree):
+        return len(obj) * _BYTES_POR_NODO_STRTREE
+    if isinstance(obj, (str, bytes, int, float, bool)):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimar_bytes(k, vistos) + estimar_bytes(v, vistos) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimar_bytes(x, vistos) for x in obj)
+    atributos = getattr(obj, "__dict__", None)
+    if atributos is not None:
+        return sys.getsizeof(obj) + estimar_bytes(atributos, vistos)
+    return sys.getsizeof(obj)
+
+
+# ==================== CONSTRUCTORES DE CAPAS ====================
+
+def cargar_capa_poligonos(ruta_geojson: str, propiedad: str) -> PolygonIndex:
+    """``PolygonIndex`` del GeoJSON (vía caché binaria); propaga el error."""
+    geoms, names = basemap_cache.cargar_poligonos(ruta_geojson, propiedad)
+    return PolygonIndex(list(zip(geoms, names)))
+
+
+# ==================== REGISTRO ====================
+
+@dataclass
+class EstadoCapa:
+    """Lo que se reporta de cada capa (``BasemapRegistry.estado``)."""
+
+    nombre: str
+    ruta: str
+    elementos: int = 0
+    sha256: Optional[str] = None
+    segundos_construccion: Optional[float] = None
+    memoria_bytes: int = 0
+    cargada_en: Optional[str] = None
+    recargas: int = 0
+    s3_key: Optional[str] = None
+    ultimo_error: Optional[str] = None
+
+
+@dataclass
+class _Capa:
+    ruta: str
+    construir: Callable[[str], Any]
+    publicar: Optional[Callable[[Any], None]]
+    valor: Any
+    estado: EstadoCapa
+    huella: Optional[tuple] = None
+    etag_s3: Optional[str] = None
+    dependientes: list = field(default_factory=list)
+
+
+def _huella(ruta: str) -> Optional[tuple]:
+    """(mtime_ns, tamaño) del archivo; None si no existe."""
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class BasemapRegistry:
+    """
+    Capas de basemap con recarga en caliente y reemplazo atómico.
+
+    ``get(nombre)`` devuelve la versión publicada (lectura sin locks). Las
+    recargas se serializan entre sí con un lock propio que los lectores
+    nunca toman.
+    """
+
+    def __init__(self, s3_prefijo: Optional[str] = None, s3_bucket: Optional[str] = None):
+        self._capas: dict[str, _Capa] = {}
+        self._lock = threading.Lock()
+        self._tarea: Optional[asyncio.Task] = None
+        self.s3_prefijo = os.getenv("BASEMAPS_S3_PREFIJO", "") if s3_prefijo is None else s3_prefijo
+        self.s3_bucket = s3_bucket or os.getenv("BASEMAPS_S3_BUCKET") or None
+
+    # ── Registro y lectura ──
+
+    def registrar(
+        self,
+        nombre: str,
+        ruta: str,
+        construir: Callable[[str], Any],
+        *,
+        publicar: Optional[Callable[[Any], None]] = None,
+        vacio: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """
+        Construye la capa por primera vez y la registra; devuelve el valor.
+
+        ``construir(ruta)`` devuelve la capa indexada (o lanza). ``publicar``
+        se llama con cada versión recargada para que los módulos que la
+        consumen reasignen su referencia. Si la primera construcción falla
+        se registra ``vacio()`` y se reintenta en la próxima revisión.
+        """
+        estado = EstadoCapa(nombre=nombre, ruta=ruta)
+        if self.s3_prefijo:
+            estado.s3_key = f"{self.s3_prefijo}{os.path.basename(ruta)}"
+        capa = _Capa(ruta=ruta, construir=construir, publicar=publicar, valor=None, estado=estado)
+        try:
+            capa.valor = self._construir(nombre, capa)
+        except Exception as e:
+            print(f"⚠️ Error construyendo basemap '{nombre}' ({ruta}): {e}")
+            estado.ultimo_error = str(e)
+            capa.valor = vacio() if vacio is not None else None
+            capa.huella = None
+        self._capas[nombre] = capa
+        return capa.valor
+
+    def get(self, nombre: str) -> Any:
+        return self._capas[nombre].valor
+
+    def __contains__(self, nombre: str) -> bool:
+        return nombre in self._capas
+
+    def nombres(self) -> list[str]:
+        return list(self._capas)
+
+    def al_recargar(self, nombre: str, fn: Callable[[str], None]) -> None:
+        """Registra una invalidación extra para después de publicar ``nombre``."""
+        self._capas[nombre].dependientes.append(fn)
+
+    # ── Construcción y reemplazo ──
+
+    def _construir(self, nombre: str, capa: _Capa, digest: Optional[str] = None) -> Any:
+        """Construye desde el archivo local y actualiza huella y estado (sin publicar)."""
+        huella = _huella(capa.ruta)
+        digest = digest or basemap_cache.hash_archivo(capa.ruta)
+        t0 = time.perf_counter()
+        valor = capa.construir(capa.ruta)
+        segundos = time.perf_counter() - t0
+        memoria = estimar_bytes(valor)
+
+        capa.huella = huella
+        estado = capa.estado
+        estado.elementos = len(valor)
+        estado.sha256 = digest
+        estado.segundos_construccion = round(segundos, 4)
+        estado.memoria_bytes = memoria
+        estado.cargada_en = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        estado.ultimo_error = None
+        BASEMAP_CONSTRUCCION.labels(capa=nombre).set(segundos)
+        BASEMAP_MEMORIA.labels(capa=nombre).set(memoria)
+        print(
+            f"✅ Basemap '{nombre}' construido: {len(valor)} elementos en {segundos:.2f} s"
+            f" (~{memoria / 1e6:.1f} MB)"
+        )
+        return valor
+
+    def _sincronizar_s3(self, capa: _Capa) -> None:
+        """Descarga el objeto S3 de la capa sobre el GeoJSON local si cambió su ETag."""
+        key = capa.estado.s3_key
+        if not key:
+            return
+        from app.utils.s3_storage import bucket_name, get_s3_client
+
+        s3 = get_s3_client()
+        bucket = self.s3_bucket or bucket_name()
+        etag = s3.head_object(Bucket=bucket, Key=key).get("ETag")
+        if etag is not None and etag == capa.etag_s3:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(capa.ruta)), exist_ok=True)
+        tmp = f"{capa.ruta}.{os.getpid()}.s3.tmp"
+        try:
+            s3.download_file(bucket, key, tmp)
+            os.replace(tmp, capa.ruta)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        capa.etag_s3 = etag
+
+    def recargar(self, nombre: str, forzar: bool = False) -> bool:
+        """
+        Reconstruye ``nombre`` si su fuente cambió (o siempre con ``forzar``)
+        y la publica. True si se publicó una versión nueva. Bloquea al
+        hilo que llama mientras construye; los lectores no esperan.
+        """
+        capa = self._capas[nombre]
+        with self._lock:
+            try:
+                self._sincronizar_s3(capa)
+                huella = _huella(capa.ruta)
+                if huella is None or (not forzar and huella == capa.huella):
+                    return False  # sin archivo (se mantiene lo publicado) o sin cambios
+                digest = basemap_cache.hash_archivo(capa.ruta)
+                if not forzar and digest == capa.estado.sha256:
+                    capa.huella = huella  # mismo contenido (touch / copia idéntica)
+                    return False
+                valor = self._construir(nombre, capa, digest)
+            except Exception as e:
+                capa.estado.ultimo_error = str(e)
+                BASEMAP_RECARGAS.labels(capa=nombre, resultado="error").inc()
+                print(f"⚠️ Recarga de basemap '{nombre}' falló; se mantiene la versión anterior: {e}")
+                return False
+
+            capa.valor = valor
+            if capa.publicar is not None:
+                capa.publicar(valor)
+            capa.estado.recargas += 1
+            BASEMAP_RECARGAS.labels(capa=nombre, resultado="ok").inc()
+            for fn in [invalidar_dependientes, *capa.dependientes]:
+                try:
+                    fn(nombre)
+                except Exception as e:
+                    print(f"⚠️ Invalidación tras recargar '{nombre}' falló: {e}")
+        return True
+
+    def revisar(self) -> list[str]:
+        """Revisa todas las capas; devuelve las que se recargaron."""
+        return [nombre for nombre in list(self._capas) if self.recargar(nombre)]
+
+    # ── Vigilancia en segundo plano ──
+
+    async def vigilar(self, intervalo_s: float) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(intervalo_s)
+            try:
+                await loop.run_in_executor(None, self.revisar)
+            except Exception as e:
+                print(f"⚠️ Revisión de basemaps falló: {e}")
+
+    def iniciar(self, intervalo_s: Optional[float] = None) -> None:
+        """Arranca ``vigilar`` en el loop actual (no-op si el intervalo es 0)."""
+        intervalo_s = _INTERVALO_S if intervalo_s is None else intervalo_s
+        if intervalo_s <= 0 or self._tarea is not None:
+            return
+        self._tarea = asyncio.get_running_loop().create_task(self.vigilar(intervalo_s))
+
+    async def detener(self) -> None:
+        tarea, self._tarea = self._tarea, None
+        if tarea is not None:
+            tarea.cancel()
+            try:
+                await tarea
+            except asyncio.CancelledError:
+                pass
+
+    def estado(self) -> list[dict]:
+        return [asdict(capa.estado) for capa in self._capas.values()]
+
+
+def invalidar_dependientes(nombre: str) -> None:
+    """
+    Vacía las cachés derivadas de la capa ``nombre`` en los módulos ya
+    importados (no importa nada nuevo: lo que no se cargó no tiene caché).
+    """
+    reverse = sys.modules.get("app.geocoding.reverse")
+    if reverse is not None:
+        reverse._lookup_local_cached.cache_clear()
+    contornos = sys.modules.get("app.geocoding.contornos")
+    if contornos is not None and nombre in contornos.CAPAS:
+        contornos.limpiar()
+    avanzadas = sys.modules.get("app.routes.avanzadas_routes")
+    if avanzadas is not None and nombre in ("barrios", "comunas"):
+        avanzadas._invalidar_cache_coropletas()
+
+
+# Registro del proceso: artefacto_360_routes y spatial_index registran sus capas al importarse
+REGISTRO = BasemapRegistry()
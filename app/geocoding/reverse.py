@@ -3,65 +3,222 @@ Servicio de reverse geocoding: (lat, lon) → dirección estructurada para Cali.
 
 Combina basemaps catastrales locales (verdad para Cali) con Nominatim /reverse
 (enriquecimiento opcional, fallback silencioso). Cache LRU por coordenada
-cuantizada a 5 decimales (~1 m) para respetar la política de OSM (1 req/s).
+cuantizada a 5 decimales (~1 m) para la parte local, y caché persistente
+SQLite compartida entre workers para las respuestas de Nominatim (ver
+``_nominatim_reverse_cached``), para respetar la política de OSM (1 req/s).
 """
 from __future__ import annotations
 
 import asyncio
-from functools import lru_cache
+import base64
+import os
 from typing import Optional
 
-import httpx
+import numpy as np
 
 from app.geocoding import spatial_index as si
-
-# Throttle global para Nominatim (1 req/s)
-_NOMINATIM_LOCK = asyncio.Lock()
-_NOMINATIM_LAST_TS: list[float] = [0.0]  # mutable holder
+from app.geocoding import ejecutor, enriquecimiento, http_client
+from app.geocoding.cache_persistente import CachePersistente
+from app.routes.monitoring_routes import (
+    GEOCODING_ENRIQUECIMIENTO_COLA,
+    GEOCODING_ENRIQUECIMIENTO_ESPERA,
+    GEOCODING_ENRIQUECIMIENTO_RECHAZOS,
+)
+
+# Throttle de Nominatim (1 req/s), compartido con la búsqueda directa
+_NOMINATIM_INTERVALO_S = 1.0
+# Máximo de puntos de un lote con usar_nominatim=True: se consultan en serie
+# a 1 req/s, así que un lote grande dejaría la solicitud abierta por horas.
+_LOTE_MAX_NOMINATIM = int(os.getenv("GEOCODING_LOTE_MAX_NOMINATIM", "50"))
 
 NOMINATIM_REVERSE_URL = "https://nominatim.openstreetmap.org/reverse"
-USER_AGENT = "catatrack-api/1.0 (contacto: catatrack@cali.gov.co)"
+USER_AGENT = http_client.USER_AGENT
 
 
 async def _nominatim_reverse(lat: float, lon: float, timeout: float = 5.0) -> Optional[dict]:
-    """Llama Nominatim reverse con throttling 1 req/s. Devuelve None ante cualquier fallo."""
-    import time
+    """
+    Llama Nominatim reverse con throttling 1 req/s. Devuelve None ante cualquier fallo.
+    Consultas idénticas concurrentes se coalescen antes de entrar al throttle.
+    """
+    return await http_client.single_flight(
+        ("nominatim_reverse", lat, lon), lambda: _nominatim_reverse_throttled(lat, lon, timeout)
+    )
+
 
-    async with _NOMINATIM_LOCK:
-        delta = time.time() - _NOMINATIM_LAST_TS[0]
-        if delta < 1.0:
-            await asyncio.sleep(1.0 - delta)
+async def _nominatim_reverse_throttled(lat: float, lon: float, timeout: float) -> Optional[dict]:
+    async with http_client.turno("nominatim", _NOMINATIM_INTERVALO_S):
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                resp = await client.get(
-                    NOMINATIM_REVERSE_URL,
-                    params={
-                        "lat": f"{lat}",
-                        "lon": f"{lon}",
-                        "format": "jsonv2",
-                        "zoom": 18,
-                        "addressdetails": 1,
-                        "accept-language": "es",
-                    },
-                    headers={"User-Agent": USER_AGENT},
-                )
-                _NOMINATIM_LAST_TS[0] = time.time()
-                if resp.status_code != 200:
-                    return None
-                data = resp.json()
-                addr = data.get("address", {}) or {}
-                return {
-                    "display_name": data.get("display_name"),
-                    "road": addr.get("road"),
-                    "suburb": addr.get("suburb") or addr.get("neighbourhood"),
-                    "city_district": addr.get("city_district"),
-                    "city": addr.get("city") or addr.get("town") or addr.get("village"),
-                    "postcode": addr.get("postcode"),
-                }
+            resp = await http_client.cliente("nominatim").get(
+                NOMINATIM_REVERSE_URL,
+                params={
+                    "lat": f"{lat}",
+                    "lon": f"{lon}",
+                    "format": "jsonv2",
+                    "zoom": 18,
+                    "addressdetails": 1,
+                    "accept-language": "es",
+                },
+                headers={"User-Agent": USER_AGENT},
+                timeout=timeout,
+            )
+            if resp.status_code != 200:
+                return None
+            data = resp.json()
+            addr = data.get("address", {}) or {}
+            return {
+                "display_name": data.get("display_name"),
+                "road": addr.get("road"),
+                "suburb": addr.get("suburb") or addr.get("neighbourhood"),
+                "city_district": addr.get("city_district"),
+                "city": addr.get("city") or addr.get("town") or addr.get("village"),
+                "postcode": addr.get("postcode"),
+            }
         except Exception:
             return None
 
 
+# ==================== CACHÉ PERSISTENTE DE NOMINATIM ====================
+# Clave: coordenada cuantizada a NOMINATIM_CACHE_DECIMALES (4 ≈ 11 m; calle y
+# barrio de OSM no cambian a esa escala). La consulta a Nominatim se hace con
+# la coordenada cuantizada, así la respuesta vale para toda la celda.
+#
+# Variables de entorno:
+# - NOMINATIM_CACHE: 0/false desactiva la caché.
+# - NOMINATIM_CACHE_PATH: archivo SQLite (default .cache/nominatim_reverse.sqlite3).
+# - NOMINATIM_CACHE_TTL_S: frescura (default 30 días).
+# - NOMINATIM_CACHE_MAX_VENCIDA_S: margen en que una entrada vencida se sirve
+#   mientras se refresca en segundo plano (default 180 días).
+# - NOMINATIM_CACHE_MAX_ENTRADAS: tope LRU (default 200 000).
+
+_API_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+_NOMINATIM_CACHE_DECIMALES = int(os.getenv("NOMINATIM_CACHE_DECIMALES", "4"))
+
+
+def _crear_cache_nominatim() -> Optional[CachePersistente]:
+    if os.getenv("NOMINATIM_CACHE", "true").lower() in ("0", "false", "no", "n"):
+        return None
+    return CachePersistente(
+        os.getenv("NOMINATIM_CACHE_PATH") or os.path.join(_API_ROOT, ".cache", "nominatim_reverse.sqlite3"),
+        "nominatim_reverse",
+        ttl_s=float(os.getenv("NOMINATIM_CACHE_TTL_S", str(30 * 86400))),
+        max_entradas=int(os.getenv("NOMINATIM_CACHE_MAX_ENTRADAS", "200000")),
+        max_vencida_s=float(os.getenv("NOMINATIM_CACHE_MAX_VENCIDA_S", str(180 * 86400))),
+    )
+
+
+_NOMINATIM_CACHE = _crear_cache_nominatim()
+# Refrescos en segundo plano: uno a la vez por proceso, para que nunca haya
+# más de una consulta de refresco esperando el throttle delante del tráfico.
+_REFRESCO_SEM = asyncio.Semaphore(1)
+_REFRESCOS_PENDIENTES: set[str] = set()
+_TAREAS_REFRESCO: set[asyncio.Task] = set()
+
+
+def _clave_nominatim(lat: float, lon: float) -> tuple[str, float, float]:
+    d = _NOMINATIM_CACHE_DECIMALES
+    lat_q, lon_q = round(lat, d), round(lon, d)
+    return f"{lat_q:.{d}f},{lon_q:.{d}f}", lat_q, lon_q
+
+
+async def _refrescar_nominatim(clave: str, lat_q: float, lon_q: float) -> None:
+    try:
+        async with _REFRESCO_SEM:
+            res = await _nominatim_reverse(lat_q, lon_q)
+        if res is not None and _NOMINATIM_CACHE is not None:
+            await _NOMINATIM_CACHE.guardar_async(clave, res)
+    finally:
+        _REFRESCOS_PENDIENTES.discard(clave)
+
+
+async def _nominatim_reverse_cached(lat: float, lon: float, *, esperar_red: bool = True) -> Optional[dict]:
+    """
+    ``_nominatim_reverse`` con caché persistente y stale-while-revalidate.
+
+    - Entrada fresca → se devuelve sin tocar la red.
+    - Entrada vencida → se devuelve de inmediato y se agenda un refresco en
+      segundo plano (un solo worker lo reclama; pasa por el mismo throttle
+      de 1 req/s que el resto de consultas).
+    - Sin entrada → consulta síncrona; solo se cachean respuestas exitosas.
+      Con ``esperar_red=False`` devuelve None sin consultar.
+    """
+    if _NOMINATIM_CACHE is None:
+        return await _nominatim_reverse(lat, lon) if esperar_red else None
+    clave, lat_q, lon_q = _clave_nominatim(lat, lon)
+    hit = await _NOMINATIM_CACHE.obtener_async(clave)
+    if hit is not None:
+        valor, vencido = hit
+        if (
+            vencido
+            and clave not in _REFRESCOS_PENDIENTES
+            and await _NOMINATIM_CACHE.reclamar_refresco_async(clave)
+        ):
+            _REFRESCOS_PENDIENTES.add(clave)
+            tarea = asyncio.create_task(_refrescar_nominatim(clave, lat_q, lon_q))
+            _TAREAS_REFRESCO.add(tarea)
+            tarea.add_done_callback(_TAREAS_REFRESCO.discard)
+        return valor
+    if not esperar_red:
+        return None
+    res = await _nominatim_reverse(lat_q, lon_q)
+    if res is not None:
+        await _NOMINATIM_CACHE.guardar_async(clave, res)
+    return res
+
+
+# ==================== MODO "LOCAL PRIMERO, OSM DESPUÉS" ====================
+# reverse_geocode(..., diferir_nominatim=True) no espera a Nominatim: responde
+# con los basemaps y deja la coordenada en _COLA_NOMINATIM (coalescida por
+# celda cuantizada). El token de enriquecimiento codifica la coordenada, así
+# que la consulta de seguimiento la puede atender cualquier worker: el
+# resultado queda en la caché persistente compartida.
+#
+# GEOCODING_ENRIQUECIMIENTO_MAX_COLA: coordenadas pendientes como máximo por
+# worker (default 600 ≈ 10 min de trabajo a 1 req/s). Con la cola llena la
+# respuesta sale solo con los basemaps y enriquecimiento.estado="rechazado".
+
+_COLA_NOMINATIM = enriquecimiento.ColaEnriquecimiento(
+    _nominatim_reverse_cached,
+    max_pendientes=int(os.getenv("GEOCODING_ENRIQUECIMIENTO_MAX_COLA", "600")),
+    metrica_rechazos=GEOCODING_ENRIQUECIMIENTO_RECHAZOS,
+    metrica_profundidad=GEOCODING_ENRIQUECIMIENTO_COLA,
+    metrica_espera=GEOCODING_ENRIQUECIMIENTO_ESPERA,
+)
+
+
+def token_enriquecimiento(lat: float, lon: float) -> str:
+    """Token opaco (base64url de la coordenada) para la consulta de seguimiento."""
+    return base64.urlsafe_b64encode(f"{lat!r},{lon!r}".encode()).decode().rstrip("=")
+
+
+def coordenada_de_token(token: str) -> tuple[float, float]:
+    """Inversa de ``token_enriquecimiento``. ValueError si el token no es válido."""
+    try:
+        crudo = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        lat_s, lon_s = crudo.split(",")
+        return float(lat_s), float(lon_s)
+    except Exception:
+        raise ValueError("Token de enriquecimiento inválido")
+
+
+async def _nominatim_sin_esperar(lat: float, lon: float) -> tuple[Optional[dict], str]:
+    """
+    ``(nominatim, estado)`` sin bloquear en la red: usa la caché persistente o
+    el resultado ya procesado por la cola; si no hay, encola la coordenada y
+    devuelve ``(None, "pendiente")``, o ``(None, "rechazado")`` si la cola
+    está llena.
+    """
+    nominatim = await _nominatim_reverse_cached(lat, lon, esperar_red=False)
+    if nominatim is not None:
+        return nominatim, enriquecimiento.LISTO
+    clave, _, _ = _clave_nominatim(lat, lon)
+    estado, valor = _COLA_NOMINATIM.resultado(clave)
+    if estado is not None:
+        return valor, estado
+    if not _COLA_NOMINATIM.encolar(clave, lat, lon):
+        return None, enriquecimiento.RECHAZADO
+    return None, enriquecimiento.PENDIENTE
+
+
 # Mapeo nombre completo → abreviatura catastral usada en los nombres de cruce
 _TIPO_VIA_ABREV: dict[str, str] = {
     "carrera": "KR",
@@ -151,9 +308,9 @@ def _componer_direccion(
     return ", ".join(contexto)
 
 
-# Cache LRU por coordenada cuantizada (~1 m). Guarda solo la parte local (rápida).
-@lru_cache(maxsize=2048)
-def _lookup_local_cached(lat_q: float, lon_q: float) -> dict:
+# Parte local (basemaps) por coordenada cuantizada (~1 m). Es CPU puro: los
+# fallos de caché se calculan en el pool de ``ejecutor``; los aciertos, inline.
+def _lookup_local(lat_q: float, lon_q: float) -> dict:
     barrio_info = si.barrio_de_robusto(lon_q, lat_q)
     comuna_info = si.comuna_de_robusto(lon_q, lat_q)
     # La única fuente vial disponible son los cruces; inferimos la vía dominante.
@@ -174,6 +331,9 @@ def _lookup_local_cached(lat_q: float, lon_q: float) -> dict:
     }
 
 
+_lookup_local_cached = ejecutor.MemoLRU(_lookup_local, maxsize=2048)
+
+
 # Normalización Nominatim → formato catastral local
 def _normalizar_comuna_osm(osm_name: Optional[str]) -> Optional[str]:
     """'Comuna 3' → 'COMUNA 03'; 'Comuna 15' → 'COMUNA 15'; pasa corregimientos intactos."""
@@ -412,26 +572,47 @@ async def reverse_geocode(
     lon: float,
     *,
     usar_nominatim: bool = True,
+    diferir_nominatim: bool = False,
 ) -> dict:
-    """Punto de entrada principal del servicio de reverse geocoding."""
+    """
+    Punto de entrada principal del servicio de reverse geocoding.
+
+    Con ``diferir_nominatim=True`` no se espera a Nominatim: la respuesta sale
+    de los basemaps (más OSM si ya estaba en caché) e incluye
+    ``enriquecimiento = {estado, token}``; repetir la consulta con el token
+    devuelve el resultado reconciliado cuando la cola lo haya procesado.
+    """
     # Validar rango global
     if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
         raise ValueError("Coordenadas fuera de rango global")
 
     dentro_cali = si._dentro_de_cali(lon, lat)
 
-    # Lookup local (con cache cuantizada a 5 decimales ≈ 1 m)
     lat_q = round(lat, 5)
     lon_q = round(lon, 5)
-    local = _lookup_local_cached(lat_q, lon_q)
 
-    # Enriquecimiento Nominatim (opcional, no bloqueante si falla)
+    # Enriquecimiento Nominatim (opcional, no bloqueante si falla). Se lanza
+    # antes del lookup local para que la red se solape con el cómputo en el pool.
     nominatim = None
     fuentes = ["basemaps_cali"]
-    if usar_nominatim:
-        nominatim = await _nominatim_reverse(lat, lon)
-        if nominatim:
-            fuentes.append("nominatim")
+    estado_enriquecimiento = None
+    tarea_nominatim = None
+    if usar_nominatim and diferir_nominatim:
+        nominatim, estado_enriquecimiento = await _nominatim_sin_esperar(lat, lon)
+    elif usar_nominatim:
+        tarea_nominatim = asyncio.create_task(_nominatim_reverse_cached(lat, lon))
+
+    # Lookup local (con cache cuantizada a 5 decimales ≈ 1 m)
+    try:
+        local = await ejecutor.calcular(_lookup_local_cached, lat_q, lon_q)
+    except BaseException:
+        if tarea_nominatim is not None:
+            tarea_nominatim.cancel()
+        raise
+    if tarea_nominatim is not None:
+        nominatim = await tarea_nominatim
+    if nominatim:
+        fuentes.append("nominatim")
 
     # Reconciliación estricta: OSM solo corrige si coincide con un polígono vecino real
     barrio_final, fuente_barrio = _reconciliar_barrio(local, nominatim)
@@ -451,7 +632,7 @@ async def reverse_geocode(
         dentro_cali=dentro_cali,
     )
 
-    return {
+    respuesta = {
         "success": True,
         "coordenada": {"lat": lat, "lon": lon},
         "dentro_de_cali": dentro_cali,
@@ -477,3 +658,80 @@ async def reverse_geocode(
             "comuna_osm": _normalizar_comuna_osm((nominatim or {}).get("city_district")),
         },
     }
+    if estado_enriquecimiento is not None:
+        respuesta["enriquecimiento"] = {
+            "estado": estado_enriquecimiento,
+            "pendiente": estado_enriquecimiento == enriquecimiento.PENDIENTE,
+            "token": token_enriquecimiento(lat, lon),
+        }
+    return respuesta
+
+
+def _lookup_lote(lons: np.ndarray, lats: np.ndarray) -> tuple[list, list, list]:
+    return si.barrios_de(lons, lats), si.comunas_de(lons, lats), si.cruces_mas_cercanos(lons, lats)
+
+
+async def reverse_geocode_lote(
+    lats,
+    lons,
+    *,
+    usar_nominatim: bool = False,
+) -> list[dict]:
+    """
+    Reverse geocoding en lote para backfills e importaciones de mapas.
+
+    El point-in-polygon (barrio/comuna) y el cruce más cercano se resuelven
+    con consultas vectorizadas sobre arreglos NumPy (una consulta bulk al
+    STRtree por capa y un ``query_nearest`` para todos los cruces), sin
+    pasar por ``_lookup_local_cached`` punto a punto. Devuelve un dict por
+    coordenada, en el mismo orden de entrada.
+
+    Nominatim es opcional y por defecto se omite: con ``usar_nominatim=True``
+    cada punto se enriquece secuencialmente (caché persistente primero,
+    luego Nominatim respetando el throttle de 1 req/s),
+    y OSM solo confirma (nunca reemplaza) el barrio/comuna local. Por eso
+    ese modo admite a lo sumo ``GEOCODING_LOTE_MAX_NOMINATIM`` puntos
+    (default 50); para más, usar ``diferir_nominatim`` punto a punto.
+    """
+    lats = np.asarray(lats, dtype=float).ravel()
+    lons = np.asarray(lons, dtype=float).ravel()
+    if lats.shape != lons.shape:
+        raise ValueError("lats y lons deben tener la misma longitud")
+    if usar_nominatim and len(lats) > _LOTE_MAX_NOMINATIM:
+        raise ValueError(
+            f"usar_nominatim admite a lo sumo {_LOTE_MAX_NOMINATIM} puntos por lote "
+            f"(Nominatim: 1 req/s); recibidos {len(lats)}"
+        )
+    if not (
+        np.all((lats >= -90.0) & (lats <= 90.0))
+        and np.all((lons >= -180.0) & (lons <= 180.0))
+    ):
+        raise ValueError("Coordenadas fuera de rango global")
+
+    barrios, comunas, cruces = await ejecutor.en_pool(_lookup_lote, lons, lats)
+
+    resultados: list[dict] = []
+    for i in range(len(lats)):
+        lat, lon = float(lats[i]), float(lons[i])
+        local = {"barrio": barrios[i], "comuna": comunas[i]}
+        nominatim = None
+        fuentes = ["basemaps_cali"]
+        if usar_nominatim:
+            nominatim = await _nominatim_reverse_cached(lat, lon)
+            if nominatim:
+                fuentes.append("nominatim")
+        barrio_final, fuente_barrio = _reconciliar_barrio(local, nominatim)
+        comuna_final, fuente_comuna = _reconciliar_comuna(local, nominatim)
+        resultados.append({
+            "coordenada": {"lat": lat, "lon": lon},
+            "dentro_de_cali": si._dentro_de_cali(lon, lat),
+            "barrio_vereda": barrio_final,
+            "comuna_corregimiento": comuna_final,
+            "cruce_mas_cercano": cruces[i],
+            "direccion_legible": _componer_direccion(
+                None, cruces[i], barrio_final, comuna_final, nominatim
+            ),
+            "fuentes": fuentes,
+            "asignacion": {"barrio_fuente": fuente_barrio, "comuna_fuente": fuente_comuna},
+        })
+    return resultados
@@ -8,24 +8,41 @@ Basemaps utilizados (todos en ``api-catatrack/basemaps/``):
   (point-in-polygon), también reutilizado de ``artefacto_360_routes``.
 - ``cruces_ejes_viales.geojson`` — points de cruces (nearest + inferencia de vía),
   indexados con ``shapely.strtree.STRtree`` y deduplicados por par no ordenado
-  de calles.
-
-Las distancias se calculan en metros con haversine puro (sin pyproj).
+  de calles. También alimentan el geocodificador directo local
+  (``direccion_local``).
+
+El point-in-polygon de barrios/comunas usa los ``PolygonIndex`` (STRtree +
+geometrías preparadas) construidos por ``artefacto_360_routes``, los mismos
+que usa ``geolocate_point``.
+
+Las tres capas están registradas en ``registro_basemaps``, que las
+reconstruye cuando cambia su GeoJSON y las vuelve a publicar aquí: cada
+capa es una sola referencia (``_BARRIOS_SPATIAL``, ``_COMUNAS_SPATIAL``,
+``_CRUCES``) y cada consulta la lee una vez.
+
+Las distancias se calculan en metros sobre la proyección local de
+``proyeccion`` (equirectangular a la latitud de Cali, sin pyproj): polígonos
+y cruces se mantienen también proyectados, de modo que distancias, radios y
+vecinos más cercanos son operaciones vectorizadas de shapely/NumPy.
+``_haversine_m`` queda como referencia geodésica.
 """
 from __future__ import annotations
 
-import json
 import math
 import os
+from dataclasses import dataclass
 from typing import Optional
 
-from shapely.geometry import Point, shape
+import numpy as np
+import shapely
 from shapely.strtree import STRtree
 
+from app.geocoding import basemap_cache, direccion_local, proyeccion, registro_basemaps
+
 # Reutilizar polígonos ya cargados por artefacto_360_routes para no duplicar memoria
 from app.routes.artefacto_360_routes import (
-    _BARRIOS_POLYGONS,
-    _COMUNAS_POLYGONS,
+    _BARRIOS_SPATIAL,
+    _COMUNAS_SPATIAL,
     _CALI_BBOX,
     _dentro_de_cali,
 )
@@ -47,106 +64,105 @@ def _haversine_m(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
     return 2 * R * math.asin(math.sqrt(a))
 
 
-def _load_intersections(filepath: str) -> tuple[list[Point], list[str]]:
-    """Carga cruces y los deduplica por par de calles (frozenset)."""
-    geoms: list[Point] = []
-    names: list[str] = []
-    seen: set[frozenset[str]] = set()
-    full = os.path.join(_BASEMAPS_DIR, filepath)
-    try:
-        with open(full, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        for feat in data.get("features", []):
-            try:
-                g = shape(feat["geometry"])
-                if g.is_empty or g.geom_type != "Point":
-                    continue
-                name = (feat.get("properties", {}) or {}).get("cruce2") or ""
-                # Dedupe: "CL 72A con CL 72" == "CL 72 con CL 72A"
-                parts = [p.strip() for p in name.split(" con ")]
-                key = frozenset(parts) if len(parts) == 2 else frozenset([name])
-                if key in seen:
-                    continue
-                seen.add(key)
-                geoms.append(g)
-                names.append(name)
-            except Exception:
-                continue
-        print(f"✅ Basemap '{filepath}' cargado: {len(geoms)} cruces (dedup)")
-    except Exception as e:
-        print(f"⚠️ Error cargando basemap '{filepath}': {e}")
-    return geoms, names
+def _indexar_cruces(geoms: list) -> tuple[Optional[STRtree], np.ndarray]:
+    """STRtree sobre los cruces proyectados a metros + sus coordenadas (x, y) en metros."""
+    if not geoms:
+        return None, np.empty((0, 2))
+    puntos_m = proyeccion.proyectar(np.asarray(geoms, dtype=object))
+    return STRtree(puntos_m), shapely.get_coordinates(puntos_m).reshape(-1, 2)
 
 
-# ==================== CARGA AL IMPORT ====================
-_CRUCE_GEOMS, _CRUCE_NAMES = _load_intersections("cruces_ejes_viales.geojson")
+@dataclass(frozen=True)
+class CapaCruces:
+    """
+    Capa de cruces con todos sus índices derivados, inmutable.
 
-# STRtree para nearest queries O(log n)
-_CRUCE_TREE: Optional[STRtree] = STRtree(_CRUCE_GEOMS) if _CRUCE_GEOMS else None
+    Se publica como una sola referencia (``_CRUCES``): las consultas la leen
+    una vez y usan árbol, coordenadas, nombres y vías de la misma versión
+    aunque ``registro_basemaps`` publique otra a mitad de la consulta.
+    """
 
+    geoms: list
+    names: list
+    tree: Optional[STRtree]  # STRtree (en metros) para nearest / radio en O(log n)
+    xy_m: np.ndarray
+    vias: np.ndarray  # ids de vía por cruce (``_indexar_vias_de_cruces``)
+    vias_token: list
+    vias_parsed: list
+    # Pares de vías → cruce, para geocodificar direcciones "Calle 5 # 38-20" sin red
+    direcciones: direccion_local.IndiceCruces
 
-def barrio_de(lon: float, lat: float) -> Optional[str]:
-    pt = Point(lon, lat)
-    for polygon, name in _BARRIOS_POLYGONS:
-        if polygon.contains(pt):
-            return name
-    return None
+    def __len__(self) -> int:
+        return len(self.names)
 
 
-def comuna_de(lon: float, lat: float) -> Optional[str]:
-    pt = Point(lon, lat)
-    for polygon, name in _COMUNAS_POLYGONS:
-        if polygon.contains(pt):
-            return name
-    return None
+def construir_cruces(geoms: list, names: list) -> CapaCruces:
+    """Indexa cruces ya cargados: STRtree, vías parseadas e índice de direcciones."""
+    tree, xy_m = _indexar_cruces(geoms)
+    vias, vias_token, vias_parsed = _indexar_vias_de_cruces(names)
+    return CapaCruces(
+        geoms=geoms,
+        names=names,
+        tree=tree,
+        xy_m=xy_m,
+        vias=vias,
+        vias_token=vias_token,
+        vias_parsed=vias_parsed,
+        direcciones=direccion_local.IndiceCruces(names, xy_m),
+    )
 
 
-def _dist_a_boundary_m(polygon, lon: float, lat: float) -> float:
-    """Distancia (m) del punto al borde más cercano del polígono."""
-    try:
-        nearest_pt = polygon.boundary.interpolate(polygon.boundary.project(Point(lon, lat)))
-        return _haversine_m(lon, lat, nearest_pt.x, nearest_pt.y)
-    except Exception:
-        return float("inf")
+def cargar_capa_cruces(ruta_geojson: str) -> CapaCruces:
+    """Carga e indexa el GeoJSON de cruces; propaga el error (recarga en caliente)."""
+    return construir_cruces(*basemap_cache.cargar_cruces(ruta_geojson))
 
 
-def _dist_a_polygon_m(polygon, lon: float, lat: float) -> float:
-    """Distancia (m) del punto al polígono (0 si está dentro)."""
-    pt = Point(lon, lat)
-    if polygon.contains(pt):
-        return 0.0
-    return _dist_a_boundary_m(polygon, lon, lat)
+def geocodificar_direccion_local(direccion: str) -> Optional[dict]:
+    """Geocodifica una dirección con los cruces del basemap (``direccion_local``); None si no se resuelve."""
+    return _CRUCES.direcciones.geocodificar(direccion)
 
 
-def barrio_de_robusto(lon: float, lat: float, margen_borde_m: float = 60.0) -> dict:
+def barrio_de(lon: float, lat: float) -> Optional[str]:
+    return _BARRIOS_SPATIAL.nombre_en(lon, lat)
+
+
+def comuna_de(lon: float, lat: float) -> Optional[str]:
+    return _COMUNAS_SPATIAL.nombre_en(lon, lat)
+
+
+def _vecindad_robusta(
+    spatial,
+    lon: float,
+    lat: float,
+    margen_borde_m: float,
+    radio_minimo_m: float,
+    max_nearest_m: float,
+) -> dict:
     """
-    Asignación robusta de barrio por intersección geográfica + vecindad:
-    - 'primario': polígono que CONTIENE el punto (verdad catastral local).
-    - 'vecinos': lista de polígonos cercanos (≤ margen_borde_m * 5), ordenados por distancia.
-    - 'dist_borde_m': distancia del punto al borde del polígono primario.
-    Si no hay primario, busca el más cercano dentro de 200m.
+    Núcleo común de ``barrio_de_robusto`` / ``comuna_de_robusto``.
+
+    Solo se miden los polígonos que devuelve ``spatial.en_radio`` (consulta
+    ``dwithin`` sobre el STRtree en metros), y todas las distancias salen de
+    una sola llamada vectorizada sobre la capa proyectada. Si el borde del
+    primario queda a más del radio, solo los polígonos adyacentes al
+    primario (que lo tocan o se solapan con él) pueden estar más cerca, así
+    que la búsqueda se restringe al grafo de adyacencia.
     """
-    pt = Point(lon, lat)
-    primario: Optional[str] = None
-    primario_poly = None
-    for polygon, name in _BARRIOS_POLYGONS:
-        if polygon.contains(pt):
-            primario = name
-            primario_poly = polygon
-            break
-
-    if primario_poly is not None:
-        dist_borde = _dist_a_boundary_m(primario_poly, lon, lat)
+    primario_idx = spatial.contenedor(lon, lat)
+
+    if primario_idx is not None:
+        primario = spatial.names[primario_idx]
+        dist_borde = spatial.distancia_borde_m(primario_idx, lon, lat)
         # Lista de vecinos cercanos para reconciliación con fuentes externas
-        candidatos: list[tuple[float, str]] = []
-        radio_busqueda = max(margen_borde_m * 5, 200.0)
-        for polygon, name in _BARRIOS_POLYGONS:
-            if name == primario:
-                continue
-            d = _dist_a_polygon_m(polygon, lon, lat)
-            if d <= radio_busqueda:
-                candidatos.append((d, name))
-        candidatos.sort()
+        radio_busqueda = max(margen_borde_m * 5, radio_minimo_m)
+        idxs = spatial.en_radio(lon, lat, radio_busqueda)
+        if dist_borde > radio_busqueda:
+            idxs = np.intersect1d(idxs, spatial.adyacentes[primario_idx], assume_unique=True)
+        idxs = np.array([i for i in idxs if spatial.names[i] != primario], dtype=np.intp)
+        dists = spatial.distancias_m(lon, lat, idxs)
+        candidatos: list[tuple[float, str]] = sorted(
+            (float(d), spatial.names[i]) for i, d in zip(idxs, dists) if d <= radio_busqueda
+        )
         vecinos = [{"nombre": n, "distancia_m": round(d, 2)} for d, n in candidatos[:5]]
         vecino_inmediato = vecinos[0]["nombre"] if (vecinos and candidatos[0][0] < margen_borde_m * 3) else None
         return {
@@ -156,13 +172,10 @@ def barrio_de_robusto(lon: float, lat: float, margen_borde_m: float = 60.0) -> d
             "dist_borde_m": round(dist_borde, 2),
         }
 
-    # Sin contenedor → nearest (solo si está razonablemente cerca, < 200m)
-    mejor = (float("inf"), None)
-    for polygon, name in _BARRIOS_POLYGONS:
-        d = _dist_a_polygon_m(polygon, lon, lat)
-        if d < mejor[0]:
-            mejor = (d, name)
-    if mejor[0] > 200.0:
+    # Sin contenedor → nearest (solo si está razonablemente cerca)
+    idx, dist = spatial.mas_cercano(lon, lat)
+    mejor = (dist, spatial.names[idx] if idx is not None else None)
+    if mejor[0] > max_nearest_m:
         return {"primario": None, "vecino": None, "vecinos": [], "dist_borde_m": round(mejor[0], 2)}
     return {
         "primario": mejor[1],
@@ -172,63 +185,62 @@ def barrio_de_robusto(lon: float, lat: float, margen_borde_m: float = 60.0) -> d
     }
 
 
+def barrio_de_robusto(lon: float, lat: float, margen_borde_m: float = 60.0) -> dict:
+    """
+    Asignación robusta de barrio por intersección geográfica + vecindad:
+    - 'primario': polígono que CONTIENE el punto (verdad catastral local).
+    - 'vecinos': lista de polígonos cercanos (≤ margen_borde_m * 5), ordenados por distancia.
+    - 'dist_borde_m': distancia del punto al borde del polígono primario.
+    Si no hay primario, busca el más cercano dentro de 200m.
+    """
+    return _vecindad_robusta(_BARRIOS_SPATIAL, lon, lat, margen_borde_m, 200.0, 200.0)
+
+
 def comuna_de_robusto(lon: float, lat: float, margen_borde_m: float = 80.0) -> dict:
     """Versión robusta para comunas: mismo patrón que barrio_de_robusto."""
-    pt = Point(lon, lat)
-    primario: Optional[str] = None
-    primario_poly = None
-    for polygon, name in _COMUNAS_POLYGONS:
-        if polygon.contains(pt):
-            primario = name
-            primario_poly = polygon
-            break
-
-    if primario_poly is not None:
-        dist_borde = _dist_a_boundary_m(primario_poly, lon, lat)
-        candidatos: list[tuple[float, str]] = []
-        radio_busqueda = max(margen_borde_m * 5, 300.0)
-        for polygon, name in _COMUNAS_POLYGONS:
-            if name == primario:
-                continue
-            d = _dist_a_polygon_m(polygon, lon, lat)
-            if d <= radio_busqueda:
-                candidatos.append((d, name))
-        candidatos.sort()
-        vecinos = [{"nombre": n, "distancia_m": round(d, 2)} for d, n in candidatos[:5]]
-        vecino_inmediato = vecinos[0]["nombre"] if (vecinos and candidatos[0][0] < margen_borde_m * 3) else None
-        return {
-            "primario": primario,
-            "vecino": vecino_inmediato,
-            "vecinos": vecinos,
-            "dist_borde_m": round(dist_borde, 2),
-        }
-
-    mejor = (float("inf"), None)
-    for polygon, name in _COMUNAS_POLYGONS:
-        d = _dist_a_polygon_m(polygon, lon, lat)
-        if d < mejor[0]:
-            mejor = (d, name)
-    if mejor[0] > 500.0:
-        return {"primario": None, "vecino": None, "vecinos": [], "dist_borde_m": round(mejor[0], 2)}
-    return {
-        "primario": mejor[1],
-        "vecino": None,
-        "vecinos": [{"nombre": mejor[1], "distancia_m": round(mejor[0], 2)}] if mejor[1] else [],
-        "dist_borde_m": round(mejor[0], 2),
-    }
+    return _vecindad_robusta(_COMUNAS_SPATIAL, lon, lat, margen_borde_m, 300.0, 500.0)
 
 
 def cruce_mas_cercano(lon: float, lat: float, max_m: float = 150.0) -> Optional[dict]:
     """Devuelve {'nombre','distancia_m'} del cruce vial más cercano o None."""
-    if _CRUCE_TREE is None:
+    cruces = _CRUCES
+    if cruces.tree is None:
         return None
-    pt = Point(lon, lat)
-    idx = _CRUCE_TREE.nearest(pt)
-    g = _CRUCE_GEOMS[idx]
-    dist_m = _haversine_m(lon, lat, g.x, g.y)
+    idx = cruces.tree.nearest(proyeccion.punto_m(lon, lat))
+    x, y = proyeccion.a_metros(lon, lat)
+    dist_m = float(np.hypot(*(cruces.xy_m[idx] - (x, y))))
     if dist_m > max_m:
         return None
-    return {"nombre": _CRUCE_NAMES[idx], "distancia_m": round(dist_m, 2)}
+    return {"nombre": cruces.names[idx], "distancia_m": round(dist_m, 2)}
+
+
+# ==================== CONSULTAS EN LOTE (VECTORIZADAS) ====================
+# Equivalentes a barrio_de / comuna_de / cruce_mas_cercano para arreglos de
+# coordenadas: una consulta bulk al STRtree por capa en vez de un loop Python.
+
+def barrios_de(lons, lats) -> list[Optional[str]]:
+    return _BARRIOS_SPATIAL.nombres_en(lons, lats)
+
+
+def comunas_de(lons, lats) -> list[Optional[str]]:
+    return _COMUNAS_SPATIAL.nombres_en(lons, lats)
+
+
+def cruces_mas_cercanos(lons, lats, max_m: float = 150.0) -> list[Optional[dict]]:
+    """``cruce_mas_cercano`` para arreglos: un solo ``STRtree.query_nearest``."""
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    out: list[Optional[dict]] = [None] * len(lons)
+    cruces = _CRUCES
+    if cruces.tree is None or not len(lons):
+        return out
+    idx_pt, idx_cruce = cruces.tree.query_nearest(proyeccion.puntos_m(lons, lats), all_matches=False)
+    xs, ys = proyeccion.a_metros(lons[idx_pt], lats[idx_pt])
+    dists = np.hypot(cruces.xy_m[idx_cruce, 0] - xs, cruces.xy_m[idx_cruce, 1] - ys)
+    for i, j, d in zip(idx_pt, idx_cruce, dists):
+        if d <= max_m:
+            out[int(i)] = {"nombre": cruces.names[int(j)], "distancia_m": round(float(d), 2)}
+    return out
 
 
 # ==================== INFERENCIA DE VÍA A PARTIR DE CRUCES ====================
@@ -262,25 +274,77 @@ def _parse_via_token(token: str) -> Optional[tuple[str, str, str]]:
     return abrev, num, f"{tipo} {num}"
 
 
-def _cruces_en_radio(lon: float, lat: float, max_m: float) -> list[tuple[int, float]]:
-    """Devuelve [(idx, distancia_m), ...] de cruces dentro de max_m, ordenados."""
-    if _CRUCE_TREE is None:
-        return []
-    pt = Point(lon, lat)
-    # Conversión aproximada a grados (overestima para coincidir con todos)
-    buffer_deg = (max_m / 111000.0) * 1.4
+def _cruces_en_radio_np(
+    lon: float, lat: float, max_m: float, cruces: Optional[CapaCruces] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """``(idxs, distancias_m)`` de cruces dentro de max_m, ordenados por distancia e índice."""
+    if cruces is None:
+        cruces = _CRUCES
+    if cruces.tree is None:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    x, y = proyeccion.a_metros(lon, lat)
+    # Caja envolvente del radio (sin predicado, mucho más barato que "dwithin"
+    # en el STRtree); el círculo exacto lo filtra la distancia de abajo.
     try:
-        idxs = list(_CRUCE_TREE.query(pt.buffer(buffer_deg)))
+        idxs = cruces.tree.query(shapely.box(x - max_m, y - max_m, x + max_m, y + max_m))
     except Exception:
-        return []
-    out: list[tuple[int, float]] = []
-    for i in idxs:
-        g = _CRUCE_GEOMS[int(i)]
-        d = _haversine_m(lon, lat, g.x, g.y)
-        if d <= max_m:
-            out.append((int(i), d))
-    out.sort(key=lambda x: x[1])
-    return out
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    dists = np.hypot(cruces.xy_m[idxs, 0] - x, cruces.xy_m[idxs, 1] - y)
+    orden = np.lexsort((idxs, dists))
+    orden = orden[dists[orden] <= max_m]
+    return idxs[orden], dists[orden]
+
+
+def _cruces_en_radio(lon: float, lat: float, max_m: float) -> list[tuple[int, float]]:
+    """Devuelve [(idx, distancia_m), ...] de cruces dentro de max_m, ordenados."""
+    idxs, dists = _cruces_en_radio_np(lon, lat, max_m)
+    return [(int(i), float(d)) for i, d in zip(idxs, dists)]
+
+
+def _indexar_vias_de_cruces(names: list[str]) -> tuple[np.ndarray, list[str], list[tuple[str, str, str]]]:
+    """
+    Parsea una sola vez los nombres de cruces: ``(tokens, vocab, parsed)``.
+
+    ``tokens[i]`` tiene el id de cada vía del cruce ``i`` en orden de aparición
+    en el nombre (-1 si la parte no es una vía parseable o no existe);
+    ``vocab[id]`` es el token tal como aparece ('CL 72A') y ``parsed[id]`` su
+    ``_parse_via_token``.
+    """
+    partes = [[p.strip() for p in name.split(" con ")] for name in names]
+    ancho = max((len(p) for p in partes), default=0)
+    tokens = np.full((len(names), max(ancho, 2)), -1, dtype=np.int32)
+    ids: dict[str, int] = {}
+    vocab: list[str] = []
+    parsed: list[tuple[str, str, str]] = []
+    for i, ps in enumerate(partes):
+        for j, t in enumerate(ps):
+            tid = ids.get(t)
+            if tid is None:
+                p = _parse_via_token(t) if t else None
+                if p is None:
+                    continue
+                tid = ids[t] = len(vocab)
+                vocab.append(t)
+                parsed.append(p)
+            tokens[i, j] = tid
+    return tokens, vocab, parsed
+
+
+# ==================== CARGA AL IMPORT ====================
+# Vías de cada cruce como ids enteros (se parsean una vez, no en cada consulta).
+# ``registro_basemaps`` reemplaza la referencia completa al recargar el GeoJSON.
+def _publicar_cruces(cruces: CapaCruces) -> None:
+    global _CRUCES
+    _CRUCES = cruces
+
+
+_CRUCES = registro_basemaps.REGISTRO.registrar(
+    "cruces",
+    os.path.join(_BASEMAPS_DIR, "cruces_ejes_viales.geojson"),
+    cargar_capa_cruces,
+    publicar=_publicar_cruces,
+    vacio=lambda: construir_cruces([], []),
+)
 
 
 def via_inferida_de_cruces(
@@ -295,43 +359,45 @@ def via_inferida_de_cruces(
     Cada cruce 'CL 72A con CL 72' aporta dos vías candidatas. Se rankea por:
     1. Frecuencia (vías que aparecen en más cruces son las vías principales).
     2. Menor distancia mínima al punto consultado.
+    Empates: la vía que aparece primero (cruce más cercano, parte izquierda).
 
-    Devuelve None si no hay cruces utilizables dentro de ``max_m`` o si los
-    nombres no son parseables.
+    El conteo es sobre ids de vía precalculados (``CapaCruces.vias``), sin
+    volver a partir ni parsear nombres. Devuelve None si no hay cruces
+    utilizables dentro de ``max_m`` o si los nombres no son parseables.
     """
-    vecinos = _cruces_en_radio(lon, lat, max_m)
-    if not vecinos:
+    cruces = _CRUCES
+    idxs, dists = _cruces_en_radio_np(lon, lat, max_m, cruces)
+    if not len(idxs):
         return None
-    vecinos = vecinos[: max(k, 4)]
-
-    # token → lista de distancias a los cruces que lo mencionan
-    cand: dict[str, list[float]] = {}
-    for idx, d in vecinos:
-        for part in _CRUCE_NAMES[idx].split(" con "):
-            t = part.strip()
-            if not t or _parse_via_token(t) is None:
+    idxs, dists = idxs[: max(k, 4)], dists[: max(k, 4)]
+
+    # id de vía → [soporte, distancia mínima]; los vecinos vienen por distancia
+    # creciente, así que la primera aparición fija la distancia mínima y el
+    # orden de inserción del dict es el de primera aparición (desempate).
+    conteo: dict[int, list] = {}
+    for fila, d in zip(cruces.vias[idxs].tolist(), dists.tolist()):
+        for via in fila:
+            if via < 0:
                 continue
-            cand.setdefault(t, []).append(d)
-    if not cand:
+            c = conteo.get(via)
+            if c is None:
+                conteo[via] = [1, d]
+            else:
+                c[0] += 1
+    if not conteo:
         return None
 
-    def score(item: tuple[str, list[float]]) -> tuple[int, float]:
-        _, dists = item
-        return (-len(dists), min(dists))
-
-    best_token, best_dists = min(cand.items(), key=score)
-    parsed = _parse_via_token(best_token)
-    if parsed is None:
-        return None
-    abrev, num, nombre = parsed
+    best, (soporte, d_min) = min(conteo.items(), key=lambda it: (-it[1][0], it[1][1]))
+    best_token = cruces.vias_token[best]
+    abrev, num, nombre = cruces.vias_parsed[best]
     return {
         "tipo": _ABREV_TO_TIPO.get(abrev),
         "numero": num,
         "nombre": nombre,
         "nombre_catastral": best_token,
         "clase": None,
-        "distancia_m": round(min(best_dists), 2),
-        "soporte_cruces": len(best_dists),
+        "distancia_m": round(d_min, 2),
+        "soporte_cruces": soporte,
         "inferida": True,
     }
 
@@ -344,6 +410,10 @@ __all__ = [
     "comuna_de_robusto",
     "via_inferida_de_cruces",
     "cruce_mas_cercano",
+    "barrios_de",
+    "comunas_de",
+    "cruces_mas_cercanos",
+    "geocodificar_direccion_local",
     "_CALI_BBOX",
     "_dentro_de_cali",
     "_haversine_m",
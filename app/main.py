@@ -176,6 +176,40 @@ async def _precargar_clasificador():
     except Exception as e:
         logger.warning(f"⚠️ Preload del clasificador falló (continuando): {e}")
 
+# Clientes HTTP compartidos (keep-alive, límites por proveedor) para los
+# proveedores externos de geocoding: Nominatim, Photon, ArcGIS.
+@app.on_event("startup")
+async def _iniciar_clientes_geocoding():
+    from app.geocoding import http_client
+    await http_client.iniciar()
+
+
+@app.on_event("shutdown")
+async def _cerrar_clientes_geocoding():
+    from app.geocoding import http_client
+    await http_client.cerrar()
+
+
+# Pool de hilos del trabajo CPU de geocoding (GEOCODING_POOL_WORKERS).
+@app.on_event("shutdown")
+async def _cerrar_pool_geocoding():
+    from app.geocoding import ejecutor
+    ejecutor.cerrar()
+
+
+# Recarga en caliente de los basemaps cuando cambia su GeoJSON u objeto S3
+# (BASEMAPS_RECARGA_INTERVALO_S; 0 la desactiva).
+@app.on_event("startup")
+async def _vigilar_basemaps():
+    from app.geocoding import registro_basemaps
+    registro_basemaps.REGISTRO.iniciar()
+
+
+@app.on_event("shutdown")
+async def _detener_vigilancia_basemaps():
+    from app.geocoding import registro_basemaps
+    await registro_basemaps.REGISTRO.detener()
+
 # Manejador de errores global
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
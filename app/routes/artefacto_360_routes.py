@@ -13,9 +13,12 @@ import math
 import os
 import io
 import gzip
+import time
+from dataclasses import dataclass
+from functools import partial
 from pydantic import BaseModel, Field
 import httpx
-from shapely.geometry import shape, Point
+from shapely.geometry import Point
 from shapely.ops import nearest_points
 from faster_whisper import WhisperModel
 
@@ -28,7 +31,20 @@ from app.firebase_config import db
 from app.utils.s3_storage import get_s3_client
 
 # Clasificador automático de centros gestores (organismos_encargados)
-from app.classification import clasificar_centros_gestores
+from app.classification import clasificar_centros_gestores, clasificar_lote
+
+# Índice espacial compartido (STRtree + geometrías preparadas) de los basemaps
+# y caché binaria de los GeoJSON parseados
+from app.geocoding import carrera, ejecutor, http_client, proyeccion, raster_grid, registro_basemaps
+from app.geocoding.cache_persistente import CachePersistente
+from app.geocoding.polygon_index import PolygonIndex
+from app.utils.aho_corasick import AhoCorasick
+from app.routes.monitoring_routes import (
+    CACHE_HITS,
+    CACHE_MISSES,
+    GEOCODING_PROVEEDOR_CONSULTAS,
+    GEOCODING_PROVEEDOR_LATENCIA,
+)
 
 
 # ==================== WHISPER TRANSCRIPCIÓN (LOCAL, GRATUITO) ====================
@@ -251,34 +267,65 @@ def _listar_documentos_s3(vid: str, rid: str, s3_client=None, expiration: int =
 
 
 # ==================== GEOLOCALIZACIÓN ====================
-# Cargar basemaps en memoria al iniciar el módulo
-def _load_basemap(filepath: str, property_name: str) -> list:
-    """Carga un GeoJSON y retorna lista de tuplas (polygon_shape, property_value)"""
-    basemap_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), filepath)
-    try:
-        with open(basemap_path, 'r', encoding='utf-8') as f:
-            geojson_data = json.load(f)
-        polygons = []
-        for feature in geojson_data.get('features', []):
-            try:
-                geom = shape(feature['geometry'])
-                value = feature['properties'].get(property_name)
-                polygons.append((geom, value))
-            except Exception:
-                continue
-        print(f"✅ Basemap '{filepath}' cargado: {len(polygons)} polígonos")
-        return polygons
-    except Exception as e:
-        print(f"⚠️ Error cargando basemap '{filepath}': {str(e)}")
-        return []
+# Basemaps en memoria desde el import. Las capas son de
+# app.geocoding.registro_basemaps, que las reconstruye en segundo plano cuando
+# cambia el GeoJSON (o su objeto S3) y las vuelve a publicar aquí
+# (_publicar_capa_poligonos); la lectura de los .geojson pasa por la caché
+# binaria de app.geocoding.basemap_cache.
+_BASEMAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'basemaps')
+
+# Grilla raster opcional (scripts/build_raster_grid.py): responde en O(1) los
+# puntos interiores del bbox de Cali; solo las celdas de borde van al test exacto.
+_RASTER_GRID_PATH = os.getenv(
+    "BASEMAP_RASTER_GRID", os.path.join(_BASEMAPS_DIR, '.cache', 'raster_grid.npy')
+)
+
+# capa → (GeoJSON, propiedad con el nombre)
+_CAPAS_POLIGONOS = {
+    "barrios": (os.path.join(_BASEMAPS_DIR, 'barrios_veredas.geojson'), 'barrio_vereda'),
+    "comunas": (os.path.join(_BASEMAPS_DIR, 'comunas_corregimientos.geojson'), 'comuna_corregimiento'),
+}
+
 
-_BARRIOS_POLYGONS = _load_basemap('basemaps/barrios_veredas.geojson', 'barrio_vereda')
-_COMUNAS_POLYGONS = _load_basemap('basemaps/comunas_corregimientos.geojson', 'comuna_corregimiento')
+def _construir_capa_poligonos(nombre: str, ruta: str) -> PolygonIndex:
+    """
+    PolygonIndex de la capa con la grilla raster enganchada si se generó con
+    este mismo GeoJSON (raster_grid.activar compara el SHA-256); si no, la
+    capa responde siempre con el test geométrico exacto.
+    """
+    index = registro_basemaps.cargar_capa_poligonos(ruta, _CAPAS_POLIGONOS[nombre][1])
+    raster_grid.activar(_RASTER_GRID_PATH, {nombre: (index, ruta)})
+    return index
+
+
+def _publicar_capa_poligonos(nombre: str, index: PolygonIndex) -> None:
+    """Publica una versión recargada de barrios/comunas aquí y en spatial_index."""
+    global _BARRIOS_POLYGONS, _BARRIOS_SPATIAL, _COMUNAS_POLYGONS, _COMUNAS_SPATIAL
+    if nombre == "barrios":
+        _BARRIOS_SPATIAL, _BARRIOS_POLYGONS = index, index.polygons
+    else:
+        _COMUNAS_SPATIAL, _COMUNAS_POLYGONS = index, index.polygons
+    from app.geocoding import spatial_index  # diferido: spatial_index importa este módulo
+
+    setattr(spatial_index, f"_{nombre.upper()}_SPATIAL", index)
+    _construir_indices_nombres()
+
+
+def _registrar_capa_poligonos(nombre: str) -> PolygonIndex:
+    return registro_basemaps.REGISTRO.registrar(
+        nombre,
+        _CAPAS_POLIGONOS[nombre][0],
+        partial(_construir_capa_poligonos, nombre),
+        publicar=partial(_publicar_capa_poligonos, nombre),
+        vacio=lambda: PolygonIndex([]),
+    )
 
-# Índice nombre (mayúsculas) → (polígono, nombre_canónico) para búsqueda rápida
-_BARRIOS_INDEX: dict = {}
-_COMUNAS_INDEX: dict = {}
 
+# Índices espaciales de cada capa; compartidos con app.geocoding.spatial_index
+_BARRIOS_SPATIAL = _registrar_capa_poligonos("barrios")
+_COMUNAS_SPATIAL = _registrar_capa_poligonos("comunas")
+_BARRIOS_POLYGONS = _BARRIOS_SPATIAL.polygons
+_COMUNAS_POLYGONS = _COMUNAS_SPATIAL.polygons
 
 def geolocate_point(lon: float, lat: float) -> dict:
     """
@@ -286,24 +333,40 @@ def geolocate_point(lon: float, lat: float) -> dict:
     y comunas/corregimientos.
     Retorna dict con 'barrio_vereda' y 'comuna_corregimiento' (None si no intersecta).
     """
-    point = Point(lon, lat)
-    result = {"barrio_vereda": None, "comuna_corregimiento": None}
-    
-    for polygon, name in _BARRIOS_POLYGONS:
-        if polygon.contains(point):
-            result["barrio_vereda"] = name
-            break
-    
-    for polygon, name in _COMUNAS_POLYGONS:
-        if polygon.contains(point):
-            result["comuna_corregimiento"] = name
-            break
-    
-    return result
+    return {
+        "barrio_vereda": _BARRIOS_SPATIAL.nombre_en(lon, lat),
+        "comuna_corregimiento": _COMUNAS_SPATIAL.nombre_en(lon, lat),
+    }
+
 
+# Caché de geocodificación directa (dirección → coordenada), persistida en
+# SQLite y compartida entre workers (app.geocoding.cache_persistente), con tope
+# LRU y TTL. La clave es la dirección canónica (_clave_geocode), así "Cl 10
+# #5-20" y "calle 10 No. 5-20" comparten entrada. Los resultados negativos
+# (None) y los fallbacks a centroide se guardan con un TTL corto: un proveedor
+# caído o un basemap recién cargado pueden dar un resultado mejor pronto.
+# Variables de entorno:
+# - GEOCODE_CACHE: 0/false desactiva la caché.
+# - GEOCODE_CACHE_PATH: archivo SQLite (default .cache/geocode_directo.sqlite3).
+# - GEOCODE_CACHE_TTL_S: frescura de un resultado de proveedor (default 30 días).
+# - GEOCODE_CACHE_TTL_NEGATIVO_S: frescura de None / centroide (default 1 hora).
+# - GEOCODE_CACHE_MAX_ENTRADAS: tope LRU (default 100 000).
+_GEOCODE_CACHE_TTL_NEGATIVO_S = float(os.getenv("GEOCODE_CACHE_TTL_NEGATIVO_S", "3600"))
 
-# Cache en memoria para evitar geocodificar la misma dirección múltiples veces
-_GEOCODE_CACHE: dict = {}
+
+def _crear_cache_geocode() -> Optional[CachePersistente]:
+    if os.getenv("GEOCODE_CACHE", "true").lower() in ("0", "false", "no", "n"):
+        return None
+    return CachePersistente(
+        os.getenv("GEOCODE_CACHE_PATH")
+        or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), ".cache", "geocode_directo.sqlite3"),
+        "geocode_directo",
+        ttl_s=float(os.getenv("GEOCODE_CACHE_TTL_S", str(30 * 86400))),
+        max_entradas=int(os.getenv("GEOCODE_CACHE_MAX_ENTRADAS", "100000")),
+    )
+
+
+_GEOCODE_CACHE = _crear_cache_geocode()
 
 # Bounding box del municipio de Cali (incluye corregimientos rurales)
 _CALI_BBOX = {"lon_min": -76.75, "lon_max": -76.20, "lat_min": 3.10, "lat_max": 3.80}
@@ -350,6 +413,31 @@ def _limpiar_complementos(texto: str) -> str:
     return texto
 
 
+_ABREVIACIONES_VIA = [
+    (r'\bCl\.?\b', 'Calle'), (r'\bCll\.?\b', 'Calle'),
+    (r'\bCr\.?\b', 'Carrera'), (r'\bCra\.?\b', 'Carrera'), (r'\bKr\.?\b', 'Carrera'),
+    (r'\bAv\.?\b', 'Avenida'), (r'\bAvd\.?\b', 'Avenida'),
+    (r'\bDg\.?\b', 'Diagonal'), (r'\bDiag\.?\b', 'Diagonal'),
+    (r'\bTv\.?\b', 'Transversal'), (r'\bTvs\.?\b', 'Transversal'),
+    (r'\bCq\.?\b', 'Circular'),
+]
+_CUADRANTES = {
+    'N': 'Norte', 'S': 'Sur', 'E': 'Este', 'O': 'Oeste',
+    'NE': 'Noreste', 'NO': 'Noroeste', 'SE': 'Sureste', 'SO': 'Suroeste',
+}
+
+
+def _expandir_abreviaciones(texto: str) -> str:
+    """Expande abreviaciones de vía (Cl, Cra, Av, ...) y cuadrantes pegados al número (15N → 15 Norte)."""
+    for pattern, repl in _ABREVIACIONES_VIA:
+        texto = re.sub(pattern, repl, texto, flags=re.IGNORECASE)
+    return re.sub(
+        r'(\d)([NnSsEeOo]{1,2})\b',
+        lambda m: m.group(1) + ' ' + _CUADRANTES.get(m.group(2).upper(), m.group(2)),
+        texto
+    )
+
+
 def _normalizar_direccion_colombiana(direccion: str) -> list:
     """
     Genera variantes normalizadas de una dirección colombiana para maximizar
@@ -366,31 +454,8 @@ def _normalizar_direccion_colombiana(direccion: str) -> list:
     # Versión limpia: sin complementos ruidosos (prioridad para Nominatim)
     clean = _limpiar_complementos(clean_orig)
 
-    abreviaciones = [
-        (r'\bCl\.?\b', 'Calle'), (r'\bCll\.?\b', 'Calle'),
-        (r'\bCr\.?\b', 'Carrera'), (r'\bCra\.?\b', 'Carrera'), (r'\bKr\.?\b', 'Carrera'),
-        (r'\bAv\.?\b', 'Avenida'), (r'\bAvd\.?\b', 'Avenida'),
-        (r'\bDg\.?\b', 'Diagonal'), (r'\bDiag\.?\b', 'Diagonal'),
-        (r'\bTv\.?\b', 'Transversal'), (r'\bTvs\.?\b', 'Transversal'),
-        (r'\bCq\.?\b', 'Circular'),
-    ]
-    cuadrantes = {
-        'N': 'Norte', 'S': 'Sur', 'E': 'Este', 'O': 'Oeste',
-        'NE': 'Noreste', 'NO': 'Noroeste', 'SE': 'Sureste', 'SO': 'Suroeste',
-    }
-
-    def _expandir(texto: str) -> str:
-        for pattern, repl in abreviaciones:
-            texto = re.sub(pattern, repl, texto, flags=re.IGNORECASE)
-        texto = re.sub(
-            r'(\d)([NnSsEeOo]{1,2})\b',
-            lambda m: m.group(1) + ' ' + cuadrantes.get(m.group(2).upper(), m.group(2)),
-            texto
-        )
-        return texto
-
-    expanded = _expandir(clean)
-    expanded_orig = _expandir(clean_orig)
+    expanded = _expandir_abreviaciones(clean)
+    expanded_orig = _expandir_abreviaciones(clean_orig)
 
     variantes = []
 
@@ -429,6 +494,116 @@ def _normalizar_direccion_colombiana(direccion: str) -> list:
     return unique
 
 
+# ── Índices de nombres de barrios / comunas para detectar menciones en texto ──
+# Se construyen al cargar el módulo y cada vez que registro_basemaps recarga
+# una capa (_construir_indices_nombres), y se publican juntos en _NOMBRES:
+# - barrios / comunas: nombre normalizado (_strip_acentos) →
+#   (polígono, nombre_canónico); su orden de inserción define el ranking de
+#   desempate de todas las estrategias.
+# - Autómatas Aho-Corasick (app.utils.aho_corasick) sobre esas claves: cada
+#   dirección se recorre una sola vez en vez de probar `clave in texto` por
+#   cada barrio. Su trie resuelve también los emparejamientos por prefijo.
+# - barrios_palabras: índice invertido palabra significativa → primera clave
+#   que la contiene (estrategia 2c).
+
+# Números escritos como palabra → dígito, para que "7 de Agosto" encuentre "Siete de Agosto"
+_NUM_TO_DIGIT = {
+    'PRIMERO': '1', 'UNO': '1', 'DOS': '2', 'TRES': '3', 'CUATRO': '4',
+    'CINCO': '5', 'SEIS': '6', 'SIETE': '7', 'OCHO': '8', 'NUEVE': '9',
+    'DIEZ': '10', 'ONCE': '11', 'DOCE': '12', 'VEINTE': '20',
+}
+_STOP_WORDS_GEO = {
+    'EL', 'LA', 'LOS', 'LAS', 'SAN', 'SANTA', 'DE', 'DEL', 'UN', 'UNA',
+    'BARRIO', 'SECTOR', 'VEREDA', 'CON', 'CALLE', 'CARRERA', 'AVENIDA',
+    'CIUDAD', 'PARQUE', 'VILLA', 'NUEVO', 'NUEVA', 'VIEJO', 'VIEJA',
+    'URBANIZACION', 'CIUDADELA', 'CONJUNTO', 'RESIDENCIAL', 'UNIDAD',
+}
+_KW_BARRIO = re.compile(
+    r'\b(?:barrio|bario|sector|vereda|b[oOº°]'
+    r'|urb\.?|urbanizaci[oó]n|ciudadela'
+    r'|conj\.?|cjto\.?|conjunto|res\.?|residencial)\s+'
+    r'([A-Za-z\u00c0-\u024f][A-Za-z\u00c0-\u024f0-9\s]{2,30}?)'
+    r'(?=\s*[,;#\n]|\s*$)',
+    re.IGNORECASE
+)
+_NUM_COMUNA = re.compile(r'\b(?:comunas?|com\.?|c\.)\s*0?(\d{1,2})\b', re.IGNORECASE)
+_KW_CORREGIMIENTO = re.compile(
+    r'\b(?:corregimiento|correg\.?|cgto\.?)\s+'
+    r'([A-Za-z\u00c0-\u024f][A-Za-z\u00c0-\u024f0-9\s]{2,25}?)'
+    r'(?=\s*[,;#\n]|\s*$)',
+    re.IGNORECASE
+)
+
+@dataclass(frozen=True)
+class _IndicesNombres:
+    """Índices de nombres de una misma versión de las capas; se reemplazan completos."""
+
+    barrios: dict
+    barrios_claves: list  # claves de ``barrios`` en orden (id en los autómatas)
+    barrios_ac: AhoCorasick
+    barrios_prefijos_ac: AhoCorasick  # prefijos de 2 palabras (estrategia 1b)
+    barrios_prefijos_ids: list  # id de prefijo → ids de claves que lo tienen
+    barrios_palabras: dict
+    comunas: dict
+    comunas_nombradas: list  # claves que no son "COMUNA NN" y tienen ≥5 chars
+    comunas_ac: AhoCorasick
+
+
+def _palabras_significativas(texto_norm: str) -> set:
+    return {w for w in texto_norm.split() if len(w) >= 6 and w not in _STOP_WORDS_GEO}
+
+
+def _construir_indices_nombres() -> None:
+    """
+    (Re)construye los índices de nombres a partir de _BARRIOS_POLYGONS /
+    _COMUNAS_POLYGONS y los publica con una sola asignación de _NOMBRES.
+    """
+    global _NOMBRES
+
+    barrios: dict = {}
+    for poly, name in _BARRIOS_POLYGONS:
+        if not name or len(name) < 5:
+            continue
+        key = _strip_acentos(name)
+        barrios[key] = (poly, name)
+        # Variante dígito para nombres que comienzan con número escrito
+        # ("SIETE DE AGOSTO" → "7 DE AGOSTO")
+        first = key.split()[0]
+        if first in _NUM_TO_DIGIT:
+            alt = _NUM_TO_DIGIT[first] + key[len(first):]
+            barrios.setdefault(alt, (poly, name))
+    claves = list(barrios)
+
+    prefijos: dict = {}  # prefijo → ids, en orden de aparición
+    palabras: dict = {}
+    for i, key in enumerate(claves):
+        partes = key.split()
+        if len(partes) >= 2:
+            prefijo = ' '.join(partes[:2])
+            if len(prefijo) >= 10:
+                prefijos.setdefault(prefijo, []).append(i)
+        for w in _palabras_significativas(key):
+            palabras.setdefault(w, i)
+
+    comunas: dict = {}
+    for poly, name in _COMUNAS_POLYGONS:
+        if name:
+            comunas[_strip_acentos(name)] = (poly, name)
+    nombradas = [k for k in comunas if not k.startswith('COMUNA') and len(k) >= 5]
+
+    _NOMBRES = _IndicesNombres(
+        barrios=barrios,
+        barrios_claves=claves,
+        barrios_ac=AhoCorasick(claves),
+        barrios_prefijos_ac=AhoCorasick(list(prefijos)),
+        barrios_prefijos_ids=list(prefijos.values()),
+        barrios_palabras=palabras,
+        comunas=comunas,
+        comunas_nombradas=nombradas,
+        comunas_ac=AhoCorasick(nombradas),
+    )
+
+
 def _extraer_barrios_mencionados(direccion: str) -> list:
     """
     Detecta barrios/veredas mencionados en la dirección usando cuatro estrategias:
@@ -439,97 +614,62 @@ def _extraer_barrios_mencionados(direccion: str) -> list:
        el texto extraído se empareja exactamente, por prefijo y por palabras clave.
     4. Palabras significativas (≥5 chars, no artículos): 'El Obrero' → 'Barrio Obrero'.
 
+    Las estrategias 1 y 2 recorren el texto una sola vez con los autómatas
+    Aho-Corasick; las de la 3 consultan el trie y el índice invertido de
+    palabras. Entre coincidencias manda el orden del índice, como antes.
+
     Retorna lista de (nombre_canónico, polígono) ordenada por longitud descendente.
     """
-    global _BARRIOS_INDEX
-    if not _BARRIOS_INDEX:
-        # Números escritos como palabra → dígito, para que "7 de Agosto" encuentre "Siete de Agosto"
-        _NUM_TO_DIGIT = {
-            'PRIMERO': '1', 'UNO': '1', 'DOS': '2', 'TRES': '3', 'CUATRO': '4',
-            'CINCO': '5', 'SEIS': '6', 'SIETE': '7', 'OCHO': '8', 'NUEVE': '9',
-            'DIEZ': '10', 'ONCE': '11', 'DOCE': '12', 'VEINTE': '20',
-        }
-        for poly, name in _BARRIOS_POLYGONS:
-            if not name or len(name) < 5:
-                continue
-            key = _strip_acentos(name)
-            _BARRIOS_INDEX[key] = (poly, name)
-            # Variante dígito para nombres que comienzan con número escrito
-            # ("SIETE DE AGOSTO" → "7 DE AGOSTO")
-            first = key.split()[0]
-            if first in _NUM_TO_DIGIT:
-                alt = _NUM_TO_DIGIT[first] + key[len(first):]
-                _BARRIOS_INDEX.setdefault(alt, (poly, name))
-
     texto_norm = _strip_acentos(direccion)
     encontrados: dict = {}  # canonical_name → polygon (deduplicado)
+    n = _NOMBRES
 
     # ── Estrategia 1: coincidencia directa insensible a acentos ──
-    for nombre_norm, (polygon, nombre_canonical) in _BARRIOS_INDEX.items():
-        if nombre_norm in texto_norm:
-            encontrados[nombre_canonical] = polygon
+    for i in n.barrios_ac.presentes(texto_norm):
+        polygon, nombre_canonical = n.barrios[n.barrios_claves[i]]
+        encontrados[nombre_canonical] = polygon
 
     # ── Estrategia 1b: prefijo de 2 palabras del nombre del basemap ──
     # Captura "San Fernando" → "San Fernando Viejo" / "San Fernando Nuevo"
-    for nombre_norm, (polygon, nombre_canonical) in _BARRIOS_INDEX.items():
-        if nombre_canonical in encontrados:
-            continue
-        palabras = nombre_norm.split()
-        if len(palabras) >= 2:
-            prefijo = ' '.join(palabras[:2])
-            if len(prefijo) >= 10 and prefijo in texto_norm:
-                encontrados[nombre_canonical] = polygon
+    ids_prefijo = sorted({
+        i for p in n.barrios_prefijos_ac.presentes(texto_norm) for i in n.barrios_prefijos_ids[p]
+    })
+    for i in ids_prefijo:
+        polygon, nombre_canonical = n.barrios[n.barrios_claves[i]]
+        if nombre_canonical not in encontrados:
+            encontrados[nombre_canonical] = polygon
 
     # ── Estrategia 2: extracción por palabra clave "barrio X", "sector X", "urb X", etc. ──
-    _STOP_WORDS_GEO = {
-        'EL', 'LA', 'LOS', 'LAS', 'SAN', 'SANTA', 'DE', 'DEL', 'UN', 'UNA',
-        'BARRIO', 'SECTOR', 'VEREDA', 'CON', 'CALLE', 'CARRERA', 'AVENIDA',
-        'CIUDAD', 'PARQUE', 'VILLA', 'NUEVO', 'NUEVA', 'VIEJO', 'VIEJA',
-        'URBANIZACION', 'CIUDADELA', 'CONJUNTO', 'RESIDENCIAL', 'UNIDAD',
-    }
-    kw_pattern = re.compile(
-        r'\b(?:barrio|bario|sector|vereda|b[oOº°]'
-        r'|urb\.?|urbanizaci[oó]n|ciudadela'
-        r'|conj\.?|cjto\.?|conjunto|res\.?|residencial)\s+'
-        r'([A-Za-z\u00c0-\u024f][A-Za-z\u00c0-\u024f0-9\s]{2,30}?)'
-        r'(?=\s*[,;#\n]|\s*$)',
-        re.IGNORECASE
-    )
-    for m in kw_pattern.finditer(direccion):
+    for m in _KW_BARRIO.finditer(direccion):
         candidato_norm = _strip_acentos(m.group(1).strip())
         if not candidato_norm:
             continue
 
         # 2a. Exacto
-        if candidato_norm in _BARRIOS_INDEX:
-            poly, canonical = _BARRIOS_INDEX[candidato_norm]
+        if candidato_norm in n.barrios:
+            poly, canonical = n.barrios[candidato_norm]
             encontrados[canonical] = poly
             continue
 
         # 2b. Prefijo: basemap_key comienza con el candidato o viceversa
-        matched = False
-        for idx_key, (poly, canonical) in _BARRIOS_INDEX.items():
-            if (idx_key.startswith(candidato_norm) or candidato_norm.startswith(idx_key)) \
-                    and len(idx_key) >= 5:
-                encontrados[canonical] = poly
-                matched = True
-                break
+        # (la primera clave del índice que cumpla cualquiera de los dos)
+        def _larga(i: int) -> bool:
+            return len(n.barrios_claves[i]) >= 5
+
+        ids = [i for i in n.barrios_ac.prefijos_de(candidato_norm) if _larga(i)]
+        primero = n.barrios_ac.primero_con_prefijo(candidato_norm, _larga)
+        if primero is not None:
+            ids.append(primero)
+        if ids:
+            poly, canonical = n.barrios[n.barrios_claves[min(ids)]]
+            encontrados[canonical] = poly
+            continue
 
         # 2c. Palabras significativas en común (fallback para "El Obrero" → "Barrio Obrero")
-        if not matched:
-            palabras_cand = {
-                w for w in candidato_norm.split()
-                if len(w) >= 6 and w not in _STOP_WORDS_GEO
-            }
-            if palabras_cand:
-                for idx_key, (poly, canonical) in _BARRIOS_INDEX.items():
-                    palabras_idx = {
-                        w for w in idx_key.split()
-                        if len(w) >= 6 and w not in _STOP_WORDS_GEO
-                    }
-                    if palabras_cand & palabras_idx:
-                        encontrados[canonical] = poly
-                        break
+        ids = [n.barrios_palabras[w] for w in _palabras_significativas(candidato_norm) if w in n.barrios_palabras]
+        if ids:
+            poly, canonical = n.barrios[n.barrios_claves[min(ids)]]
+            encontrados[canonical] = poly
 
     result = [(name, poly) for name, poly in encontrados.items()]
     result.sort(key=lambda x: len(x[0]), reverse=True)
@@ -546,58 +686,44 @@ def _extraer_comunas_mencionadas(direccion: str) -> list:
 
     Retorna lista de (nombre_canónico, polígono).
     """
-    global _COMUNAS_INDEX
-    if not _COMUNAS_INDEX:
-        _COMUNAS_INDEX = {
-            _strip_acentos(name): (poly, name)
-            for poly, name in _COMUNAS_POLYGONS
-            if name
-        }
-
     texto_norm = _strip_acentos(direccion)
     encontrados: dict = {}
+    n = _NOMBRES
 
     # A: número de comuna — soporta "comuna 10", "c.10", "com 10", "c. 10"
-    num_pattern = re.compile(
-        r'\b(?:comunas?|com\.?|c\.)\s*0?(\d{1,2})\b',
-        re.IGNORECASE
-    )
-    for m in num_pattern.finditer(direccion):
+    for m in _NUM_COMUNA.finditer(direccion):
         num = int(m.group(1))
         clave = f'COMUNA {num:02d}'
-        if clave in _COMUNAS_INDEX:
-            poly, canonical = _COMUNAS_INDEX[clave]
+        if clave in n.comunas:
+            poly, canonical = n.comunas[clave]
             encontrados[canonical] = poly
 
     # B: nombre de corregimiento directo (solo entradas nombradas, no "COMUNA NN")
-    for nombre_norm, (polygon, nombre_canonical) in _COMUNAS_INDEX.items():
-        if not nombre_norm.startswith('COMUNA') and len(nombre_norm) >= 5:
-            if nombre_norm in texto_norm:
-                encontrados[nombre_canonical] = polygon
+    for i in n.comunas_ac.presentes(texto_norm):
+        polygon, nombre_canonical = n.comunas[n.comunas_nombradas[i]]
+        encontrados[nombre_canonical] = polygon
 
     # C: keyword "corregimiento X" / "cgto X" / "correg X"
-    kw_corr = re.compile(
-        r'\b(?:corregimiento|correg\.?|cgto\.?)\s+'
-        r'([A-Za-z\u00c0-\u024f][A-Za-z\u00c0-\u024f0-9\s]{2,25}?)'
-        r'(?=\s*[,;#\n]|\s*$)',
-        re.IGNORECASE
-    )
-    for m in kw_corr.finditer(direccion):
+    for m in _KW_CORREGIMIENTO.finditer(direccion):
         candidato_norm = _strip_acentos(m.group(1).strip())
-        if candidato_norm in _COMUNAS_INDEX:
-            poly, canonical = _COMUNAS_INDEX[candidato_norm]
+        if candidato_norm in n.comunas:
+            poly, canonical = n.comunas[candidato_norm]
             encontrados[canonical] = poly
         else:
-            for idx_key, (poly, canonical) in _COMUNAS_INDEX.items():
-                if not idx_key.startswith('COMUNA') and (
-                    idx_key.startswith(candidato_norm) or candidato_norm.startswith(idx_key)
-                ) and len(idx_key) >= 5:
-                    encontrados[canonical] = poly
-                    break
+            ids = n.comunas_ac.prefijos_de(candidato_norm)
+            primero = n.comunas_ac.primero_con_prefijo(candidato_norm)
+            if primero is not None:
+                ids.append(primero)
+            if ids:
+                poly, canonical = n.comunas[n.comunas_nombradas[min(ids)]]
+                encontrados[canonical] = poly
 
     return [(name, poly) for name, poly in encontrados.items()]
 
 
+_construir_indices_nombres()
+
+
 def _snap_al_interior(lon: float, lat: float, polygon) -> tuple:
     """
     Si el punto está fuera del polígono, devuelve el representative_point()
@@ -651,14 +777,13 @@ def _seleccionar_candidato(candidatos: list, barrio_polygon, barrio_name: str) -
     }
 
 
-async def _geocode_nominatim_multi(
-    query: str, client: httpx.AsyncClient, limit: int = 5
-) -> list:
+async def _geocode_nominatim_multi(query: str, limit: int = 5) -> list:
     """Nominatim con múltiples candidatos acotados al bbox de Cali."""
     try:
-        r = await client.get(
+        data = await http_client.get_json(
+            "nominatim",
             "https://nominatim.openstreetmap.org/search",
-            params={
+            {
                 "q": query,
                 "format": "json",
                 "limit": limit,
@@ -666,33 +791,32 @@ async def _geocode_nominatim_multi(
                 "viewbox": _CALI_VIEWBOX,
                 "bounded": 1,
             },
-            headers={"User-Agent": "catatrack-api/1.0"},
+            intervalo_s=1.0,  # política de uso de Nominatim: 1 req/s
         )
-        r.raise_for_status()
         return [
             {"lat": float(item["lat"]), "lon": float(item["lon"]), "proveedor": "nominatim"}
-            for item in r.json()
+            for item in data
             if _dentro_de_cali(float(item["lon"]), float(item["lat"]))
         ]
     except Exception:
         return []
 
 
-async def _geocode_nominatim(query: str, client: httpx.AsyncClient) -> Optional[dict]:
+async def _geocode_nominatim(query: str) -> Optional[dict]:
     """Nominatim (OpenStreetMap) — gratuito, sin API key, 1 req/s"""
-    results = await _geocode_nominatim_multi(query, client, limit=1)
+    results = await _geocode_nominatim_multi(query, limit=1)
     return results[0] if results else None
 
 
-async def _geocode_photon(query: str, client: httpx.AsyncClient) -> Optional[dict]:
+async def _geocode_photon(query: str) -> Optional[dict]:
     """Photon (Komoot) — gratuito, basado en OSM, sin API key, mejor cobertura LATAM"""
     try:
-        r = await client.get(
+        data = await http_client.get_json(
+            "photon",
             "https://photon.komoot.io/api/",
-            params={"q": query, "limit": 1, "lang": "es", "lat": "3.45", "lon": "-76.53"},
+            {"q": query, "limit": 1, "lang": "es", "lat": "3.45", "lon": "-76.53"},
         )
-        r.raise_for_status()
-        features = r.json().get("features", [])
+        features = data.get("features", [])
         if features:
             lon, lat = features[0]["geometry"]["coordinates"][:2]
             if _dentro_de_cali(lon, lat):
@@ -702,12 +826,13 @@ async def _geocode_photon(query: str, client: httpx.AsyncClient) -> Optional[dic
     return None
 
 
-async def _geocode_arcgis(query: str, client: httpx.AsyncClient) -> Optional[dict]:
+async def _geocode_arcgis(query: str) -> Optional[dict]:
     """ArcGIS World Geocoding Service — acceso anónimo gratuito (1M req/mes)"""
     try:
-        r = await client.get(
+        data = await http_client.get_json(
+            "arcgis",
             "https://geocode.arcgis.com/arcgis/rest/services/World/GeocodeServer/findAddressCandidates",
-            params={
+            {
                 "SingleLine": query,
                 "f": "json",
                 "maxLocations": 1,
@@ -715,8 +840,7 @@ async def _geocode_arcgis(query: str, client: httpx.AsyncClient) -> Optional[dic
                 "outFields": "Match_addr",
             },
         )
-        r.raise_for_status()
-        candidates = r.json().get("candidates", [])
+        candidates = data.get("candidates", [])
         if candidates and candidates[0].get("score", 0) >= 70:
             loc = candidates[0]["location"]
             lon, lat = loc["x"], loc["y"]
@@ -727,32 +851,145 @@ async def _geocode_arcgis(query: str, client: httpx.AsyncClient) -> Optional[dic
     return None
 
 
+def _clave_geocode(direccion: str) -> str:
+    """
+    Forma canónica de una dirección para la caché: sin tildes y en
+    mayúsculas (``_strip_acentos``), abreviaciones y cuadrantes expandidos
+    como en ``_normalizar_direccion_colombiana``, "No." / "N°" → "#" y
+    puntuación y espacios colapsados.
+    """
+    texto = _strip_acentos(_expandir_abreviaciones(direccion.strip()))
+    texto = re.sub(r'\b(?:NO\.|NO(?=\s*\d)|N[°º])\s*', '#', texto)
+    texto = re.sub(r'[.,;]+', ' ', texto)
+    texto = re.sub(r'\s*([#\-])\s*', r'\1', texto)
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+async def _guardar_geocode(clave: str, result: Optional[dict]) -> None:
+    if _GEOCODE_CACHE is None:
+        return
+    negativo = result is None or result["proveedor"] in ("barrio_centroide", "comuna_centroide")
+    await _GEOCODE_CACHE.guardar_async(clave, result, ttl_s=_GEOCODE_CACHE_TTL_NEGATIVO_S if negativo else None)
+
+
 async def geocodificar_direccion_cali(direccion: str) -> Optional[dict]:
     """
     Geocodifica una dirección en Cali con cadena de proveedores, barrio/comuna-hint y fallback.
 
     Estrategia:
-      1. Caché en memoria: evita llamadas redundantes.
+      1. Caché persistente por dirección canónica (también resultados negativos,
+         con TTL corto). Peticiones concurrentes de la misma dirección
+         comparten una sola ejecución (single-flight).
       2a. Extrae barrios/veredas mencionados (insensible a acentos, 4 estrategias).
       2b. Extrae comunas/corregimientos mencionados (número o nombre).
-      3. Nominatim multi-candidato acotado al bbox de Cali:
-         - Si hay barrio_hint → elige/proyecta el candidato dentro del polígono del barrio.
-         - Si solo hay comuna_hint → elige/proyecta dentro del polígono de la comuna.
-      4. Nominatim simple (sin hint o sin resultados con hint).
-      5. Photon (Komoot) como fallback OSM alternativo.
-      6. ArcGIS World Geocoding.
+      2c. Geocodificador local sobre los cruces viales ("Calle 5 # 38-20" →
+         cruce CL 5 / KR 38 + 20 m): sin red; si falla o cae lejos del
+         barrio/comuna mencionado se sigue con los proveedores.
+      3-6. Carrera de proveedores (Nominatim acotado al bbox de Cali, Photon,
+         ArcGIS) escalonada cada GEOCODE_HEDGE_S s en el orden que sugiere su
+         latencia/tasa de éxito. Con barrio_hint (o, si no, comuna_hint) gana
+         el primer candidato que ya cae dentro del polígono del hint; si
+         ninguno lo logra se usa el candidato proyectado del proveedor
+         preferido (Nominatim > Photon > ArcGIS). Sin hint gana el primero
+         que responda dentro de Cali.
       7. Fallback al centroide del barrio mencionado.
       8. Fallback al centroide de la comuna mencionada.
 
     Retorna dict con 'lat', 'lon', 'proveedor' y opcionalmente 'barrio_snap' (bool),
     'barrio_snap_desde' (str). Retorna None si todos los pasos fallan.
     """
-    clave = direccion.strip().lower()
-    if clave in _GEOCODE_CACHE:
-        cached = _GEOCODE_CACHE[clave]
-        print(f"💾 Geocodificación (caché): '{direccion}' → [{cached['lon']}, {cached['lat']}]")
+    clave = _clave_geocode(direccion)
+    hit = await _GEOCODE_CACHE.obtener_async(clave) if _GEOCODE_CACHE is not None else None
+    if hit is not None:
+        CACHE_HITS.inc()
+        cached = hit[0]
+        if cached is None:
+            print(f"💾 Geocodificación (caché negativa): '{direccion}'")
+        else:
+            print(f"💾 Geocodificación (caché): '{direccion}' → [{cached['lon']}, {cached['lat']}]")
         return cached
+    CACHE_MISSES.inc()
+
+    # Direcciones idénticas en vuelo al mismo tiempo comparten una sola cadena de proveedores
+    return await http_client.single_flight(
+        ("geocodificar_direccion_cali", clave), lambda: _geocodificar_sin_cache(direccion, clave)
+    )
 
+
+# Carrera de proveedores (app.geocoding.carrera): Nominatim arranca primero y
+# Photon / ArcGIS entran escalonados cada GEOCODE_HEDGE_S segundos; el orden se
+# adapta según la latencia y tasa de éxito observadas de cada proveedor.
+_GEOCODE_HEDGE_S = float(os.getenv("GEOCODE_HEDGE_S", "1.0"))
+_PROVEEDORES_GEOCODE = carrera.RastreadorProveedores(
+    {"nominatim": (1.0, 0.8), "photon": (1.0, 0.6), "arcgis": (1.0, 0.6)},
+    metrica_latencia=GEOCODING_PROVEEDOR_LATENCIA,
+    metrica_consultas=GEOCODING_PROVEEDOR_CONSULTAS,
+)
+# Preferencia para elegir respaldo cuando ningún proveedor da un resultado fuerte
+_PREFERENCIA_RESPALDO = ("nominatim", "photon", "arcgis")
+
+
+async def _consultar_medido(proveedor: str, consulta) -> list:
+    """Ejecuta la consulta a un proveedor y registra latencia/éxito; devuelve candidatos."""
+    t0 = time.perf_counter()
+    res = await consulta
+    candidatos = res if isinstance(res, list) else ([res] if res else [])
+    _PROVEEDORES_GEOCODE.registrar(proveedor, time.perf_counter() - t0, bool(candidatos))
+    return candidatos
+
+
+def _carril_proveedor(proveedor: str, consultar, queries: list, hint: Optional[tuple]):
+    """
+    Carril de la carrera para un proveedor: prueba ``queries`` en orden y se
+    detiene en la primera que devuelve candidatos. Con hint (nombre,
+    polígono) el candidato pasa por ``_seleccionar_candidato``: si ya cae
+    dentro del polígono es fuerte; si hubo que proyectarlo es débil. Sin
+    hint cualquier candidato dentro de Cali es fuerte.
+    """
+    async def _carril() -> carrera.ResultadoCarril:
+        for query in queries:
+            candidatos = await _consultar_medido(proveedor, consultar(query))
+            if not candidatos:
+                continue
+            if hint is None:
+                return carrera.ResultadoCarril(fuerte=candidatos[0])
+            mejor = _seleccionar_candidato(candidatos, hint[1], hint[0])
+            if mejor and not mejor.get("barrio_snap"):
+                return carrera.ResultadoCarril(fuerte=mejor)
+            return carrera.ResultadoCarril(debil=mejor)
+        return carrera.ResultadoCarril()
+
+    return _carril
+
+
+# Geocodificador local sobre los cruces viales (app.geocoding.direccion_local):
+# "Calle 5 # 38-20" se resuelve sin red. GEOCODE_LOCAL=0 lo desactiva. Con
+# barrio/comuna mencionado, el punto local solo se acepta si cae a menos de
+# _GEOCODE_LOCAL_MAX_HINT_M del polígono; si no, se sigue a los proveedores.
+_GEOCODE_LOCAL = os.getenv("GEOCODE_LOCAL", "true").lower() not in ("0", "false", "no", "n")
+_GEOCODE_LOCAL_MAX_HINT_M = 150.0
+
+
+def _geocodificar_local(direccion: str, hint: Optional[tuple]) -> Optional[dict]:
+    """Intento local (sin red) de ``geocodificar_direccion_cali``; None si no aplica o no es confiable."""
+    # spatial_index importa este módulo: import diferido
+    from app.geocoding import spatial_index
+
+    result = spatial_index.geocodificar_direccion_local(
+        _expandir_abreviaciones(_limpiar_complementos(direccion))
+    )
+    if result is None or not _dentro_de_cali(result["lon"], result["lat"]):
+        return None
+    if hint is not None:
+        dist_m = proyeccion.proyectar(hint[1]).distance(proyeccion.punto_m(result["lon"], result["lat"]))
+        if dist_m > _GEOCODE_LOCAL_MAX_HINT_M:
+            print(f"⚠️ Geocodificación local descartada: {dist_m:.0f} m fuera de '{hint[0]}'")
+            return None
+    return result
+
+
+async def _geocodificar_sin_cache(direccion: str, clave: str) -> Optional[dict]:
+    """Geocodificador local, carrera de proveedores y fallbacks de ``geocodificar_direccion_cali`` (pasos 2a-8)."""
     variantes = _normalizar_direccion_colombiana(direccion)
     barrios_hint = _extraer_barrios_mencionados(direccion)
     comunas_hint = _extraer_comunas_mencionadas(direccion)
@@ -764,99 +1001,83 @@ async def geocodificar_direccion_cali(direccion: str) -> Optional[dict]:
         f" | barrio='{hint_b}' | comuna='{hint_c}'"
     )
 
-    async with httpx.AsyncClient(timeout=12.0) as client:
-
-        # ── Paso 1: Nominatim multi-candidato restringido al polígono del barrio ──
-        if barrios_hint:
-            barrio_name_hint, barrio_polygon_hint = barrios_hint[0]
-            variantes_hint = variantes + [f"{barrio_name_hint}, Cali, Valle del Cauca, Colombia"]
-            for query in variantes_hint:
-                candidatos = await _geocode_nominatim_multi(query, client, limit=5)
-                if candidatos:
-                    mejor = _seleccionar_candidato(candidatos, barrio_polygon_hint, barrio_name_hint)
-                    if mejor:
-                        snap_msg = (
-                            f" (proyectado desde {mejor['barrio_snap_desde']})"
-                            if mejor.get("barrio_snap") else ""
-                        )
-                        print(
-                            f"✅ [{mejor['proveedor']}+barrio:'{barrio_name_hint}'] →"
-                            f" [{mejor['lon']:.6f}, {mejor['lat']:.6f}]{snap_msg}"
-                        )
-                        _GEOCODE_CACHE[clave] = mejor
-                        return mejor
-
-        # ── Paso 2: Nominatim multi-candidato restringido al polígono de la comuna ──
-        if comunas_hint and not barrios_hint:
-            comuna_name_hint, comuna_polygon_hint = comunas_hint[0]
-            variantes_hint = variantes + [f"{comuna_name_hint}, Cali, Valle del Cauca, Colombia"]
-            for query in variantes_hint:
-                candidatos = await _geocode_nominatim_multi(query, client, limit=5)
-                if candidatos:
-                    mejor = _seleccionar_candidato(candidatos, comuna_polygon_hint, comuna_name_hint)
-                    if mejor:
-                        snap_msg = (
-                            f" (proyectado desde {mejor['barrio_snap_desde']})"
-                            if mejor.get("barrio_snap") else ""
-                        )
-                        print(
-                            f"✅ [{mejor['proveedor']}+comuna:'{comuna_name_hint}'] →"
-                            f" [{mejor['lon']:.6f}, {mejor['lat']:.6f}]{snap_msg}"
-                        )
-                        _GEOCODE_CACHE[clave] = mejor
-                        return mejor
-
-        # ── Paso 3: Nominatim simple (sin hint o sin resultados con hint) ──
-        for query in variantes:
-            result = await _geocode_nominatim(query, client)
-            if result:
-                print(f"✅ [nominatim] '{query}' → [{result['lon']}, {result['lat']}]")
-                _GEOCODE_CACHE[clave] = result
-                return result
-
-        # ── Paso 4: Photon ──
-        for query in variantes[:2]:
-            result = await _geocode_photon(query, client)
-            if result:
-                print(f"✅ [photon] '{query}' → [{result['lon']}, {result['lat']}]")
-                _GEOCODE_CACHE[clave] = result
-                return result
-
-        # ── Paso 5: ArcGIS ──
-        for query in variantes[:2]:
-            result = await _geocode_arcgis(query, client)
-            if result:
-                print(f"✅ [arcgis] '{query}' → [{result['lon']}, {result['lat']}]")
-                _GEOCODE_CACHE[clave] = result
-                return result
-
-        # ── Paso 6: Fallback al centroide del barrio mencionado ──
-        if barrios_hint:
-            barrio_name_hint, barrio_polygon_hint = barrios_hint[0]
-            centroide = barrio_polygon_hint.centroid
-            result = {
-                "lat": centroide.y, "lon": centroide.x,
-                "proveedor": "barrio_centroide",
-                "barrio_snap": True, "barrio_snap_desde": "centroide_fallback",
-            }
-            print(f"📍 Fallback centroide barrio '{barrio_name_hint}': [{centroide.x:.6f}, {centroide.y:.6f}]")
-            _GEOCODE_CACHE[clave] = result
-            return result
-
-        # ── Paso 7: Fallback al centroide de la comuna mencionada ──
-        if comunas_hint:
-            comuna_name_hint, comuna_polygon_hint = comunas_hint[0]
-            centroide = comuna_polygon_hint.centroid
-            result = {
-                "lat": centroide.y, "lon": centroide.x,
-                "proveedor": "comuna_centroide",
-                "barrio_snap": True, "barrio_snap_desde": "centroide_fallback",
-            }
-            print(f"📍 Fallback centroide comuna '{comuna_name_hint}': [{centroide.x:.6f}, {centroide.y:.6f}]")
-            _GEOCODE_CACHE[clave] = result
-            return result
+    # El barrio manda sobre la comuna como polígono de referencia
+    hint = barrios_hint[0] if barrios_hint else (comunas_hint[0] if comunas_hint else None)
+
+    if _GEOCODE_LOCAL:
+        local = _geocodificar_local(direccion, hint)
+        if local is not None:
+            print(
+                f"✅ [cruces_local] '{local['cruce']}' + {local['placa_m']:.0f} m →"
+                f" [{local['lon']:.6f}, {local['lat']:.6f}]"
+            )
+            await _guardar_geocode(clave, local)
+            return local
+
+    etiqueta_hint = ""
+    if hint is not None:
+        etiqueta_hint = f"+{'barrio' if barrios_hint else 'comuna'}:'{hint[0]}'"
+        queries_nominatim = variantes + [f"{hint[0]}, Cali, Valle del Cauca, Colombia"]
+    else:
+        queries_nominatim = variantes
+    limite = 5 if hint is not None else 1
+
+    carriles = {
+        "nominatim": _carril_proveedor(
+            "nominatim", lambda q: _geocode_nominatim_multi(q, limit=limite), queries_nominatim, hint
+        ),
+        "photon": _carril_proveedor("photon", _geocode_photon, variantes[:2], hint),
+        "arcgis": _carril_proveedor("arcgis", _geocode_arcgis, variantes[:2], hint),
+    }
+    ganador, result, resultados = await carrera.carrera(
+        carriles, _PROVEEDORES_GEOCODE.orden(), _GEOCODE_HEDGE_S
+    )
+    if result is None:
+        for proveedor in _PREFERENCIA_RESPALDO:
+            r = resultados.get(proveedor)
+            if r is not None and r.debil is not None:
+                ganador, result = proveedor, r.debil
+                break
+
+    if result is not None:
+        snap_msg = (
+            f" (proyectado desde {result['barrio_snap_desde']})" if result.get("barrio_snap") else ""
+        )
+        print(
+            f"✅ [{result['proveedor']}{etiqueta_hint}] →"
+            f" [{result['lon']:.6f}, {result['lat']:.6f}]{snap_msg}"
+        )
+        await _guardar_geocode(clave, result)
+        return result
+
+    # ── Fallback al centroide del barrio mencionado ──
+    if barrios_hint:
+        barrio_name_hint, barrio_polygon_hint = barrios_hint[0]
+        centroide = barrio_polygon_hint.centroid
+        result = {
+            "lat": centroide.y, "lon": centroide.x,
+            "proveedor": "barrio_centroide",
+            "barrio_snap": True, "barrio_snap_desde": "centroide_fallback",
+        }
+        print(f"📍 Fallback centroide barrio '{barrio_name_hint}': [{centroide.x:.6f}, {centroide.y:.6f}]")
+        await _guardar_geocode(clave, result)
+        return result
+
+    # ── Fallback al centroide de la comuna mencionada ──
+    if comunas_hint:
+        comuna_name_hint, comuna_polygon_hint = comunas_hint[0]
+        centroide = comuna_polygon_hint.centroid
+        result = {
+            "lat": centroide.y, "lon": centroide.x,
+            "proveedor": "comuna_centroide",
+            "barrio_snap": True, "barrio_snap_desde": "centroide_fallback",
+        }
+        print(f"📍 Fallback centroide comuna '{comuna_name_hint}': [{centroide.x:.6f}, {centroide.y:.6f}]")
+        await _guardar_geocode(clave, result)
+        return result
 
     print(f"⚠️ Sin resultados en ningún proveedor para: '{direccion}'")
+    await _guardar_geocode(clave, None)
     return None
 
 
@@ -1145,7 +1366,7 @@ async def post_registro_visita(payload: RegistroVisitaRequest):
             geocodificacion_fuente = geo.get("proveedor")
             coords_dict = {"type": "Point", "coordinates": [lon, lat]}
             # Intersección geográfica con basemaps
-            geo_result = geolocate_point(lon, lat)
+            geo_result = await ejecutor.en_pool(geolocate_point, lon, lat)
             barrio_vereda = geo_result["barrio_vereda"]
             comuna_corregimiento = geo_result["comuna_corregimiento"]
             print(f"📍 Barrio: {barrio_vereda} | Comuna: {comuna_corregimiento}")
@@ -1920,7 +2141,7 @@ async def post_registrar_requerimiento(
             )
         
         # Geolocalización automática: intersección con basemaps
-        geo_result = geolocate_point(lng, lat)
+        geo_result = await ejecutor.en_pool(geolocate_point, lng, lat)
         barrio_vereda = geo_result["barrio_vereda"]
         comuna_corregimiento = geo_result["comuna_corregimiento"]
         
@@ -2224,6 +2445,52 @@ async def post_clasificar_requerimiento(body: ClasificarRequerimientoRequest):
         raise HTTPException(status_code=500, detail=f"Error clasificando: {str(e)}")
 
 
+_CLASIFICAR_LOTE_MAX = int(os.getenv("CLASSIFIER_LOTE_MAX", "500"))
+
+
+class ClasificarRequerimientosLoteRequest(BaseModel):
+    items: List[ClasificarRequerimientoRequest] = Field(
+        ..., min_length=1, description="Requerimientos a clasificar (mismo formato que /clasificar-requerimiento)"
+    )
+    top_k: int = Field(3, ge=1, le=10, description="Cantidad máxima de candidatos por requerimiento")
+
+
+@router.post(
+    "/clasificar-requerimientos/lote",
+    summary="🟢 POST | Clasificar Requerimientos en lote (preview)",
+    description=(
+        "Igual que `/clasificar-requerimiento` para varios textos a la vez "
+        "(backfills, migraciones). Las reglas se aplican a todos y los que "
+        "caen a embeddings se embeben en una sola inferencia por lote. "
+        "Los resultados vuelven en el mismo orden que `items`; se ignora el "
+        "`top_k` de cada item en favor del del lote."
+    ),
+)
+def post_clasificar_requerimientos_lote(body: ClasificarRequerimientosLoteRequest):
+    # ``def`` (no async): FastAPI lo corre en su threadpool, así la
+    # inferencia del lote no bloquea el event loop.
+    if len(body.items) > _CLASIFICAR_LOTE_MAX:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Máximo {_CLASIFICAR_LOTE_MAX} items por lote (recibidos {len(body.items)})",
+        )
+    try:
+        resultados = clasificar_lote(
+            [
+                {
+                    "requerimiento": item.texto,
+                    "tipo_requerimiento": item.tipo_requerimiento,
+                    "observaciones": item.observaciones,
+                }
+                for item in body.items
+            ],
+            top_k=body.top_k,
+        )
+        return {"success": True, "total": len(resultados), "resultados": resultados}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error clasificando lote: {str(e)}")
+
+
 # ==================== ENDPOINT: Obtener Requerimientos ====================#
 @router.get(
     "/obtener-requerimientos",
@@ -2383,7 +2650,7 @@ async def patch_editar_requerimiento(
                 coordinates = coords_dict.get('coordinates')
                 lng = float(coordinates[0])
                 lat = float(coordinates[1])
-                geo_result = geolocate_point(lng, lat)
+                geo_result = await ejecutor.en_pool(geolocate_point, lng, lat)
                 updates["barrio_vereda"] = geo_result["barrio_vereda"]
                 updates["comuna_corregimiento"] = geo_result["comuna_corregimiento"]
                 updates["coords"] = coords_dict
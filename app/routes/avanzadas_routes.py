@@ -27,6 +27,7 @@ from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional
 
+import numpy as np
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
 from pydantic import BaseModel, Field, ValidationError
 
@@ -40,6 +41,7 @@ from app.data.avanzadas_catalogos import (
     ESTRATEGIAS_DEFAULT,
 )
 from app.firebase_config import db
+from app.geocoding import geohash
 # Módulo unificado de S3 (single source: credenciales, bucket, key format,
 # upload/delete/list/presign).
 from app.utils import s3_storage
@@ -337,6 +339,50 @@ class GeoOut(BaseModel):
     omitidos: OmitidosGeoOut
 
 
+class GeoAvanzadaCercaOut(GeoAvanzadaOut):
+    distancia_m: float
+
+
+class GeoRequerimientoCercaOut(GeoRequerimientoOut):
+    distancia_m: float
+
+
+class GeoJornadaCercaOut(GeoJornadaOut):
+    distancia_m: float
+
+
+class GeoCercaOut(BaseModel):
+    lat: float
+    lng: float
+    radio_m: float
+    avanzadas: List[GeoAvanzadaCercaOut]
+    requerimientos: List[GeoRequerimientoCercaOut]
+    jornadas: List[GeoJornadaCercaOut]
+
+
+class PoligonoCoropletaOut(BaseModel):
+    # id: posición del polígono en su basemap (estable mientras no cambie
+    # el GeoJSON); nombre: barrio_vereda / comuna_corregimiento.
+    id: int
+    nombre: Optional[str] = None
+    total: int
+
+
+class OmitidosCoropletaOut(BaseModel):
+    sin_coordenadas: int
+    fuera_de_poligonos: int
+    huerfanos: int
+
+
+class CoropletaOut(BaseModel):
+    capa: str
+    entidad: Optional[str] = None
+    mes: Optional[str] = None
+    total: int
+    poligonos: List[PoligonoCoropletaOut]
+    omitidos: OmitidosCoropletaOut
+
+
 # ==================== HELPERS ====================
 
 def _sigla_entidad(entidad: str) -> str:
@@ -379,6 +425,29 @@ def _parsear_coordenadas(valor) -> Optional[tuple]:
     return (lat, lng)
 
 
+def _campos_geo(coordenadas) -> dict:
+    """Campos derivados que se escriben junto con ``coordenadas`` (o
+    ``coordenadas_encuentro`` en jornadas): ``geo`` (GeoPoint numérico,
+    para no volver a parsear el string en cada lectura) y ``geohash``
+    (para las consultas por radio de ``/geo/cerca``). Ambos ``None`` si
+    las coordenadas no son parseables."""
+    coords = _parsear_coordenadas(coordenadas)
+    if coords is None:
+        return {"geo": None, "geohash": None}
+    lat, lng = coords
+    return {"geo": firestore.GeoPoint(lat, lng), "geohash": geohash.codificar(lat, lng)}
+
+
+def _coordenadas_doc(data: dict, campo: str = "coordenadas") -> Optional[tuple]:
+    """``(lat, lng)`` de un documento: el GeoPoint ``geo`` si existe (se
+    escribe siempre junto con ``campo``), si no el string parseado
+    (documentos anteriores al backfill)."""
+    geo = data.get("geo")
+    if geo is not None:
+        return (geo.latitude, geo.longitude)
+    return _parsear_coordenadas(data.get(campo))
+
+
 def _requerimiento_doc_to_out(doc) -> dict:
     data = doc.to_dict() or {}
     data["id"] = doc.id
@@ -782,12 +851,63 @@ def _invalidar_cache_estadisticas() -> None:
     _estadisticas_cache = None
 
 
+def _geo_avanzada(doc_id: str, data: dict, coords: tuple) -> dict:
+    lat, lng = coords
+    return {
+        "client_id": doc_id,
+        "nombre_avanzada": data.get("nombre_avanzada", ""),
+        "fecha": data.get("fecha", ""),
+        "estrategia": data.get("estrategia", ""),
+        "comuna": data.get("comuna", ""),
+        "barrio": data.get("barrio", ""),
+        "lat": lat,
+        "lng": lng,
+        "requerimientos_count": data.get("requerimientos_count", 0),
+    }
+
+
+def _geo_requerimiento(doc_id: str, data: dict, origen: str, coords: tuple) -> dict:
+    lat, lng = coords
+    entidad = data.get("entidad") or ""
+    categoria_personalizada = (data.get("categoria_personalizada") or "").strip()
+    categoria = categoria_personalizada or (data.get("categoria") or "")
+    fotos = data.get("fotos_urls") or []
+    return {
+        "id": doc_id,
+        "avanzada_client_id": data.get("avanzada_client_id") or "",
+        "origen": origen,
+        "sigla": _sigla_entidad(entidad),
+        "entidad": entidad,
+        "categoria": categoria,
+        "requerimiento": data.get("requerimiento", ""),
+        "ubicacion": data.get("ubicacion", ""),
+        "fecha": data.get("fecha", ""),
+        "lat": lat,
+        "lng": lng,
+        "fotos_count": len(fotos),
+    }
+
+
+def _geo_jornada(doc_id: str, data: dict, coords: tuple) -> dict:
+    lat, lng = coords
+    return {
+        "client_id": doc_id,
+        "nombre_jornada": data.get("nombre_jornada", ""),
+        "fecha": data.get("fecha", ""),
+        "comuna": data.get("comuna", ""),
+        "barrio": data.get("barrio", ""),
+        "estado": data.get("estado", ""),
+        "lat": lat,
+        "lng": lng,
+    }
+
+
 def _calcular_geo() -> dict:
     """Recorre ``avanzadas``, ``avanzadas_requerimientos`` y
     ``jornadas_integrales`` UNA sola vez cada una y arma los tres
     arreglos de puntos georreferenciados para el mapa, parseando el
-    campo ``coordenadas``/``coordenadas_encuentro`` (string "lat, lng")
-    con ``_parsear_coordenadas``.
+    GeoPoint ``geo`` (o, en documentos sin backfill, el string "lat, lng"
+    de ``coordenadas``/``coordenadas_encuentro``) con ``_coordenadas_doc``.
 
     Los registros sin coordenadas parseables se OMITEN (nunca se
     fabrica una ubicación 0,0 ni se hereda la coordenada de un padre) y
@@ -807,22 +927,11 @@ def _calcular_geo() -> dict:
     omitidos_avanzadas = 0
     for doc in avanzada_docs:
         data = doc.to_dict() or {}
-        coords = _parsear_coordenadas(data.get("coordenadas"))
+        coords = _coordenadas_doc(data)
         if coords is None:
             omitidos_avanzadas += 1
             continue
-        lat, lng = coords
-        avanzadas_out.append({
-            "client_id": doc.id,
-            "nombre_avanzada": data.get("nombre_avanzada", ""),
-            "fecha": data.get("fecha", ""),
-            "estrategia": data.get("estrategia", ""),
-            "comuna": data.get("comuna", ""),
-            "barrio": data.get("barrio", ""),
-            "lat": lat,
-            "lng": lng,
-            "requerimientos_count": data.get("requerimientos_count", 0),
-        })
+        avanzadas_out.append(_geo_avanzada(doc.id, data, coords))
 
     requerimientos_out: List[dict] = []
     omitidos_requerimientos = 0
@@ -831,7 +940,7 @@ def _calcular_geo() -> dict:
         # Sin fallback a la coordenada del padre (avanzada o jornada):
         # heredarla fabricaría una ubicación que el requerimiento nunca
         # reportó.
-        coords = _parsear_coordenadas(data.get("coordenadas"))
+        coords = _coordenadas_doc(data)
         if coords is None:
             omitidos_requerimientos += 1
             continue
@@ -851,45 +960,17 @@ def _calcular_geo() -> dict:
             omitidos_requerimientos += 1
             continue
 
-        lat, lng = coords
-        entidad = data.get("entidad") or ""
-        categoria_personalizada = (data.get("categoria_personalizada") or "").strip()
-        categoria = categoria_personalizada or (data.get("categoria") or "")
-        fotos = data.get("fotos_urls") or []
-        requerimientos_out.append({
-            "id": doc.id,
-            "avanzada_client_id": data.get("avanzada_client_id") or "",
-            "origen": origen,
-            "sigla": _sigla_entidad(entidad),
-            "entidad": entidad,
-            "categoria": categoria,
-            "requerimiento": data.get("requerimiento", ""),
-            "ubicacion": data.get("ubicacion", ""),
-            "fecha": data.get("fecha", ""),
-            "lat": lat,
-            "lng": lng,
-            "fotos_count": len(fotos),
-        })
+        requerimientos_out.append(_geo_requerimiento(doc.id, data, origen, coords))
 
     jornadas_out: List[dict] = []
     omitidos_jornadas = 0
     for doc in jornada_docs:
         data = doc.to_dict() or {}
-        coords = _parsear_coordenadas(data.get("coordenadas_encuentro"))
+        coords = _coordenadas_doc(data, "coordenadas_encuentro")
         if coords is None:
             omitidos_jornadas += 1
             continue
-        lat, lng = coords
-        jornadas_out.append({
-            "client_id": doc.id,
-            "nombre_jornada": data.get("nombre_jornada", ""),
-            "fecha": data.get("fecha", ""),
-            "comuna": data.get("comuna", ""),
-            "barrio": data.get("barrio", ""),
-            "estado": data.get("estado", ""),
-            "lat": lat,
-            "lng": lng,
-        })
+        jornadas_out.append(_geo_jornada(doc.id, data, coords))
 
     return {
         "avanzadas": avanzadas_out,
@@ -942,6 +1023,285 @@ def _invalidar_cache_geo() -> None:
     _geo_cache = None
 
 
+# ==================== PUNTOS CERCANOS (GEOHASH) ====================
+# Cada escritura guarda, junto al string de coordenadas, el GeoPoint
+# ``geo`` y su ``geohash`` (``_campos_geo``; los documentos anteriores se
+# completan con scripts/backfill_geo_avanzadas.py). Una búsqueda por radio
+# consulta solo los rangos de geohash que cubren el círculo
+# (``geohash.rangos_radio``) en vez de recorrer las tres colecciones, y
+# filtra los candidatos por distancia exacta. Documentos sin ``geohash``
+# (sin coordenadas parseables o sin backfill) no aparecen.
+
+_GEO_CERCA_RADIO_MAX_M = float(os.getenv("AVANZADAS_GEO_CERCA_RADIO_MAX_M", "20000"))
+
+
+def _docs_en_radio(coleccion: str, campo: str, lat: float, lng: float, radio_m: float) -> List[tuple]:
+    """``[(doc_id, data, (lat, lng), distancia_m)]`` de ``coleccion``
+    dentro de ``radio_m``, ordenados por distancia, con una consulta de
+    rango por celda de geohash."""
+    vistos = set()
+    encontrados = []
+    for inicio, fin in geohash.rangos_radio(lat, lng, radio_m):
+        consulta = (
+            db.collection(coleccion)
+            .where("geohash", ">=", inicio)
+            .where("geohash", "<=", fin)
+        )
+        for doc in consulta.stream():
+            if doc.id in vistos:
+                continue
+            vistos.add(doc.id)
+            data = doc.to_dict() or {}
+            coords = _coordenadas_doc(data, campo)
+            if coords is None:
+                continue
+            distancia = geohash.distancia_m(lat, lng, *coords)
+            if distancia <= radio_m:
+                encontrados.append((doc.id, data, coords, distancia))
+    encontrados.sort(key=lambda e: (e[3], e[0]))
+    return encontrados
+
+
+def _geo_cerca(lat: float, lng: float, radio_m: float) -> dict:
+    """Avanzadas, requerimientos y jornadas a ``radio_m`` metros o menos
+    de ``(lat, lng)``, con su ``distancia_m``. Los requerimientos
+    huérfanos se omiten, igual que en ``_calcular_geo``; para eso se leen
+    solo los padres de los requerimientos encontrados."""
+    avanzadas = _docs_en_radio("avanzadas", "coordenadas", lat, lng, radio_m)
+    requerimientos = _docs_en_radio("avanzadas_requerimientos", "coordenadas", lat, lng, radio_m)
+    jornadas = _docs_en_radio("jornadas_integrales", "coordenadas_encuentro", lat, lng, radio_m)
+
+    padres: Dict[tuple, bool] = {}
+
+    def _padre_existe(coleccion: str, padre_id) -> bool:
+        clave = (coleccion, padre_id)
+        if clave not in padres:
+            padres[clave] = bool(padre_id) and db.collection(coleccion).document(padre_id).get().exists
+        return padres[clave]
+
+    requerimientos_out = []
+    for doc_id, data, coords, distancia in requerimientos:
+        origen = data.get("origen") or "avanzada"
+        if origen == "jornada":
+            existe = _padre_existe("jornadas_integrales", data.get("jornada_client_id"))
+        else:
+            existe = _padre_existe("avanzadas", data.get("avanzada_client_id"))
+        if existe:
+            requerimientos_out.append(
+                {**_geo_requerimiento(doc_id, data, origen, coords), "distancia_m": round(distancia, 2)}
+            )
+
+    return {
+        "lat": lat,
+        "lng": lng,
+        "radio_m": radio_m,
+        "avanzadas": [
+            {**_geo_avanzada(i, d, c), "distancia_m": round(m, 2)} for i, d, c, m in avanzadas
+        ],
+        "requerimientos": requerimientos_out,
+        "jornadas": [
+            {**_geo_jornada(i, d, c), "distancia_m": round(m, 2)} for i, d, c, m in jornadas
+        ],
+    }
+
+
+# ==================== COROPLETAS (REQUERIMIENTOS POR POLÍGONO) ====================
+# A diferencia de ``por_comuna`` de las estadísticas (que agrupa por el texto
+# libre de ``comuna`` que escribió el equipo de campo), acá cada
+# requerimiento se asigna al polígono de barrio y de comuna que contiene su
+# ``coordenadas``, con un spatial join vectorizado sobre los mismos
+# ``PolygonIndex`` del geocoding.
+#
+# El estado (asignación por requerimiento + conteos) se construye con un
+# único recorrido de la colección y luego se mantiene incrementalmente desde
+# las escrituras de requerimientos (``_coropletas_registrar`` /
+# ``_coropletas_quitar``), sin volver a escanear. Esas escrituras solo
+# llegan al estado del proceso que las atendió: las de OTRO proceso (otro
+# worker de uvicorn, scripts de migración) se ven recién cuando vence el
+# TTL, que es entonces la desactualización máxima de los conteos en un
+# despliegue con varios workers.
+_AVANZADAS_COROPLETAS_TTL_SECONDS = float(os.getenv("AVANZADAS_COROPLETAS_TTL_SECONDS", "300"))
+
+_CAPAS_COROPLETA = ("barrio", "comuna")
+
+# Índices especiales en las asignaciones (los polígonos reales son >= 0)
+_FUERA_DE_POLIGONOS = -1
+_SIN_COORDENADAS = -2
+_HUERFANO = -3
+
+
+@dataclass
+class _CoropletaEstado:
+    # capa -> PolygonIndex
+    capas: dict
+    # id de requerimiento -> (sigla, mes, {capa: índice de polígono})
+    asignaciones: Dict[str, tuple]
+    # (capa, índice, sigla, mes) -> cantidad de requerimientos
+    conteos: Dict[tuple, int]
+    expires_at: float
+
+
+_coropletas_estado: Optional[_CoropletaEstado] = None
+
+
+def _capas_coropleta() -> dict:
+    """Capas de polígonos del geocoding (import diferido: cargar los
+    basemaps solo hace falta cuando se pide una coropleta)."""
+    from app.geocoding import spatial_index
+
+    return {"barrio": spatial_index._BARRIOS_SPATIAL, "comuna": spatial_index._COMUNAS_SPATIAL}
+
+
+def _clave_coropleta(data: dict) -> tuple:
+    return _sigla_entidad(data.get("entidad") or ""), _mes_valido(data.get("fecha"))
+
+
+def _asignar_poligonos(capas: dict, coords: List[tuple]) -> Dict[str, np.ndarray]:
+    """Spatial join en bloque: por capa, índice del polígono que contiene
+    cada ``(lat, lng)`` (``_FUERA_DE_POLIGONOS`` si ninguno)."""
+    lats = np.array([c[0] for c in coords], dtype=float)
+    lngs = np.array([c[1] for c in coords], dtype=float)
+    return {capa: indice.contenedores(lngs, lats) for capa, indice in capas.items()}
+
+
+def _coropletas_sumar(estado: _CoropletaEstado, asignacion: tuple, signo: int) -> None:
+    sigla, mes, indices = asignacion
+    for capa, idx in indices.items():
+        clave = (capa, idx, sigla, mes)
+        n = estado.conteos.get(clave, 0) + signo
+        if n:
+            estado.conteos[clave] = n
+        else:
+            estado.conteos.pop(clave, None)
+
+
+def _calcular_coropletas() -> _CoropletaEstado:
+    """Recorre ``avanzadas_requerimientos`` UNA vez, parsea
+    ``coordenadas`` y asigna todos los puntos a su barrio y comuna con una
+    consulta bulk por capa.
+
+    Mismo criterio que ``_calcular_geo``: sin coordenadas parseables o
+    huérfano (padre inexistente) no se asigna a ningún polígono y se cuenta
+    en ``omitidos``.
+    """
+    requerimiento_docs = list(db.collection("avanzadas_requerimientos").stream())
+    avanzadas_ids = {d.id for d in db.collection("avanzadas").stream()}
+    jornadas_ids = {d.id for d in db.collection("jornadas_integrales").stream()}
+
+    capas = _capas_coropleta()
+    estado = _CoropletaEstado(
+        capas=capas,
+        asignaciones={},
+        conteos={},
+        expires_at=time.monotonic() + _AVANZADAS_COROPLETAS_TTL_SECONDS,
+    )
+
+    ubicados: List[tuple] = []  # (id, sigla, mes)
+    coords: List[tuple] = []
+    for doc in requerimiento_docs:
+        data = doc.to_dict() or {}
+        sigla, mes = _clave_coropleta(data)
+        origen = data.get("origen") or "avanzada"
+        if origen == "jornada":
+            huerfano = data.get("jornada_client_id") not in jornadas_ids
+        else:
+            huerfano = data.get("avanzada_client_id") not in avanzadas_ids
+        c = _coordenadas_doc(data)
+        if c is None or huerfano:
+            especial = _SIN_COORDENADAS if c is None else _HUERFANO
+            estado.asignaciones[doc.id] = (sigla, mes, {capa: especial for capa in capas})
+            continue
+        ubicados.append((doc.id, sigla, mes))
+        coords.append(c)
+
+    if coords:
+        indices = _asignar_poligonos(capas, coords)
+        for i, (req_id, sigla, mes) in enumerate(ubicados):
+            estado.asignaciones[req_id] = (sigla, mes, {capa: int(indices[capa][i]) for capa in capas})
+
+    for asignacion in estado.asignaciones.values():
+        _coropletas_sumar(estado, asignacion, +1)
+    return estado
+
+
+def _obtener_coropletas() -> _CoropletaEstado:
+    global _coropletas_estado
+
+    estado = _coropletas_estado
+    if estado is None or estado.expires_at <= time.monotonic():
+        estado = _calcular_coropletas()
+        _coropletas_estado = estado
+    return estado
+
+
+def _coropletas_quitar(req_id: str) -> None:
+    """Descuenta un requerimiento borrado (no-op si el estado no está construido)."""
+    estado = _coropletas_estado
+    if estado is None:
+        return
+    anterior = estado.asignaciones.pop(req_id, None)
+    if anterior is not None:
+        _coropletas_sumar(estado, anterior, -1)
+
+
+def _coropletas_registrar(req_id: str, data: dict) -> None:
+    """Alta o modificación de un requerimiento: reasigna solo ese punto en
+    vez de recalcular todo (no-op si el estado no está construido). Quien
+    llama acaba de escribirlo bajo un padre existente, así que no es
+    huérfano."""
+    estado = _coropletas_estado
+    if estado is None:
+        return
+    _coropletas_quitar(req_id)
+    sigla, mes = _clave_coropleta(data)
+    c = _coordenadas_doc(data)
+    if c is None:
+        indices = {capa: _SIN_COORDENADAS for capa in estado.capas}
+    else:
+        asignados = _asignar_poligonos(estado.capas, [c])
+        indices = {capa: int(asignados[capa][0]) for capa in estado.capas}
+    asignacion = (sigla, mes, indices)
+    estado.asignaciones[req_id] = asignacion
+    _coropletas_sumar(estado, asignacion, +1)
+
+
+def _invalidar_cache_coropletas() -> None:
+    global _coropletas_estado
+    _coropletas_estado = None
+
+
+def _consultar_coropleta(capa: str, entidad: Optional[str] = None, mes: Optional[str] = None) -> dict:
+    """Conteo por polígono de ``capa`` (todos los polígonos, también los
+    que quedan en 0), filtrado opcionalmente por sigla de entidad y mes
+    ``YYYY-MM``."""
+    estado = _obtener_coropletas()
+    sigla = _sigla_entidad(entidad) if entidad else None
+    indice = estado.capas[capa]
+    totales = [0] * len(indice)
+    especiales = {_FUERA_DE_POLIGONOS: 0, _SIN_COORDENADAS: 0, _HUERFANO: 0}
+    for (c, idx, s, m), n in estado.conteos.items():
+        if c != capa or (sigla is not None and s != sigla) or (mes is not None and m != mes):
+            continue
+        if idx >= 0:
+            totales[idx] += n
+        else:
+            especiales[idx] += n
+    return {
+        "capa": capa,
+        "entidad": sigla,
+        "mes": mes,
+        "total": sum(totales),
+        "poligonos": [
+            {"id": i, "nombre": indice.names[i], "total": t} for i, t in enumerate(totales)
+        ],
+        "omitidos": {
+            "sin_coordenadas": especiales[_SIN_COORDENADAS],
+            "fuera_de_poligonos": especiales[_FUERA_DE_POLIGONOS],
+            "huerfanos": especiales[_HUERFANO],
+        },
+    }
+
+
 def _upsert_categoria_personalizada(entidad_sigla: str, categoria: str, fecha: str) -> None:
     """Registra una categoría personalizada nueva si (entidad, categoria) no existe aún."""
     existentes = (
@@ -1228,6 +1588,7 @@ async def crear_avanzada(
             "requerimiento": req_in.requerimiento,
             "ubicacion": req_in.ubicacion,
             "coordenadas": req_in.coordenadas,
+            **_campos_geo(req_in.coordenadas),
             "fotos_urls": requerimientos_fotos_urls.get(idx, []),
             "fecha": payload.fecha,
             "nombre_avanzada": payload.nombre_avanzada,
@@ -1247,6 +1608,7 @@ async def crear_avanzada(
         req_doc_ref = db.collection("avanzadas_requerimientos").document(req_doc_id)
         req_doc_ref.set(req_data)
         req_data["id"] = req_doc_ref.id
+        _coropletas_registrar(req_doc_id, req_data)
         requerimientos_out.append(RequerimientoAvanzadaOut(**req_data))
 
         if req_in.categoria_personalizada and req_in.categoria_personalizada.strip():
@@ -1266,6 +1628,7 @@ async def crear_avanzada(
         "barrio": payload.barrio,
         "direccion": payload.direccion,
         "coordenadas": payload.coordenadas,
+        **_campos_geo(payload.coordenadas),
         "encargados": payload.encargados,
         "asistentes": [
             {
@@ -1402,6 +1765,63 @@ async def obtener_geo_avanzadas(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Error calculando puntos georreferenciados: {str(e)}")
 
 
+@router.get(
+    "/geo/cerca",
+    summary="📍 GET | Avanzadas, requerimientos y jornadas cerca de un punto",
+    response_model=GeoCercaOut,
+)
+async def obtener_geo_cerca(
+    lat: float = Query(..., ge=-90.0, le=90.0),
+    lng: float = Query(..., ge=-180.0, le=180.0),
+    radio_m: float = Query(500.0, gt=0.0, description="Radio de búsqueda en metros"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Puntos a ``radio_m`` metros o menos de ``(lat, lng)``, ordenados por
+    distancia. Consulta Firestore por rangos de ``geohash`` (unas pocas
+    celdas alrededor del punto) en vez de recorrer las colecciones
+    completas; sin cache porque cada consulta ya es acotada.
+    """
+    if radio_m > _GEO_CERCA_RADIO_MAX_M:
+        raise HTTPException(
+            status_code=422, detail=f"radio_m no puede superar {_GEO_CERCA_RADIO_MAX_M:g} m"
+        )
+    try:
+        return GeoCercaOut(**_geo_cerca(lat, lng, radio_m))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error buscando puntos cercanos: {str(e)}")
+
+
+@router.get(
+    "/coropletas",
+    summary="🗺️ GET | Requerimientos por barrio/comuna (coropleta)",
+    response_model=CoropletaOut,
+)
+async def obtener_coropletas_avanzadas(
+    capa: str = Query("comuna", pattern="^(barrio|comuna)$", description="Capa de polígonos: barrio | comuna"),
+    entidad: Optional[str] = Query(None, description="Sigla (o 'SIGLA - Nombre') de la entidad"),
+    mes: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="Mes YYYY-MM"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Cantidad de requerimientos (avanzadas y jornadas) por polígono de
+    barrio o comuna, asignados por la geometría de sus ``coordenadas`` y
+    no por el texto de ``comuna``. Devuelve todos los polígonos de la
+    capa con su ``id`` y ``total`` (0 incluido), listos para pintar una
+    coropleta.
+
+    La asignación se calcula una vez y se actualiza incrementalmente con
+    cada alta/edición/borrado de requerimientos (ver
+    ``_coropletas_registrar``). Con varios workers, los cambios atendidos
+    por otro proceso pueden tardar hasta ``AVANZADAS_COROPLETAS_TTL_SECONDS``
+    (default 300 s) en reflejarse en los conteos.
+    """
+    try:
+        return CoropletaOut(**_consultar_coropleta(capa, entidad, mes))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculando coropleta: {str(e)}")
+
+
 # ==================== ACTUALIZAR AVANZADA (PATCH / PUT) ====================
 # IMPORTANTE: mismo motivo que "/estadisticas" y "/geo" arriba -- estas
 # rutas (y las de requerimientos más abajo) deben declararse ANTES de
@@ -1510,6 +1930,8 @@ async def _actualizar_avanzada(client_id: str, cambios: dict, avanzada_ref=None)
         if not doc.exists:
             raise HTTPException(status_code=404, detail=f"Avanzada '{client_id}' no encontrada")
 
+    if "coordenadas" in cambios:
+        cambios.update(_campos_geo(cambios["coordenadas"]))
     cambios["updated_at"] = now_colombia().isoformat()
     avanzada_ref.update(cambios)
     _invalidar_cache_estadisticas()
@@ -1613,6 +2035,7 @@ async def eliminar_avanzada(
     )
     for req_doc in req_docs:
         db.collection("avanzadas_requerimientos").document(req_doc.id).delete()
+        _coropletas_quitar(req_doc.id)
 
     avanzada_ref.delete()
 
@@ -1772,6 +2195,7 @@ async def crear_requerimiento_avanzada(
         "requerimiento": req_in.requerimiento,
         "ubicacion": req_in.ubicacion,
         "coordenadas": req_in.coordenadas,
+        **_campos_geo(req_in.coordenadas),
         "fotos_urls": fotos_urls,
         "fecha": avanzada_data.get("fecha", ""),
         "nombre_avanzada": avanzada_data.get("nombre_avanzada", ""),
@@ -1783,6 +2207,7 @@ async def crear_requerimiento_avanzada(
     req_ref = db.collection("avanzadas_requerimientos").document(req_doc_id)
     req_ref.set(req_data)
     req_data["id"] = req_doc_id
+    _coropletas_registrar(req_doc_id, req_data)
 
     if req_in.categoria_personalizada and req_in.categoria_personalizada.strip():
         _upsert_categoria_personalizada(
@@ -1864,6 +2289,8 @@ async def actualizar_requerimiento_avanzada(
         raise HTTPException(status_code=422, detail=e.errors())
 
     cambios = patch_in.model_dump(exclude_unset=True, exclude={"fotos_eliminar"})
+    if "coordenadas" in cambios:
+        cambios.update(_campos_geo(cambios["coordenadas"]))
 
     fotos_urls = list(data_actual.get("fotos_urls", []))
     eliminadas = patch_in.fotos_eliminar or []
@@ -1920,7 +2347,9 @@ async def actualizar_requerimiento_avanzada(
     _invalidar_cache_estadisticas()
     _invalidar_cache_geo()
 
-    return RequerimientoAvanzadaOut(**_requerimiento_doc_to_out(req_ref.get()))
+    actualizado = _requerimiento_doc_to_out(req_ref.get())
+    _coropletas_registrar(req_id, actualizado)
+    return RequerimientoAvanzadaOut(**actualizado)
 
 
 @router.delete(
@@ -1947,6 +2376,7 @@ async def eliminar_requerimiento_avanzada(
 
     req_index = data_actual.get("req_index", 0)
     req_ref.delete()
+    _coropletas_quitar(req_id)
 
     try:
         s3_client = get_s3_client()
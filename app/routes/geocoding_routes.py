@@ -1,15 +1,24 @@
-"""Rutas FastAPI para reverse geocoding (coordenada → dirección)."""
+"""Rutas FastAPI para reverse geocoding (coordenada → dirección) y contornos de basemaps."""
 from __future__ import annotations
 
+import os
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response
 from pydantic import BaseModel, Field
 
-from app.geocoding.reverse import reverse_geocode
+from app.geocoding import contornos, ejecutor, registro_basemaps
+from app.geocoding.reverse import coordenada_de_token, reverse_geocode, reverse_geocode_lote
 
 router = APIRouter(prefix="/api", tags=["Geocoding"])
 
+# Máximo de coordenadas por solicitud al endpoint de lote
+_LOTE_MAX_PUNTOS = 10000
+
+# Cache-Control de los contornos: el navegador revalida con If-None-Match
+# pasado este tiempo y recibe 304 mientras el basemap no cambie.
+_CONTORNOS_MAX_AGE_S = int(os.getenv("CONTORNOS_MAX_AGE_S", "3600"))
+
 
 class ReverseGeocodeRequest(BaseModel):
     lat: float = Field(..., ge=-90.0, le=90.0, description="Latitud en WGS84")
@@ -18,6 +27,14 @@ class ReverseGeocodeRequest(BaseModel):
         default=True,
         description="Si True, enriquece con Nominatim /reverse (puede tardar ~1s).",
     )
+    diferir_nominatim: bool = Field(
+        default=False,
+        description=(
+            "Si True, responde de inmediato con los basemaps y agenda Nominatim en "
+            "segundo plano; el resultado reconciliado se consulta con "
+            "GET /api/reverse-geocode/enriquecimiento/{token}."
+        ),
+    )
 
 
 class ViaInfo(BaseModel):
@@ -47,6 +64,14 @@ class VerificacionInfo(BaseModel):
     advertencias: list[str] = []
 
 
+class EnriquecimientoInfo(BaseModel):
+    estado: str = Field(..., description="pendiente | listo | fallido | rechazado (cola llena)")
+    pendiente: bool = Field(
+        ..., description="True si Nominatim quedó agendado y conviene consultar el token más tarde"
+    )
+    token: str
+
+
 class ReverseGeocodeResponse(BaseModel):
     success: bool
     coordenada: Coordenada
@@ -60,6 +85,59 @@ class ReverseGeocodeResponse(BaseModel):
     osm: Optional[dict] = None
     fuentes: list[str]
     verificacion: Optional[VerificacionInfo] = None
+    enriquecimiento: Optional[EnriquecimientoInfo] = None
+
+
+class ReverseGeocodeLoteRequest(BaseModel):
+    lats: list[float] = Field(..., min_length=1, max_length=_LOTE_MAX_PUNTOS, description="Latitudes WGS84")
+    lons: list[float] = Field(..., min_length=1, max_length=_LOTE_MAX_PUNTOS, description="Longitudes WGS84")
+    usar_nominatim: bool = Field(
+        default=False,
+        description=(
+            "Si True, enriquece cada punto con Nominatim (1 req/s). Solo para lotes de hasta "
+            "GEOCODING_LOTE_MAX_NOMINATIM puntos (default 50); por encima responde 422."
+        ),
+    )
+
+
+class AsignacionLoteInfo(BaseModel):
+    barrio_fuente: str
+    comuna_fuente: str
+
+
+class ReverseGeocodeLoteItem(BaseModel):
+    coordenada: Coordenada
+    dentro_de_cali: bool
+    barrio_vereda: Optional[str] = None
+    comuna_corregimiento: Optional[str] = None
+    cruce_mas_cercano: Optional[CruceInfo] = None
+    direccion_legible: str
+    fuentes: list[str]
+    asignacion: AsignacionLoteInfo
+
+
+class ReverseGeocodeLoteResponse(BaseModel):
+    success: bool
+    total: int
+    resultados: list[ReverseGeocodeLoteItem]
+
+
+class BasemapEstadoItem(BaseModel):
+    nombre: str
+    ruta: str
+    elementos: int
+    sha256: Optional[str] = None
+    segundos_construccion: Optional[float] = None
+    memoria_bytes: int = Field(..., description="Estimada: geometrías, arreglos e índices de la capa")
+    cargada_en: Optional[str] = None
+    recargas: int
+    s3_key: Optional[str] = None
+    ultimo_error: Optional[str] = None
+
+
+class BasemapsEstadoResponse(BaseModel):
+    success: bool
+    capas: list[BasemapEstadoItem]
 
 
 @router.post(
@@ -78,7 +156,10 @@ async def reverse_geocode_endpoint(
     """
     try:
         return await reverse_geocode(
-            payload.lat, payload.lon, usar_nominatim=payload.usar_nominatim
+            payload.lat,
+            payload.lon,
+            usar_nominatim=payload.usar_nominatim,
+            diferir_nominatim=payload.diferir_nominatim,
         )
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
@@ -93,8 +174,126 @@ async def reverse_geocode_get(
     lat: float = Query(..., ge=-90.0, le=90.0),
     lon: float = Query(..., ge=-180.0, le=180.0),
     usar_nominatim: bool = Query(default=True),
+    diferir_nominatim: bool = Query(default=False),
 ):
     try:
-        return await reverse_geocode(lat, lon, usar_nominatim=usar_nominatim)
+        return await reverse_geocode(
+            lat, lon, usar_nominatim=usar_nominatim, diferir_nominatim=diferir_nominatim
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get(
+    "/reverse-geocode/enriquecimiento/{token}",
+    response_model=ReverseGeocodeResponse,
+    summary="Resultado reconciliado de un reverse geocoding diferido",
+)
+async def reverse_geocode_enriquecimiento(token: str):
+    """
+    Consulta de seguimiento del modo `diferir_nominatim`. Devuelve la misma
+    respuesta que `/reverse-geocode`; `enriquecimiento.estado` indica si
+    Nominatim ya fue reconciliado (`listo`), sigue en cola (`pendiente`),
+    falló (`fallido`, se mantiene la asignación local) o no se pudo agendar
+    porque la cola está llena (`rechazado`, `pendiente: false`).
+    """
+    try:
+        lat, lon = coordenada_de_token(token)
+        return await reverse_geocode(lat, lon, usar_nominatim=True, diferir_nominatim=True)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.post(
+    "/reverse-geocode/batch",
+    response_model=ReverseGeocodeLoteResponse,
+    summary="Reverse geocoding en lote: arreglos de coordenadas → barrio/comuna/cruce",
+)
+async def reverse_geocode_batch_endpoint(payload: ReverseGeocodeLoteRequest):
+    """
+    Enriquece miles de coordenadas en una sola llamada (backfills, importación
+    de mapas). Barrio, comuna y cruce más cercano se calculan con consultas
+    espaciales vectorizadas; los resultados se devuelven en el mismo orden
+    que `lats`/`lons`. Nominatim se omite por defecto.
+    """
+    try:
+        resultados = await reverse_geocode_lote(
+            payload.lats, payload.lons, usar_nominatim=payload.usar_nominatim
+        )
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
+    return {"success": True, "total": len(resultados), "resultados": resultados}
+
+
+def _parsear_bbox(bbox: str) -> tuple[float, float, float, float]:
+    try:
+        lon_min, lat_min, lon_max, lat_max = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="bbox debe ser 'lon_min,lat_min,lon_max,lat_max'")
+    if not (lon_min < lon_max and lat_min < lat_max):
+        raise HTTPException(status_code=422, detail="bbox vacío: se requiere lon_min < lon_max y lat_min < lat_max")
+    return lon_min, lat_min, lon_max, lat_max
+
+
+def _etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparación débil (RFC 9110 §13.1.2): un proxy pudo marcarlo W/
+    return any(e.strip().removeprefix("W/") == etag for e in if_none_match.split(","))
+
+
+@router.get(
+    "/basemaps/{capa}/contornos",
+    summary="Contornos simplificados de barrios/comunas (GeoJSON precomprimido)",
+    responses={200: {"content": {"application/geo+json": {}}}, 304: {"description": "Sin cambios (ETag)"}},
+)
+async def contornos_basemap(
+    request: Request,
+    capa: str = Path(..., pattern="^(barrios|comunas)$"),
+    zoom: int = Query(12, ge=0, le=22, description="Zoom del mapa; se sirve el nivel precalculado más cercano hacia arriba"),
+    bbox: Optional[str] = Query(None, description="lon_min,lat_min,lon_max,lat_max: solo los polígonos que lo intersectan"),
+):
+    """
+    GeoJSON de los contornos de la capa simplificados para `zoom`, sin
+    huecos ni solapes entre vecinos. Los niveles se precalculan (build de
+    la caché de basemaps o primer pedido) y se sirven ya comprimidos
+    (brotli/gzip según `Accept-Encoding`) con un ETag fuerte: mientras el
+    basemap no cambie, el navegador recibe 304.
+    """
+    bbox_t = _parsear_bbox(bbox) if bbox else None
+    if bbox_t is None:
+        # Ya en memoria: inline; primera vez (lectura de disco o cálculo): en el pool
+        nivel = contornos.nivel_cacheado(capa, zoom) or await ejecutor.en_pool(contornos.nivel, capa, zoom)
+        rep = nivel.completo
+    else:
+        rep = await ejecutor.en_pool(contornos.recortar, capa, zoom, bbox_t)
+
+    contenido, encoding, etag = rep.para(request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={_CONTORNOS_MAX_AGE_S}",
+        "Vary": "Accept-Encoding",
+        "X-Contornos-Zoom": str(contornos.zoom_precalculado(zoom)),
+    }
+    if _etag_coincide(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=contenido, media_type="application/geo+json", headers=headers)
+
+
+@router.get(
+    "/basemaps/estado",
+    response_model=BasemapsEstadoResponse,
+    summary="Versión cargada, tiempo de construcción y memoria de cada capa de basemap",
+)
+async def estado_basemaps():
+    """
+    Estado de las capas del registro de basemaps: SHA-256 del GeoJSON
+    publicado, duración de su construcción, memoria estimada, recargas en
+    caliente y el último error (si la última recarga falló, sigue
+    publicada la versión anterior).
+    """
+    return {"success": True, "capas": registro_basemaps.REGISTRO.estado()}
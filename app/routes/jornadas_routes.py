@@ -950,6 +950,7 @@ async def crear_jornada(
         "punto_encuentro": payload.punto_encuentro,
         "direccion_punto_encuentro": payload.direccion_punto_encuentro,
         "coordenadas_encuentro": payload.coordenadas_encuentro,
+        **avanzadas_routes._campos_geo(payload.coordenadas_encuentro),
         "comuna": payload.comuna,
         "barrio": payload.barrio,
         "direcciones_recuperadas": payload.direcciones_recuperadas,
@@ -992,6 +993,8 @@ async def actualizar_jornada(
         raise HTTPException(status_code=404, detail=f"Jornada '{client_id}' no encontrada")
 
     cambios = payload.model_dump(exclude_unset=True)
+    if "coordenadas_encuentro" in cambios:
+        cambios.update(avanzadas_routes._campos_geo(cambios["coordenadas_encuentro"]))
     if cambios:
         cambios["actualizado"] = now_colombia().isoformat()
         ref.update(cambios)
@@ -1061,6 +1064,7 @@ async def eliminar_jornada(
     )
     for req_doc in req_docs:
         db.collection("avanzadas_requerimientos").document(req_doc.id).delete()
+        avanzadas_routes._coropletas_quitar(req_doc.id)
 
     ref.delete()
 
@@ -1520,6 +1524,7 @@ async def crear_requerimientos_jornada(
             "requerimiento": req_in.requerimiento,
             "ubicacion": req_in.ubicacion,
             "coordenadas": req_in.coordenadas,
+            **avanzadas_routes._campos_geo(req_in.coordenadas),
             "fotos_urls": requerimientos_fotos_urls.get(pos, []),
             "fecha": jornada_data.get("fecha", ""),
             "nombre_avanzada": None,
@@ -1534,6 +1539,7 @@ async def crear_requerimientos_jornada(
         req_doc_id = f"{client_id}_{idx}"
         db.collection("avanzadas_requerimientos").document(req_doc_id).set(req_data)
         req_data["id"] = req_doc_id
+        avanzadas_routes._coropletas_registrar(req_doc_id, req_data)
         creados.append(req_data)
 
         if req_in.categoria_personalizada and req_in.categoria_personalizada.strip():
@@ -15,6 +15,46 @@ ACTIVE_REQUESTS = Gauge('api_requests_active', 'Requests activos')
 FIREBASE_QUERIES = Counter('api_firebase_queries_total', 'Total de queries a Firestore')
 CACHE_HITS = Counter('api_cache_hits_total', 'Total de cache hits')
 CACHE_MISSES = Counter('api_cache_misses_total', 'Total de cache misses')
+GEOCODING_ENRIQUECIMIENTO_COLA = Gauge(
+    'geocoding_enriquecimiento_cola', 'Coordenadas pendientes de enriquecer con Nominatim'
+)
+GEOCODING_ENRIQUECIMIENTO_RECHAZOS = Counter(
+    'geocoding_enriquecimiento_rechazos_total', 'Coordenadas no encoladas para Nominatim por cola llena'
+)
+GEOCODING_ENRIQUECIMIENTO_ESPERA = Histogram(
+    'geocoding_enriquecimiento_espera_seconds',
+    'Tiempo en cola antes de consultar Nominatim',
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300),
+)
+GEOCODING_PROVEEDOR_LATENCIA = Histogram(
+    'geocoding_proveedor_latencia_seconds', 'Latencia de proveedores externos de geocoding', ['proveedor']
+)
+GEOCODING_PROVEEDOR_CONSULTAS = Counter(
+    'geocoding_proveedor_consultas_total', 'Consultas a proveedores externos de geocoding', ['proveedor', 'resultado']
+)
+GEOCODING_POOL_ESPERA = Histogram(
+    'geocoding_pool_espera_seconds',
+    'Tiempo en cola antes de que un hilo del pool de geocoding tome la tarea',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+GEOCODING_POOL_PENDIENTES = Gauge(
+    'geocoding_pool_pendientes', 'Tareas del pool de geocoding encoladas o en ejecución'
+)
+BASEMAP_CONSTRUCCION = Gauge(
+    'basemap_construccion_seconds', 'Duración de la última construcción de cada capa de basemap', ['capa']
+)
+BASEMAP_MEMORIA = Gauge(
+    'basemap_memoria_bytes', 'Memoria estimada de cada capa de basemap con sus índices', ['capa']
+)
+BASEMAP_RECARGAS = Counter(
+    'basemap_recargas_total', 'Recargas en caliente de capas de basemap', ['capa', 'resultado']
+)
+CLASIFICADOR_MEMO_CONSULTAS = Counter(
+    'clasificador_memo_consultas_total', 'Consultas a la caché de resultados del clasificador', ['resultado']
+)
+CLASIFICADOR_MEMO_ENTRADAS = Gauge(
+    'clasificador_memo_entradas', 'Entradas en la caché de resultados del clasificador'
+)
 
 @router.get("/metrics")
 async def metrics():
@@ -28,6 +68,17 @@ async def metrics():
     - api_firebase_queries_total: Contador de queries a Firestore
     - api_cache_hits_total: Contador de cache hits
     - api_cache_misses_total: Contador de cache misses
+    - geocoding_enriquecimiento_cola: Coordenadas esperando enriquecimiento Nominatim
+    - geocoding_enriquecimiento_espera_seconds: Histograma de espera en esa cola
+    - geocoding_enriquecimiento_rechazos_total: Coordenadas rechazadas por cola llena
+    - geocoding_proveedor_latencia_seconds / geocoding_proveedor_consultas_total:
+      latencia y resultado por proveedor de geocodificación directa
+    - geocoding_pool_espera_seconds / geocoding_pool_pendientes: tiempo en cola
+      y tareas pendientes del pool de hilos del geocoding local
+    - basemap_construccion_seconds / basemap_memoria_bytes / basemap_recargas_total:
+      construcción, memoria estimada y recargas en caliente por capa de basemap
+    - clasificador_memo_consultas_total / clasificador_memo_entradas: aciertos
+      (hit/miss) y tamaño de la caché de resultados del clasificador
     
     Usar con Grafana + Prometheus para dashboards de monitoreo
     """
@@ -0,0 +1,161 @@
+"""
+Autómata Aho-Corasick para buscar muchos patrones a la vez en un texto.
+
+Se construye una vez (trie + enlaces de fallo) y cada búsqueda recorre el
+texto una sola vez, en tiempo lineal en su longitud más la cantidad de
+coincidencias, sin importar cuántos patrones haya. Las coincidencias son de
+subcadena cruda (igual que ``patron in texto``); los límites de palabra, si
+hacen falta, los verifica quien llama.
+
+Los patrones se identifican por su posición en la lista de construcción, de
+modo que el llamador puede mapear ids a sus propios datos y reproducir el
+orden de recorrido de un dict o lista original ordenando por id.
+
+El trie queda expuesto para consultas de prefijo (``prefijos_de``,
+``primero_con_prefijo``), útiles para emparejar un candidato contra los
+patrones en ambos sentidos sin recorrerlos todos.
+
+Con ``transiciones_completas=True`` se precalcula además la función de
+transición completa (un dict por nodo con el destino para cada carácter
+del alfabeto de los patrones, ya resueltos los enlaces de fallo), y
+``presentes`` avanza un solo lookup por carácter. Cuesta memoria
+proporcional a nodos × alfabeto, así que conviene para conjuntos
+pequeños de patrones consultados contra textos largos.
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional
+
+
+class AhoCorasick:
+    """Autómata de búsqueda multipatrón sobre cadenas (ids = posición en ``patrones``)."""
+
+    def __init__(self, patrones: Iterable[str], transiciones_completas: bool = False):
+        self.patrones: list[str] = list(patrones)
+        self._hijos: list[dict[str, int]] = [{}]
+        self._propios: list[list[int]] = [[]]  # patrones que terminan exactamente en el nodo
+        for pid, patron in enumerate(self.patrones):
+            if not patron:
+                continue
+            nodo = 0
+            for c in patron:
+                sig = self._hijos[nodo].get(c)
+                if sig is None:
+                    sig = len(self._hijos)
+                    self._hijos[nodo][c] = sig
+                    self._hijos.append({})
+                    self._propios.append([])
+                nodo = sig
+            self._propios[nodo].append(pid)
+
+        n = len(self._hijos)
+        self._fallo = [0] * n
+        self._salida: list[tuple[int, ...]] = [()] * n  # propios + los de la cadena de fallo
+        orden_bfs = []
+        cola = deque()
+        for hijo in self._hijos[0].values():
+            self._salida[hijo] = tuple(self._propios[hijo])
+            cola.append(hijo)
+        while cola:
+            nodo = cola.popleft()
+            orden_bfs.append(nodo)
+            for c, hijo in self._hijos[nodo].items():
+                f = self._fallo[nodo]
+                while f and c not in self._hijos[f]:
+                    f = self._fallo[f]
+                self._fallo[hijo] = self._hijos[f].get(c, 0)
+                self._salida[hijo] = tuple(self._propios[hijo]) + self._salida[self._fallo[hijo]]
+                cola.append(hijo)
+
+        self._delta: Optional[list[dict[str, int]]] = None
+        if transiciones_completas:
+            delta: list[dict[str, int]] = [{}] * n
+            delta[0] = dict(self._hijos[0])
+            for nodo in orden_bfs:
+                delta[nodo] = {**delta[self._fallo[nodo]], **self._hijos[nodo]}
+            self._delta = delta
+
+        # Menor id de patrón en el subárbol de cada nodo (para primero_con_prefijo)
+        infinito = len(self.patrones)
+        self._min_subarbol = [min(p) if p else infinito for p in self._propios]
+        for nodo in reversed(orden_bfs):
+            for hijo in self._hijos[nodo].values():
+                if self._min_subarbol[hijo] < self._min_subarbol[nodo]:
+                    self._min_subarbol[nodo] = self._min_subarbol[hijo]
+        for hijo in self._hijos[0].values():
+            if self._min_subarbol[hijo] < self._min_subarbol[0]:
+                self._min_subarbol[0] = self._min_subarbol[hijo]
+
+    def __len__(self) -> int:
+        return len(self.patrones)
+
+    # ------------------------------------------------------------------ búsqueda
+    def buscar(self, texto: str) -> Iterator[tuple[int, int]]:
+        """Todas las coincidencias como ``(fin, id_patron)``; ``fin`` es exclusivo."""
+        hijos, fallo, salida = self._hijos, self._fallo, self._salida
+        nodo = 0
+        for i, c in enumerate(texto):
+            while nodo and c not in hijos[nodo]:
+                nodo = fallo[nodo]
+            nodo = hijos[nodo].get(c, 0)
+            for pid in salida[nodo]:
+                yield i + 1, pid
+
+    def presentes(self, texto: str) -> list[int]:
+        """Ids de los patrones que aparecen en ``texto``, ordenados."""
+        if self._delta is None:
+            return sorted({pid for _, pid in self.buscar(texto)})
+        delta, salida = self._delta, self._salida
+        encontrados: set[int] = set()
+        nodo = 0
+        for c in texto:
+            nodo = delta[nodo].get(c, 0)
+            if salida[nodo]:
+                encontrados.update(salida[nodo])
+        return sorted(encontrados)
+
+    # ------------------------------------------------------------------ trie
+    def _nodo(self, prefijo: str) -> Optional[int]:
+        nodo = 0
+        for c in prefijo:
+            nodo = self._hijos[nodo].get(c)
+            if nodo is None:
+                return None
+        return nodo
+
+    def prefijos_de(self, texto: str) -> list[int]:
+        """Ids de los patrones que son prefijo de ``texto`` (``texto.startswith(patron)``)."""
+        ids: list[int] = []
+        nodo = 0
+        for c in texto:
+            nodo = self._hijos[nodo].get(c)
+            if nodo is None:
+                break
+            ids.extend(self._propios[nodo])
+        return ids
+
+    def primero_con_prefijo(
+        self, prefijo: str, acepta: Optional[Callable[[int], bool]] = None
+    ) -> Optional[int]:
+        """
+        Menor id de patrón que empieza con ``prefijo`` (``patron.startswith(prefijo)``),
+        opcionalmente restringido a los ids que ``acepta``; None si no hay.
+        """
+        nodo = self._nodo(prefijo)
+        if nodo is None:
+            return None
+        if acepta is None:
+            minimo = self._min_subarbol[nodo]
+            return minimo if minimo < len(self.patrones) else None
+        mejor = None
+        pila = [nodo]
+        while pila:
+            actual = pila.pop()
+            if self._min_subarbol[actual] >= (len(self.patrones) if mejor is None else mejor):
+                continue
+            for pid in self._propios[actual]:
+                if acepta(pid) and (mejor is None or pid < mejor):
+                    mejor = pid
+            pila.extend(self._hijos[actual].values())
+        return mejor
@@ -682,7 +682,10 @@ def generar_reporte_avanzada(
                 bloque = KeepTogether([envoltorio])
             story.append(bloque)
 
-            coords_parseadas = _parsear_coordenadas(coordenadas)
+            # ``geo`` (GeoPoint) se escribe junto con ``coordenadas``; el
+            # string solo se parsea en documentos anteriores al backfill
+            geo = req.get("geo")
+            coords_parseadas = (geo.latitude, geo.longitude) if geo is not None else _parsear_coordenadas(coordenadas)
             if coords_parseadas:
                 lat, lng = coords_parseadas
                 puntos_mapa.append({"lat": lat, "lng": lng, "numero": numero, "color": color_entidad})
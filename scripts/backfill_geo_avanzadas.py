@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+CLI one-off para completar ``geo`` (GeoPoint) y ``geohash`` en documentos
+escritos antes de que las rutas los guardaran junto con el string de
+coordenadas.
+
+USO (desde ``api-catatrack/``):
+    python scripts/backfill_geo_avanzadas.py               # dry-run (default, no escribe nada)
+    python scripts/backfill_geo_avanzadas.py --dry-run      # idem, explicito
+    python scripts/backfill_geo_avanzadas.py --execute      # escribe en Firestore real
+
+Colecciones y campo de origen:
+    - ``avanzadas``                 -> ``coordenadas``
+    - ``avanzadas_requerimientos``  -> ``coordenadas``
+    - ``jornadas_integrales``       -> ``coordenadas_encuentro``
+
+Los campos se calculan con ``avanzadas_routes._campos_geo`` (el mismo
+helper que usan las escrituras), así que el resultado es idéntico al de un
+documento nuevo. Solo se actualizan los documentos cuyo ``geo``/``geohash``
+difiere del calculado: reejecutar el script es idempotente y no reescribe
+nada. Coordenadas no parseables dejan ambos campos en ``None`` (el
+documento no aparece en ``GET /avanzadas/geo/cerca``, igual que hoy queda
+en ``omitidos`` de ``/geo``).
+
+Reutiliza el mismo patrón de carga de ``.env`` que
+``scripts/migrate_formulario_avanzadas.py`` (parser KEY=VALUE propio,
+cargado ANTES de importar ``app.firebase_config``).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Dict
+
+# ──────────────────────────────────────────────────────────────────────────
+# 1) Cargar api-catatrack/.env ANTES de importar nada de `app.*` (mismo
+#    patrón que scripts/migrate_formulario_avanzadas.py).
+# ──────────────────────────────────────────────────────────────────────────
+
+
+def _load_env_file(path: Path) -> None:
+    """Parser mínimo de archivos .env: líneas ``KEY=VALUE``, ignora
+    comentarios (``#``) y líneas vacías. No pisa variables ya seteadas
+    en el entorno real del proceso (el entorno gana sobre el archivo).
+    """
+    if not path.exists():
+        return
+    for raw_line in path.read_text(encoding="utf-8").splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        key = key.strip()
+        value = value.strip()
+        if key:
+            os.environ.setdefault(key, value)
+
+
+_API_ROOT = Path(__file__).resolve().parent.parent
+_ENV_PATH = _API_ROOT / ".env"
+_load_env_file(_ENV_PATH)
+
+# Asegura que `app` y `scripts` sean importables sin importar desde dónde
+# se invoque este archivo.
+if str(_API_ROOT) not in sys.path:
+    sys.path.insert(0, str(_API_ROOT))
+
+
+_BATCH_LIMIT = 500  # límite de operaciones por WriteBatch de Firestore
+
+_CAMPOS_COORDENADAS = {
+    "avanzadas": "coordenadas",
+    "avanzadas_requerimientos": "coordenadas",
+    "jornadas_integrales": "coordenadas_encuentro",
+}
+
+
+def _safe_print(*args, **kwargs) -> None:
+    """``print`` con fallback ASCII-safe (mismo patrón que
+    ``migrate_formulario_avanzadas._safe_print``).
+    """
+    text = " ".join(str(a) for a in args)
+    try:
+        print(text, **kwargs)
+    except UnicodeEncodeError:
+        encoding = sys.stdout.encoding or "ascii"
+        print(text.encode(encoding, errors="backslashreplace").decode(encoding), **kwargs)
+
+
+def _pendientes(db, coleccion: str, campo: str) -> Dict[str, dict]:
+    """``{doc_id: {"geo": ..., "geohash": ...}}`` de los documentos de
+    ``coleccion`` cuyos campos derivados no coinciden con ``campo``."""
+    from app.routes.avanzadas_routes import _campos_geo  # noqa: E402
+
+    pendientes: Dict[str, dict] = {}
+    for doc in db.collection(coleccion).stream():
+        data = doc.to_dict() or {}
+        esperados = _campos_geo(data.get(campo))
+        if any(data.get(k) != v for k, v in esperados.items()) or not all(k in data for k in esperados):
+            pendientes[doc.id] = esperados
+    return pendientes
+
+
+def _actualizar_batched(db, coleccion: str, cambios: Dict[str, dict]) -> int:
+    """``update()`` de ``cambios`` en batches de hasta 500 operaciones."""
+    items = list(cambios.items())
+    for start in range(0, len(items), _BATCH_LIMIT):
+        batch = db.batch()
+        for doc_id, data in items[start : start + _BATCH_LIMIT]:
+            batch.update(db.collection(coleccion).document(doc_id), data)
+        batch.commit()
+    return len(items)
+
+
+def backfill(db=None, execute: bool = False) -> Dict[str, int]:
+    """Calcula (y con ``execute`` escribe) los campos ``geo``/``geohash``
+    faltantes. Retorna ``{coleccion: documentos pendientes/actualizados}``.
+
+    ``db`` es inyectable para tests (``FakeFirestore``); si no se pasa se
+    usa ``app.firebase_config.db``.
+    """
+    if db is None:
+        from app.firebase_config import db as _real_db  # noqa: E402
+
+        db = _real_db
+
+    resumen: Dict[str, int] = {}
+    for coleccion, campo in _CAMPOS_COORDENADAS.items():
+        pendientes = _pendientes(db, coleccion, campo)
+        sin_coordenadas = sum(1 for v in pendientes.values() if v["geo"] is None)
+        if execute:
+            resumen[coleccion] = _actualizar_batched(db, coleccion, pendientes)
+            _safe_print(f"{coleccion}: {resumen[coleccion]} documentos actualizados ({sin_coordenadas} sin coordenadas parseables)")
+        else:
+            resumen[coleccion] = len(pendientes)
+            _safe_print(f"{coleccion}: se ACTUALIZARIAN {len(pendientes)} documentos ({sin_coordenadas} sin coordenadas parseables) (dry-run)")
+    return resumen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", action="store_true", help="Solo calcula e imprime (default)")
+    mode.add_argument("--execute", action="store_true", help="Escribe en Firestore real")
+    args = parser.parse_args()
+
+    backfill(execute=args.execute)
+    if not args.execute:
+        _safe_print("\nDRY-RUN completo. Use --execute para escribir en Firestore real.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Benchmark de arranque: parseo del GeoJSON vs. carga desde la caché binaria.
+
+USO (desde ``api-catatrack/``):
+    python scripts/bench_basemap_cache.py
+    python scripts/bench_basemap_cache.py --repeticiones 10
+
+Para cada basemap presente mide el mejor tiempo de ``json.load`` + ``shape()``
+(lo que hacía ``_load_basemap`` en cada arranque) contra la carga del ``.npz``
+con ``shapely.from_wkb``, y verifica que las geometrías sean idénticas. La
+caché se escribe en un directorio temporal para no tocar la del proyecto.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_API_ROOT = Path(__file__).resolve().parent.parent
+if str(_API_ROOT) not in sys.path:
+    sys.path.insert(0, str(_API_ROOT))
+
+from app.geocoding import basemap_cache  # noqa: E402
+
+_CAPAS = (
+    ("barrios_veredas.geojson", "barrio_vereda"),
+    ("comunas_corregimientos.geojson", "comuna_corregimiento"),
+    ("cruces_ejes_viales.geojson", None),
+)
+
+
+def _mejor(fn, repeticiones: int) -> tuple[float, tuple]:
+    mejor, out = float("inf"), None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        out = fn()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["BASEMAP_CACHE_DIR"] = tmp
+        for archivo, propiedad in _CAPAS:
+            ruta = str(_API_ROOT / "basemaps" / archivo)
+            if not os.path.exists(ruta):
+                print(f"⏭️  '{archivo}' no existe, se omite")
+                continue
+            if propiedad is None:
+                parsear = lambda: basemap_cache.parsear_cruces(ruta)  # noqa: E731
+                cargar = lambda: basemap_cache.cargar_cruces(ruta)  # noqa: E731
+            else:
+                parsear = lambda: basemap_cache.parsear_poligonos(ruta, propiedad)  # noqa: E731
+                cargar = lambda: basemap_cache.cargar_poligonos(ruta, propiedad)  # noqa: E731
+
+            t_geojson, (g_ref, n_ref) = _mejor(parsear, args.repeticiones)
+            cargar()  # construye la caché
+            t_cache, (g_cache, n_cache) = _mejor(cargar, args.repeticiones)
+            iguales = n_ref == n_cache and all(a.equals_exact(b, 0) for a, b in zip(g_ref, g_cache))
+            if not iguales or len(g_ref) != len(g_cache):
+                print(f"❌ '{archivo}': la caché no reproduce las geometrías del GeoJSON")
+                return 1
+            tam_geojson = os.path.getsize(ruta) / 1e6
+            tam_cache = sum(f.stat().st_size for f in Path(tmp).glob(f"{Path(archivo).stem}.*.npz")) / 1e6
+            print(
+                f"{archivo}: {len(g_ref)} geometrías | GeoJSON {t_geojson * 1e3:.1f} ms ({tam_geojson:.1f} MB) | "
+                f"caché {t_cache * 1e3:.1f} ms ({tam_cache:.1f} MB) | speedup x{t_geojson / t_cache:.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
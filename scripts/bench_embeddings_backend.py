@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""
+Benchmark de los backends de embeddings del clasificador
+(``CLASSIFIER_BACKEND``): PyTorch vs. ONNX Runtime fp32 / int8.
+
+USO (desde ``api-catatrack/``, con el export de
+``scripts/export_onnx_clasificador.py`` ya generado):
+    python scripts/bench_embeddings_backend.py
+    python scripts/bench_embeddings_backend.py --backends torch,onnx-int8 --consultas 500 --salida bench.json
+    python scripts/bench_embeddings_backend.py --modelo ruta/modelo --onnx-dir ruta/export
+
+Cada backend corre en un subproceso propio (el RSS es por proceso y no se
+libera al descargar un modelo) con la caché de la matriz desactivada, y
+mide:
+
+- carga: segundos y RSS pico tras cargar el modelo y embeber la taxonomía;
+- ``calcular_similitudes`` de a una consulta: latencias p50/p95/p99 en ms;
+- ``calcular_similitudes_lote`` con todas las consultas: textos/s;
+- RSS pico al final.
+
+Las consultas son reproducibles (``generar_textos`` de
+``bench_reglas_clasificador``). Además compara los scores coseno
+consulta × taxonomía de cada backend contra el primero de la lista
+(máx. |Δscore| y coincidencia del top-1).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+_API_ROOT = Path(__file__).resolve().parent.parent
+if str(_API_ROOT) not in sys.path:
+    sys.path.insert(0, str(_API_ROOT))
+
+_BACKENDS = {
+    "torch": {"CLASSIFIER_BACKEND": "torch"},
+    "onnx-fp32": {"CLASSIFIER_BACKEND": "onnx", "CLASSIFIER_ONNX_QUANTIZED": "false"},
+    "onnx-int8": {"CLASSIFIER_BACKEND": "onnx", "CLASSIFIER_ONNX_QUANTIZED": "true"},
+}
+
+
+def _rss_mb() -> float:
+    """Pico de RSS del proceso en MB (``ru_maxrss`` está en KB en Linux y en bytes en macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _consultas(n: int, palabras: int, seed: int) -> list[str]:
+    from scripts.bench_reglas_clasificador import generar_textos
+
+    return generar_textos(n, palabras, seed=seed)
+
+
+def _worker(args) -> int:
+    """Mide el backend de las variables de entorno; imprime una línea JSON."""
+    consultas = _consultas(args.consultas, args.palabras, args.seed)
+    t0 = time.perf_counter()
+    from app.classification import embeddings as emb
+
+    emb._get_model()
+    matriz = emb._get_matrix()
+    carga_s = time.perf_counter() - t0
+    rss_carga = _rss_mb()
+
+    for texto in consultas[:10]:
+        emb.calcular_similitudes(texto, top_k=3)
+    latencias = np.empty(len(consultas))
+    for i, texto in enumerate(consultas):
+        t = time.perf_counter()
+        emb.calcular_similitudes(texto, top_k=3)
+        latencias[i] = time.perf_counter() - t
+    t = time.perf_counter()
+    emb.calcular_similitudes_lote(consultas, top_k=3)
+    lote_s = time.perf_counter() - t
+
+    vecs = emb._get_model().encode(consultas, normalize_embeddings=True, convert_to_numpy=True)
+    np.save(args.scores, np.asarray(vecs) @ np.asarray(matriz).T)
+    ms = latencias * 1e3
+    print(json.dumps({
+        "carga_s": round(carga_s, 2),
+        "rss_carga_mb": round(rss_carga, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "lote_textos_s": round(len(consultas) / lote_s, 1),
+        "rss_pico_mb": round(_rss_mb(), 1),
+    }))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,onnx-fp32,onnx-int8", help=f"Lista de {', '.join(_BACKENDS)}")
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--palabras", type=int, default=25, help="Palabras por consulta")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--modelo", default=None, help="CLASSIFIER_MODEL para todos los backends")
+    parser.add_argument("--onnx-dir", default=None, help="CLASSIFIER_ONNX_DIR")
+    parser.add_argument("--salida", default=None, help="Archivo JSON con los resultados")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--scores", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker:
+        return _worker(args)
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    desconocidos = [b for b in backends if b not in _BACKENDS]
+    if desconocidos:
+        parser.error(f"backends desconocidos: {desconocidos}")
+
+    resultados: dict = {}
+    scores: dict = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            env = dict(os.environ, **_BACKENDS[backend], CLASSIFIER_MATRIX_CACHE="false")
+            if args.modelo:
+                env["CLASSIFIER_MODEL"] = args.modelo
+            if args.onnx_dir:
+                env["CLASSIFIER_ONNX_DIR"] = args.onnx_dir
+            ruta_scores = os.path.join(tmp, f"{backend}.npy")
+            print(f"🔄 Midiendo {backend}...", file=sys.stderr)
+            proc = subprocess.run(
+                [sys.executable, __file__, "--worker", "--scores", ruta_scores,
+                 "--consultas", str(args.consultas), "--palabras", str(args.palabras), "--seed", str(args.seed)],
+                env=env, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"⚠️ {backend} falló:\n{proc.stderr[-2000:]}", file=sys.stderr)
+                continue
+            resultados[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            scores[backend] = np.load(ruta_scores)
+
+    if not resultados:
+        return 1
+    base = next(iter(scores))
+    for backend, sims in scores.items():
+        ref = scores[base]
+        resultados[backend]["max_diff_vs_" + base] = round(float(np.abs(sims - ref).max()), 5)
+        resultados[backend]["top1_igual_vs_" + base] = round(float((sims.argmax(1) == ref.argmax(1)).mean()), 4)
+
+    print(f"{args.consultas} consultas × ~{args.palabras} palabras")
+    for backend, r in resultados.items():
+        print(
+            f"{backend:>10} | carga {r['carga_s']:.2f} s, RSS {r['rss_carga_mb']:.0f} MB | "
+            f"p50 {r['p50_ms']:.2f} ms, p95 {r['p95_ms']:.2f} ms | lote {r['lote_textos_s']:.0f} textos/s | "
+            f"RSS pico {r['rss_pico_mb']:.0f} MB | max |Δscore| {r['max_diff_vs_' + base]:.4f}"
+        )
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "resultados": resultados}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
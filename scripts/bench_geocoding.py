@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+"""
+Benchmark reproducible del geocoder (``app.geocoding``), sin red.
+
+USO (desde ``api-catatrack/``):
+    python scripts/bench_geocoding.py
+    python scripts/bench_geocoding.py --grilla 60 --aleatorios 5000 --seed 7 --salida bench.json
+    python scripts/bench_geocoding.py --salida nuevo.json --comparar base.json
+
+Genera una grilla regular y una muestra aleatoria con semilla dentro y
+alrededor de ``_CALI_BBOX`` (``--margen`` grados de borde, para ejercitar
+los puntos fuera de Cali) y mide, punto por punto:
+
+- ``geolocate_point``, ``barrio_de_robusto``, ``comuna_de_robusto``,
+  ``cruce_mas_cercano``, ``via_inferida_de_cruces``;
+- ``reverse_geocode(usar_nominatim=False)`` (con la caché LRU local vaciada
+  antes, para medir el camino sin caché).
+
+Por función reporta throughput y latencias p50/p95/p99/max en µs. Además
+mide el import de ``app.geocoding.spatial_index`` (que carga basemaps y
+construye los índices; tiempo, RSS y pico de tracemalloc) y el tiempo y
+memoria de reconstruir cada índice por separado.
+
+El resultado va a JSON (``--salida``, o stdout) junto con commit de git,
+versiones y parámetros, para comparar entre commits con ``--comparar``.
+Las rutas inicializan Firebase al importarse: hacen falta las mismas
+variables de entorno que para levantar la API.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+_API_ROOT = Path(__file__).resolve().parent.parent
+if str(_API_ROOT) not in sys.path:
+    sys.path.insert(0, str(_API_ROOT))
+
+# Mismo bbox que artefacto_360_routes._CALI_BBOX: los puntos se generan antes
+# de importar las rutas, para que el import se mida en frío.
+_CALI_BBOX = {"lon_min": -76.75, "lon_max": -76.20, "lat_min": 3.10, "lat_max": 3.80}
+
+
+def generar_puntos(grilla: int, aleatorios: int, seed: int, margen: float) -> list[tuple[float, float]]:
+    """Grilla ``grilla`` × ``grilla`` + ``aleatorios`` puntos uniformes en el bbox ampliado, (lon, lat)."""
+    b = _CALI_BBOX
+    lon_min, lon_max = b["lon_min"] - margen, b["lon_max"] + margen
+    lat_min, lat_max = b["lat_min"] - margen, b["lat_max"] + margen
+    puntos = [
+        (float(lon), float(lat))
+        for lat in np.linspace(lat_min, lat_max, grilla)
+        for lon in np.linspace(lon_min, lon_max, grilla)
+    ]
+    rng = random.Random(seed)
+    puntos += [(rng.uniform(lon_min, lon_max), rng.uniform(lat_min, lat_max)) for _ in range(aleatorios)]
+    return puntos
+
+
+def _rss_mb() -> float:
+    """Pico de RSS del proceso en MB (``ru_maxrss`` está en KB en Linux y en bytes en macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _estadisticas(latencias_ns: np.ndarray) -> dict:
+    us = latencias_ns / 1e3
+    total_s = float(latencias_ns.sum()) / 1e9
+    return {
+        "n": int(len(us)),
+        "total_s": round(total_s, 4),
+        "throughput_ops": round(len(us) / total_s, 1) if total_s > 0 else None,
+        "media_us": round(float(us.mean()), 2),
+        "p50_us": round(float(np.percentile(us, 50)), 2),
+        "p95_us": round(float(np.percentile(us, 95)), 2),
+        "p99_us": round(float(np.percentile(us, 99)), 2),
+        "max_us": round(float(us.max()), 2),
+    }
+
+
+def medir(fn, puntos: list, calentamiento: int = 20) -> dict:
+    """Latencia por llamada de ``fn(lon, lat)`` sobre ``puntos``."""
+    for lon, lat in puntos[:calentamiento]:
+        fn(lon, lat)
+    latencias = np.empty(len(puntos), dtype=np.int64)
+    reloj = time.perf_counter_ns
+    for i, (lon, lat) in enumerate(puntos):
+        t0 = reloj()
+        fn(lon, lat)
+        latencias[i] = reloj() - t0
+    return _estadisticas(latencias)
+
+
+def _medir_construccion(fn) -> dict:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    segundos = time.perf_counter() - t0
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"segundos": round(segundos, 4), "pico_mb": round(pico / 1e6, 2)}
+
+
+def _commit_git() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_API_ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def ejecutar(grilla: int, aleatorios: int, seed: int, margen: float) -> dict:
+    puntos = generar_puntos(grilla, aleatorios, seed, margen)
+
+    # ── Import: carga de basemaps + construcción de todos los índices ──
+    rss_antes = _rss_mb()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    from app.geocoding import direccion_local, reverse, spatial_index as si  # noqa: E402
+    from app.geocoding.polygon_index import PolygonIndex  # noqa: E402
+    from app.routes import artefacto_360_routes as art  # noqa: E402
+    t_import = time.perf_counter() - t0
+    _, pico_import = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    importacion = {
+        "segundos": round(t_import, 4),
+        "pico_tracemalloc_mb": round(pico_import / 1e6, 2),
+        "rss_antes_mb": round(rss_antes, 1),
+        "rss_despues_mb": round(_rss_mb(), 1),
+    }
+
+    construccion = {
+        "barrios_polygon_index": _medir_construccion(lambda: PolygonIndex(art._BARRIOS_POLYGONS)),
+        "comunas_polygon_index": _medir_construccion(lambda: PolygonIndex(art._COMUNAS_POLYGONS)),
+        "cruces_strtree": _medir_construccion(lambda: si._indexar_cruces(si._CRUCES.geoms)),
+        "cruces_vias": _medir_construccion(lambda: si._indexar_vias_de_cruces(si._CRUCES.names)),
+        "cruces_direcciones": _medir_construccion(
+            lambda: direccion_local.IndiceCruces(si._CRUCES.names, si._CRUCES.xy_m)
+        ),
+        "nombres_barrios_comunas": _medir_construccion(art._construir_indices_nombres),
+    }
+
+    loop = asyncio.new_event_loop()
+    reverse._lookup_local_cached.cache_clear()
+
+    def _reverse(lon: float, lat: float):
+        return loop.run_until_complete(reverse.reverse_geocode(lat, lon, usar_nominatim=False))
+
+    funciones = {
+        "geolocate_point": art.geolocate_point,
+        "barrio_de_robusto": si.barrio_de_robusto,
+        "comuna_de_robusto": si.comuna_de_robusto,
+        "cruce_mas_cercano": si.cruce_mas_cercano,
+        "via_inferida_de_cruces": si.via_inferida_de_cruces,
+        "reverse_geocode_local": _reverse,
+    }
+    resultados = {}
+    try:
+        for nombre, fn in funciones.items():
+            if nombre == "reverse_geocode_local":
+                reverse._lookup_local_cached.cache_clear()
+            resultados[nombre] = medir(fn, puntos)
+    finally:
+        loop.close()
+
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit_git(),
+        "entorno": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "numpy": np.__version__,
+            "shapely": __import__("shapely").__version__,
+        },
+        "parametros": {"grilla": grilla, "aleatorios": aleatorios, "seed": seed, "margen": margen, "puntos": len(puntos)},
+        "capas": {
+            "barrios": len(art._BARRIOS_POLYGONS),
+            "comunas": len(art._COMUNAS_POLYGONS),
+            "cruces": len(si._CRUCES.names),
+        },
+        "importacion": importacion,
+        "construccion": construccion,
+        "funciones": resultados,
+    }
+
+
+def comparar(actual: dict, base: dict) -> list[str]:
+    """Líneas "función: p50 base → actual (x ratio)" para las funciones presentes en ambos."""
+    lineas = [f"Comparación contra {base.get('commit') or '?'} ({base.get('fecha', '?')}):"]
+    for nombre, act in actual["funciones"].items():
+        ref = base.get("funciones", {}).get(nombre)
+        if not ref:
+            continue
+        partes = []
+        for p in ("p50_us", "p95_us", "p99_us"):
+            ratio = act[p] / ref[p] if ref[p] else (1.0 if not act[p] else float("inf"))
+            marca = " ⚠️" if ratio > 1.2 else ""
+            partes.append(f"{p[:-3]} {ref[p]:.1f}→{act[p]:.1f} µs (x{ratio:.2f}){marca}")
+        lineas.append(f"  {nombre}: " + " | ".join(partes))
+    return lineas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grilla", type=int, default=40, help="Lado de la grilla regular (grilla² puntos)")
+    parser.add_argument("--aleatorios", type=int, default=2000, help="Puntos aleatorios adicionales")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--margen", type=float, default=0.05, help="Grados alrededor de _CALI_BBOX")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (default: stdout)")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar latencias")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args.grilla, args.aleatorios, args.seed, args.margen)
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+        print(f"✅ Resultados en {args.salida}")
+        for nombre, st in resultado["funciones"].items():
+            print(
+                f"{nombre}: {st['throughput_ops']:.0f} ops/s | p50 {st['p50_us']:.1f} µs | "
+                f"p95 {st['p95_us']:.1f} µs | p99 {st['p99_us']:.1f} µs"
+            )
+    else:
+        print(texto)
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        print("\n".join(comparar(resultado, base)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: ``PolygonIndex`` (STRtree + geometrías preparadas) vs. el
+recorrido lineal ``for polygon, name in capa: polygon.contains(pt)`` que
+usaban ``geolocate_point`` y ``spatial_index.barrio_de``/``comuna_de``.
+
+USO (desde ``api-catatrack/``):
+    python scripts/bench_polygon_index.py
+    python scripts/bench_polygon_index.py --puntos 20000 --seed 7
+
+Carga los GeoJSON de ``basemaps/`` directamente (sin importar las rutas ni
+Firebase), genera puntos aleatorios reproducibles dentro del bbox de Cali,
+verifica que ambos métodos devuelvan exactamente lo mismo y reporta
+microsegundos por consulta y el speedup.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from shapely.geometry import Point, shape
+
+_API_ROOT = Path(__file__).resolve().parent.parent
+if str(_API_ROOT) not in sys.path:
+    sys.path.insert(0, str(_API_ROOT))
+
+from app.geocoding.polygon_index import PolygonIndex  # noqa: E402
+
+# Mismo bbox que artefacto_360_routes._CALI_BBOX (duplicado para no importar
+# las rutas, que inicializan Firebase al importarse).
+_CALI_BBOX = {"lon_min": -76.75, "lon_max": -76.20, "lat_min": 3.10, "lat_max": 3.80}
+
+_CAPAS = (
+    ("barrios", "basemaps/barrios_veredas.geojson", "barrio_vereda"),
+    ("comunas", "basemaps/comunas_corregimientos.geojson", "comuna_corregimiento"),
+)
+
+
+def _cargar_capa(ruta: Path, propiedad: str) -> list:
+    with open(ruta, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    capa = []
+    for feat in data.get("features", []):
+        try:
+            capa.append((shape(feat["geometry"]), feat["properties"].get(propiedad)))
+        except Exception:
+            continue
+    return capa
+
+
+def _lineal(capa: list, lon: float, lat: float):
+    pt = Point(lon, lat)
+    for polygon, name in capa:
+        if polygon.contains(pt):
+            return name
+    return None
+
+
+def _medir(fn, puntos: list) -> tuple[float, list]:
+    t0 = time.perf_counter()
+    out = [fn(lon, lat) for lon, lat in puntos]
+    return time.perf_counter() - t0, out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--puntos", type=int, default=5000, help="Puntos aleatorios a consultar")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    b = _CALI_BBOX
+    puntos = [
+        (rng.uniform(b["lon_min"], b["lon_max"]), rng.uniform(b["lat_min"], b["lat_max"]))
+        for _ in range(args.puntos)
+    ]
+
+    for nombre, rel, propiedad in _CAPAS:
+        ruta = _API_ROOT / rel
+        if not ruta.exists():
+            print(f"⏭️  {nombre}: '{rel}' no existe, se omite")
+            continue
+        capa = _cargar_capa(ruta, propiedad)
+        t0 = time.perf_counter()
+        idx = PolygonIndex(capa)
+        t_build = time.perf_counter() - t0
+
+        t_lin, res_lin = _medir(lambda lon, lat: _lineal(capa, lon, lat), puntos)
+        t_idx, res_idx = _medir(idx.nombre_en, puntos)
+        if res_lin != res_idx:
+            difs = sum(1 for a, c in zip(res_lin, res_idx) if a != c)
+            print(f"❌ {nombre}: {difs} resultados distintos entre lineal e índice")
+            return 1
+
+        n = len(puntos)
+        print(
+            f"{nombre}: {len(capa)} polígonos | build índice {t_build * 1e3:.1f} ms | "
+            f"lineal {t_lin / n * 1e6:.1f} µs/pt | índice {t_idx / n * 1e6:.1f} µs/pt | "
+            f"speedup x{t_lin / t_idx:.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: ``rules.aplicar_reglas`` (keywords precompiladas en un
+autómata Aho-Corasick, una pasada por texto) vs. el recorrido anterior
+``for fila in TAXONOMIA: for kw in fila["keywords"]: normalizar(kw) in texto``
+con la ``normalizar`` anterior (filtro por carácter + regex).
+
+USO (desde ``api-catatrack/``):
+    python scripts/bench_reglas_clasificador.py
+    python scripts/bench_reglas_clasificador.py --textos 500 --palabras 2000 --seed 7
+
+Genera textos reproducibles como los que arma el clasificador con
+transcripciones de audio (requerimiento + observaciones + varios minutos
+de transcripción): relleno conversacional con keywords de la taxonomía
+intercaladas, con tildes y mayúsculas. Verifica que ambos métodos
+devuelvan exactamente lo mismo (filas, score, hits y orden) y reporta
+microsegundos por texto y el speedup.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, List
+
+_API_ROOT = Path(__file__).resolve().parent.parent
+if str(_API_ROOT) not in sys.path:
+    sys.path.insert(0, str(_API_ROOT))
+
+from app.classification.rules import aplicar_reglas  # noqa: E402
+from app.classification.taxonomia import TAXONOMIA  # noqa: E402
+
+_RELLENO = (
+    "buenas tardes pues mire vecino aca en el barrio hace rato estamos esperando que vengan "
+    "la señora de la esquina dice que ya llamó varias veces y nadie responde nos toca a "
+    "nosotros mismos organizarnos con la junta de acción comunal para que por favor nos "
+    "ayuden porque los niños pasan por ahí todos los días camino al colegio y es peligroso "
+    "el martes vino un funcionario tomó fotos y dijo que iba a reportar pero no volvió"
+).split()
+
+
+def normalizar_anterior(texto: str) -> str:
+    """Implementación anterior de ``rules.normalizar`` (referencia de paridad)."""
+    if not texto:
+        return ""
+    desc = unicodedata.normalize("NFD", texto)
+    sin_tildes = "".join(ch for ch in desc if unicodedata.category(ch) != "Mn")
+    sin_tildes = sin_tildes.lower()
+    return re.sub(r"\s+", " ", sin_tildes).strip()
+
+
+def aplicar_reglas_lineal(texto: str) -> List[Dict]:
+    """Implementación anterior de ``aplicar_reglas`` (referencia de paridad)."""
+    normalizado = normalizar_anterior(texto)
+    if not normalizado:
+        return []
+    candidatos: List[Dict] = []
+    for fila in TAXONOMIA:
+        hits: List[str] = []
+        for kw in fila["keywords"]:
+            kw_norm = normalizar_anterior(kw)
+            if kw_norm and kw_norm in normalizado:
+                hits.append(kw)
+        if hits:
+            candidatos.append({"fila": fila, "score": len(hits), "hits": hits})
+    candidatos.sort(key=lambda c: c["score"], reverse=True)
+    return candidatos
+
+
+def generar_textos(n: int, palabras: int, seed: int = 42) -> List[str]:
+    """``n`` textos de ~``palabras`` palabras con 0-6 keywords intercaladas."""
+    rng = random.Random(seed)
+    keywords = [kw for fila in TAXONOMIA for kw in fila["keywords"]]
+    textos = []
+    for _ in range(n):
+        tokens = [rng.choice(_RELLENO) for _ in range(palabras)]
+        for _ in range(rng.randint(0, 6)):
+            kw = rng.choice(keywords)
+            kw = kw.upper() if rng.random() < 0.2 else kw.replace("a", "á", 1) if rng.random() < 0.3 else kw
+            tokens.insert(rng.randrange(len(tokens) + 1), kw)
+        textos.append(" . ".join([" ".join(tokens[:12]), " ".join(tokens[12:])]))
+    return textos
+
+
+def _medir(fn, textos: List[str]) -> tuple[float, list]:
+    t0 = time.perf_counter()
+    out = [fn(t) for t in textos]
+    return time.perf_counter() - t0, out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--textos", type=int, default=300, help="Textos a clasificar")
+    parser.add_argument("--palabras", type=int, default=1500, help="Palabras por texto (~10 min de audio)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    textos = generar_textos(args.textos, args.palabras, seed=args.seed)
+    t_lin, res_lin = _medir(aplicar_reglas_lineal, textos)
+    t_ac, res_ac = _medir(aplicar_reglas, textos)
+    if res_lin != res_ac:
+        difs = sum(1 for a, b in zip(res_lin, res_ac) if a != b)
+        print(f"❌ {difs} resultados distintos entre el recorrido lineal y el autómata")
+        return 1
+
+    n = len(textos)
+    keywords = sum(len(f["keywords"]) for f in TAXONOMIA)
+    print(
+        f"{n} textos × ~{args.palabras} palabras | {len(TAXONOMIA)} filas, {keywords} keywords | "
+        f"lineal {t_lin / n * 1e6:.1f} µs/texto | autómata {t_ac / n * 1e6:.1f} µs/texto | "
+        f"speedup x{t_lin / t_ac:.1f}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Build step de la caché binaria de basemaps (``app.geocoding.basemap_cache``).
+
+USO (desde ``api-catatrack/``):
+    python scripts/build_basemap_cache.py
+
+Parsea cada GeoJSON de ``basemaps/`` una vez y escribe su ``.npz`` (WKB +
+tabla de nombres, keyed por SHA-256 del GeoJSON) en ``BASEMAP_CACHE_DIR``
+(default ``basemaps/.cache``). Para las capas de polígonos también
+precalcula los contornos simplificados por zoom (``app.geocoding.contornos``,
+GeoJSON ya comprimido). Pensado para correr en el build de la imagen
+/ deploy, de modo que ningún worker pague el parseo en el arranque. Si no se
+corre, el primer proceso que arranque construye la caché igualmente.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+_API_ROOT = Path(__file__).resolve().parent.parent
+if str(_API_ROOT) not in sys.path:
+    sys.path.insert(0, str(_API_ROOT))
+
+from app.geocoding import basemap_cache, contornos, proyeccion  # noqa: E402
+
+# (archivo, variante) — mismas capas que cargan artefacto_360_routes y spatial_index
+_CAPAS = (
+    ("barrios_veredas.geojson", "barrio_vereda"),
+    ("comunas_corregimientos.geojson", "comuna_corregimiento"),
+    ("cruces_ejes_viales.geojson", None),
+)
+
+
+def _construir_contornos(ruta: str, propiedad: str, geoms: list, names: list) -> None:
+    geoms_m = proyeccion.proyectar(np.asarray(geoms, dtype=object))
+    for zoom in contornos.ZOOMS:
+        t0 = time.perf_counter()
+        nivel = contornos.cargar_nivel(ruta, propiedad, zoom, geoms_m, names, reconstruir=True)
+        print(
+            f"   contornos z{zoom}: {len(nivel.completo.cuerpo) / 1e3:.0f} KB "
+            f"({len(nivel.completo.gzip) / 1e3:.0f} KB gzip) en {(time.perf_counter() - t0) * 1e3:.0f} ms"
+        )
+
+
+def main() -> int:
+    basemaps = _API_ROOT / "basemaps"
+    for archivo, propiedad in _CAPAS:
+        ruta = basemaps / archivo
+        if not ruta.exists():
+            print(f"⏭️  '{archivo}' no existe, se omite")
+            continue
+        t0 = time.perf_counter()
+        if propiedad is None:
+            geoms, names = basemap_cache.cargar_cruces(str(ruta), reconstruir=True)
+        else:
+            geoms, names = basemap_cache.cargar_poligonos(str(ruta), propiedad, reconstruir=True)
+        print(f"✅ '{archivo}': {len(geoms)} geometrías cacheadas en {(time.perf_counter() - t0) * 1e3:.0f} ms")
+        if propiedad is not None:
+            _construir_contornos(str(ruta), propiedad, geoms, names)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Genera offline la grilla raster de barrios/comunas (``app.geocoding.raster_grid``).
+
+USO (desde ``api-catatrack/``):
+    python scripts/build_raster_grid.py                 # celdas de 20 m
+    python scripts/build_raster_grid.py --celda-m 30 --salida /ruta/grid.npy
+
+Lee los basemaps (vía la caché binaria de ``basemap_cache``), rasteriza cada
+capa sobre el bbox de Cali y escribe ``raster_grid.npy`` + ``raster_grid.json``
+en ``BASEMAP_RASTER_GRID`` (default ``basemaps/.cache/raster_grid.npy``), que
+``artefacto_360_routes`` activa al importarse si los hashes de los GeoJSON
+coinciden. Al final valida la grilla contra el camino exacto con puntos
+aleatorios y reporta el porcentaje de celdas interiores.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+_API_ROOT = Path(__file__).resolve().parent.parent
+if str(_API_ROOT) not in sys.path:
+    sys.path.insert(0, str(_API_ROOT))
+
+from app.geocoding import basemap_cache, raster_grid  # noqa: E402
+from app.geocoding.polygon_index import PolygonIndex  # noqa: E402
+
+# Mismo bbox que artefacto_360_routes._CALI_BBOX (duplicado para no importar
+# las rutas, que inicializan Firebase al importarse).
+_CALI_BBOX = {"lon_min": -76.75, "lon_max": -76.20, "lat_min": 3.10, "lat_max": 3.80}
+
+_CAPAS = (
+    ("barrios", "barrios_veredas.geojson", "barrio_vereda"),
+    ("comunas", "comunas_corregimientos.geojson", "comuna_corregimiento"),
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--celda-m", type=float, default=20.0, help="Tamaño de celda en metros")
+    parser.add_argument(
+        "--salida",
+        default=os.getenv("BASEMAP_RASTER_GRID", str(_API_ROOT / "basemaps" / ".cache" / "raster_grid.npy")),
+    )
+    parser.add_argument("--validar", type=int, default=20000, help="Puntos aleatorios para validar")
+    args = parser.parse_args(argv)
+
+    capas, fuentes = {}, {}
+    for nombre, archivo, propiedad in _CAPAS:
+        ruta = _API_ROOT / "basemaps" / archivo
+        if not ruta.exists():
+            print(f"⏭️  '{archivo}' no existe, capa '{nombre}' omitida")
+            continue
+        geoms, names = basemap_cache.cargar_poligonos(str(ruta), propiedad)
+        capas[nombre] = PolygonIndex(list(zip(geoms, names)))
+        fuentes[nombre] = basemap_cache.hash_archivo(str(ruta))
+    if not capas:
+        print("❌ No hay basemaps para rasterizar")
+        return 1
+
+    t0 = time.perf_counter()
+    grid = raster_grid.RasterGrid.construir(capas, _CALI_BBOX, args.celda_m, fuentes)
+    grid.guardar(args.salida)
+    m = grid.meta
+    print(
+        f"✅ Grilla {m['nx']}x{m['ny']} ({args.celda_m} m) escrita en '{args.salida}' "
+        f"({os.path.getsize(args.salida) / 1e6:.1f} MB, {time.perf_counter() - t0:.1f} s)"
+    )
+
+    rng = random.Random(0)
+    for nombre, index in capas.items():
+        capa = grid.capa(nombre)
+        interiores = float((capa.valores != raster_grid.BORDE).mean())
+        for _ in range(args.validar):
+            lon = rng.uniform(_CALI_BBOX["lon_min"], _CALI_BBOX["lon_max"])
+            lat = rng.uniform(_CALI_BBOX["lat_min"], _CALI_BBOX["lat_max"])
+            v = capa.valor(lon, lat)
+            if v != raster_grid.BORDE and (None if v < 0 else v) != index.contenedor(lon, lat):
+                print(f"❌ '{nombre}': la grilla difiere del camino exacto en ({lon}, {lat})")
+                return 1
+        print(f"   {nombre}: {interiores:.1%} de celdas interiores; validada con {args.validar} puntos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
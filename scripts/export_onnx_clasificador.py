@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""
+Exporta el modelo de embeddings del clasificador a ONNX (fp32 + int8) para
+el backend ``CLASSIFIER_BACKEND=onnx`` de ``app/classification/embeddings.py``.
+
+USO (desde ``api-catatrack/``, con ``torch``, ``sentence-transformers``,
+``onnx`` y ``onnxruntime`` instalados; solo hace falta en la máquina que
+genera el export, no en la imagen de producción):
+    python scripts/export_onnx_clasificador.py
+    python scripts/export_onnx_clasificador.py --salida /app/.cache/huggingface/catatrack/onnx/mini
+    python scripts/export_onnx_clasificador.py --modelo ruta/a/otro-modelo --tolerancia 0.03
+
+Pasos:
+1. Carga el ``SentenceTransformer`` (``CLASSIFIER_MODEL`` por defecto) y
+   exporta su transformer (``last_hidden_state``, ejes dinámicos de lote y
+   secuencia) con ``torch.onnx.export`` → ``model.onnx``.
+2. Cuantiza los pesos a int8 con ``onnxruntime.quantization.quantize_dynamic``
+   → ``model.int8.onnx``.
+3. Guarda ``tokenizer.json`` y ``catatrack_onnx.json`` (max_seq_length,
+   pooling, entradas, padding).
+4. Verifica paridad: embebe las descripciones canónicas de la taxonomía y
+   frases de ejemplo con torch y con cada grafo ONNX, compara los scores
+   coseno consulta × taxonomía y falla (exit 1) si la diferencia máxima
+   supera ``--tolerancia`` (int8; el fp32 se exige a 1e-4).
+
+El pooling exportado es el promedio de tokens (el del modelo por defecto);
+si el modelo usara otro, la verificación de paridad lo detecta.
+"""
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+_API_ROOT = Path(__file__).resolve().parent.parent
+if str(_API_ROOT) not in sys.path:
+    sys.path.insert(0, str(_API_ROOT))
+
+from app.classification import embeddings as emb  # noqa: E402
+from app.classification import embeddings_onnx as eo  # noqa: E402
+
+# Frases tipo requerimiento para la verificación de paridad
+CONSULTAS_EJEMPLO = [
+    "Se cayó un árbol grande sobre la vía y bloquea el paso",
+    "La luminaria del parque lleva una semana apagada",
+    "Hay escombros botados en el lote de la esquina",
+    "Huecos en la calle frente al colegio",
+    "Música a todo volumen toda la noche en la casa del frente",
+    "El semáforo de la carrera 5 no funciona",
+    "Necesitamos jornada de vacunación para los perros del barrio",
+    "Se inundó el canal cuando llovió y el agua entró a las casas",
+    "Solicitamos capacitación en emprendimiento para las madres cabeza de hogar",
+    "Vendedores ambulantes ocupan todo el andén",
+]
+
+
+def exportar(modelo: str, salida: str, opset: int = 17, cuantizar: bool = True) -> Dict:
+    """Exporta ``modelo`` a ``salida``; devuelve la metadata escrita."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st = SentenceTransformer(modelo, device="cpu")
+    tokenizer = st.tokenizer
+    transformer = st[0].auto_model.eval()
+    entradas = [n for n in tokenizer.model_input_names if n in ("input_ids", "attention_mask", "token_type_ids")]
+
+    class _SoloHidden(torch.nn.Module):
+        def __init__(self, modelo_hf):
+            super().__init__()
+            self.modelo_hf = modelo_hf
+
+        def forward(self, *tensores):
+            return self.modelo_hf(**dict(zip(entradas, tensores))).last_hidden_state
+
+    os.makedirs(salida, exist_ok=True)
+    ejemplo = tokenizer(["hola mundo", "poda de árbol en el parque"], padding=True, return_tensors="pt")
+    ejes = {n: {0: "lote", 1: "secuencia"} for n in entradas + ["last_hidden_state"]}
+    extra = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    ruta_fp32 = os.path.join(salida, eo.ARCHIVO_FP32)
+    print(f"🔄 Exportando '{modelo}' a '{ruta_fp32}' (entradas: {entradas})...")
+    with torch.no_grad():
+        torch.onnx.export(
+            _SoloHidden(transformer),
+            tuple(ejemplo[n] for n in entradas),
+            ruta_fp32,
+            input_names=entradas,
+            output_names=["last_hidden_state"],
+            dynamic_axes=ejes,
+            opset_version=opset,
+            do_constant_folding=True,
+            **extra,
+        )
+
+    if cuantizar:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        ruta_int8 = os.path.join(salida, eo.ARCHIVO_INT8)
+        print(f"🔄 Cuantizando pesos a int8 → '{ruta_int8}'...")
+        quantize_dynamic(ruta_fp32, ruta_int8, weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(salida)
+    if not os.path.exists(os.path.join(salida, eo.ARCHIVO_TOKENIZER)):
+        raise RuntimeError("El tokenizer del modelo no es 'fast' (no se generó tokenizer.json)")
+    meta = {
+        "modelo": modelo,
+        "max_seq_length": int(st.max_seq_length),
+        "pooling": "mean",
+        "entradas": entradas,
+        "pad_id": int(tokenizer.pad_token_id),
+        "pad_token": tokenizer.pad_token,
+        "opset": opset,
+    }
+    with open(os.path.join(salida, eo.ARCHIVO_META), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    for nombre in (eo.ARCHIVO_FP32, eo.ARCHIVO_INT8):
+        ruta = os.path.join(salida, nombre)
+        if os.path.exists(ruta):
+            print(f"✅ {nombre}: {os.path.getsize(ruta) / 1e6:.1f} MB")
+    return meta
+
+
+def comparar_scores(referencia, candidato, consultas: List[str], documentos: List[str]) -> Dict:
+    """Diferencia de scores coseno consulta × documento entre dos encoders
+    (``encode(..., normalize_embeddings=True)``) y coincidencia del top-1."""
+    def _sims(modelo):
+        q = np.asarray(modelo.encode(consultas, normalize_embeddings=True, convert_to_numpy=True))
+        d = np.asarray(modelo.encode(documentos, normalize_embeddings=True, convert_to_numpy=True))
+        return q @ d.T
+
+    ref, cand = _sims(referencia), _sims(candidato)
+    return {
+        "max_diff": float(np.abs(ref - cand).max()),
+        "media_diff": float(np.abs(ref - cand).mean()),
+        "top1_igual": float((ref.argmax(axis=1) == cand.argmax(axis=1)).mean()),
+    }
+
+
+def verificar(modelo: str, salida: str, consultas: List[str], documentos: List[str]) -> Dict[str, Dict]:
+    """``comparar_scores`` de torch contra cada grafo ONNX presente en ``salida``."""
+    from sentence_transformers import SentenceTransformer
+
+    st = SentenceTransformer(modelo, device="cpu")
+    resultados = {}
+    for variante, cuantizado in (("fp32", False), ("int8", True)):
+        if os.path.exists(eo.archivo_modelo(salida, cuantizado)):
+            resultados[variante] = comparar_scores(st, eo.ModeloOnnx(salida, cuantizado=cuantizado), consultas, documentos)
+    return resultados
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default=emb._MODEL_NAME, help="Modelo sentence-transformers (nombre o ruta)")
+    parser.add_argument("--salida", default=None, help="Directorio del export (default: CLASSIFIER_ONNX_DIR)")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--sin-cuantizar", action="store_true", help="Solo el grafo fp32")
+    parser.add_argument("--tolerancia", type=float, default=0.03, help="Máx. diferencia de score coseno del int8")
+    args = parser.parse_args(argv)
+
+    from app.classification.taxonomia import listar_descripciones_canonicas
+
+    salida = args.salida or emb._dir_onnx()
+    exportar(args.modelo, salida, opset=args.opset, cuantizar=not args.sin_cuantizar)
+    resultados = verificar(args.modelo, salida, CONSULTAS_EJEMPLO, listar_descripciones_canonicas())
+    ok = True
+    for variante, r in resultados.items():
+        tolerancia = 1e-4 if variante == "fp32" else args.tolerancia
+        estado = "✅" if r["max_diff"] <= tolerancia else "❌"
+        ok = ok and r["max_diff"] <= tolerancia
+        print(
+            f"{estado} paridad {variante}: max |Δscore| {r['max_diff']:.5f} (tolerancia {tolerancia}) | "
+            f"media {r['media_diff']:.5f} | top-1 igual {r['top1_igual']:.0%}"
+        )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
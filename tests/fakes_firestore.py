@@ -13,6 +13,16 @@ from typing import Any, Optional
 def _match(actual: Any, op: str, expected: Any) -> bool:
     if op == "==":
         return actual == expected
+    # Como en Firestore, un campo ausente no cumple ningún filtro de rango
+    if op in (">=", "<=", ">", "<"):
+        if actual is None:
+            return False
+        return {
+            ">=": actual >= expected,
+            "<=": actual <= expected,
+            ">": actual > expected,
+            "<": actual < expected,
+        }[op]
     raise NotImplementedError(f"Operador no soportado en FakeFirestore: {op}")
 
 
@@ -158,6 +168,26 @@ class FakeCollection:
         return FakeAggregationQuery(self)
 
 
+class FakeWriteBatch:
+    """Batch de escrituras: se aplican recién en ``commit()``."""
+
+    def __init__(self):
+        self._ops: list = []
+        self.commits = 0
+
+    def set(self, ref: FakeDocumentRef, data: dict) -> None:
+        self._ops.append((ref.set, data))
+
+    def update(self, ref: FakeDocumentRef, data: dict) -> None:
+        self._ops.append((ref.update, data))
+
+    def commit(self) -> None:
+        for op, data in self._ops:
+            op(data)
+        self._ops = []
+        self.commits += 1
+
+
 class FakeFirestore:
     """Sustituto mínimo de google.cloud.firestore.Client para tests."""
 
@@ -169,6 +199,9 @@ class FakeFirestore:
             self._collections[name] = FakeCollection(name)
         return self._collections[name]
 
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch()
+
 
 class FakeS3Client:
     """Sustituto mínimo de boto3 S3 client: registra put_object/delete_objects
@@ -0,0 +1,166 @@
+"""
+Tests del autómata Aho-Corasick (``app.utils.aho_corasick``) y de la
+detección de barrios/comunas mencionados en direcciones, que debe dar
+exactamente lo mismo que el recorrido lineal del índice al que reemplazó.
+
+Los barrios son sintéticos (el basemap de barrios no está en el repo);
+las comunas son las reales de ``basemaps/comunas_corregimientos.geojson``.
+"""
+from __future__ import annotations
+
+import random
+import re
+
+import pytest
+from shapely.geometry import box
+
+from app.utils.aho_corasick import AhoCorasick
+
+
+def test_presentes_coincide_con_subcadena():
+    rng = random.Random(7)
+    alfabeto = "AB C"
+    for _ in range(300):
+        patrones = ["".join(rng.choice(alfabeto) for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(1, 15))]
+        texto = "".join(rng.choice(alfabeto) for _ in range(30))
+        ac = AhoCorasick(patrones)
+        assert ac.presentes(texto) == sorted({i for i, p in enumerate(patrones) if p in texto})
+        assert sorted(ac.prefijos_de(texto)) == [i for i, p in enumerate(patrones) if texto.startswith(p)]
+        prefijo = texto[: rng.randint(0, 3)]
+        esperado = [i for i, p in enumerate(patrones) if p.startswith(prefijo)]
+        assert ac.primero_con_prefijo(prefijo) == (esperado[0] if esperado else None)
+        largos = [i for i in esperado if len(patrones[i]) >= 3]
+        assert ac.primero_con_prefijo(prefijo, lambda i: len(patrones[i]) >= 3) == (largos[0] if largos else None)
+
+
+def test_posiciones_de_coincidencia():
+    ac = AhoCorasick(["HE", "SHE", "HIS", "HERS"])
+    assert sorted(ac.buscar("USHERS")) == [(4, 0), (4, 1), (6, 3)]
+    assert ac.presentes("") == [] and AhoCorasick([]).presentes("X") == []
+
+
+# ---------------------------------------------------------------- referencia lineal
+_NOMBRES_BARRIOS = [
+    "Siete de Agosto", "San Fernando Viejo", "San Fernando Nuevo", "Barrio Obrero",
+    "Siloé", "La Flora", "El Centenario", "Centenario", "Alfonso López I", "Alfonso López II",
+    "Ciudad Córdoba", "Los Guaduales", "Dos de Mayo", "Granada", "El Peñón",
+    "Villa del Sur", "Villa del Lago", "San Antonio", "Santa Rosa", "Sector Meléndez",
+    "Unión de Vivienda Popular", "Mariano Ramos", "República de Israel", "Los Cámbulos",
+    "Urbanización La Merced", "Cali", "Ñ", "Brisas de Los Álamos",
+]
+
+
+def _lineal_barrios(art, direccion):
+    """Recorrido lineal de referencia (implementación anterior de _extraer_barrios_mencionados)."""
+    index = art._NOMBRES.barrios
+    texto_norm = art._strip_acentos(direccion)
+    encontrados = {}
+    for nombre_norm, (polygon, canonical) in index.items():
+        if nombre_norm in texto_norm:
+            encontrados[canonical] = polygon
+    for nombre_norm, (polygon, canonical) in index.items():
+        if canonical in encontrados:
+            continue
+        palabras = nombre_norm.split()
+        if len(palabras) >= 2:
+            prefijo = " ".join(palabras[:2])
+            if len(prefijo) >= 10 and prefijo in texto_norm:
+                encontrados[canonical] = polygon
+    for m in art._KW_BARRIO.finditer(direccion):
+        cand = art._strip_acentos(m.group(1).strip())
+        if not cand:
+            continue
+        if cand in index:
+            poly, canonical = index[cand]
+            encontrados[canonical] = poly
+            continue
+        matched = False
+        for k, (poly, canonical) in index.items():
+            if (k.startswith(cand) or cand.startswith(k)) and len(k) >= 5:
+                encontrados[canonical] = poly
+                matched = True
+                break
+        if not matched:
+            pc = {w for w in cand.split() if len(w) >= 6 and w not in art._STOP_WORDS_GEO}
+            if pc:
+                for k, (poly, canonical) in index.items():
+                    if pc & {w for w in k.split() if len(w) >= 6 and w not in art._STOP_WORDS_GEO}:
+                        encontrados[canonical] = poly
+                        break
+    result = list(encontrados.items())
+    result.sort(key=lambda x: len(x[0]), reverse=True)
+    return result
+
+
+def _lineal_comunas(art, direccion):
+    """Recorrido lineal de referencia (implementación anterior de _extraer_comunas_mencionadas)."""
+    index = art._NOMBRES.comunas
+    texto_norm = art._strip_acentos(direccion)
+    encontrados = {}
+    for m in art._NUM_COMUNA.finditer(direccion):
+        clave = f"COMUNA {int(m.group(1)):02d}"
+        if clave in index:
+            poly, canonical = index[clave]
+            encontrados[canonical] = poly
+    for k, (polygon, canonical) in index.items():
+        if not k.startswith("COMUNA") and len(k) >= 5 and k in texto_norm:
+            encontrados[canonical] = polygon
+    for m in art._KW_CORREGIMIENTO.finditer(direccion):
+        cand = art._strip_acentos(m.group(1).strip())
+        if cand in index:
+            poly, canonical = index[cand]
+            encontrados[canonical] = poly
+        else:
+            for k, (poly, canonical) in index.items():
+                if not k.startswith("COMUNA") and (k.startswith(cand) or cand.startswith(k)) and len(k) >= 5:
+                    encontrados[canonical] = poly
+                    break
+    return list(encontrados.items())
+
+
+@pytest.fixture()
+def art(monkeypatch):
+    from app.routes import artefacto_360_routes as art
+
+    barrios = [(box(i, 0, i + 1, 1), n) for i, n in enumerate(_NOMBRES_BARRIOS)]
+    barrios.append((box(99, 0, 100, 1), "Siloé"))  # nombre repetido: gana el último polígono
+    monkeypatch.setattr(art, "_BARRIOS_POLYGONS", barrios)
+    art._construir_indices_nombres()
+    yield art
+    monkeypatch.undo()
+    art._construir_indices_nombres()
+
+
+def _direcciones(rng):
+    fijas = [
+        "Cl 10 # 5-20 barrio Siloé", "Carrera 5 junto a La Flora, sector San Fernando",
+        "7 de Agosto, Calle 72", "Barrio El Obrero", "urb la merced, comuna 3",
+        "Corregimiento La Buitrera", "cgto pance", "correg. Los Andes Bajo", "c.10 villa del sur",
+        "Calle 5 con Carrera 39 San Fernando", "sector Meléndez", "barrio alfonso lopez",
+        "Vereda Felidia, corregimiento felidia", "com 22 sector las brisas", "barrio Republica",
+        "barrio ciudadela Córdoba", "BO Granada", "conj. los cambulos", "barrio Mariano",
+    ]
+    palabras = [w for n in _NOMBRES_BARRIOS + ["Pance", "La Paz", "Montebello", "Navarro"] for w in n.split()]
+    palabras += ["barrio", "sector", "corregimiento", "cgto", "comuna", "12", "calle", "#", ",", "con", "frente a"]
+    aleatorias = [" ".join(rng.choice(palabras) for _ in range(rng.randint(2, 8))) for _ in range(400)]
+    return fijas + aleatorias
+
+
+def test_barrios_mencionados_coincide_con_recorrido_lineal(art):
+    rng = random.Random(3)
+    for d in _direcciones(rng):
+        assert art._extraer_barrios_mencionados(d) == _lineal_barrios(art, d), d
+
+
+def test_comunas_mencionadas_coincide_con_recorrido_lineal(art):
+    rng = random.Random(5)
+    for d in _direcciones(rng):
+        assert art._extraer_comunas_mencionadas(d) == _lineal_comunas(art, d), d
+
+
+def test_ejemplos_de_barrios(art):
+    nombres = lambda d: [n for n, _ in art._extraer_barrios_mencionados(d)]  # noqa: E731
+    assert nombres("7 de Agosto, Calle 72") == ["Siete de Agosto"]
+    assert set(nombres("Calle 5 San Fernando")) == {"San Fernando Viejo", "San Fernando Nuevo"}
+    assert nombres("Barrio El Obrero") == ["Barrio Obrero"]
+    assert "Siloé" in nombres("barrio siloe")
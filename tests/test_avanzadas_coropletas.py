@@ -0,0 +1,235 @@
+"""
+Tests de ``GET /avanzadas/coropletas``: asignación de requerimientos a
+polígonos de barrio/comuna por geometría (spatial join en bloque), filtros
+por entidad/mes, conteo de ``omitidos`` y mantenimiento incremental del
+estado desde las escrituras de requerimientos (sin volver a escanear la
+colección).
+
+Las capas de polígonos se reemplazan por ``PolygonIndex`` sintéticos para
+no depender de los basemaps. Fixtures propios (no hay ``conftest.py``
+compartido), mismo estilo que ``test_avanzadas_geo.py``.
+"""
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from shapely.geometry import box
+
+from app.auth_system.dependencies import get_current_user
+from app.geocoding.polygon_index import PolygonIndex
+from app.routes import avanzadas_routes
+from tests.fakes_firestore import FakeCollection, FakeFirestore, FakeS3Client
+
+_FAKE_USER = {"uid": "tester-uid", "email": "tester@catatrack.test"}
+
+_DAGMA = "DAGMA - Departamento Administrativo de Gestión del Medio Ambiente"
+_EMCALI = "EMCALI - Empresas Municipales de Cali"
+
+# Barrio Sur (lat 3.40-3.45) y Barrio Norte (lat 3.45-3.50); una comuna que
+# los cubre a ambos y otra lejana que debe salir con total 0.
+_CAPAS = {
+    "barrio": PolygonIndex([
+        (box(-76.60, 3.40, -76.50, 3.45), "Barrio Sur"),
+        (box(-76.60, 3.45, -76.50, 3.50), "Barrio Norte"),
+    ]),
+    "comuna": PolygonIndex([
+        (box(-76.60, 3.40, -76.50, 3.50), "COMUNA 01"),
+        (box(-76.40, 3.30, -76.30, 3.35), "COMUNA 99"),
+    ]),
+}
+
+_SUR = "3.42, -76.55"
+_NORTE = "3.48, -76.55"
+_FUERA = "3.10, -76.90"
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Fixtures / helpers
+# ──────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture()
+def fake_db(monkeypatch):
+    db = FakeFirestore()
+    monkeypatch.setattr(avanzadas_routes, "db", db)
+    return db
+
+
+@pytest.fixture(autouse=True)
+def _capas_y_estado(monkeypatch):
+    monkeypatch.setattr(avanzadas_routes, "_capas_coropleta", lambda: _CAPAS)
+    avanzadas_routes._coropletas_estado = None
+    yield
+    avanzadas_routes._coropletas_estado = None
+    avanzadas_routes._estadisticas_cache = None
+    avanzadas_routes._geo_cache = None
+
+
+@pytest.fixture()
+def client(fake_db, monkeypatch):
+    s3 = FakeS3Client()
+    monkeypatch.setattr(avanzadas_routes, "get_s3_client", lambda: s3)
+    app = FastAPI()
+    app.include_router(avanzadas_routes.router)
+    app.dependency_overrides[get_current_user] = lambda: _FAKE_USER
+    return TestClient(app)
+
+
+def _set_avanzada(fake_db, doc_id: str) -> None:
+    fake_db.collection("avanzadas").document(doc_id).set({
+        "client_id": doc_id,
+        "nombre_avanzada": "Avanzada de prueba",
+        "fecha": "2026-01-15",
+        "estrategia": "En Un 2x3",
+        "requerimientos_count": 0,
+    })
+
+
+def _set_requerimiento(fake_db, doc_id: str, coordenadas, avanzada="av-1", **campos) -> None:
+    data = {
+        "avanzada_client_id": avanzada,
+        "req_index": 0,
+        "entidad": _DAGMA,
+        "requerimiento": "Requerimiento de prueba",
+        "ubicacion": "Ubicación de prueba",
+        "coordenadas": coordenadas,
+        "fotos_urls": [],
+        "fecha": "2026-01-15",
+        "nombre_avanzada": "Avanzada de prueba",
+        "estrategia": "En Un 2x3",
+        "created_at": "2026-01-15T10:00:00-05:00",
+    }
+    data.update(campos)
+    fake_db.collection("avanzadas_requerimientos").document(doc_id).set(data)
+
+
+def _totales(body: dict) -> dict:
+    return {p["nombre"]: p["total"] for p in body["poligonos"]}
+
+
+def _contar_streams(monkeypatch) -> dict:
+    calls = {"avanzadas_requerimientos": 0}
+    original = FakeCollection.stream
+
+    def spy(self):
+        if self.name in calls:
+            calls[self.name] += 1
+        return original(self)
+
+    monkeypatch.setattr(FakeCollection, "stream", spy)
+    return calls
+
+
+@pytest.fixture()
+def datos_base(fake_db):
+    _set_avanzada(fake_db, "av-1")
+    _set_requerimiento(fake_db, "r-sur-1", _SUR)
+    _set_requerimiento(fake_db, "r-sur-2", _SUR, entidad=_EMCALI, fecha="2026-02-03")
+    _set_requerimiento(fake_db, "r-norte", _NORTE)
+    _set_requerimiento(fake_db, "r-fuera", _FUERA)
+    _set_requerimiento(fake_db, "r-sin", "no es una coordenada")
+    _set_requerimiento(fake_db, "r-huerfano", _SUR, avanzada="av-borrada")
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Agregación
+# ──────────────────────────────────────────────────────────────────────────
+
+def test_cuenta_por_poligono_y_omitidos(client, datos_base):
+    body = client.get("/avanzadas/coropletas", params={"capa": "barrio"}).json()
+    assert body["capa"] == "barrio"
+    assert body["poligonos"] == [
+        {"id": 0, "nombre": "Barrio Sur", "total": 2},
+        {"id": 1, "nombre": "Barrio Norte", "total": 1},
+    ]
+    assert body["total"] == 3
+    assert body["omitidos"] == {"sin_coordenadas": 1, "fuera_de_poligonos": 1, "huerfanos": 1}
+
+    comunas = client.get("/avanzadas/coropletas").json()
+    assert comunas["capa"] == "comuna"
+    assert _totales(comunas) == {"COMUNA 01": 3, "COMUNA 99": 0}
+
+
+def test_filtros_por_entidad_y_mes(client, datos_base):
+    por_sigla = client.get("/avanzadas/coropletas", params={"capa": "barrio", "entidad": "EMCALI"}).json()
+    assert por_sigla["entidad"] == "EMCALI"
+    assert _totales(por_sigla) == {"Barrio Sur": 1, "Barrio Norte": 0}
+
+    # El nombre completo 'SIGLA - Nombre' se reduce a la sigla
+    completo = client.get("/avanzadas/coropletas", params={"capa": "barrio", "entidad": _DAGMA}).json()
+    assert _totales(completo) == {"Barrio Sur": 1, "Barrio Norte": 1}
+
+    enero = client.get("/avanzadas/coropletas", params={"capa": "barrio", "mes": "2026-01"}).json()
+    assert _totales(enero) == {"Barrio Sur": 1, "Barrio Norte": 1}
+    assert enero["omitidos"]["sin_coordenadas"] == 1
+
+    ambos = client.get(
+        "/avanzadas/coropletas", params={"capa": "barrio", "entidad": "EMCALI", "mes": "2026-01"}
+    ).json()
+    assert ambos["total"] == 0
+
+
+def test_parametros_invalidos_422(client, datos_base):
+    assert client.get("/avanzadas/coropletas", params={"capa": "municipio"}).status_code == 422
+    assert client.get("/avanzadas/coropletas", params={"mes": "enero"}).status_code == 422
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Mantenimiento incremental
+# ──────────────────────────────────────────────────────────────────────────
+
+def test_escrituras_actualizan_sin_reescanear(client, fake_db, datos_base, monkeypatch):
+    client.get("/avanzadas/coropletas", params={"capa": "barrio"})
+    calls = _contar_streams(monkeypatch)
+
+    datos = {"entidad": _DAGMA, "requerimiento": "Nuevo", "ubicacion": "Esquina", "coordenadas": _NORTE}
+    r = client.post("/avanzadas/av-1/requerimientos", data={"datos": json.dumps(datos)})
+    assert r.status_code in (200, 201), r.text
+    nuevo_id = r.json()["id"]
+    body = client.get("/avanzadas/coropletas", params={"capa": "barrio"}).json()
+    assert _totales(body) == {"Barrio Sur": 2, "Barrio Norte": 2}
+
+    # Mover el punto de Barrio Sur a fuera de los polígonos
+    r = client.patch(
+        "/avanzadas/av-1/requerimientos/r-sur-1", data={"datos": json.dumps({"coordenadas": _FUERA})}
+    )
+    assert r.status_code == 200, r.text
+    body = client.get("/avanzadas/coropletas", params={"capa": "barrio"}).json()
+    assert _totales(body) == {"Barrio Sur": 1, "Barrio Norte": 2}
+    assert body["omitidos"]["fuera_de_poligonos"] == 2
+
+    assert client.delete(f"/avanzadas/av-1/requerimientos/{nuevo_id}").status_code == 204
+    body = client.get("/avanzadas/coropletas", params={"capa": "barrio"}).json()
+    assert _totales(body) == {"Barrio Sur": 1, "Barrio Norte": 1}
+
+    assert calls["avanzadas_requerimientos"] == 0
+
+    # El estado incremental coincide con un recálculo completo
+    incremental = avanzadas_routes._coropletas_estado
+    completo = avanzadas_routes._calcular_coropletas()
+    assert incremental.conteos == completo.conteos
+    assert incremental.asignaciones == completo.asignaciones
+
+
+def test_eliminar_avanzada_descuenta_sus_requerimientos(client, datos_base):
+    client.get("/avanzadas/coropletas")
+    assert client.delete("/avanzadas/av-1").status_code == 204
+    body = client.get("/avanzadas/coropletas").json()
+    assert body["total"] == 0
+    assert body["omitidos"] == {"sin_coordenadas": 0, "fuera_de_poligonos": 0, "huerfanos": 1}
+
+
+def test_escritura_sin_estado_construido_es_noop(fake_db):
+    avanzadas_routes._coropletas_registrar("r-x", {"coordenadas": _SUR, "entidad": _DAGMA})
+    avanzadas_routes._coropletas_quitar("r-x")
+    assert avanzadas_routes._coropletas_estado is None
+
+
+def test_ttl_vencido_recalcula(client, fake_db, datos_base, monkeypatch):
+    client.get("/avanzadas/coropletas")
+    avanzadas_routes._coropletas_estado.expires_at = 0.0
+    _set_requerimiento(fake_db, "r-externo", _NORTE)  # escrito por otro proceso
+    body = client.get("/avanzadas/coropletas", params={"capa": "barrio"}).json()
+    assert _totales(body)["Barrio Norte"] == 2
@@ -0,0 +1,253 @@
+"""
+Tests de ``GET /avanzadas/geo/cerca`` (búsqueda por radio con rangos de
+geohash), del módulo ``app.geocoding.geohash``, de los campos ``geo``/
+``geohash`` que guardan las escrituras y del backfill
+``scripts/backfill_geo_avanzadas.py``.
+
+El endpoint se contrasta contra fuerza bruta (distancia haversine a todos
+los documentos) sobre puntos aleatorios alrededor de Cali, y se verifica
+que no recorre las colecciones completas. Fixtures propios (no hay
+``conftest.py`` compartido), mismo estilo que ``test_avanzadas_geo.py``.
+"""
+from __future__ import annotations
+
+import json
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth_system.dependencies import get_current_user
+from app.geocoding import geohash
+from app.routes import avanzadas_routes
+from scripts import backfill_geo_avanzadas
+from tests.fakes_firestore import FakeCollection, FakeFirestore, FakeS3Client
+
+_FAKE_USER = {"uid": "tester-uid", "email": "tester@catatrack.test"}
+_CENTRO = (3.4516, -76.5320)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Fixtures / helpers
+# ──────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture()
+def fake_db(monkeypatch):
+    db = FakeFirestore()
+    monkeypatch.setattr(avanzadas_routes, "db", db)
+    return db
+
+
+@pytest.fixture(autouse=True)
+def _reset_caches():
+    yield
+    avanzadas_routes._estadisticas_cache = None
+    avanzadas_routes._geo_cache = None
+    avanzadas_routes._coropletas_estado = None
+
+
+@pytest.fixture()
+def client(fake_db, monkeypatch):
+    s3 = FakeS3Client()
+    monkeypatch.setattr(avanzadas_routes, "get_s3_client", lambda: s3)
+    app = FastAPI()
+    app.include_router(avanzadas_routes.router)
+    app.dependency_overrides[get_current_user] = lambda: _FAKE_USER
+    return TestClient(app)
+
+
+def _punto_aleatorio(rng: random.Random, dispersion: float = 0.03) -> tuple:
+    return (
+        round(_CENTRO[0] + rng.uniform(-dispersion, dispersion), 6),
+        round(_CENTRO[1] + rng.uniform(-dispersion, dispersion), 6),
+    )
+
+
+def _sembrar(fake_db, n: int = 120, semilla: int = 7) -> None:
+    """Avanzadas, requerimientos (algunos huérfanos) y jornadas con
+    coordenadas aleatorias, escritas con los mismos campos que las rutas;
+    algunos documentos sin coordenadas parseables."""
+    rng = random.Random(semilla)
+    for i in range(n):
+        lat, lng = _punto_aleatorio(rng)
+        coordenadas = f"{lat}, {lng}" if i % 17 else "sin coordenadas"
+        fake_db.collection("avanzadas").document(f"av-{i}").set({
+            "nombre_avanzada": f"Avanzada {i}",
+            "coordenadas": coordenadas,
+            **avanzadas_routes._campos_geo(coordenadas),
+        })
+    for i in range(n):
+        lat, lng = _punto_aleatorio(rng)
+        coordenadas = f"{lat}, {lng}"
+        padre = f"av-{i}" if i % 5 else "av-inexistente"
+        fake_db.collection("avanzadas_requerimientos").document(f"req-{i}").set({
+            "avanzada_client_id": padre,
+            "entidad": "DAGMA - Departamento Administrativo de Gestión del Medio Ambiente",
+            "coordenadas": coordenadas,
+            **avanzadas_routes._campos_geo(coordenadas),
+        })
+    for i in range(n // 4):
+        lat, lng = _punto_aleatorio(rng)
+        coordenadas = f"{lat}, {lng}"
+        fake_db.collection("jornadas_integrales").document(f"jor-{i}").set({
+            "nombre_jornada": f"Jornada {i}",
+            "coordenadas_encuentro": coordenadas,
+            **avanzadas_routes._campos_geo(coordenadas),
+        })
+
+
+def _fuerza_bruta(fake_db, coleccion: str, campo: str, lat: float, lng: float, radio_m: float) -> list:
+    ids = []
+    for doc in fake_db.collection(coleccion).stream():
+        coords = avanzadas_routes._parsear_coordenadas((doc.to_dict() or {}).get(campo))
+        if coords is not None and geohash.distancia_m(lat, lng, *coords) <= radio_m:
+            ids.append(doc.id)
+    return sorted(ids)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# geohash
+# ──────────────────────────────────────────────────────────────────────────
+
+def test_codificar_valores_conocidos():
+    assert geohash.codificar(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash.codificar(0.0, 0.0, 5) == "s0000"
+
+
+@pytest.mark.parametrize("radio_m", [5, 50, 500, 5000])
+def test_rangos_radio_cubren_el_circulo(radio_m):
+    """Todo punto dentro del radio cae en alguno de los rangos devueltos."""
+    rng = random.Random(radio_m)
+    lat0, lng0 = _CENTRO
+    rangos = geohash.rangos_radio(lat0, lng0, radio_m)
+    assert 1 <= len(rangos) <= 9
+    for _ in range(500):
+        lat = lat0 + rng.uniform(-1, 1) * radio_m / 111320.0
+        lng = lng0 + rng.uniform(-1, 1) * radio_m / 111320.0
+        if geohash.distancia_m(lat0, lng0, lat, lng) > radio_m:
+            continue
+        h = geohash.codificar(lat, lng)
+        assert any(inicio <= h <= fin for inicio, fin in rangos)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Endpoint vs fuerza bruta
+# ──────────────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("radio_m", [150.0, 800.0, 2500.0])
+def test_geo_cerca_coincide_con_fuerza_bruta(client, fake_db, radio_m):
+    _sembrar(fake_db)
+    rng = random.Random(int(radio_m))
+    for _ in range(8):
+        lat, lng = _punto_aleatorio(rng, dispersion=0.02)
+        r = client.get("/avanzadas/geo/cerca", params={"lat": lat, "lng": lng, "radio_m": radio_m})
+        assert r.status_code == 200, r.text
+        body = r.json()
+
+        assert sorted(a["client_id"] for a in body["avanzadas"]) == _fuerza_bruta(
+            fake_db, "avanzadas", "coordenadas", lat, lng, radio_m
+        )
+        esperados_req = [
+            i for i in _fuerza_bruta(fake_db, "avanzadas_requerimientos", "coordenadas", lat, lng, radio_m)
+            if int(i.split("-")[1]) % 5  # huérfanos omitidos
+        ]
+        assert sorted(q["id"] for q in body["requerimientos"]) == esperados_req
+        assert sorted(j["client_id"] for j in body["jornadas"]) == _fuerza_bruta(
+            fake_db, "jornadas_integrales", "coordenadas_encuentro", lat, lng, radio_m
+        )
+
+        distancias = [a["distancia_m"] for a in body["avanzadas"]]
+        assert distancias == sorted(distancias)
+        assert all(d <= radio_m for d in distancias)
+
+
+def test_geo_cerca_no_recorre_las_colecciones(client, fake_db, monkeypatch):
+    _sembrar(fake_db, n=30)
+    llamadas = []
+    original = FakeCollection.stream
+
+    def _spy(self):
+        llamadas.append(self.name)
+        return original(self)
+
+    monkeypatch.setattr(FakeCollection, "stream", _spy)
+    r = client.get("/avanzadas/geo/cerca", params={"lat": _CENTRO[0], "lng": _CENTRO[1], "radio_m": 1000})
+    assert r.status_code == 200
+    assert llamadas == []
+
+
+def test_geo_cerca_valida_parametros(client, fake_db):
+    base = {"lat": _CENTRO[0], "lng": _CENTRO[1]}
+    assert client.get("/avanzadas/geo/cerca", params={**base, "radio_m": 0}).status_code == 422
+    assert client.get("/avanzadas/geo/cerca", params={**base, "radio_m": 10**7}).status_code == 422
+    assert client.get("/avanzadas/geo/cerca", params={"lat": 95, "lng": 0}).status_code == 422
+    assert client.get("/avanzadas/geo/cerca", params={"lng": 0}).status_code == 422
+
+
+def test_geo_cerca_no_la_intercepta_client_id(client, fake_db):
+    r = client.get("/avanzadas/geo/cerca", params={"lat": _CENTRO[0], "lng": _CENTRO[1]})
+    assert r.status_code == 200
+    assert r.json()["avanzadas"] == []
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Escrituras y backfill
+# ──────────────────────────────────────────────────────────────────────────
+
+def test_crear_avanzada_guarda_geo_y_geohash(client, fake_db):
+    datos = {
+        "client_id": "cid-geo",
+        "nombre_avanzada": "Avanzada geo",
+        "fecha": "2026-07-10",
+        "estrategia": "En Un 2x3",
+        "sector": "Sector A",
+        "comuna": "COMUNA 03",
+        "barrio": "San Antonio",
+        "direccion": "Calle 5 # 10-20",
+        "coordenadas": "3.4516, -76.5320",
+        "encargados": ["Ana Maria Carabali"],
+        "asistentes": [],
+        "requerimientos": [{
+            "entidad": "DAGMA - Departamento Administrativo de Gestión del Medio Ambiente",
+            "categoria": "Poda de árboles (autorización)",
+            "requerimiento": "Árbol caído",
+            "ubicacion": "Parque",
+            "coordenadas": "3.4520, -76.5322",
+        }],
+    }
+    r = client.post("/avanzadas", data={"datos": json.dumps(datos)})
+    assert r.status_code in (200, 201), r.text
+
+    avanzada = fake_db.collection("avanzadas").document("cid-geo").get().to_dict()
+    assert (avanzada["geo"].latitude, avanzada["geo"].longitude) == (3.4516, -76.5320)
+    assert avanzada["geohash"] == geohash.codificar(3.4516, -76.5320)
+    (req,) = [d.to_dict() for d in fake_db.collection("avanzadas_requerimientos").stream()]
+    assert req["geohash"] == geohash.codificar(3.4520, -76.5322)
+
+    cerca = client.get("/avanzadas/geo/cerca", params={"lat": 3.4516, "lng": -76.5320, "radio_m": 100}).json()
+    assert [a["client_id"] for a in cerca["avanzadas"]] == ["cid-geo"]
+    assert len(cerca["requerimientos"]) == 1
+
+
+def test_backfill_completa_documentos_anteriores(fake_db):
+    fake_db.collection("avanzadas").document("a1").set({"coordenadas": "3.45, -76.53"})
+    fake_db.collection("avanzadas").document("a2").set({"coordenadas": "no parseable"})
+    fake_db.collection("jornadas_integrales").document("j1").set({"coordenadas_encuentro": "3.46, -76.54"})
+    fake_db.collection("avanzadas_requerimientos").document("r1").set({
+        "coordenadas": "3.47, -76.55", **avanzadas_routes._campos_geo("3.47, -76.55"),
+    })
+
+    assert backfill_geo_avanzadas.backfill(fake_db, execute=False) == {
+        "avanzadas": 2, "avanzadas_requerimientos": 0, "jornadas_integrales": 1,
+    }
+    assert "geohash" not in fake_db.collection("avanzadas").document("a1").get().to_dict()
+
+    backfill_geo_avanzadas.backfill(fake_db, execute=True)
+    a1 = fake_db.collection("avanzadas").document("a1").get().to_dict()
+    assert a1["geohash"] == geohash.codificar(3.45, -76.53)
+    assert fake_db.collection("avanzadas").document("a2").get().to_dict()["geo"] is None
+    assert fake_db.collection("jornadas_integrales").document("j1").get().to_dict()["geohash"]
+
+    # Idempotente: la segunda pasada no encuentra nada pendiente
+    assert set(backfill_geo_avanzadas.backfill(fake_db, execute=False).values()) == {0}
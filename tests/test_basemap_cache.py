@@ -0,0 +1,100 @@
+"""
+Tests de la caché binaria de basemaps (``app.geocoding.basemap_cache``).
+
+Usa GeoJSON sintéticos en ``tmp_path`` y un ``BASEMAP_CACHE_DIR`` temporal:
+primera carga construye la caché, la segunda la usa sin re-parsear, un
+cambio en el GeoJSON la invalida y una caché corrupta cae al parseo normal.
+"""
+from __future__ import annotations
+
+import json
+
+import pytest
+from shapely.geometry import Point, box, mapping
+
+from app.geocoding import basemap_cache
+
+
+def _escribir_geojson(ruta, features):
+    ruta.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+
+
+def _poligonos(n=3):
+    return [
+        {"type": "Feature", "geometry": mapping(box(i, 0, i + 1, 1)),
+         "properties": {"comuna_corregimiento": f"COMUNA {i:02d}" if i else None}}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture()
+def cache_dir(tmp_path, monkeypatch):
+    d = tmp_path / "cache"
+    monkeypatch.setenv("BASEMAP_CACHE_DIR", str(d))
+    monkeypatch.delenv("BASEMAP_CACHE", raising=False)
+    return d
+
+
+def test_primera_carga_construye_y_segunda_no_reparsea(tmp_path, cache_dir, monkeypatch):
+    ruta = tmp_path / "comunas.geojson"
+    _escribir_geojson(ruta, _poligonos())
+
+    geoms, names = basemap_cache.cargar_poligonos(str(ruta), "comuna_corregimiento")
+    assert names == [None, "COMUNA 01", "COMUNA 02"]
+    assert len(list(cache_dir.glob("*.npz"))) == 1
+
+    def _no_parsear(*a, **k):
+        raise AssertionError("no debía re-parsear el GeoJSON")
+
+    monkeypatch.setattr(basemap_cache, "parsear_poligonos", _no_parsear)
+    geoms2, names2 = basemap_cache.cargar_poligonos(str(ruta), "comuna_corregimiento")
+    assert names2 == names
+    assert all(a.equals_exact(b, 0) for a, b in zip(geoms, geoms2))
+
+
+def test_cambio_en_geojson_invalida_y_purga(tmp_path, cache_dir):
+    ruta = tmp_path / "comunas.geojson"
+    _escribir_geojson(ruta, _poligonos(2))
+    basemap_cache.cargar_poligonos(str(ruta), "comuna_corregimiento")
+    viejo = list(cache_dir.glob("*.npz"))
+
+    _escribir_geojson(ruta, _poligonos(4))
+    geoms, names = basemap_cache.cargar_poligonos(str(ruta), "comuna_corregimiento")
+    assert len(geoms) == 4
+    nuevo = list(cache_dir.glob("*.npz"))
+    assert len(nuevo) == 1 and nuevo != viejo
+
+
+def test_cache_corrupta_cae_al_geojson(tmp_path, cache_dir):
+    ruta = tmp_path / "comunas.geojson"
+    _escribir_geojson(ruta, _poligonos())
+    basemap_cache.cargar_poligonos(str(ruta), "comuna_corregimiento")
+    (archivo,) = cache_dir.glob("*.npz")
+    archivo.write_bytes(b"basura")
+
+    geoms, names = basemap_cache.cargar_poligonos(str(ruta), "comuna_corregimiento")
+    assert names == [None, "COMUNA 01", "COMUNA 02"]
+    # Se reescribió una caché válida
+    basemap_cache._leer(str(archivo), basemap_cache.hash_archivo(str(ruta)))
+
+
+def test_cruces_dedup_y_variantes_independientes(tmp_path, cache_dir):
+    ruta = tmp_path / "cruces.geojson"
+    _escribir_geojson(ruta, [
+        {"type": "Feature", "geometry": mapping(Point(0, 0)), "properties": {"cruce2": "CL 72A con CL 72"}},
+        {"type": "Feature", "geometry": mapping(Point(0, 1)), "properties": {"cruce2": "CL 72 con CL 72A"}},
+        {"type": "Feature", "geometry": mapping(Point(1, 1)), "properties": {"cruce2": "KR 1 con CL 8"}},
+    ])
+    geoms, names = basemap_cache.cargar_cruces(str(ruta))
+    assert names == ["CL 72A con CL 72", "KR 1 con CL 8"]
+    geoms2, names2 = basemap_cache.cargar_cruces(str(ruta))
+    assert names2 == names and [g.coords[0] for g in geoms2] == [(0.0, 0.0), (1.0, 1.0)]
+
+
+def test_cache_desactivada_no_escribe(tmp_path, cache_dir, monkeypatch):
+    monkeypatch.setenv("BASEMAP_CACHE", "false")
+    ruta = tmp_path / "comunas.geojson"
+    _escribir_geojson(ruta, _poligonos())
+    geoms, _ = basemap_cache.cargar_poligonos(str(ruta), "comuna_corregimiento")
+    assert len(geoms) == 3
+    assert not cache_dir.exists()
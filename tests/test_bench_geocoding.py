@@ -0,0 +1,38 @@
+"""
+Tests del benchmark del geocoder (``scripts/bench_geocoding.py``): puntos
+reproducibles, estructura del JSON de resultados y comparación entre
+corridas. Usa tamaños mínimos; no mide nada en serio.
+"""
+from __future__ import annotations
+
+import json
+
+from scripts import bench_geocoding as bench
+
+
+def test_puntos_reproducibles_y_alrededor_del_bbox():
+    a = bench.generar_puntos(5, 50, seed=3, margen=0.05)
+    assert a == bench.generar_puntos(5, 50, seed=3, margen=0.05)
+    assert a != bench.generar_puntos(5, 50, seed=4, margen=0.05)
+    assert len(a) == 25 + 50
+    b = bench._CALI_BBOX
+    assert min(lon for lon, _ in a) < b["lon_min"] and max(lat for _, lat in a) > b["lat_max"]
+
+
+def test_main_escribe_json_y_compara(tmp_path, capsys):
+    salida = tmp_path / "bench.json"
+    assert bench.main(["--grilla", "3", "--aleatorios", "10", "--salida", str(salida)]) == 0
+    datos = json.loads(salida.read_text(encoding="utf-8"))
+    assert set(datos["funciones"]) == {
+        "geolocate_point", "barrio_de_robusto", "comuna_de_robusto",
+        "cruce_mas_cercano", "via_inferida_de_cruces", "reverse_geocode_local",
+    }
+    for st in datos["funciones"].values():
+        assert st["n"] == 19 and st["p50_us"] <= st["p95_us"] <= st["p99_us"] <= st["max_us"]
+    assert datos["parametros"]["puntos"] == 19
+    assert {"segundos", "rss_despues_mb"} <= set(datos["importacion"])
+    assert "cruces_vias" in datos["construccion"]
+
+    lineas = bench.comparar(datos, datos)
+    assert len(lineas) == 1 + len(datos["funciones"])
+    assert all("x1.00" in l for l in lineas[1:])
@@ -0,0 +1,123 @@
+"""
+Tests de la caché persistente SQLite (``app.geocoding.cache_persistente``).
+
+Cada test usa un archivo en ``tmp_path``; el tiempo se controla
+parcheando ``time.time`` del módulo para ejercitar TTL, margen de
+entradas vencidas y expulsión LRU sin esperas reales.
+"""
+from __future__ import annotations
+
+import pytest
+
+from app.geocoding import cache_persistente
+from app.geocoding.cache_persistente import CachePersistente
+
+
+class _Reloj:
+    def __init__(self, t: float = 1_000_000.0):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+@pytest.fixture()
+def reloj(monkeypatch):
+    r = _Reloj()
+    monkeypatch.setattr(cache_persistente.time, "time", r)
+    return r
+
+
+def _cache(tmp_path, **kw):
+    opciones = {"ttl_s": 100.0, "max_entradas": 1000, "max_vencida_s": 50.0}
+    opciones.update(kw)
+    return CachePersistente(str(tmp_path / "cache.sqlite3"), "prueba", **opciones)
+
+
+def test_fresco_vencido_y_ausente(tmp_path, reloj):
+    cache = _cache(tmp_path)
+    assert cache.obtener("a") is None
+    cache.guardar("a", {"road": "Calle 5", "n": [1, 2]})
+    assert cache.obtener("a") == ({"road": "Calle 5", "n": [1, 2]}, False)
+
+    reloj.t += 120  # pasó el TTL, dentro del margen de vencidas
+    assert cache.obtener("a") == ({"road": "Calle 5", "n": [1, 2]}, True)
+
+    reloj.t += 40  # fuera del margen → ausente
+    assert cache.obtener("a") is None
+    assert cache.estadisticas()["aciertos"] == 1
+    assert cache.estadisticas()["vencidos_servidos"] == 1
+
+
+def test_ttl_por_entrada_y_valor_nulo(tmp_path, reloj):
+    cache = _cache(tmp_path, max_vencida_s=0.0)
+    cache.guardar("negativo", None, ttl_s=10.0)
+    assert cache.obtener("negativo") == (None, False)
+    reloj.t += 11
+    assert cache.obtener("negativo") is None
+
+
+def test_compartida_entre_instancias(tmp_path, reloj):
+    """Dos instancias sobre el mismo archivo (como dos workers) ven las mismas entradas."""
+    a = _cache(tmp_path)
+    b = _cache(tmp_path)
+    a.guardar("k", "v")
+    assert b.obtener("k") == ("v", False)
+
+
+def test_reclamar_refresco_una_sola_vez(tmp_path, reloj):
+    a = _cache(tmp_path)
+    b = _cache(tmp_path)
+    a.guardar("k", "v")
+    assert a.reclamar_refresco("k", duracion_s=30) is True
+    assert b.reclamar_refresco("k", duracion_s=30) is False
+    reloj.t += 31
+    assert b.reclamar_refresco("k", duracion_s=30) is True
+    assert a.reclamar_refresco("no_existe") is False
+
+
+def test_expulsion_lru(tmp_path, reloj):
+    cache = _cache(tmp_path, max_entradas=3, ttl_s=10_000.0)
+    for i in range(4):
+        cache.guardar(f"k{i}", i)
+        reloj.t += 100
+    cache.obtener("k0")  # k0 pasa a ser la más reciente
+    cache.guardar("k4", 4)
+    cache.expulsar()
+    assert len(cache) == 3
+    assert cache.obtener("k0") is not None
+    assert cache.obtener("k1") is None and cache.obtener("k2") is None
+
+
+def test_archivo_inutilizable_no_rompe(tmp_path):
+    (tmp_path / "dir").mkdir()
+    cache = CachePersistente(str(tmp_path / "dir"), "prueba", ttl_s=1.0, max_entradas=10)
+    cache.guardar("k", 1)
+    assert cache.obtener("k") is None
+
+
+def test_api_async_no_bloquea_el_event_loop(tmp_path, reloj, monkeypatch):
+    import asyncio
+    import threading
+
+    cache = _cache(tmp_path)
+    hilos = []
+    original = cache._conexion
+
+    def _conexion_espiada():
+        hilos.append(threading.get_ident())
+        return original()
+
+    monkeypatch.setattr(cache, "_conexion", _conexion_espiada)
+
+    async def _flujo():
+        await cache.guardar_async("k", {"road": "Calle 5"})
+        leido = await cache.obtener_async("k")
+        reloj.t += 101
+        reclamado = await cache.reclamar_refresco_async("k")
+        return threading.get_ident(), leido, reclamado
+
+    hilo_loop, leido, reclamado = asyncio.run(_flujo())
+    assert leido == ({"road": "Calle 5"}, False)
+    assert reclamado is True
+    assert hilos and hilo_loop not in hilos
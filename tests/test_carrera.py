@@ -0,0 +1,161 @@
+"""
+Tests de la carrera de proveedores (``app.geocoding.carrera``) y de su uso
+en ``geocodificar_direccion_cali``.
+
+Los proveedores se simulan con corrutinas con ``asyncio.sleep``; no hay
+llamadas de red. Los retrasos de hedge son de decenas de ms.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from shapely.geometry import box
+
+from app.geocoding import carrera
+from app.geocoding.carrera import ResultadoCarril
+
+
+def _carril(demora, resultado, log, nombre):
+    async def _c():
+        log.append(("inicio", nombre, time.perf_counter()))
+        try:
+            await asyncio.sleep(demora)
+        except asyncio.CancelledError:
+            log.append(("cancelado", nombre, time.perf_counter()))
+            raise
+        return resultado
+
+    return _c
+
+
+def test_gana_el_primer_fuerte_y_cancela_el_resto():
+    log = []
+    carriles = {
+        "lento": _carril(0.5, ResultadoCarril(fuerte="L"), log, "lento"),
+        "rapido": _carril(0.02, ResultadoCarril(fuerte="R"), log, "rapido"),
+    }
+
+    async def _flujo():
+        r = await carrera.carrera(carriles, ["lento", "rapido"], retraso_s=0.03)
+        await asyncio.sleep(0)  # deja correr la cancelación
+        return r
+
+    ganador, valor, _ = asyncio.run(_flujo())
+    assert (ganador, valor) == ("rapido", "R")
+    assert ("cancelado", "lento") in [(e, n) for e, n, _ in log]
+
+
+def test_no_lanza_el_hedge_si_el_primero_gana_a_tiempo():
+    log = []
+    carriles = {
+        "a": _carril(0.01, ResultadoCarril(fuerte="A"), log, "a"),
+        "b": _carril(0.01, ResultadoCarril(fuerte="B"), log, "b"),
+    }
+    ganador, valor, _ = asyncio.run(carrera.carrera(carriles, ["a", "b"], retraso_s=0.2))
+    assert (ganador, valor) == ("a", "A")
+    assert [n for e, n, _ in log if e == "inicio"] == ["a"]
+
+
+def test_carril_vacio_adelanta_el_siguiente_y_debiles_quedan_de_respaldo():
+    log = []
+    carriles = {
+        "a": _carril(0.01, ResultadoCarril(debil="a_debil"), log, "a"),
+        "b": _carril(0.01, ResultadoCarril(), log, "b"),
+        "c": _carril(0.01, RuntimeError, log, "c"),
+    }
+
+    async def _falla():
+        raise RuntimeError("proveedor caído")
+
+    carriles["c"] = _falla
+    t0 = time.perf_counter()
+    ganador, valor, resultados = asyncio.run(carrera.carrera(carriles, ["a", "b", "c"], retraso_s=5.0))
+    assert time.perf_counter() - t0 < 1.0  # no esperó los 5 s de hedge
+    assert ganador is None and valor is None
+    assert resultados["a"].debil == "a_debil"
+    assert resultados["b"] == ResultadoCarril() and resultados["c"] == ResultadoCarril()
+
+
+def test_rastreador_reordena_por_latencia_y_exito():
+    r = carrera.RastreadorProveedores({"nominatim": (1.0, 0.8), "photon": (1.0, 0.6), "arcgis": (1.0, 0.6)})
+    assert r.orden() == ["nominatim", "photon", "arcgis"]
+    for _ in range(10):
+        r.registrar("nominatim", 6.0, False)
+        r.registrar("arcgis", 0.3, True)
+    assert r.orden()[0] == "arcgis"
+    assert r.orden()[-1] == "nominatim"
+    stats = r.estadisticas()
+    assert stats["arcgis"]["consultas"] == 10 and stats["photon"]["consultas"] == 0
+
+
+@pytest.fixture()
+def art(monkeypatch, tmp_path):
+    from app.geocoding.cache_persistente import CachePersistente
+    from app.routes import artefacto_360_routes as art
+
+    monkeypatch.setattr(
+        art, "_GEOCODE_CACHE",
+        CachePersistente(str(tmp_path / "geocode.sqlite3"), "geocode_directo", ttl_s=3600, max_entradas=100),
+    )
+    monkeypatch.setattr(art, "_GEOCODE_HEDGE_S", 0.05)
+    monkeypatch.setattr(art, "_GEOCODE_LOCAL", False)
+    monkeypatch.setattr(
+        art, "_PROVEEDORES_GEOCODE",
+        carrera.RastreadorProveedores({"nominatim": (1.0, 0.8), "photon": (1.0, 0.6), "arcgis": (1.0, 0.6)}),
+    )
+    hint = ("SAN ANTONIO", box(-76.54, 3.44, -76.53, 3.45))
+    monkeypatch.setattr(art, "_extraer_barrios_mencionados", lambda d: [hint])
+    monkeypatch.setattr(art, "_extraer_comunas_mencionadas", lambda d: [])
+    return art
+
+
+def test_geocodificar_toma_el_primer_candidato_dentro_del_hint(art, monkeypatch):
+    llamadas = []
+
+    async def _nominatim(query, limit=5):
+        llamadas.append("nominatim")
+        await asyncio.sleep(0.3)
+        return [{"lat": 3.50, "lon": -76.50, "proveedor": "nominatim"}]  # fuera del barrio
+
+    async def _photon(query):
+        llamadas.append("photon")
+        await asyncio.sleep(0.01)
+        return {"lat": 3.445, "lon": -76.535, "proveedor": "photon"}  # dentro del barrio
+
+    async def _arcgis(query):
+        llamadas.append("arcgis")
+        await asyncio.sleep(1.0)
+        return None
+
+    monkeypatch.setattr(art, "_geocode_nominatim_multi", _nominatim)
+    monkeypatch.setattr(art, "_geocode_photon", _photon)
+    monkeypatch.setattr(art, "_geocode_arcgis", _arcgis)
+
+    t0 = time.perf_counter()
+    res = asyncio.run(art.geocodificar_direccion_cali("Carrera 5 # 3-20 San Antonio"))
+    assert time.perf_counter() - t0 < 0.3
+    assert res["proveedor"] == "photon" and res["barrio_snap"] is False
+    assert llamadas[0] == "nominatim"
+    assert art._PROVEEDORES_GEOCODE.estadisticas()["photon"]["consultas"] == 1
+
+
+def test_geocodificar_sin_fuerte_usa_respaldo_preferido(art, monkeypatch):
+    async def _nominatim(query, limit=5):
+        return [{"lat": 3.50, "lon": -76.50, "proveedor": "nominatim"}]
+
+    async def _vacio(query):
+        return None
+
+    monkeypatch.setattr(art, "_geocode_nominatim_multi", _nominatim)
+    monkeypatch.setattr(art, "_geocode_photon", _vacio)
+    monkeypatch.setattr(art, "_geocode_arcgis", _vacio)
+
+    res = asyncio.run(art.geocodificar_direccion_cali("Carrera 5 # 3-20 San Antonio"))
+    assert res["proveedor"] == "nominatim" and res["barrio_snap"] is True
+
+    monkeypatch.setattr(art, "_geocode_nominatim_multi", lambda q, limit=5: _vacio(q))
+    art._GEOCODE_CACHE.limpiar()
+    res = asyncio.run(art.geocodificar_direccion_cali("Carrera 5 # 3-20 San Antonio"))
+    assert res["proveedor"] == "barrio_centroide"
@@ -0,0 +1,178 @@
+"""
+Tests de la caché de resultados del clasificador (``memo.MemoTTL`` y su
+uso en ``clasificar_centros_gestores`` / ``clasificar_lote``): LRU + TTL,
+clave por texto combinado normalizado + versión de taxonomía + ``top_k``,
+resultados degradados que no se guardan, métricas e invalidación al
+recargar la taxonomía.
+
+Solo se ejercita la rama de reglas; embeddings queda desactivado o se
+simula caído (mismo criterio que ``test_classifier.py``: sin
+``sentence-transformers`` en CI).
+"""
+from __future__ import annotations
+
+import pytest
+
+from app.classification import classifier, memo, taxonomia
+from app.classification import embeddings as emb
+from app.classification.taxonomia import RESPONSABLES_CONOCIDOS, TAXONOMIA
+from app.routes.monitoring_routes import CLASIFICADOR_MEMO_CONSULTAS
+
+
+@pytest.fixture(autouse=True)
+def _memo_limpia(monkeypatch):
+    # Sin modelo real: lo que no resuelven las reglas queda en "ninguno"
+    monkeypatch.setattr(emb, "esta_disponible", lambda: False)
+    classifier._MEMO.limpiar()
+    yield
+    classifier._MEMO.limpiar()
+
+
+@pytest.fixture()
+def llamadas_reglas(monkeypatch):
+    llamadas = []
+    original = classifier._clasificar_por_reglas
+
+    def _spy(texto, top_k):
+        llamadas.append(texto)
+        return original(texto, top_k)
+
+    monkeypatch.setattr(classifier, "_clasificar_por_reglas", _spy)
+    return llamadas
+
+
+def _contador(resultado: str) -> float:
+    return CLASIFICADOR_MEMO_CONSULTAS.labels(resultado=resultado)._value.get()
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# MemoTTL
+# ──────────────────────────────────────────────────────────────────────────
+
+def test_memo_lru_desaloja_la_menos_usada():
+    cache = memo.MemoTTL(maxsize=2, ttl_s=60)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    assert cache.obtener("a") == (True, 1)  # "a" pasa a ser la más reciente
+    cache.guardar("c", 3)
+    assert cache.obtener("b") == (False, None)
+    assert cache.obtener("a") == (True, 1) and cache.obtener("c") == (True, 3)
+    assert cache.info()["currsize"] == 2
+
+
+def test_memo_ttl_vence_entradas(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr(memo.time, "monotonic", lambda: ahora[0])
+    cache = memo.MemoTTL(maxsize=10, ttl_s=30)
+    cache.guardar("a", {"x": 1})
+    ahora[0] += 29
+    assert cache.obtener("a")[0] is True
+    ahora[0] += 2
+    assert cache.obtener("a") == (False, None)
+    assert cache.info()["currsize"] == 0
+
+
+def test_memo_devuelve_copias():
+    cache = memo.MemoTTL(maxsize=10, ttl_s=60)
+    valor = {"centros_gestores": ["DAGMA"]}
+    cache.guardar("a", valor)
+    valor["centros_gestores"].append("mutado")
+    _, leido = cache.obtener("a")
+    leido["centros_gestores"].append("otra")
+    assert cache.obtener("a")[1] == {"centros_gestores": ["DAGMA"]}
+
+
+def test_memo_desactivada():
+    cache = memo.MemoTTL(maxsize=0, ttl_s=60)
+    cache.guardar("a", 1)
+    assert cache.obtener("a") == (False, None)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Clasificador
+# ──────────────────────────────────────────────────────────────────────────
+
+def test_texto_repetido_no_se_reclasifica(llamadas_reglas):
+    hits_antes, misses_antes = _contador("hit"), _contador("miss")
+    primero = classifier.clasificar_centros_gestores("Poda de árbol en el parque")
+    segundo = classifier.clasificar_centros_gestores("poda de ARBOL   en el parque")
+    assert segundo == primero and segundo is not primero
+    assert len(llamadas_reglas) == 1
+    assert (_contador("hit") - hits_antes, _contador("miss") - misses_antes) == (1, 1)
+
+
+def test_top_k_y_contexto_son_parte_de_la_clave(llamadas_reglas):
+    classifier.clasificar_centros_gestores("Poda de árbol", top_k=3)
+    classifier.clasificar_centros_gestores("Poda de árbol", top_k=1)
+    classifier.clasificar_centros_gestores("Poda de árbol", observaciones="y escombros")
+    assert len(llamadas_reglas) == 3
+
+
+def test_mutar_el_resultado_no_altera_la_cache():
+    r = classifier.clasificar_centros_gestores("Recolección de escombros en la esquina")
+    r["centros_gestores"].clear()
+    assert classifier.clasificar_centros_gestores("Recolección de escombros en la esquina")["centros_gestores"]
+
+
+def test_falla_del_modelo_no_se_guarda(monkeypatch):
+    monkeypatch.setattr(emb, "esta_disponible", lambda: True)
+
+    def _falla(*_a, **_k):
+        raise RuntimeError("modelo caído")
+
+    monkeypatch.setattr(emb, "calcular_similitudes", _falla)
+    monkeypatch.setattr(emb, "calcular_similitudes_lote", _falla)
+    assert classifier.clasificar_centros_gestores("zzz qqq")["metodo"] == "ninguno"
+    assert classifier.clasificar_lote(["zzz www"])[0]["metodo"] == "ninguno"
+    assert classifier._MEMO.info()["currsize"] == 0
+
+
+def test_lote_usa_la_cache_y_deduplica(llamadas_reglas):
+    classifier.clasificar_centros_gestores("Luminaria apagada")
+    llamadas_reglas.clear()
+    resultados = classifier.clasificar_lote(
+        ["Luminaria apagada", "Árbol caído", "árbol caído", "Luminaria apagada"]
+    )
+    assert len(llamadas_reglas) == 1  # solo "Árbol caído", una vez
+    assert resultados[1] == resultados[2] and resultados[1] is not resultados[2]
+    assert resultados[0] == resultados[3] and resultados[0] is not resultados[3]
+
+
+def test_recargar_taxonomia_invalida(monkeypatch):
+    fila = TAXONOMIA[0]
+    texto = "palabra inventada xyzzy"
+    assert classifier.clasificar_centros_gestores(texto)["metodo"] != "reglas"
+    version = classifier._VERSION_TAXONOMIA
+
+    monkeypatch.setitem(fila, "keywords", fila["keywords"] + ["xyzzy"])
+    try:
+        assert classifier.recargar_taxonomia() != version
+        assert classifier._MEMO.info()["currsize"] == 0
+        r = classifier.clasificar_centros_gestores(texto)
+        assert r["metodo"] == "reglas" and r["matches"][0]["hits"] == ["xyzzy"]
+    finally:
+        monkeypatch.undo()
+        classifier.recargar_taxonomia()
+    assert classifier._VERSION_TAXONOMIA == version
+
+
+def test_recargar_taxonomia_reasignada():
+    texto = "otra palabra inventada plugh"
+    version = classifier._VERSION_TAXONOMIA
+    nueva = [dict(f) for f in TAXONOMIA]
+    nueva.append(dict(TAXONOMIA[0], keywords=["plugh"], responsables=["Entidad Nueva"]))
+
+    # Sin monkeypatch.undo(): desharía también el parche de ``esta_disponible``
+    taxonomia.TAXONOMIA = nueva
+    try:
+        classifier.recargar_taxonomia()
+        r = classifier.clasificar_centros_gestores(texto)
+        assert r["metodo"] == "reglas" and r["centros_gestores"] == ["Entidad Nueva"]
+        # La lista importada antes de la recarga se actualiza en el lugar
+        assert "Entidad Nueva" in RESPONSABLES_CONOCIDOS
+    finally:
+        taxonomia.TAXONOMIA = TAXONOMIA
+        classifier.recargar_taxonomia()
+    assert classifier._VERSION_TAXONOMIA == version
+    assert "Entidad Nueva" not in RESPONSABLES_CONOCIDOS
+    assert classifier.clasificar_centros_gestores(texto)["metodo"] != "reglas"
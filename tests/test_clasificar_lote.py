@@ -0,0 +1,162 @@
+"""
+Tests de la clasificación por lote (``classifier.clasificar_lote``,
+``embeddings.calcular_similitudes_lote`` y
+``POST /clasificar-requerimientos/lote``).
+
+El modelo de embeddings se reemplaza por uno determinista (bolsa de
+trigramas con hash) para no depender de ``sentence-transformers``/``torch``
+en CI (mismo criterio que ``test_classifier.py``). Se verifica que el lote
+da exactamente lo mismo que clasificar uno por uno y que los textos que
+caen a embeddings se embeben en una sola llamada a ``encode``.
+"""
+from __future__ import annotations
+
+import zlib
+
+import numpy as np
+import pytest
+
+from app.classification import classifier
+from app.classification import embeddings as emb
+from app.classification.taxonomia import listar_descripciones_canonicas
+
+_DIM = 64
+
+
+class _ModeloFalso:
+    """``encode`` determinista: trigramas de caracteres → vector normalizado."""
+
+    def __init__(self):
+        self.llamadas: list[int] = []
+
+    def encode(self, textos, batch_size=32, normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False):
+        self.llamadas.append(len(textos))
+        vecs = np.zeros((len(textos), _DIM), dtype=np.float32)
+        for fila, texto in enumerate(textos):
+            t = f"  {texto.lower()}  "
+            for i in range(len(t) - 2):
+                vecs[fila, zlib.crc32(t[i:i + 3].encode()) % _DIM] += 1.0
+        normas = np.linalg.norm(vecs, axis=1, keepdims=True)
+        return vecs / np.where(normas == 0, 1.0, normas)
+
+
+@pytest.fixture()
+def modelo(monkeypatch, tmp_path):
+    monkeypatch.setenv("CLASSIFIER_MATRIX_CACHE_DIR", str(tmp_path / "matriz"))
+    falso = _ModeloFalso()
+    monkeypatch.setattr(emb, "_MODEL", falso)
+    monkeypatch.setattr(emb, "_MATRIX", None)
+    monkeypatch.setattr(emb, "esta_disponible", lambda: True)
+    emb._get_matrix()
+    falso.llamadas.clear()
+    classifier._MEMO.limpiar()
+    return falso
+
+
+_TEXTOS = [
+    "Se cayó un árbol grande en la cuadra",
+    "",
+    "Luminaria apagada hace 3 días",
+    # Sin keywords: caen a embeddings (descripciones canónicas parafraseadas)
+    "Arboles poda de arboles autorizacion autorizar intervencion",
+    "Movilidad semaforizacion y demarcacion vial",
+    "zzz qqq",
+    {"requerimiento": "Hay escombros", "observaciones": "en el lote de la esquina"},
+    {"requerimiento": "Ruido", "transcripciones": [{"texto": "musica a todo volumen en la noche"}]},
+]
+
+
+def test_lote_igual_a_clasificar_uno_por_uno(modelo):
+    individuales = [
+        classifier.clasificar_centros_gestores(t) if isinstance(t, str) else classifier.clasificar_centros_gestores(**t)
+        for t in _TEXTOS
+    ]
+    classifier._MEMO.limpiar()
+    assert classifier.clasificar_lote(_TEXTOS) == individuales
+    assert {r["metodo"] for r in individuales} >= {"reglas", "embeddings", "ninguno"}
+
+
+def test_lote_embebe_los_pendientes_en_una_sola_llamada(modelo):
+    resultados = classifier.clasificar_lote(_TEXTOS)
+    pendientes = [
+        t for t, r in zip(_TEXTOS, resultados) if r["metodo"] != "reglas" and t
+    ]
+    assert modelo.llamadas == [len(pendientes)]
+
+
+def test_lote_solo_reglas_no_carga_el_modelo(modelo):
+    classifier.clasificar_lote(["Se cayó un árbol", "Hay escombros botados"])
+    assert modelo.llamadas == []
+
+
+def test_lote_degrada_si_falla_el_modelo(modelo, monkeypatch):
+    def _falla(*_a, **_k):
+        raise RuntimeError("sin modelo")
+
+    monkeypatch.setattr(modelo, "encode", _falla)
+    resultados = classifier.clasificar_lote(["Se cayó un árbol", "zzz qqq"])
+    assert [r["metodo"] for r in resultados] == ["reglas", "ninguno"]
+
+
+def test_similitudes_lote_igual_a_individuales(modelo):
+    textos = ["poda de arbol", "", "alumbrado publico apagado", "zzz"]
+    lote = emb.calcular_similitudes_lote(textos, top_k=5)
+    assert lote[1] == []
+    for texto, res in zip(textos, lote):
+        if texto:
+            # El producto matricial por lote puede diferir en el último bit de float32
+            individual = emb.calcular_similitudes(texto, top_k=5)
+            assert [i for i, _ in res] == [i for i, _ in individual]
+            assert [s for _, s in res] == pytest.approx([s for _, s in individual], abs=1e-6)
+            assert len(res) == 5
+
+
+@pytest.mark.parametrize("top_k", [1, 3, 10, 1000])
+def test_top_k_filas_igual_al_orden_completo(top_k):
+    rng = np.random.default_rng(top_k)
+    sims = rng.random((6, len(listar_descripciones_canonicas())))
+    for fila, top in zip(sims, emb._top_k_filas(sims, top_k)):
+        esperado = np.argsort(-fila, kind="stable")[:top_k]
+        assert [i for i, _ in top] == [int(i) for i in esperado]
+        assert [s for _, s in top] == pytest.approx(fila[esperado].tolist())
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Endpoint
+# ──────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture()
+def client(modelo):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.routes.artefacto_360_routes import router
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_endpoint_lote_mantiene_el_orden(client):
+    items = [
+        {"texto": "Luminaria apagada"},
+        {"texto": "zzz qqq"},
+        {"texto": "Árbol caído", "observaciones": "bloquea la vía"},
+    ]
+    r = client.post("/clasificar-requerimientos/lote", json={"items": items, "top_k": 2})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["success"] is True and body["total"] == 3
+    esperado = classifier.clasificar_lote(
+        [{"requerimiento": i["texto"], "observaciones": i.get("observaciones")} for i in items], top_k=2
+    )
+    assert body["resultados"] == esperado
+
+
+def test_endpoint_lote_valida_tamano(client, monkeypatch):
+    from app.routes import artefacto_360_routes as art
+
+    assert client.post("/clasificar-requerimientos/lote", json={"items": []}).status_code == 422
+    monkeypatch.setattr(art, "_CLASIFICAR_LOTE_MAX", 2)
+    items = [{"texto": "poda"}] * 3
+    assert client.post("/clasificar-requerimientos/lote", json={"items": items}).status_code == 422
@@ -0,0 +1,209 @@
+"""
+Tests de los contornos simplificados (``app.geocoding.contornos``) y de
+``GET /api/basemaps/{capa}/contornos``.
+
+Se usan capas sintéticas: cuadrados vecinos con bordes compartidos
+dentados (muchos vértices), para verificar que la simplificación reduce
+vértices sin abrir huecos ni solapes entre vecinos.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+
+import numpy as np
+import pytest
+import shapely
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from shapely.geometry import Polygon
+
+from app.geocoding import contornos, proyeccion
+from app.geocoding.polygon_index import PolygonIndex
+
+
+def _borde_dentado(x0: float, y0: float, x1: float, y1: float, n: int = 200) -> list[tuple[float, float]]:
+    """Segmento de (x0, y0) a (x1, y1) con ruido de ~0.1 m perpendicular."""
+    t = np.linspace(0.0, 1.0, n)
+    ruido = 1e-6 * np.sin(np.arange(n) * 1.7)
+    ruido[0] = ruido[-1] = 0.0
+    xs = x0 + (x1 - x0) * t + (ruido if y0 == y1 else 0)
+    ys = y0 + (y1 - y0) * t + (ruido if x0 == x1 else 0)
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def _grilla(n: int = 3, lado: float = 0.01, lon0: float = -76.55, lat0: float = 3.42) -> list[tuple]:
+    """``n × n`` celdas vecinas; los bordes compartidos son idénticos en ambos lados."""
+    capa = []
+    for fila in range(n):
+        for col in range(n):
+            x0, y0 = lon0 + col * lado, lat0 + fila * lado
+            x1, y1 = x0 + lado, y0 + lado
+            anillo = (
+                _borde_dentado(x0, y0, x1, y0)[:-1]
+                + _borde_dentado(x1, y0, x1, y1)[:-1]
+                + list(reversed(_borde_dentado(x0, y1, x1, y1)))[:-1]
+                + list(reversed(_borde_dentado(x0, y0, x0, y1)))
+            )
+            capa.append((Polygon(anillo), f"Celda {fila}-{col}"))
+    return capa
+
+
+_CAPA = _grilla()
+
+
+@pytest.fixture()
+def indice():
+    return PolygonIndex(_CAPA)
+
+
+@pytest.fixture(autouse=True)
+def _sin_estado(monkeypatch, tmp_path):
+    monkeypatch.setenv("BASEMAP_CACHE_DIR", str(tmp_path / "cache"))
+    contornos.limpiar()
+    yield
+    contornos.limpiar()
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Simplificación
+# ──────────────────────────────────────────────────────────────────────────
+
+def test_simplificar_reduce_vertices_sin_huecos_ni_solapes(indice):
+    simples = contornos.simplificar(indice.geoms_m, contornos.tolerancia_m(12), indice.tree_m)
+    assert len(simples) == len(_CAPA)
+    assert all(shapely.is_valid(simples))
+    assert shapely.get_num_coordinates(simples).sum() < shapely.get_num_coordinates(indice.geoms).sum() / 10
+
+    simples_m = proyeccion.proyectar(simples)
+    union = shapely.union_all(simples_m)
+    # Sin solapes: la suma de áreas es el área de la unión; sin huecos: la unión es un solo polígono
+    assert shapely.area(simples_m).sum() == pytest.approx(union.area, rel=1e-6)
+    assert union.geom_type == "Polygon" and len(union.interiors) == 0
+    # Cada celda conserva su área (±1 %)
+    np.testing.assert_allclose(shapely.area(simples_m), shapely.area(indice.geoms_m), rtol=0.01)
+
+
+def test_bordes_compartidos_identicos_entre_vecinos(indice):
+    simples = contornos.simplificar(indice.geoms_m, contornos.tolerancia_m(10), indice.tree_m)
+    a, b = simples[0], simples[1]  # celdas 0-0 y 0-1
+    compartido = shapely.intersection(a.boundary, b.boundary)
+    assert compartido.length > 0.009  # todo el lado común, no puntos sueltos
+    assert shapely.intersection(a, b).area == pytest.approx(0.0, abs=1e-12)
+
+
+def test_zoom_precalculado_y_tolerancia():
+    assert contornos.zoom_precalculado(0) == contornos.ZOOMS[0]
+    assert contornos.zoom_precalculado(contornos.ZOOMS[0] + 1) == contornos.ZOOMS[1]
+    assert contornos.zoom_precalculado(30) == contornos.ZOOMS[-1]
+    assert contornos.tolerancia_m(12) == pytest.approx(2 * contornos.tolerancia_m(13))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Representación y caché en disco
+# ──────────────────────────────────────────────────────────────────────────
+
+def test_representacion_elige_codificacion_y_etag():
+    rep = contornos.Representacion.de_cuerpo(b'{"type":"FeatureCollection","features":[]}' * 50)
+    assert gzip.decompress(rep.gzip) == rep.cuerpo
+
+    contenido, encoding, etag = rep.para("gzip, deflate")
+    assert (contenido, encoding, etag) == (rep.gzip, "gzip", f'"{rep.etag}-gz"')
+    contenido, encoding, etag = rep.para("")
+    assert (contenido, encoding, etag) == (rep.cuerpo, None, f'"{rep.etag}"')
+    assert rep.para("gzip;q=0")[1] is None
+    if rep.br is not None:
+        assert rep.para("gzip, br")[1] == "br"
+
+
+def test_cargar_nivel_reutiliza_cache_en_disco(indice, tmp_path, monkeypatch):
+    ruta = tmp_path / "celdas.geojson"
+    ruta.write_text("{}")
+    nombres = indice.names
+
+    primero = contornos.cargar_nivel(str(ruta), "nombre", 12, indice.geoms_m, nombres, tree_m=indice.tree_m)
+
+    def _no_recalcular(*_a, **_k):
+        raise AssertionError("debía leerse de la caché en disco")
+
+    monkeypatch.setattr(contornos, "construir_nivel", _no_recalcular)
+    segundo = contornos.cargar_nivel(str(ruta), "nombre", 12, indice.geoms_m, nombres)
+    assert segundo.completo.etag == primero.completo.etag
+    assert segundo.features == primero.features
+    assert json.loads(segundo.completo.cuerpo)["features"][4]["properties"] == {"id": 4, "nombre": "Celda 1-1"}
+
+    # Otro GeoJSON de origen (otro hash) invalida la caché y purga la vieja
+    monkeypatch.undo()
+    monkeypatch.setenv("BASEMAP_CACHE_DIR", str(tmp_path / "cache"))
+    ruta.write_text('{"cambio": 1}')
+    contornos.cargar_nivel(str(ruta), "nombre", 12, indice.geoms_m, nombres)
+    archivos = list((tmp_path / "cache").glob("celdas.nombre.contornos-z12.*.json.gz"))
+    assert len(archivos) == 1
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Endpoint
+# ──────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture()
+def client(indice, monkeypatch):
+    from app.routes.geocoding_routes import router
+
+    monkeypatch.setenv("BASEMAP_CACHE", "false")
+    monkeypatch.setattr(contornos, "_indice", lambda capa: indice)
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_endpoint_sirve_gzip_con_etag_y_304(client):
+    r = client.get("/api/basemaps/barrios/contornos", params={"zoom": 13})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/geo+json"
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["x-contornos-zoom"] == str(contornos.zoom_precalculado(13))
+    assert len(r.json()["features"]) == len(_CAPA)
+
+    etag = r.headers["etag"]
+    r2 = client.get("/api/basemaps/barrios/contornos", params={"zoom": 13}, headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+    assert r2.content == b""
+    r3 = client.get("/api/basemaps/barrios/contornos", params={"zoom": 13}, headers={"If-None-Match": f"W/{etag}"})
+    assert r3.status_code == 304
+
+
+def test_endpoint_bbox_filtra_poligonos(client):
+    # Solo la columna izquierda de la grilla (lon < -76.545)
+    r = client.get(
+        "/api/basemaps/barrios/contornos",
+        params={"zoom": 12, "bbox": "-76.56,3.41,-76.545,3.46"},
+    )
+    assert r.status_code == 200
+    nombres = sorted(f["properties"]["nombre"] for f in r.json()["features"])
+    assert nombres == ["Celda 0-0", "Celda 1-0", "Celda 2-0"]
+    completo = client.get("/api/basemaps/barrios/contornos", params={"zoom": 12})
+    assert r.headers["etag"] != completo.headers["etag"]
+
+
+def test_recorte_usa_el_indice_del_nivel_tras_recarga(indice, monkeypatch):
+    monkeypatch.setenv("BASEMAP_CACHE", "false")
+    monkeypatch.setattr(contornos, "_indice", lambda capa: indice)
+    contornos.nivel("barrios", 12)
+    # Recarga con otra generación de polígonos antes de limpiar los niveles
+    otro = PolygonIndex(_grilla(n=1, lon0=-76.56))
+    monkeypatch.setattr(contornos, "_indice", lambda capa: otro)
+    rep = contornos.recortar("barrios", 12, (-76.56, 3.41, -76.545, 3.46))
+    nombres = sorted(f["properties"]["nombre"] for f in json.loads(rep.cuerpo)["features"])
+    assert nombres == ["Celda 0-0", "Celda 1-0", "Celda 2-0"]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"bbox": "1,2,3"}, {"bbox": "-76.5,3.5,-76.6,3.4"}, {"zoom": 40}],
+)
+def test_endpoint_parametros_invalidos(client, params):
+    assert client.get("/api/basemaps/barrios/contornos", params=params).status_code == 422
+
+
+def test_endpoint_capa_desconocida(client):
+    assert client.get("/api/basemaps/ejes/contornos").status_code == 422
@@ -0,0 +1,158 @@
+"""
+Tests del geocodificador directo local (``app.geocoding.direccion_local``):
+parseo de nomenclatura ("Calle 5 # 38-20"), índice de pares de vías,
+interpolación hacia el cruce siguiente y su uso sin red en
+``geocodificar_direccion_cali``.
+
+Los cruces son una grilla sintética (el basemap de cruces no está en el
+repo): Calles 1..10 horizontales, Carreras 30..40 verticales, cada 100 m,
+más la Carrera 38A entre la 38 y la 39.
+"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+
+import numpy as np
+import pytest
+
+from app.geocoding import direccion_local, proyeccion
+from app.geocoding.direccion_local import IndiceCruces, parsear
+
+_X0, _Y0 = proyeccion.a_metros(-76.53, 3.43)
+
+
+def _grilla():
+    nombres, xy = [], []
+    carreras = [(str(m), (m - 30) * 100.0) for m in range(30, 41)] + [("38A", 850.0)]
+    for n in range(1, 11):
+        for kr, x in carreras:
+            # Orden de las vías en el nombre alternado, como en el basemap
+            nombres.append(f"CL {n} con KR {kr}" if n % 2 else f"KR {kr} con CL {n}")
+            xy.append((_X0 + x, _Y0 + n * 100.0))
+    nombres.append("CL 70 NORTE con AV 6")
+    xy.append((_X0, _Y0 + 5000.0))
+    nombres.append("VIA CRISTO REY con CL 1")  # no numerada: se ignora
+    xy.append((_X0, _Y0))
+    return nombres, np.array(xy)
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return IndiceCruces(*_grilla())
+
+
+def _xy(res):
+    x, y = proyeccion.a_metros(res["lon"], res["lat"])
+    return float(x) - _X0, float(y) - _Y0
+
+
+@pytest.mark.parametrize("texto, principal, generadora, placa", [
+    ("Calle 5 # 38-20", "CL 5", "38", 20.0),
+    ("Cl. 5 No. 38A - 20, barrio X", "CL 5", "38A", 20.0),
+    ("CARRERA 38 A BIS # 5 - 7", "KR 38ABIS", "5", 7.0),
+    ("Calle 70 Norte # 6-15", "CL 70 N", "6", 15.0),
+    ("Calle 5 con Carrera 38", "CL 5", "KR 38", 0.0),
+    ("Cra 40 y Cll 2", "KR 40", "CL 2", 0.0),
+])
+def test_parsear(texto, principal, generadora, placa):
+    p = parsear(texto)
+    assert (p.principal, p.generadora, p.placa_m) == (principal, generadora, placa)
+
+
+@pytest.mark.parametrize("texto", ["Vereda La Buitrera", "Calle 5", "Manzana 3 casa 4", ""])
+def test_parsear_no_aplica(texto):
+    assert parsear(texto) is None
+
+
+def test_cruce_por_par_no_ordenado(indice):
+    assert indice.cruce("CL 4", "38")[1] == "KR 38"
+    assert indice.cruce("KR 38", "4")[1] == "CL 4"
+    assert indice.cruce("CL 4", "KR 38") == indice.cruce("KR 38", "CL 4")[:1] + ("KR 38",)
+    assert indice.cruce("CL 4", "99") is None
+    assert not any("VIA" in v for v in indice.por_via)
+
+
+def test_interpola_hacia_el_cruce_siguiente(indice):
+    res = indice.geocodificar("Calle 5 # 38-20")
+    assert res["cruce"] == "CL 5 con KR 38" and res["interpolado"]
+    x, y = _xy(res)
+    # Siguiente cruce sobre la CL 5 es la KR 38A (x=850): 20 m hacia el este
+    assert x == pytest.approx(820.0, abs=0.01) and y == pytest.approx(500.0, abs=0.01)
+
+    # La placa no pasa del cruce siguiente
+    x, _ = _xy(indice.geocodificar("Calle 5 # 38-90"))
+    assert x == pytest.approx(850.0, abs=0.01)
+
+    # Sobre una Carrera avanza hacia la Calle siguiente (norte)
+    x, y = _xy(indice.geocodificar("Carrera 33 # 7-40"))
+    assert (x, y) == (pytest.approx(300.0, abs=0.01), pytest.approx(740.0, abs=0.01))
+
+
+def test_ultimo_cruce_se_aleja_del_anterior(indice):
+    x, y = _xy(indice.geocodificar("Calle 2 # 40-30"))
+    assert x == pytest.approx(1030.0, abs=0.01) and y == pytest.approx(200.0, abs=0.01)
+
+
+def test_cruce_explicito_y_fallos(indice):
+    res = indice.geocodificar("Carrera 31 con Calle 9")
+    assert res["interpolado"] is False and _xy(res) == (pytest.approx(100.0), pytest.approx(900.0))
+    assert indice.geocodificar("Calle 5 # 99-10") is None
+    assert indice.geocodificar("Vereda La Buitrera") is None
+    assert indice.geocodificar("Calle 70 Norte # 6-0")["cruce"] == "CL 70 NORTE con AV 6"
+
+
+def test_geocodificar_direccion_cali_sin_red(monkeypatch, tmp_path, indice):
+    from app.geocoding import spatial_index
+    from app.geocoding.cache_persistente import CachePersistente
+    from app.routes import artefacto_360_routes as art
+
+    async def _no_llamar(*a, **k):
+        raise AssertionError("no debería consultar proveedores externos")
+
+    monkeypatch.setattr(spatial_index, "_CRUCES", dataclasses.replace(spatial_index._CRUCES, direcciones=indice))
+    monkeypatch.setattr(art, "_GEOCODE_LOCAL", True)
+    monkeypatch.setattr(
+        art, "_GEOCODE_CACHE", CachePersistente(str(tmp_path / "g.sqlite3"), "geocode_directo", ttl_s=60, max_entradas=10)
+    )
+    monkeypatch.setattr(art, "_geocode_nominatim_multi", _no_llamar)
+    monkeypatch.setattr(art, "_geocode_photon", _no_llamar)
+    monkeypatch.setattr(art, "_geocode_arcgis", _no_llamar)
+    monkeypatch.setattr(art, "_extraer_barrios_mencionados", lambda d: [])
+    monkeypatch.setattr(art, "_extraer_comunas_mencionadas", lambda d: [])
+
+    res = asyncio.run(art.geocodificar_direccion_cali("Cl 5 # 38-20 apto 301"))
+    assert res["proveedor"] == "cruces_local"
+    assert _xy(res) == (pytest.approx(820.0, abs=0.01), pytest.approx(500.0, abs=0.01))
+
+
+def test_local_lejos_del_hint_sigue_a_la_red(monkeypatch, tmp_path, indice):
+    from shapely.geometry import box
+
+    from app.geocoding import spatial_index
+    from app.geocoding.cache_persistente import CachePersistente
+    from app.routes import artefacto_360_routes as art
+
+    llamadas = []
+
+    async def _nominatim(query, limit=5):
+        llamadas.append(query)
+        return [{"lat": 3.50, "lon": -76.50, "proveedor": "nominatim"}]
+
+    async def _vacio(query):
+        return None
+
+    lejos = ("LEJANO", box(-76.40, 3.60, -76.39, 3.61))
+    monkeypatch.setattr(spatial_index, "_CRUCES", dataclasses.replace(spatial_index._CRUCES, direcciones=indice))
+    monkeypatch.setattr(art, "_GEOCODE_LOCAL", True)
+    monkeypatch.setattr(
+        art, "_GEOCODE_CACHE", CachePersistente(str(tmp_path / "g.sqlite3"), "geocode_directo", ttl_s=60, max_entradas=10)
+    )
+    monkeypatch.setattr(art, "_geocode_nominatim_multi", _nominatim)
+    monkeypatch.setattr(art, "_geocode_photon", _vacio)
+    monkeypatch.setattr(art, "_geocode_arcgis", _vacio)
+    monkeypatch.setattr(art, "_extraer_barrios_mencionados", lambda d: [lejos])
+    monkeypatch.setattr(art, "_extraer_comunas_mencionadas", lambda d: [])
+
+    res = asyncio.run(art.geocodificar_direccion_cali("Calle 5 # 38-20 Lejano"))
+    assert res["proveedor"] == "nominatim" and llamadas
@@ -0,0 +1,116 @@
+"""
+Tests del pool de geocoding (``app.geocoding.ejecutor``): memo LRU,
+aciertos inline, fallos en hilos del pool y que el event loop sigue
+atendiendo mientras el pool trabaja.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.geocoding import ejecutor
+from app.routes.monitoring_routes import GEOCODING_POOL_ESPERA
+
+
+def _hilo(*_args) -> str:
+    return threading.current_thread().name
+
+
+def test_memo_lru_expulsa_el_menos_usado():
+    llamadas = []
+
+    def f(x):
+        llamadas.append(x)
+        return x * 10
+
+    memo = ejecutor.MemoLRU(f, maxsize=2)
+    assert memo(1) == 10 and memo(2) == 20
+    assert memo(1) == 10  # acierto: 1 pasa a ser el más reciente
+    memo(3)  # expulsa a 2
+    assert memo.obtener(2) == (False, None)
+    assert memo.obtener(1) == (True, 10)
+    assert llamadas == [1, 2, 3]
+    info = memo.cache_info()
+    assert info["currsize"] == 2 and info["misses"] == 3
+
+    memo.cache_clear()
+    assert memo.cache_info() == {"hits": 0, "misses": 0, "maxsize": 2, "currsize": 0}
+
+
+def test_calcular_fallo_en_pool_y_acierto_inline():
+    memo = ejecutor.MemoLRU(_hilo, maxsize=8)
+
+    async def _flujo():
+        primero = await ejecutor.calcular(memo, 3.1, -76.5)
+        return primero, threading.current_thread().name
+
+    primero, hilo_loop = asyncio.run(_flujo())
+    if ejecutor._WORKERS > 0:
+        assert primero.startswith("geocoding")
+        assert primero != hilo_loop
+    # El acierto devuelve lo guardado sin volver a calcular
+    assert asyncio.run(ejecutor.calcular(memo, 3.1, -76.5)) == primero
+    assert memo.cache_info()["hits"] == 1
+
+
+def test_en_pool_no_bloquea_el_loop(monkeypatch):
+    monkeypatch.setattr(ejecutor, "_WORKERS", 2)
+    monkeypatch.setattr(ejecutor, "_POOL", None)
+
+    async def _flujo():
+        ticks = 0
+
+        async def _ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        tarea = asyncio.create_task(_ticker())
+        await ejecutor.en_pool(time.sleep, 0.2)
+        tarea.cancel()
+        return ticks
+
+    try:
+        assert asyncio.run(_flujo()) >= 10
+    finally:
+        ejecutor.cerrar()
+
+
+def test_workers_cero_ejecuta_inline(monkeypatch):
+    monkeypatch.setattr(ejecutor, "_WORKERS", 0)
+    monkeypatch.setattr(ejecutor, "_POOL", None)
+
+    async def _flujo():
+        return await ejecutor.en_pool(_hilo), threading.current_thread().name
+
+    hilo_fn, hilo_loop = asyncio.run(_flujo())
+    assert hilo_fn == hilo_loop
+    assert ejecutor._POOL is None
+
+
+def test_espera_en_cola_se_reporta(monkeypatch):
+    monkeypatch.setattr(ejecutor, "_WORKERS", 1)
+    monkeypatch.setattr(ejecutor, "_POOL", None)
+
+    def _muestras() -> float:
+        for metrica in GEOCODING_POOL_ESPERA.collect():
+            for m in metrica.samples:
+                if m.name.endswith("_count"):
+                    return m.value
+        return 0.0
+
+    antes = _muestras()
+
+    async def _flujo():
+        await asyncio.gather(*(ejecutor.en_pool(time.sleep, 0.01) for _ in range(3)))
+
+    try:
+        asyncio.run(_flujo())
+    finally:
+        ejecutor.cerrar()
+    assert _muestras() - antes == pytest.approx(3)
+    assert ejecutor._PENDIENTES == 0
@@ -0,0 +1,201 @@
+"""
+Tests del backend ONNX Runtime de embeddings (``CLASSIFIER_BACKEND=onnx``,
+``embeddings_onnx.ModeloOnnx`` y ``scripts/export_onnx_clasificador.py``).
+
+- ``ModeloOnnx.encode`` con una sesión falsa (lookup de embeddings por
+  token): pooling promedio que ignora el padding, normalización, orden de
+  salida y entradas del grafo. Solo requiere ``tokenizers``.
+- Selección del backend en ``embeddings``: disponibilidad sin export,
+  huella de la matriz por backend.
+- Paridad contra torch: un BERT diminuto aleatorio (sin red) se exporta con
+  el script y los scores coseno consulta × taxonomía de ONNX fp32 / int8 se
+  comparan con los de ``SentenceTransformer`` dentro de una tolerancia. Se
+  salta si faltan ``torch``, ``sentence-transformers``, ``onnx`` u
+  ``onnxruntime`` (mismo criterio que ``test_classifier.py``).
+"""
+from __future__ import annotations
+
+import json
+import string
+
+import numpy as np
+import pytest
+
+from app.classification import embeddings as emb
+from app.classification import embeddings_onnx as eo
+
+_VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(string.ascii_lowercase) + [
+    "##" + c for c in string.ascii_lowercase
+] + "de la el en poda arbol luz via parque basura".split()
+
+
+def _escribir_tokenizer(directorio, entradas=("input_ids", "attention_mask")):
+    tk = pytest.importorskip("tokenizers")
+    from tokenizers import models, normalizers, pre_tokenizers, processors
+
+    tokenizer = tk.Tokenizer(models.WordPiece({t: i for i, t in enumerate(_VOCAB)}, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True, strip_accents=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    tokenizer.save(str(directorio / eo.ARCHIVO_TOKENIZER))
+    meta = {
+        "modelo": "falso",
+        "max_seq_length": 16,
+        "pooling": "mean",
+        "entradas": list(entradas),
+        "pad_id": 0,
+        "pad_token": "[PAD]",
+    }
+    (directorio / eo.ARCHIVO_META).write_text(json.dumps(meta), encoding="utf-8")
+
+
+class _SesionFalsa:
+    """``last_hidden_state`` = embedding fijo por id de token (no depende del contexto)."""
+
+    def __init__(self):
+        self.tabla = np.random.default_rng(0).normal(size=(len(_VOCAB), 8)).astype(np.float32)
+        self.feeds: list[dict] = []
+
+    def run(self, salidas, feed):
+        assert salidas == ["last_hidden_state"]
+        self.feeds.append(feed)
+        return [self.tabla[feed["input_ids"]]]
+
+
+@pytest.fixture()
+def modelo_falso(tmp_path):
+    _escribir_tokenizer(tmp_path)
+    sesion = _SesionFalsa()
+    return eo.ModeloOnnx(str(tmp_path), sesion=sesion), sesion
+
+
+def test_encode_ignora_el_padding_y_conserva_el_orden(modelo_falso):
+    modelo, _ = modelo_falso
+    textos = ["poda", "arbol en la via del parque", "luz", "basura de el parque en la via"]
+    lote = modelo.encode(textos, batch_size=64, normalize_embeddings=True)
+    uno_a_uno = np.stack([modelo.encode([t], normalize_embeddings=True)[0] for t in textos])
+    np.testing.assert_allclose(lote, uno_a_uno, atol=1e-6)
+    np.testing.assert_allclose(modelo.encode(textos, batch_size=1, normalize_embeddings=True), lote, atol=1e-6)
+    np.testing.assert_allclose(modelo.encode(textos, batch_size=0, normalize_embeddings=True), lote, atol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(lote, axis=1), 1.0, atol=1e-6)
+    assert lote.dtype == np.float32 and lote.shape == (4, 8)
+
+
+def test_encode_es_el_promedio_de_tokens(modelo_falso):
+    modelo, sesion = modelo_falso
+    vec = modelo.encode(["poda arbol"])[0]
+    ids = [2, _VOCAB.index("poda"), _VOCAB.index("arbol"), 3]
+    np.testing.assert_allclose(vec, sesion.tabla[ids].mean(axis=0), atol=1e-6)
+
+
+def test_encode_trunca_a_max_seq_length(modelo_falso):
+    modelo, sesion = modelo_falso
+    modelo.encode(["la " * 100])
+    assert sesion.feeds[-1]["input_ids"].shape == (1, 16)
+
+
+def test_token_type_ids_solo_si_el_grafo_los_pide(tmp_path):
+    _escribir_tokenizer(tmp_path, entradas=("input_ids", "token_type_ids", "attention_mask"))
+    sesion = _SesionFalsa()
+    eo.ModeloOnnx(str(tmp_path), sesion=sesion).encode(["poda"])
+    assert set(sesion.feeds[-1]) == {"input_ids", "attention_mask", "token_type_ids"}
+
+    otra = tmp_path / "sin_tipos"
+    otra.mkdir()
+    _escribir_tokenizer(otra)
+    sesion = _SesionFalsa()
+    eo.ModeloOnnx(str(otra), sesion=sesion).encode(["poda"])
+    assert set(sesion.feeds[-1]) == {"input_ids", "attention_mask"}
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Selección del backend
+# ──────────────────────────────────────────────────────────────────────────
+
+def test_backend_onnx_sin_export_no_esta_disponible(monkeypatch, tmp_path):
+    monkeypatch.setattr(emb, "_BACKEND", "onnx")
+    monkeypatch.setattr(emb, "_MODEL", None)
+    monkeypatch.setenv("CLASSIFIER_ONNX_DIR", str(tmp_path))
+    assert emb.esta_disponible() is False
+    with pytest.raises(FileNotFoundError, match="export_onnx_clasificador"):
+        emb._get_model()
+
+
+def test_backend_invalido(monkeypatch):
+    monkeypatch.setattr(emb, "_BACKEND", "tensorflow")
+    monkeypatch.setattr(emb, "_MODEL", None)
+    with pytest.raises(ValueError, match="CLASSIFIER_BACKEND"):
+        emb._get_model()
+
+
+def test_huella_de_la_matriz_depende_del_backend(monkeypatch):
+    descripciones = ["poda de árbol", "alumbrado público"]
+    huellas = set()
+    for backend, cuantizado in (("torch", "true"), ("onnx", "true"), ("onnx", "false")):
+        monkeypatch.setattr(emb, "_BACKEND", backend)
+        monkeypatch.setenv("CLASSIFIER_ONNX_QUANTIZED", cuantizado)
+        huellas.add(emb.huella_matriz(descripciones))
+    assert len(huellas) == 3
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Paridad contra torch (export real de un modelo diminuto)
+# ──────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture(scope="module")
+def export_diminuto(tmp_path_factory):
+    for dep in ("torch", "transformers", "sentence_transformers", "onnx", "onnxruntime"):
+        pytest.importorskip(dep)
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    from scripts import export_onnx_clasificador as ex
+
+    base = tmp_path_factory.mktemp("onnx")
+    modelo = base / "modelo"
+    modelo.mkdir()
+    (modelo / "vocab.txt").write_text("\n".join(_VOCAB), encoding="utf-8")
+    BertTokenizerFast(str(modelo / "vocab.txt")).save_pretrained(str(modelo))
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(_VOCAB), hidden_size=64, num_hidden_layers=2,
+        num_attention_heads=4, intermediate_size=128, max_position_embeddings=128,
+    )
+    BertModel(config).save_pretrained(str(modelo))
+    salida = base / "export"
+    ex.exportar(str(modelo), str(salida))
+    return ex, str(modelo), str(salida)
+
+
+def test_paridad_de_scores_con_torch(export_diminuto):
+    from app.classification.taxonomia import listar_descripciones_canonicas
+
+    ex, modelo, salida = export_diminuto
+    r = ex.verificar(modelo, salida, ex.CONSULTAS_EJEMPLO, listar_descripciones_canonicas())
+    assert r["fp32"]["max_diff"] <= 1e-4 and r["fp32"]["top1_igual"] == 1.0
+    assert r["int8"]["max_diff"] <= 0.03
+
+
+def test_clasificador_con_backend_onnx(export_diminuto, monkeypatch, tmp_path):
+    ex, modelo, salida = export_diminuto
+    textos = ex.CONSULTAS_EJEMPLO
+    monkeypatch.setattr(emb, "_MODEL_NAME", modelo)
+    monkeypatch.setenv("CLASSIFIER_MATRIX_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("CLASSIFIER_ONNX_DIR", salida)
+    monkeypatch.setenv("CLASSIFIER_ONNX_QUANTIZED", "false")
+
+    resultados = {}
+    for backend in ("torch", "onnx"):
+        monkeypatch.setattr(emb, "_BACKEND", backend)
+        monkeypatch.setattr(emb, "_MODEL", None)
+        monkeypatch.setattr(emb, "_MATRIX", None)
+        assert emb.esta_disponible()
+        resultados[backend] = emb.calcular_similitudes_lote(textos, top_k=3)
+    assert isinstance(emb._MODEL, eo.ModeloOnnx)
+    for t, o in zip(resultados["torch"], resultados["onnx"]):
+        assert [i for i, _ in t] == [i for i, _ in o]
+        assert [s for _, s in t] == pytest.approx([s for _, s in o], abs=1e-4)
+    # Huella distinta por backend: la matriz de torch se reemplazó por la de ONNX
+    assert len(list(tmp_path.glob("taxonomia-embeddings.*.npy"))) == 1
@@ -0,0 +1,100 @@
+"""
+Tests de la caché persistente de geocodificación directa de
+``geocodificar_direccion_cali``: clave canónica, caché negativa con TTL
+corto, persistencia entre instancias (workers) y contadores Prometheus.
+
+Los proveedores se simulan; no hay llamadas de red.
+"""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.geocoding.cache_persistente import CachePersistente
+from app.routes import artefacto_360_routes as art
+from app.routes.monitoring_routes import CACHE_HITS, CACHE_MISSES
+
+
+def _nueva_cache(ruta):
+    return CachePersistente(str(ruta), "geocode_directo", ttl_s=3600, max_entradas=100)
+
+
+@pytest.fixture()
+def proveedores(monkeypatch, tmp_path):
+    """Nominatim devuelve un punto en Cali; Photon/ArcGIS vacíos. Cuenta llamadas."""
+    llamadas = {"n": 0, "resultado": [{"lat": 3.45, "lon": -76.53, "proveedor": "nominatim"}]}
+
+    async def _nominatim(query, limit=5):
+        llamadas["n"] += 1
+        return llamadas["resultado"]
+
+    async def _vacio(query):
+        return None
+
+    monkeypatch.setattr(art, "_GEOCODE_CACHE", _nueva_cache(tmp_path / "geocode.sqlite3"))
+    monkeypatch.setattr(art, "_geocode_nominatim_multi", _nominatim)
+    monkeypatch.setattr(art, "_GEOCODE_LOCAL", False)
+    monkeypatch.setattr(art, "_geocode_photon", _vacio)
+    monkeypatch.setattr(art, "_geocode_arcgis", _vacio)
+    monkeypatch.setattr(art, "_extraer_barrios_mencionados", lambda d: [])
+    monkeypatch.setattr(art, "_extraer_comunas_mencionadas", lambda d: [])
+    return llamadas
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Cl 10 #5-20, Siloé", "calle 10 No. 5 - 20 siloe"),
+    ("CALLE 10 N° 5-20 Siloe.", "Calle 10 # 5-20,  SILOÉ"),
+    ("Cra 15N # 3-2", "Carrera 15 Norte #3-2"),
+    ("Av. 6 # 23-10", "Avenida 6 No 23-10"),
+])
+def test_clave_canonica_unifica_variantes(a, b):
+    assert art._clave_geocode(a) == art._clave_geocode(b)
+
+
+def test_clave_canonica_distingue_direcciones_distintas():
+    assert art._clave_geocode("Calle 10 # 5-20") != art._clave_geocode("Calle 10 # 5-21")
+    assert art._clave_geocode("Calle 10 # 5-20") != art._clave_geocode("Carrera 10 # 5-20")
+
+
+def test_acierto_por_variante_y_persistencia_entre_workers(proveedores, tmp_path):
+    hits0, misses0 = CACHE_HITS._value.get(), CACHE_MISSES._value.get()
+
+    r1 = asyncio.run(art.geocodificar_direccion_cali("Cl 10 #5-20"))
+    r2 = asyncio.run(art.geocodificar_direccion_cali("calle 10 No. 5 - 20"))
+    assert r1 == r2 and r1["proveedor"] == "nominatim"
+    assert proveedores["n"] == 1
+    assert CACHE_MISSES._value.get() - misses0 == 1
+    assert CACHE_HITS._value.get() - hits0 == 1
+
+    # Otro "worker": instancia nueva sobre el mismo archivo
+    art._GEOCODE_CACHE = _nueva_cache(tmp_path / "geocode.sqlite3")
+    assert asyncio.run(art.geocodificar_direccion_cali("CALLE 10 # 5-20")) == r1
+    assert proveedores["n"] == 1
+
+
+def test_negativos_se_cachean_con_ttl_corto(proveedores, monkeypatch):
+    proveedores["resultado"] = []
+    monkeypatch.setattr(art, "_GEOCODE_CACHE_TTL_NEGATIVO_S", 0.0)
+
+    assert asyncio.run(art.geocodificar_direccion_cali("Calle 99 # 1-1")) is None
+    n = proveedores["n"]
+    # TTL negativo vencido: se vuelve a consultar y ahora hay resultado
+    proveedores["resultado"] = [{"lat": 3.45, "lon": -76.53, "proveedor": "nominatim"}]
+    assert asyncio.run(art.geocodificar_direccion_cali("Calle 99 # 1-1"))["proveedor"] == "nominatim"
+    assert proveedores["n"] > n
+
+
+def test_negativo_vigente_no_consulta_proveedores(proveedores):
+    proveedores["resultado"] = []
+    assert asyncio.run(art.geocodificar_direccion_cali("Calle 98 # 1-1")) is None
+    n = proveedores["n"]
+    assert asyncio.run(art.geocodificar_direccion_cali("calle 98 No. 1-1")) is None
+    assert proveedores["n"] == n
+
+
+def test_cache_desactivada(proveedores, monkeypatch):
+    monkeypatch.setattr(art, "_GEOCODE_CACHE", None)
+    asyncio.run(art.geocodificar_direccion_cali("Calle 10 # 5-20"))
+    asyncio.run(art.geocodificar_direccion_cali("Calle 10 # 5-20"))
+    assert proveedores["n"] == 2
@@ -11,6 +11,8 @@ import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch
 
+from shapely.geometry import Point
+
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Coordenadas de referencia en Cali (WGS84)
@@ -31,6 +33,35 @@ def _run(coro):
     return asyncio.run(coro)
 
 
+def _haversine_m_np(lon1, lat1, lon2, lat2):
+    """Haversine vectorizado: referencia geodésica para las distancias en metros."""
+    import numpy as np
+
+    R = 6371008.8
+    p1 = np.radians(lat1)
+    p2 = np.radians(lat2)
+    dp = np.radians(np.asarray(lat2) - np.asarray(lat1))
+    dl = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    a = np.sin(dp / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+
+def _dist_a_boundary_m(polygon, lon, lat):
+    """Distancia (m) del punto al borde del polígono, proyectándolo en cada llamada."""
+    import shapely
+    from app.geocoding import proyeccion
+
+    return float(shapely.distance(proyeccion.proyectar(polygon.boundary), proyeccion.punto_m(lon, lat)))
+
+
+def _dist_a_polygon_m(polygon, lon, lat):
+    """Distancia (m) del punto al polígono (0 si está dentro), proyectándolo en cada llamada."""
+    import shapely
+    from app.geocoding import proyeccion
+
+    return float(shapely.distance(proyeccion.proyectar(polygon), proyeccion.punto_m(lon, lat)))
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Test 1 — coordenada dentro de Cali
 # ──────────────────────────────────────────────────────────────────────────────
@@ -138,8 +169,8 @@ def test_spatial_index_cargado():
 
     assert len(_BARRIOS_POLYGONS) > 0, "No se cargaron polígonos de barrios"
     assert len(_COMUNAS_POLYGONS) > 0, "No se cargaron polígonos de comunas"
-    assert len(si._CRUCE_GEOMS) > 0, "No se cargaron cruces"
-    assert si._CRUCE_TREE is not None, "STRtree de cruces no inicializado"
+    assert len(si._CRUCES.geoms) > 0, "No se cargaron cruces"
+    assert si._CRUCES.tree is not None, "STRtree de cruces no inicializado"
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -219,3 +250,380 @@ def test_verificacion_score_alto_en_centro_cali(mock_nominatim):
         f"Score {v['score']} demasiado bajo en el centro de Cali. "
         f"advertencias={v['advertencias']}"
     )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 8 — reverse geocoding en lote (vectorizado)
+# ──────────────────────────────────────────────────────────────────────────────
+@patch("app.geocoding.reverse._nominatim_reverse", new_callable=AsyncMock, return_value=None)
+def test_reverse_geocode_lote_respeta_orden_y_coincide_con_puntual(mock_nominatim):
+    """El lote devuelve un resultado por coordenada, en orden, igual al lookup puntual."""
+    from app.geocoding import spatial_index as si
+    from app.geocoding.reverse import reverse_geocode_lote
+
+    lats = [LAT_CALI, LAT_BOGOTA, 3.40, 3.49, LAT_CALI]
+    lons = [LON_CALI, LON_BOGOTA, -76.55, -76.50, LON_CALI]
+    res = _run(reverse_geocode_lote(lats, lons))
+
+    assert len(res) == len(lats)
+    mock_nominatim.assert_not_awaited()
+    for r, lat, lon in zip(res, lats, lons):
+        assert r["coordenada"] == {"lat": lat, "lon": lon}
+        assert r["dentro_de_cali"] == si._dentro_de_cali(lon, lat)
+        assert r["barrio_vereda"] == si.barrio_de(lon, lat)
+        assert r["comuna_corregimiento"] == si.comuna_de(lon, lat)
+        assert r["cruce_mas_cercano"] == si.cruce_mas_cercano(lon, lat)
+        assert r["fuentes"] == ["basemaps_cali"]
+    assert res[1]["comuna_corregimiento"] is None
+
+
+def test_reverse_geocode_lote_valida_entrada():
+    from app.geocoding.reverse import reverse_geocode_lote
+
+    with pytest.raises(ValueError):
+        _run(reverse_geocode_lote([LAT_CALI, LAT_CALI], [LON_CALI]))
+    with pytest.raises(ValueError):
+        _run(reverse_geocode_lote([95.0], [LON_CALI]))
+
+
+def test_cruces_mas_cercanos_coincide_con_puntual(monkeypatch):
+    """El nearest vectorizado de cruces equivale a `cruce_mas_cercano` punto a punto."""
+    from app.geocoding import spatial_index as si
+
+    geoms = [Point(LON_CALI + dx, LAT_CALI + dy) for dx, dy in
+             ((0.0, 0.0), (0.001, 0.0), (0.0, 0.0012), (0.003, 0.003))]
+    names = ["CL 12 con KR 5", "CL 12 con KR 6", "CL 13 con KR 5", "CL 15 con KR 8"]
+    monkeypatch.setattr(si, "_CRUCES", si.construir_cruces(geoms, names))
+
+    lons = [LON_CALI + 0.0004, LON_CALI + 0.0009, LON_CALI + 0.01, LON_BOGOTA]
+    lats = [LAT_CALI + 0.0001, LAT_CALI - 0.0002, LAT_CALI, LAT_BOGOTA]
+    esperado = [si.cruce_mas_cercano(lon, lat) for lon, lat in zip(lons, lats)]
+    assert si.cruces_mas_cercanos(lons, lats) == esperado
+    assert esperado[0]["nombre"] == "CL 12 con KR 5"
+    assert esperado[1]["nombre"] == "CL 12 con KR 6"
+    assert esperado[2] is None and esperado[3] is None
+
+
+def _robusto_lineal(capa, lon, lat, margen_borde_m, radio_minimo_m, max_nearest_m):
+    """Implementación de referencia: mide todos los polígonos de la capa."""
+    from app.geocoding import spatial_index as si
+
+    primario_poly, primario = next(
+        ((p, n) for p, n in capa if p.contains(Point(lon, lat))), (None, None)
+    )
+    if primario_poly is not None:
+        dist_borde = _dist_a_boundary_m(primario_poly, lon, lat)
+        radio = max(margen_borde_m * 5, radio_minimo_m)
+        candidatos = sorted(
+            (d, n) for d, n in ((_dist_a_polygon_m(p, lon, lat), n) for p, n in capa if n != primario)
+            if d <= radio
+        )
+        vecinos = [{"nombre": n, "distancia_m": round(d, 2)} for d, n in candidatos[:5]]
+        vecino = vecinos[0]["nombre"] if (vecinos and candidatos[0][0] < margen_borde_m * 3) else None
+        return {"primario": primario, "vecino": vecino, "vecinos": vecinos, "dist_borde_m": round(dist_borde, 2)}
+    mejor = (float("inf"), None)
+    for p, n in capa:
+        d = _dist_a_polygon_m(p, lon, lat)
+        if d < mejor[0]:
+            mejor = (d, n)
+    if mejor[0] > max_nearest_m:
+        return {"primario": None, "vecino": None, "vecinos": [], "dist_borde_m": round(mejor[0], 2)}
+    return {
+        "primario": mejor[1],
+        "vecino": None,
+        "vecinos": [{"nombre": mejor[1], "distancia_m": round(mejor[0], 2)}] if mejor[1] else [],
+        "dist_borde_m": round(mejor[0], 2),
+    }
+
+
+def test_barrio_de_robusto_coincide_con_recorrido_lineal(monkeypatch):
+    """La vecindad por STRtree + adyacencia devuelve lo mismo que medir todos los barrios."""
+    import random
+    from shapely.geometry import box
+    from app.geocoding import spatial_index as si
+    from app.geocoding.polygon_index import PolygonIndex
+
+    # Manzanas de ~220 m separadas por calles de ~20 m, más una isla lejana
+    paso, lado = 0.002, 0.0018
+    capa = [
+        (box(LON_CALI + i * paso, LAT_CALI + j * paso, LON_CALI + i * paso + lado, LAT_CALI + j * paso + lado),
+         f"BARRIO {i}-{j}")
+        for i in range(6) for j in range(6)
+    ]
+    capa.append((box(LON_CALI + 0.05, LAT_CALI, LON_CALI + 0.051, LAT_CALI + 0.001), "ISLA"))
+    monkeypatch.setattr(si, "_BARRIOS_SPATIAL", PolygonIndex(capa))
+
+    rng = random.Random(3)
+    puntos = [(LON_CALI + rng.uniform(-0.004, 0.016), LAT_CALI + rng.uniform(-0.004, 0.016)) for _ in range(150)]
+    puntos += [(LON_CALI + 0.03, LAT_CALI), (LON_CALI + 0.0505, LAT_CALI + 0.0005), (LON_BOGOTA, LAT_BOGOTA)]
+    for lon, lat in puntos:
+        esperado = _robusto_lineal(capa, lon, lat, 60.0, 200.0, 200.0)
+        assert si.barrio_de_robusto(lon, lat) == esperado
+
+
+def test_comuna_de_robusto_coincide_con_recorrido_lineal():
+    import random
+    from app.geocoding import spatial_index as si
+
+    capa = si._COMUNAS_SPATIAL.polygons
+    if not capa:
+        pytest.skip("basemap de comunas no disponible")
+    rng = random.Random(8)
+    for _ in range(60):
+        lon, lat = rng.uniform(-76.60, -76.46), rng.uniform(3.33, 3.50)
+        assert si.comuna_de_robusto(lon, lat) == _robusto_lineal(capa, lon, lat, 80.0, 300.0, 500.0)
+
+
+def _via_lineal(si, lon, lat, k=12, max_m=250.0):
+    """Implementación de referencia: re-parsea los nombres de los cruces en cada consulta."""
+    vecinos = si._cruces_en_radio(lon, lat, max_m)[: max(k, 4)]
+    cand = {}
+    for idx, d in vecinos:
+        for part in si._CRUCES.names[idx].split(" con "):
+            t = part.strip()
+            if t and si._parse_via_token(t) is not None:
+                cand.setdefault(t, []).append(d)
+    if not cand:
+        return None
+    best, dists = min(cand.items(), key=lambda it: (-len(it[1]), min(it[1])))
+    abrev, num, nombre = si._parse_via_token(best)
+    return {
+        "tipo": si._ABREV_TO_TIPO.get(abrev), "numero": num, "nombre": nombre,
+        "nombre_catastral": best, "clase": None, "distancia_m": round(min(dists), 2),
+        "soporte_cruces": len(dists), "inferida": True,
+    }
+
+
+def test_via_inferida_coincide_con_parseo_por_consulta(monkeypatch):
+    """Los ids precalculados dan el mismo ranking (incluidos empates) que re-parsear nombres."""
+    import random
+    from app.geocoding import spatial_index as si
+
+    rng = random.Random(11)
+    vias = ["CL 5", "CL 5A", "KR 38", "KR 39", "DG 23", "TV 2 NORTE", "AV 6", "VIA CRISTO REY", "XX 1", ""]
+    # Grilla con coordenadas repetidas: fuerza empates de distancia
+    puntos = [Point(-76.532 + 0.0005 * rng.randint(0, 6), 3.451 + 0.0005 * rng.randint(0, 6)) for _ in range(150)]
+    nombres = []
+    for _ in puntos:
+        partes = rng.sample(vias, rng.choice([1, 2, 2, 2, 3]))
+        nombres.append(" con ".join(partes))
+    monkeypatch.setattr(si, "_CRUCES", si.construir_cruces(puntos, nombres))
+
+    for _ in range(200):
+        lon, lat = rng.uniform(-76.534, -76.528), rng.uniform(3.449, 3.456)
+        k = rng.choice([1, 4, 12, 30])
+        assert si.via_inferida_de_cruces(lon, lat, k=k) == _via_lineal(si, lon, lat, k=k)
+
+
+def test_proyeccion_metrica_coincide_con_haversine():
+    """Las distancias en la proyección local difieren < 0.1 % de haversine dentro de Cali."""
+    import numpy as np
+    from app.geocoding import proyeccion
+    from app.geocoding.spatial_index import _haversine_m
+
+    rng = np.random.default_rng(4)
+    lon1, lat1 = rng.uniform(-76.75, -76.20, 2000), rng.uniform(3.10, 3.80, 2000)
+    lon2, lat2 = lon1 + rng.uniform(-0.03, 0.03, 2000), lat1 + rng.uniform(-0.03, 0.03, 2000)
+    ref = _haversine_m_np(lon1, lat1, lon2, lat2)
+    assert np.allclose(proyeccion.distancia_m(lon1, lat1, lon2, lat2), ref, rtol=1e-3, atol=0.05)
+
+    x, y = proyeccion.a_metros(LON_CALI, LAT_CALI)
+    assert np.allclose(proyeccion.a_grados(x, y), (LON_CALI, LAT_CALI))
+    assert float(proyeccion.distancia_m(LON_CALI, LAT_CALI, LON_CALI + 0.01, LAT_CALI)) == pytest.approx(
+        _haversine_m(LON_CALI, LAT_CALI, LON_CALI + 0.01, LAT_CALI), rel=1e-3
+    )
+
+
+def test_distancias_a_borde_y_cruces_en_metros_vs_haversine(monkeypatch):
+    """Borde de polígono y cruces en radio: mismos resultados que con haversine, dentro de tolerancia."""
+    import numpy as np
+    from shapely.geometry import box
+    from app.geocoding import spatial_index as si
+
+    poly = box(LON_CALI, LAT_CALI, LON_CALI + 0.01, LAT_CALI + 0.008)
+    for dx, dy in ((0.002, 0.001), (0.0095, 0.004), (0.005, 0.0079)):
+        lon, lat = LON_CALI + dx, LAT_CALI + dy
+        nearest = poly.boundary.interpolate(poly.boundary.project(Point(lon, lat)))
+        ref = si._haversine_m(lon, lat, nearest.x, nearest.y)
+        assert _dist_a_boundary_m(poly, lon, lat) == pytest.approx(ref, rel=5e-3, abs=0.5)
+
+    rng = np.random.default_rng(9)
+    lons = LON_CALI + rng.uniform(-0.01, 0.01, 400)
+    lats = LAT_CALI + rng.uniform(-0.01, 0.01, 400)
+    geoms = [Point(lo, la) for lo, la in zip(lons, lats)]
+    monkeypatch.setattr(si, "_CRUCES", si.construir_cruces(geoms, [f"CL {i} con KR {i}" for i in range(400)]))
+
+    ref = _haversine_m_np(LON_CALI, LAT_CALI, lons, lats)
+    en_radio = si._cruces_en_radio(LON_CALI, LAT_CALI, 500.0)
+    dists = [d for _, d in en_radio]
+    assert dists == sorted(dists)
+    for i, d in en_radio:
+        assert d == pytest.approx(ref[i], rel=1e-3, abs=0.05)
+    # Fuera de la banda de tolerancia del umbral, el conjunto es el mismo
+    idxs = {i for i, _ in en_radio}
+    assert {i for i in range(400) if ref[i] < 499.0} <= idxs
+    assert not {i for i in range(400) if ref[i] > 501.0} & idxs
+
+
+def test_nominatim_cache_persistente_stale_while_revalidate(tmp_path, monkeypatch):
+    """Fresco → sin red; vencido → se sirve al instante y se refresca en segundo plano."""
+    from app.geocoding import cache_persistente, reverse
+    from app.geocoding.cache_persistente import CachePersistente
+
+    cache = CachePersistente(str(tmp_path / "n.sqlite3"), "nominatim_reverse",
+                             ttl_s=100.0, max_entradas=100, max_vencida_s=1000.0)
+    monkeypatch.setattr(reverse, "_NOMINATIM_CACHE", cache)
+    respuestas = iter([{"road": "Calle 12", "suburb": "San Pedro"}, {"road": "Calle 12", "suburb": "El Centro"}])
+    mock = AsyncMock(side_effect=lambda lat, lon: next(respuestas))
+    monkeypatch.setattr(reverse, "_nominatim_reverse", mock)
+
+    async def _flujo():
+        primera = await reverse._nominatim_reverse_cached(LAT_CALI, LON_CALI)
+        # Otra coordenada en la misma celda cuantizada → acierto sin red
+        segunda = await reverse._nominatim_reverse_cached(LAT_CALI + 0.00001, LON_CALI)
+        assert mock.await_count == 1
+        # Vencer la entrada
+        ahora = cache_persistente.time.time() + 150
+        monkeypatch.setattr(cache_persistente.time, "time", lambda: ahora)
+        tercera = await reverse._nominatim_reverse_cached(LAT_CALI, LON_CALI)
+        await asyncio.gather(*list(reverse._TAREAS_REFRESCO))
+        cuarta = await reverse._nominatim_reverse_cached(LAT_CALI, LON_CALI)
+        return primera, segunda, tercera, cuarta
+
+    primera, segunda, tercera, cuarta = _run(_flujo())
+    assert primera == segunda == tercera == {"road": "Calle 12", "suburb": "San Pedro"}
+    assert cuarta["suburb"] == "El Centro"
+    assert mock.await_count == 2
+    # La consulta se hace con la coordenada cuantizada de la celda
+    assert mock.await_args_list[0].args == (round(LAT_CALI, 4), round(LON_CALI, 4))
+
+
+def test_nominatim_fallido_no_se_cachea(tmp_path, monkeypatch):
+    from app.geocoding import reverse
+    from app.geocoding.cache_persistente import CachePersistente
+
+    cache = CachePersistente(str(tmp_path / "n.sqlite3"), "nominatim_reverse", ttl_s=100.0, max_entradas=100)
+    monkeypatch.setattr(reverse, "_NOMINATIM_CACHE", cache)
+    mock = AsyncMock(return_value=None)
+    monkeypatch.setattr(reverse, "_nominatim_reverse", mock)
+    assert _run(reverse._nominatim_reverse_cached(LAT_CALI, LON_CALI)) is None
+    assert _run(reverse._nominatim_reverse_cached(LAT_CALI, LON_CALI)) is None
+    assert mock.await_count == 2 and len(cache) == 0
+
+
+def test_reverse_geocode_diferido_responde_local_y_reconcilia_despues(tmp_path, monkeypatch):
+    """Modo diferido: respuesta local inmediata + token; la cola coalesce y el seguimiento reconcilia."""
+    from app.geocoding import enriquecimiento, reverse
+    from app.geocoding.cache_persistente import CachePersistente
+
+    cache = CachePersistente(str(tmp_path / "n.sqlite3"), "nominatim_reverse", ttl_s=100.0, max_entradas=100)
+    monkeypatch.setattr(reverse, "_NOMINATIM_CACHE", cache)
+    cola = enriquecimiento.ColaEnriquecimiento(reverse._nominatim_reverse_cached)
+    monkeypatch.setattr(reverse, "_COLA_NOMINATIM", cola)
+    mock = AsyncMock(return_value={"road": "Calle 12", "suburb": None, "city_district": None})
+    monkeypatch.setattr(reverse, "_nominatim_reverse", mock)
+
+    async def _flujo():
+        r1, r2 = await asyncio.gather(
+            reverse.reverse_geocode(LAT_CALI, LON_CALI, diferir_nominatim=True),
+            reverse.reverse_geocode(LAT_CALI + 0.00001, LON_CALI, diferir_nominatim=True),
+        )
+        await cola.drenar()
+        lat, lon = reverse.coordenada_de_token(r1["enriquecimiento"]["token"])
+        r3 = await reverse.reverse_geocode(lat, lon, diferir_nominatim=True)
+        return r1, r2, r3
+
+    r1, r2, r3 = _run(_flujo())
+    assert r1["enriquecimiento"]["estado"] == "pendiente" and r1["enriquecimiento"]["pendiente"] is True
+    assert r1["fuentes"] == ["basemaps_cali"] and r1["osm"] is None
+    assert r2["enriquecimiento"]["estado"] == "pendiente"
+    assert r3["enriquecimiento"]["estado"] == "listo"
+    assert r3["fuentes"] == ["basemaps_cali", "nominatim"]
+    assert r3["osm"]["road"] == "Calle 12"
+    assert r3["coordenada"] == {"lat": LAT_CALI, "lon": LON_CALI}
+    assert mock.await_count == 1  # misma celda cuantizada → un solo trabajo en cola
+
+
+def test_cola_enriquecimiento_llena_rechaza(tmp_path, monkeypatch):
+    """Con la cola en su máximo, las coordenadas nuevas no se agendan: estado "rechazado", pendiente False."""
+    from app.geocoding import enriquecimiento, reverse
+    from app.geocoding.cache_persistente import CachePersistente
+
+    class _Contador:
+        n = 0
+
+        def inc(self):
+            self.n += 1
+
+    cache = CachePersistente(str(tmp_path / "n.sqlite3"), "nominatim_reverse", ttl_s=100.0, max_entradas=100)
+    monkeypatch.setattr(reverse, "_NOMINATIM_CACHE", cache)
+    rechazos = _Contador()
+    cola = enriquecimiento.ColaEnriquecimiento(
+        reverse._nominatim_reverse_cached, max_pendientes=2, metrica_rechazos=rechazos
+    )
+    monkeypatch.setattr(reverse, "_COLA_NOMINATIM", cola)
+    llamadas = []
+
+    async def _flujo():
+        liberar = asyncio.Event()
+
+        async def _nominatim_lento(lat, lon, timeout=5.0):
+            llamadas.append((lat, lon))
+            await liberar.wait()  # Nominatim "lento": la cola no se vacía mientras tanto
+            return {"road": "Calle 12", "suburb": None, "city_district": None}
+
+        monkeypatch.setattr(reverse, "_nominatim_reverse", _nominatim_lento)
+        estados = [
+            await reverse._nominatim_sin_esperar(LAT_CALI + i * 0.001, LON_CALI) for i in range(3)
+        ]
+        # La misma celda que ya está pendiente se coalesce, no se rechaza
+        estados.append(await reverse._nominatim_sin_esperar(LAT_CALI, LON_CALI))
+        assert len(cola) == 2
+        liberar.set()
+        await cola.drenar()
+        return estados
+
+    estados = _run(_flujo())
+    assert [e for _, e in estados] == ["pendiente", "pendiente", "rechazado", "pendiente"]
+    assert rechazos.n == 1
+    assert len(llamadas) == 2
+
+
+def test_cola_enriquecimiento_reporta_fallidos_y_metricas():
+    from app.geocoding import enriquecimiento
+
+    class _Gauge:
+        valores: list = []
+
+        def set(self, v):
+            self.valores.append(v)
+
+    class _Hist:
+        obs: list = []
+
+        def observe(self, v):
+            self.obs.append(v)
+
+    async def _procesar(x):
+        if x == "error":
+            raise RuntimeError("boom")
+        return None if x == "vacio" else x.upper()
+
+    gauge, hist = _Gauge(), _Hist()
+    cola = enriquecimiento.ColaEnriquecimiento(_procesar, metrica_profundidad=gauge, metrica_espera=hist)
+
+    async def _flujo():
+        assert cola.encolar("a", "ok") is True
+        assert cola.encolar("a", "ok") is False
+        cola.encolar("b", "vacio")
+        cola.encolar("c", "error")
+        assert cola.resultado("a") == (enriquecimiento.PENDIENTE, None)
+        await cola.drenar()
+
+    _run(_flujo())
+    assert cola.resultado("a") == (enriquecimiento.LISTO, "OK")
+    assert cola.resultado("b") == (enriquecimiento.FALLIDO, None)
+    assert cola.resultado("c") == (enriquecimiento.FALLIDO, None)
+    assert cola.resultado("z") == (None, None)
+    assert gauge.valores[:3] == [1, 2, 3] and gauge.valores[-1] == 0
+    assert len(hist.obs) == 3
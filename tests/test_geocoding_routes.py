@@ -29,7 +29,9 @@ def _mock_reverse_response(lat: float, lon: float) -> dict:
 
 
 def test_reverse_geocode_post_no_requiere_token(monkeypatch):
-    async def fake_reverse_geocode(lat: float, lon: float, *, usar_nominatim: bool = True):
+    async def fake_reverse_geocode(
+        lat: float, lon: float, *, usar_nominatim: bool = True, diferir_nominatim: bool = False
+    ):
         return _mock_reverse_response(lat, lon)
 
     monkeypatch.setattr("app.routes.geocoding_routes.reverse_geocode", fake_reverse_geocode)
@@ -46,7 +48,9 @@ def test_reverse_geocode_post_no_requiere_token(monkeypatch):
 
 
 def test_reverse_geocode_get_no_requiere_token(monkeypatch):
-    async def fake_reverse_geocode(lat: float, lon: float, *, usar_nominatim: bool = True):
+    async def fake_reverse_geocode(
+        lat: float, lon: float, *, usar_nominatim: bool = True, diferir_nominatim: bool = False
+    ):
         return _mock_reverse_response(lat, lon)
 
     monkeypatch.setattr("app.routes.geocoding_routes.reverse_geocode", fake_reverse_geocode)
@@ -57,3 +61,87 @@ def test_reverse_geocode_get_no_requiere_token(monkeypatch):
     assert response.status_code == 200
     assert response.json()["coordenada"]["lat"] == pytest.approx(3.4516)
     assert response.json()["coordenada"]["lon"] == pytest.approx(-76.5320)
+
+
+def test_reverse_geocode_batch_devuelve_resultados_en_orden(monkeypatch):
+    llamadas = {}
+
+    async def fake_lote(lats, lons, *, usar_nominatim: bool = False):
+        llamadas["usar_nominatim"] = usar_nominatim
+        return [
+            {
+                "coordenada": {"lat": lat, "lon": lon},
+                "dentro_de_cali": True,
+                "barrio_vereda": None,
+                "comuna_corregimiento": f"COMUNA {i:02d}",
+                "cruce_mas_cercano": None,
+                "direccion_legible": "Cali, Valle del Cauca, Colombia",
+                "fuentes": ["basemaps_cali"],
+                "asignacion": {"barrio_fuente": "local", "comuna_fuente": "local"},
+            }
+            for i, (lat, lon) in enumerate(zip(lats, lons))
+        ]
+
+    monkeypatch.setattr("app.routes.geocoding_routes.reverse_geocode_lote", fake_lote)
+
+    client = _build_client()
+    response = client.post(
+        "/api/reverse-geocode/batch",
+        json={"lats": [3.45, 3.40], "lons": [-76.53, -76.55]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 2
+    assert [r["comuna_corregimiento"] for r in body["resultados"]] == ["COMUNA 00", "COMUNA 01"]
+    assert llamadas["usar_nominatim"] is False
+
+
+def test_reverse_geocode_batch_longitudes_distintas_es_422():
+    client = _build_client()
+    response = client.post(
+        "/api/reverse-geocode/batch",
+        json={"lats": [3.45, 3.40], "lons": [-76.53]},
+    )
+    assert response.status_code == 422
+
+
+def test_reverse_geocode_batch_con_nominatim_limita_puntos(monkeypatch):
+    monkeypatch.setattr("app.geocoding.reverse._LOTE_MAX_NOMINATIM", 2)
+    client = _build_client()
+    response = client.post(
+        "/api/reverse-geocode/batch",
+        json={"lats": [3.45, 3.40, 3.41], "lons": [-76.53, -76.55, -76.54], "usar_nominatim": True},
+    )
+    assert response.status_code == 422
+    assert "usar_nominatim" in response.json()["detail"]
+
+
+def test_reverse_geocode_enriquecimiento_resuelve_token(monkeypatch):
+    from app.geocoding.reverse import token_enriquecimiento
+
+    llamadas = []
+
+    async def fake_reverse_geocode(
+        lat: float, lon: float, *, usar_nominatim: bool = True, diferir_nominatim: bool = False
+    ):
+        llamadas.append((lat, lon, usar_nominatim, diferir_nominatim))
+        resp = _mock_reverse_response(lat, lon)
+        resp["enriquecimiento"] = {"estado": "listo", "pendiente": False, "token": token_enriquecimiento(lat, lon)}
+        return resp
+
+    monkeypatch.setattr("app.routes.geocoding_routes.reverse_geocode", fake_reverse_geocode)
+
+    client = _build_client()
+    token = token_enriquecimiento(3.4516, -76.532)
+    response = client.get(f"/api/reverse-geocode/enriquecimiento/{token}")
+
+    assert response.status_code == 200
+    assert response.json()["enriquecimiento"] == {"estado": "listo", "pendiente": False, "token": token}
+    assert llamadas == [(3.4516, -76.532, True, True)]
+
+
+def test_reverse_geocode_enriquecimiento_token_invalido_es_422():
+    client = _build_client()
+    response = client.get("/api/reverse-geocode/enriquecimiento/no-es-un-token")
+    assert response.status_code == 422
@@ -0,0 +1,130 @@
+"""
+Tests de los clientes HTTP compartidos (``app.geocoding.http_client``).
+
+Sin red: se usa ``httpx.MockTransport`` para contar las peticiones que
+realmente salen y verificar la coalescencia (single-flight) y la
+reutilización del cliente por proveedor.
+"""
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.geocoding import http_client
+
+
+@pytest.fixture()
+def transporte(monkeypatch):
+    """Sustituye los clientes por unos con MockTransport y registra las peticiones."""
+    peticiones: list[httpx.Request] = []
+
+    async def _responder(request: httpx.Request) -> httpx.Response:
+        peticiones.append(request)
+        await asyncio.sleep(0.05)  # deja tiempo a que lleguen las peticiones concurrentes
+        if request.url.params.get("q") == "error":
+            return httpx.Response(500)
+        return httpx.Response(200, json={"q": request.url.params.get("q")})
+
+    def _cliente(proveedor):
+        loop = asyncio.get_running_loop()
+        actual = http_client._CLIENTES.get(proveedor)
+        if actual is not None and actual[0] is loop:
+            return actual[1]
+        c = httpx.AsyncClient(transport=httpx.MockTransport(_responder))
+        http_client._CLIENTES[proveedor] = (loop, c)
+        return c
+
+    monkeypatch.setattr(http_client, "cliente", _cliente)
+    monkeypatch.setattr(http_client, "_CLIENTES", {})
+    return peticiones
+
+
+def test_consultas_identicas_concurrentes_salen_una_vez(transporte):
+    async def _flujo():
+        return await asyncio.gather(
+            *[http_client.get_json("photon", "https://photon.test/api", {"q": "calle 5"}) for _ in range(10)],
+            http_client.get_json("photon", "https://photon.test/api", {"q": "calle 6"}),
+        )
+
+    resultados = asyncio.run(_flujo())
+    assert resultados[:10] == [{"q": "calle 5"}] * 10
+    assert resultados[10] == {"q": "calle 6"}
+    assert len(transporte) == 2
+
+
+def test_consultas_secuenciales_no_se_coalescen(transporte):
+    async def _flujo():
+        await http_client.get_json("photon", "https://photon.test/api", {"q": "a"})
+        await http_client.get_json("photon", "https://photon.test/api", {"q": "a"})
+
+    asyncio.run(_flujo())
+    assert len(transporte) == 2
+
+
+def test_error_se_propaga_a_todos_los_que_esperan(transporte):
+    async def _flujo():
+        return await asyncio.gather(
+            *[http_client.get_json("arcgis", "https://arcgis.test/", {"q": "error"}) for _ in range(3)],
+            return_exceptions=True,
+        )
+
+    resultados = asyncio.run(_flujo())
+    assert all(isinstance(r, httpx.HTTPStatusError) for r in resultados)
+    assert len(transporte) == 1
+    assert not http_client._EN_VUELO
+
+
+def test_cancelar_un_llamador_no_cancela_la_peticion_compartida():
+    llamadas = []
+
+    async def _lenta():
+        llamadas.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def _flujo():
+        t1 = asyncio.ensure_future(http_client.single_flight("k", _lenta))
+        t2 = asyncio.ensure_future(http_client.single_flight("k", _lenta))
+        await asyncio.sleep(0.01)
+        t1.cancel()
+        return await t2
+
+    assert asyncio.run(_flujo()) == "ok"
+    assert llamadas == [1]
+
+
+def test_cliente_se_reutiliza_por_proveedor_y_loop():
+    async def _flujo():
+        a = http_client.cliente("nominatim")
+        b = http_client.cliente("nominatim")
+        c = http_client.cliente("photon")
+        assert a is b and a is not c
+        await http_client.cerrar()
+        assert a.is_closed and c.is_closed
+        return a
+
+    a = asyncio.run(_flujo())
+
+    async def _otro_loop():
+        d = http_client.cliente("nominatim")
+        await http_client.cerrar()
+        return d
+
+    assert asyncio.run(_otro_loop()) is not a
+
+
+def test_cliente_se_cierra_al_terminar_su_loop_sin_cerrar():
+    async def _flujo():
+        return http_client.cliente("photon")
+
+    a = asyncio.run(_flujo())
+    assert a.is_closed
+
+    async def _otro_loop():
+        b = http_client.cliente("photon")
+        await http_client.cerrar()
+        return b
+
+    assert asyncio.run(_otro_loop()) is not a
@@ -0,0 +1,111 @@
+"""
+Tests de la caché en disco de la matriz de embeddings de la taxonomía
+(``embeddings._get_matrix``): se guarda como ``.npy`` nombrado por el hash
+de modelo + descripciones canónicas, se abre con ``mmap_mode="r"`` sin
+volver a cargar el modelo, y se recalcula solo si cambia el modelo o la
+taxonomía (o si el archivo está dañado).
+
+El modelo se reemplaza por uno falso (sin ``sentence-transformers``) y la
+caché apunta a ``tmp_path``.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.classification import embeddings as emb
+from app.classification import taxonomia
+
+
+class _ModeloFalso:
+    def __init__(self):
+        self.llamadas = 0
+
+    def encode(self, textos, **_kwargs):
+        self.llamadas += 1
+        vecs = np.array([[len(t), t.count("a"), t.count("e"), 1.0] for t in textos], dtype=np.float32)
+        return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+@pytest.fixture()
+def modelo(monkeypatch, tmp_path):
+    monkeypatch.setenv("CLASSIFIER_MATRIX_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("CLASSIFIER_MATRIX_CACHE", raising=False)
+    falso = _ModeloFalso()
+    monkeypatch.setattr(emb, "_MODEL", None)
+    monkeypatch.setattr(emb, "_MATRIX", None)
+    monkeypatch.setattr(emb, "_get_model", lambda: falso)
+    return falso
+
+
+def _reiniciar_proceso(monkeypatch, falso=None):
+    """Simula un arranque nuevo: sin matriz en memoria y, si se pide, sin modelo cargable."""
+    emb._MATRIX = None
+    if falso is None:
+        def _sin_modelo():
+            raise AssertionError("no debía cargarse el modelo")
+
+        monkeypatch.setattr(emb, "_get_model", _sin_modelo)
+    else:
+        monkeypatch.setattr(emb, "_get_model", lambda: falso)
+
+
+def test_primer_arranque_calcula_y_guarda(modelo, tmp_path):
+    matriz = emb._get_matrix()
+    assert modelo.llamadas == 1
+    assert isinstance(matriz, np.memmap) and not matriz.flags.writeable
+    (archivo,) = tmp_path.glob("taxonomia-embeddings.*.npy")
+    assert matriz.shape == (len(taxonomia.TAXONOMIA), 4)
+    np.testing.assert_array_equal(np.load(archivo), matriz)
+
+
+def test_arranque_siguiente_lee_del_disco_sin_modelo(modelo, monkeypatch):
+    original = np.array(emb._get_matrix())
+    _reiniciar_proceso(monkeypatch)
+    matriz = emb._get_matrix()
+    assert isinstance(matriz, np.memmap)
+    np.testing.assert_array_equal(matriz, original)
+
+
+def test_cambio_de_modelo_recalcula_y_purga(modelo, monkeypatch, tmp_path):
+    emb._get_matrix()
+    (viejo,) = tmp_path.glob("*.npy")
+    monkeypatch.setattr(emb, "_MODEL_NAME", "otro/modelo")
+    _reiniciar_proceso(monkeypatch, modelo)
+    emb._get_matrix()
+    assert modelo.llamadas == 2
+    (nuevo,) = tmp_path.glob("*.npy")
+    assert nuevo != viejo
+
+
+def test_cambio_de_taxonomia_recalcula(modelo, monkeypatch):
+    emb._get_matrix()
+    descripciones = taxonomia.listar_descripciones_canonicas()
+    monkeypatch.setattr(taxonomia, "listar_descripciones_canonicas", lambda: descripciones + ["Nueva - fila"])
+    _reiniciar_proceso(monkeypatch, modelo)
+    assert emb._get_matrix().shape[0] == len(descripciones) + 1
+    assert modelo.llamadas == 2
+
+
+def test_archivo_danado_se_recalcula(modelo, monkeypatch, tmp_path):
+    emb._get_matrix()
+    (archivo,) = tmp_path.glob("*.npy")
+    archivo.write_bytes(b"no es npy")
+    _reiniciar_proceso(monkeypatch, modelo)
+    assert emb._get_matrix().shape[0] == len(taxonomia.TAXONOMIA)
+    assert modelo.llamadas == 2
+    assert np.load(archivo).shape[0] == len(taxonomia.TAXONOMIA)
+
+
+def test_cache_desactivada_no_escribe(modelo, monkeypatch, tmp_path):
+    monkeypatch.setenv("CLASSIFIER_MATRIX_CACHE", "false")
+    matriz = emb._get_matrix()
+    assert not isinstance(matriz, np.memmap)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_huella_depende_de_modelo_y_descripciones(monkeypatch):
+    base = emb.huella_matriz(["a", "b"])
+    assert emb.huella_matriz(["b", "a"]) != base
+    monkeypatch.setattr(emb, "_MODEL_NAME", "otro/modelo")
+    assert emb.huella_matriz(["a", "b"]) != base
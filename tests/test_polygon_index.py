@@ -0,0 +1,103 @@
+"""
+Tests de ``app.geocoding.polygon_index.PolygonIndex``.
+
+El índice debe devolver exactamente lo mismo que el recorrido lineal
+``for polygon, name in capa: polygon.contains(pt)`` al que reemplaza,
+incluido el desempate "gana el primero de la lista" cuando varios
+polígonos contienen el punto. Se valida con una capa sintética y con el
+basemap real de comunas distribuido en ``basemaps/``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+
+import pytest
+from shapely.geometry import Point, box, shape
+
+from app.geocoding.polygon_index import PolygonIndex
+
+_COMUNAS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "basemaps", "comunas_corregimientos.geojson"
+)
+
+
+def _lineal(capa, lon, lat):
+    pt = Point(lon, lat)
+    for polygon, name in capa:
+        if polygon.contains(pt):
+            return name
+    return None
+
+
+def _capa_sintetica():
+    """Grilla 4x4 de celdas de 1°, más un polígono grande solapado al final."""
+    capa = [(box(x, y, x + 1, y + 1), f"C{x}{y}") for x in range(4) for y in range(4)]
+    capa.append((box(0.5, 0.5, 2.5, 2.5), "SOLAPADO"))
+    return capa
+
+
+def test_coincide_con_recorrido_lineal_en_capa_sintetica():
+    capa = _capa_sintetica()
+    idx = PolygonIndex(capa)
+    rng = random.Random(1)
+    for _ in range(500):
+        lon, lat = rng.uniform(-0.5, 4.5), rng.uniform(-0.5, 4.5)
+        assert idx.nombre_en(lon, lat) == _lineal(capa, lon, lat)
+
+
+def test_solapamiento_gana_el_primero_de_la_lista():
+    idx = PolygonIndex(_capa_sintetica())
+    # (1.5, 1.5) cae en C11 y en SOLAPADO; C11 está antes en la capa.
+    assert idx.nombre_en(1.5, 1.5) == "C11"
+    polygon, nombre = idx.polygon_en(1.5, 1.5)
+    assert nombre == "C11"
+    assert polygon.equals(box(1, 1, 2, 2))
+
+
+def test_borde_no_cuenta_como_contenido():
+    """``contains`` excluye el borde: mismo comportamiento que el lineal."""
+    capa = [(box(0, 0, 1, 1), "A")]
+    idx = PolygonIndex(capa)
+    assert idx.nombre_en(1.0, 0.5) is None
+    assert idx.contenedor(0.5, 0.5) == 0
+
+
+def test_capa_vacia():
+    idx = PolygonIndex([])
+    assert len(idx) == 0
+    assert idx.nombre_en(-76.53, 3.45) is None
+    assert idx.polygon_en(-76.53, 3.45) == (None, None)
+
+
+@pytest.mark.skipif(not os.path.exists(_COMUNAS_PATH), reason="basemap de comunas no disponible")
+def test_coincide_con_recorrido_lineal_en_comunas_reales():
+    with open(_COMUNAS_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    capa = [
+        (shape(feat["geometry"]), feat["properties"].get("comuna_corregimiento"))
+        for feat in data["features"]
+    ]
+    idx = PolygonIndex(capa)
+    rng = random.Random(7)
+    for _ in range(300):
+        lon, lat = rng.uniform(-76.75, -76.20), rng.uniform(3.10, 3.80)
+        assert idx.nombre_en(lon, lat) == _lineal(capa, lon, lat)
+
+
+def test_contenedores_vectorizado_coincide_con_puntual():
+    capa = _capa_sintetica()
+    idx = PolygonIndex(capa)
+    rng = random.Random(3)
+    lons = [rng.uniform(-0.5, 4.5) for _ in range(400)]
+    lats = [rng.uniform(-0.5, 4.5) for _ in range(400)]
+    esperado = [idx.contenedor(lon, lat) for lon, lat in zip(lons, lats)]
+    obtenido = idx.contenedores(lons, lats)
+    assert [None if i < 0 else int(i) for i in obtenido] == esperado
+    assert idx.nombres_en(lons, lats) == [_lineal(capa, lon, lat) for lon, lat in zip(lons, lats)]
+
+
+def test_contenedores_capa_vacia_y_entrada_vacia():
+    assert list(PolygonIndex([]).contenedores([1.0], [1.0])) == [-1]
+    assert len(PolygonIndex(_capa_sintetica()).contenedores([], [])) == 0
@@ -0,0 +1,140 @@
+"""
+Tests de la grilla raster de barrios/comunas (``app.geocoding.raster_grid``).
+
+La grilla solo puede acelerar: para cualquier punto, ``PolygonIndex`` con
+grilla enganchada debe devolver lo mismo que el camino geométrico exacto.
+Se valida con polígonos sintéticos irregulares (con huecos y solapados),
+con el basemap real de comunas a resolución gruesa, y el ciclo
+guardar → activar (incluido el rechazo de grillas desactualizadas).
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+from shapely.geometry import Point, Polygon, box, shape
+
+from app.geocoding import raster_grid
+from app.geocoding.basemap_cache import hash_archivo
+from app.geocoding.polygon_index import PolygonIndex
+
+_COMUNAS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "basemaps", "comunas_corregimientos.geojson"
+)
+_BBOX = {"lon_min": 0.0, "lon_max": 1.0, "lat_min": 0.0, "lat_max": 1.0}
+
+
+def _capa_sintetica():
+    dona = Point(0.3, 0.3).buffer(0.2).difference(Point(0.3, 0.3).buffer(0.07))
+    triangulo = Polygon([(0.5, 0.1), (0.95, 0.2), (0.6, 0.9)])
+    return [
+        (dona, "DONA"),
+        (triangulo, "TRIANGULO"),
+        (box(0.4, 0.4, 0.7, 0.7), "CAJA_SOLAPADA"),
+        (Point(0.2, 0.8).buffer(0.15), "CIRCULO"),
+    ]
+
+
+def _exacto(capa):
+    return PolygonIndex(capa)
+
+
+def _con_grilla(capa, celda_m):
+    index = PolygonIndex(capa)
+    grid = raster_grid.RasterGrid.construir({"capa": index}, _BBOX, celda_m)
+    index.raster = grid.capa("capa")
+    return index, grid
+
+
+def test_grilla_coincide_con_camino_exacto():
+    capa = _capa_sintetica()
+    exacto = _exacto(capa)
+    acelerado, grid = _con_grilla(capa, celda_m=1500)
+    valores = grid.valores[0]
+    assert (valores >= 0).any() and (valores == raster_grid.SIN_POLIGONO).any()
+    assert (valores == raster_grid.BORDE).any()
+
+    rng = random.Random(11)
+    for _ in range(3000):
+        lon, lat = rng.uniform(-0.05, 1.05), rng.uniform(-0.05, 1.05)
+        assert acelerado.contenedor(lon, lat) == exacto.contenedor(lon, lat)
+
+
+def test_grilla_vectorizada_coincide_con_camino_exacto():
+    capa = _capa_sintetica()
+    exacto = _exacto(capa)
+    acelerado, _ = _con_grilla(capa, celda_m=1500)
+    rng = np.random.default_rng(5)
+    lons = rng.uniform(-0.05, 1.05, 5000)
+    lats = rng.uniform(-0.05, 1.05, 5000)
+    assert np.array_equal(acelerado.contenedores(lons, lats), exacto.contenedores(lons, lats))
+
+
+def test_celdas_interiores_no_tocan_bordes():
+    """Ninguna celda no-BORDE puede intersectar el borde de un polígono."""
+    capa = _capa_sintetica()
+    _, grid = _con_grilla(capa, celda_m=2500)
+    m = grid.meta
+    bordes = [g.boundary for g, _ in capa]
+    valores = grid.valores[0]
+    for iy in range(m["ny"]):
+        for ix in range(m["nx"]):
+            if valores[iy, ix] == raster_grid.BORDE:
+                continue
+            celda = box(
+                _BBOX["lon_min"] + ix * m["dlon"], _BBOX["lat_min"] + iy * m["dlat"],
+                _BBOX["lon_min"] + (ix + 1) * m["dlon"], _BBOX["lat_min"] + (iy + 1) * m["dlat"],
+            )
+            assert not any(celda.intersects(b) for b in bordes)
+
+
+def test_guardar_y_activar_valida_hash(tmp_path):
+    capa = _capa_sintetica()
+    geojson = tmp_path / "capa.geojson"
+    geojson.write_text(json.dumps({"type": "FeatureCollection", "features": []}), encoding="utf-8")
+    index = PolygonIndex(capa)
+    grid = raster_grid.RasterGrid.construir(
+        {"capa": index}, _BBOX, 1500, fuentes={"capa": hash_archivo(str(geojson))}
+    )
+    ruta = str(tmp_path / "grid.npy")
+    grid.guardar(ruta)
+
+    destino = PolygonIndex(capa)
+    cargada = raster_grid.activar(ruta, {"capa": (destino, str(geojson))})
+    assert cargada is not None and destino.raster is not None
+    assert isinstance(cargada.valores, np.memmap)
+    assert np.array_equal(destino.raster.valores, grid.valores[0])
+
+    # GeoJSON modificado → la grilla ya no corresponde y no se engancha
+    geojson.write_text(json.dumps({"type": "FeatureCollection", "features": [None]}), encoding="utf-8")
+    otro = PolygonIndex(capa)
+    raster_grid.activar(ruta, {"capa": (otro, str(geojson))})
+    assert otro.raster is None
+
+
+def test_activar_sin_archivo_no_hace_nada(tmp_path):
+    index = PolygonIndex(_capa_sintetica())
+    assert raster_grid.activar(str(tmp_path / "no_existe.npy"), {"capa": (index, "x")}) is None
+    assert index.raster is None
+
+
+@pytest.mark.skipif(not os.path.exists(_COMUNAS_PATH), reason="basemap de comunas no disponible")
+def test_grilla_comunas_reales_coincide_con_exacto():
+    with open(_COMUNAS_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    capa = [(shape(ft["geometry"]), ft["properties"].get("comuna_corregimiento")) for ft in data["features"]]
+    bbox = {"lon_min": -76.75, "lon_max": -76.20, "lat_min": 3.10, "lat_max": 3.80}
+    exacto = PolygonIndex(capa)
+    acelerado = PolygonIndex(capa)
+    grid = raster_grid.RasterGrid.construir({"comunas": acelerado}, bbox, 400)
+    acelerado.raster = grid.capa("comunas")
+
+    rng = np.random.default_rng(2)
+    lons = rng.uniform(bbox["lon_min"], bbox["lon_max"], 4000)
+    lats = rng.uniform(bbox["lat_min"], bbox["lat_max"], 4000)
+    assert acelerado.nombres_en(lons, lats) == exacto.nombres_en(lons, lats)
+    for lon, lat in zip(lons[:300], lats[:300]):
+        assert acelerado.nombre_en(lon, lat) == exacto.nombre_en(lon, lat)
@@ -0,0 +1,239 @@
+"""
+Tests del registro de basemaps con recarga en caliente
+(``app.geocoding.registro_basemaps``): recarga solo cuando cambia el
+contenido, reemplazo atómico mientras hay lectores, la versión anterior
+se mantiene si la construcción falla, invalidación de cachés derivadas y
+publicación de barrios/comunas/cruces en los módulos que los consumen.
+
+Los GeoJSON son sintéticos y se escriben en ``tmp_path``; la caché binaria
+de basemaps apunta también a ``tmp_path``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+
+import pytest
+from shapely.geometry import Point, box, mapping
+
+from app.geocoding import registro_basemaps
+from app.geocoding.polygon_index import PolygonIndex
+from app.geocoding.registro_basemaps import BasemapRegistry
+
+
+def _escribir_poligonos(ruta, nombres: list[str], propiedad: str = "barrio_vereda") -> None:
+    features = [
+        {
+            "type": "Feature",
+            "properties": {propiedad: nombre},
+            "geometry": mapping(box(-76.60 + 0.01 * i, 3.40, -76.59 + 0.01 * i, 3.41)),
+        }
+        for i, nombre in enumerate(nombres)
+    ]
+    ruta.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+    # mtime distinto aunque el sistema de archivos tenga resolución gruesa
+    st = os.stat(ruta)
+    os.utime(ruta, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def _construir(ruta) -> PolygonIndex:
+    return registro_basemaps.cargar_capa_poligonos(ruta, "barrio_vereda")
+
+
+@pytest.fixture(autouse=True)
+def _cache_en_tmp(monkeypatch, tmp_path):
+    monkeypatch.setenv("BASEMAP_CACHE_DIR", str(tmp_path / "cache"))
+
+
+@pytest.fixture()
+def ruta(tmp_path):
+    ruta = tmp_path / "barrios.geojson"
+    _escribir_poligonos(ruta, ["Centro", "San Antonio"])
+    return ruta
+
+
+def test_registrar_construye_y_reporta(ruta):
+    registro = BasemapRegistry(s3_prefijo="")
+    index = registro.registrar("barrios", str(ruta), _construir)
+    assert index.names == ["Centro", "San Antonio"]
+    assert registro.get("barrios") is index
+
+    (estado,) = registro.estado()
+    assert estado["elementos"] == 2
+    assert estado["segundos_construccion"] >= 0
+    assert estado["memoria_bytes"] > 0
+    assert len(estado["sha256"]) == 64
+    assert estado["recargas"] == 0 and estado["ultimo_error"] is None
+
+
+def test_recarga_solo_si_cambia_el_contenido(ruta):
+    publicadas = []
+    registro = BasemapRegistry(s3_prefijo="")
+    original = registro.registrar("barrios", str(ruta), _construir, publicar=publicadas.append)
+
+    assert registro.revisar() == []
+    # Mismo contenido con otro mtime: no se reconstruye
+    _escribir_poligonos(ruta, ["Centro", "San Antonio"])
+    assert registro.recargar("barrios") is False
+    assert registro.get("barrios") is original
+
+    _escribir_poligonos(ruta, ["Centro", "San Antonio", "Granada"])
+    assert registro.revisar() == ["barrios"]
+    nueva = registro.get("barrios")
+    assert nueva is not original and nueva.names[-1] == "Granada"
+    assert publicadas == [nueva]
+    assert registro.estado()[0]["recargas"] == 1
+
+
+def test_fallo_de_construccion_mantiene_la_version_anterior(ruta):
+    registro = BasemapRegistry(s3_prefijo="")
+    original = registro.registrar("barrios", str(ruta), _construir)
+    ruta.write_text("{no es json", encoding="utf-8")
+    os.utime(ruta, ns=(0, os.stat(ruta).st_mtime_ns + 10**9))
+
+    assert registro.recargar("barrios") is False
+    assert registro.get("barrios") is original
+    assert registro.estado()[0]["ultimo_error"]
+
+
+def test_primera_carga_fallida_registra_vacio_y_reintenta(tmp_path):
+    ruta = tmp_path / "no_existe.geojson"
+    registro = BasemapRegistry(s3_prefijo="")
+    vacia = registro.registrar("barrios", str(ruta), _construir, vacio=lambda: PolygonIndex([]))
+    assert len(vacia) == 0 and registro.estado()[0]["ultimo_error"]
+    assert registro.recargar("barrios") is False  # sigue sin archivo
+
+    _escribir_poligonos(ruta, ["Centro"])
+    assert registro.recargar("barrios") is True
+    assert registro.get("barrios").names == ["Centro"]
+
+
+def test_lectores_nunca_ven_una_capa_a_medio_construir(ruta):
+    """Mientras se recarga, cada lectura devuelve una versión completa (la vieja o la nueva)."""
+    registro = BasemapRegistry(s3_prefijo="")
+    registro.registrar("barrios", str(ruta), _construir)
+    versiones = [["Centro", "San Antonio"], ["Norte", "Sur", "Oriente"]]
+    detener = threading.Event()
+    vistas = set()
+
+    def _leer():
+        while not detener.is_set():
+            index = registro.get("barrios")
+            vistas.add(tuple(index.names))
+            assert len(index.geoms) == len(index.names)
+
+    lector = threading.Thread(target=_leer)
+    lector.start()
+    try:
+        for i in range(6):
+            _escribir_poligonos(ruta, versiones[(i + 1) % 2])
+            assert registro.recargar("barrios") is True
+    finally:
+        detener.set()
+        lector.join()
+    assert vistas <= {tuple(v) for v in versiones}
+
+
+def test_recarga_invalida_cachés_dependientes(ruta, monkeypatch):
+    from app.geocoding import contornos, reverse
+
+    llamadas = []
+    monkeypatch.setattr(reverse._lookup_local_cached, "cache_clear", lambda: llamadas.append("reverse"))
+    monkeypatch.setattr(contornos, "limpiar", lambda: llamadas.append("contornos"))
+    registro = BasemapRegistry(s3_prefijo="")
+    registro.registrar("barrios", str(ruta), _construir)
+    registro.al_recargar("barrios", lambda nombre: llamadas.append(f"extra:{nombre}"))
+
+    _escribir_poligonos(ruta, ["Otra"])
+    assert registro.recargar("barrios") is True
+    assert llamadas[:2] == ["reverse", "contornos"]
+    assert llamadas[-1] == "extra:barrios"
+
+
+def test_sincroniza_desde_s3_por_etag(ruta, monkeypatch):
+    """Con prefijo S3, un ETag nuevo descarga el objeto sobre el GeoJSON local y recarga."""
+    nuevo = ruta.parent / "remoto.geojson"
+    _escribir_poligonos(nuevo, ["Remoto"])
+    contenido = nuevo.read_bytes()
+    descargas = []
+
+    class _S3:
+        etag = '"v1"'
+
+        def head_object(self, Bucket, Key):
+            return {"ETag": self.etag}
+
+        def download_file(self, bucket, key, destino):
+            descargas.append((bucket, key))
+            with open(destino, "wb") as f:
+                f.write(contenido)
+
+    s3 = _S3()
+    import app.utils.s3_storage as s3_storage
+
+    monkeypatch.setattr(s3_storage, "get_s3_client", lambda: s3)
+    registro = BasemapRegistry(s3_prefijo="basemaps/", s3_bucket="bucket-prueba")
+    registro.registrar("barrios", str(ruta), _construir)
+    assert registro.estado()[0]["s3_key"] == "basemaps/barrios.geojson"
+
+    assert registro.recargar("barrios") is True
+    assert registro.get("barrios").names == ["Remoto"]
+    assert descargas == [("bucket-prueba", "basemaps/barrios.geojson")]
+
+    # Mismo ETag: ni descarga ni recarga
+    assert registro.recargar("barrios") is False
+    assert len(descargas) == 1
+
+
+def test_estimar_bytes_cuenta_objetos_compartidos_una_vez():
+    poligono = box(0, 0, 1, 1)
+    uno = registro_basemaps.estimar_bytes([poligono])
+    assert registro_basemaps.estimar_bytes([poligono, poligono]) < 2 * uno
+    assert registro_basemaps.estimar_bytes(PolygonIndex([(poligono, "A")])) > uno
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Publicación en los módulos de geocoding
+# ──────────────────────────────────────────────────────────────────────────
+
+def test_publicar_barrios_actualiza_indices_y_nombres(monkeypatch):
+    from app.geocoding import spatial_index as si
+    from app.routes import artefacto_360_routes as art
+
+    for nombre in ("_BARRIOS_SPATIAL", "_BARRIOS_POLYGONS", "_NOMBRES"):
+        monkeypatch.setattr(art, nombre, getattr(art, nombre))
+    monkeypatch.setattr(si, "_BARRIOS_SPATIAL", si._BARRIOS_SPATIAL)
+
+    index = PolygonIndex([(box(-76.55, 3.42, -76.54, 3.43), "Barrio Recargado")])
+    art._publicar_capa_poligonos("barrios", index)
+    try:
+        assert art._BARRIOS_SPATIAL is index and si._BARRIOS_SPATIAL is index
+        assert art.geolocate_point(-76.545, 3.425)["barrio_vereda"] == "Barrio Recargado"
+        assert art._extraer_barrios_mencionados("Cl 5 barrio recargado")[0][0] == "Barrio Recargado"
+    finally:
+        monkeypatch.undo()
+        art._construir_indices_nombres()
+
+
+def test_publicar_cruces_reemplaza_la_capa(monkeypatch):
+    from app.geocoding import spatial_index as si
+
+    monkeypatch.setattr(si, "_CRUCES", si._CRUCES)
+    capa = si.construir_cruces([Point(-76.53, 3.43)], ["CL 5 con KR 38"])
+    si._publicar_cruces(capa)
+    assert si.cruce_mas_cercano(-76.53, 3.43)["nombre"] == "CL 5 con KR 38"
+    assert si.via_inferida_de_cruces(-76.53, 3.43)["nombre"] == "Calle 5"
+
+
+def test_endpoint_estado():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.routes.geocoding_routes import router
+
+    app = FastAPI()
+    app.include_router(router)
+    body = TestClient(app).get("/api/basemaps/estado").json()
+    assert body["success"] is True
+    assert {c["nombre"] for c in body["capas"]} >= {"barrios", "comunas", "cruces"}
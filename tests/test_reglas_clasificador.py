@@ -0,0 +1,93 @@
+"""
+Tests de paridad del matcher léxico precompilado (``rules.aplicar_reglas``
+con el autómata Aho-Corasick y ``rules.normalizar``) contra la
+implementación anterior, que se conserva como referencia en
+``scripts/bench_reglas_clasificador.py``.
+
+La paridad es exacta: mismas filas, ``score``, ``hits`` (en el orden de
+``keywords`` de cada fila) y orden de candidatos, también con textos
+largos enriquecidos con transcripciones.
+"""
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.classification import rules
+from app.classification.taxonomia import TAXONOMIA
+from app.utils.aho_corasick import AhoCorasick
+from scripts import bench_reglas_clasificador as bench
+
+
+@pytest.mark.parametrize(
+    "texto",
+    [
+        "",
+        "   ",
+        "Árbol  CAÍDO\ten la\nvía",
+        "señal de tránsito dañada",
+        "İstanbul Ǆ ﬁn ½ Ω ç ñ ü",
+        " espacio raro　y\x1cseparadores\x1f ",
+        "é combinada suelta ́ y doble ̣̂",
+        "Emoji 🌳 árbol 🚧",
+    ],
+)
+def test_normalizar_igual_a_la_anterior(texto):
+    assert rules.normalizar(texto) == bench.normalizar_anterior(texto)
+
+
+def test_normalizar_igual_a_la_anterior_en_texto_aleatorio():
+    rng = random.Random(11)
+    alfabeto = "aáeéiíoóuúüñÑ ÁÉ\t\n.,¿?-" + "".join(chr(c) for c in range(0x300, 0x320)) + "ǅǈ½ﬀ "
+    for _ in range(300):
+        texto = "".join(rng.choice(alfabeto) for _ in range(rng.randint(0, 60)))
+        assert rules.normalizar(texto) == bench.normalizar_anterior(texto)
+
+
+@pytest.mark.parametrize("palabras", [5, 60, 1500])
+def test_aplicar_reglas_igual_al_recorrido_lineal(palabras):
+    for texto in bench.generar_textos(40, palabras, seed=palabras):
+        assert rules.aplicar_reglas(texto) == bench.aplicar_reglas_lineal(texto)
+
+
+def test_todas_las_keywords_se_detectan_solas():
+    for fila in TAXONOMIA:
+        for kw in fila["keywords"]:
+            assert rules.aplicar_reglas(kw) == bench.aplicar_reglas_lineal(kw)
+            assert any(c["fila"] is fila for c in rules.aplicar_reglas(kw))
+
+
+def test_hits_en_orden_de_keywords_y_empates_en_orden_de_taxonomia():
+    taxonomia = [
+        {"keywords": ["poste", "cables", "poste dañado"]},
+        {"keywords": ["cables"]},
+        {"keywords": ["Poste Dañado", ""]},
+    ]
+    automata, destinos = rules.compilar_keywords(taxonomia)
+    # "poste dañado" normaliza a lo mismo en dos filas: un patrón, dos destinos
+    assert len(automata) == 3
+    assert sorted(d for ds in destinos for d in ds) == [(0, 0), (0, 1), (0, 2), (1, 0), (2, 0)]
+
+    texto = rules.normalizar("Los cables del POSTE DAÑADO")
+    por_fila = {}
+    for pid in automata.presentes(texto):
+        for i, j in destinos[pid]:
+            por_fila.setdefault(i, []).append(j)
+    assert {i: sorted(js) for i, js in por_fila.items()} == {0: [0, 1, 2], 1: [0], 2: [0]}
+
+
+def test_transiciones_completas_equivalen_al_automata_con_fallos():
+    rng = random.Random(5)
+    patrones = ["he", "she", "his", "hers", "a", "ab", "bab", "bc", "c", "aa"]
+    normal = AhoCorasick(patrones)
+    completo = AhoCorasick(patrones, transiciones_completas=True)
+    for _ in range(300):
+        texto = "".join(rng.choice("abcehirsx ") for _ in range(rng.randint(0, 40)))
+        esperados = sorted({i for i, p in enumerate(patrones) if p in texto})
+        assert completo.presentes(texto) == normal.presentes(texto) == esperados
+
+
+def test_bench_main_verifica_paridad(capsys):
+    assert bench.main(["--textos", "5", "--palabras", "40"]) == 0
+    assert "speedup" in capsys.readouterr().out